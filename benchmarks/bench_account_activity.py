@@ -0,0 +1,118 @@
+"""
+benchmarks/bench_account_activity.py
+
+The AccountActivity feed (model/activity.py) vs. the per-account
+"activity": [] list of dicts sketched in model/pseudo_account.py: recording
+events one at a time and in batches, the "last 50 events" read, paging deep
+into an account's history, and the memory each holds. Run from the project
+root:
+
+    python benchmarks/bench_account_activity.py                 # 20k accounts x 100 events
+    python benchmarks/bench_account_activity.py 100000 50
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from banking_system.db.ledger import DEPOSIT, WITHDRAW
+from banking_system.model.activity import AccountActivity
+from banking_system.model.money import Money
+
+READS = 100_000
+BATCH = 10_000
+MEMORY_ACCOUNTS = 2_000
+
+
+def events(accounts, per_account, seed=5):
+    """Returns (cust_ids, codes, amounts, balances) for accounts x per_account events in random order."""
+    rng = np.random.default_rng(seed)
+    owners = rng.permutation(np.repeat(np.arange(accounts), per_account))
+    cust_ids = (1001 + owners).astype(str).tolist()
+    codes = np.where(rng.random(len(owners)) < 0.6, DEPOSIT, WITHDRAW).astype(np.int8)
+    amounts = rng.integers(100, 50_000, len(owners))
+    return cust_ids, codes, amounts, amounts * 3
+
+
+def list_feed(cust_ids, codes, amounts, balances):
+    """The pseudo_account baseline: every event appended as a dict to the account's list."""
+    feed = {}
+    now = time.time()
+    for cust_id, code, amount, balance in zip(cust_ids, codes.tolist(), amounts.tolist(), balances.tolist()):
+        feed.setdefault(cust_id, []).append({
+            'ts': now, 'kind': 'deposit' if code == DEPOSIT else 'withdraw', 'amount': Money(amount), 'balance': Money(balance),
+        })
+    return feed
+
+
+def single_feed(cust_ids, codes, amounts, balances):
+    feed = AccountActivity(capacity=50)
+    for cust_id, code, amount, balance in zip(cust_ids, codes.tolist(), amounts.tolist(), balances.tolist()):
+        feed.record(cust_id, 'deposit' if code == DEPOSIT else 'withdraw', Money(amount), Money(balance))
+    # Count the background compaction the recording set off.
+    feed.compact()
+    return feed
+
+
+def batch_feed(cust_ids, codes, amounts, balances):
+    feed = AccountActivity(capacity=50)
+    for start in range(0, len(cust_ids), BATCH):
+        stop = start + BATCH
+        feed.record_many(cust_ids[start:stop], codes[start:stop], amounts[start:stop], balances[start:stop])
+    feed.compact()
+    return feed
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def allocated(function, *args):
+    """Returns the bytes still allocated by what function(*args) returns."""
+    tracemalloc.start()
+    result = function(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(accounts, per_account):
+    columns = events(accounts, per_account)
+    total = len(columns[0])
+    print(f'{accounts:,} accounts x {per_account} events = {total:,} events')
+
+    seconds, lists = timed(list_feed, *columns)
+    print(f'{"list of dicts, append":34} {total / seconds:12,.0f} events/s')
+    seconds, feed = timed(single_feed, *columns)
+    print(f'{"AccountActivity.record":34} {total / seconds:12,.0f} events/s')
+    seconds, feed = timed(batch_feed, *columns)
+    print(f'{"AccountActivity.record_many":34} {total / seconds:12,.0f} events/s   {feed.stats()}')
+
+    readers = [str(1001 + random.randrange(accounts)) for _ in range(READS)]
+    seconds, _ = timed(lambda: [lists[cust_id][:-51:-1] for cust_id in readers])
+    print(f'{"list of dicts, last 50":34} {READS / seconds:12,.0f} reads/s')
+    seconds, _ = timed(lambda: [feed.recent(cust_id) for cust_id in readers])
+    print(f'{"AccountActivity.recent(50)":34} {READS / seconds:12,.0f} reads/s')
+    seconds, _ = timed(lambda: [feed.recent(cust_id) for cust_id in readers[:100] * (READS // 100)])
+    print(f'{"recent(50), 100 busy accounts":34} {READS / seconds:12,.0f} reads/s')
+    seconds, _ = timed(lambda: [[event.to_dict() for event in feed.recent(cust_id, 20)] for cust_id in readers])
+    print(f'{"recent(20) as JSON-ready dicts":34} {READS / seconds:12,.0f} reads/s')
+    cursor = max(per_account - 60, 1)
+    seconds, _ = timed(lambda: [feed.page(cust_id, 20, cursor) for cust_id in readers[:READS // 10]])
+    print(f'{"cold page of 20":34} {READS // 10 / seconds:12,.0f} reads/s')
+
+    sample = events(MEMORY_ACCOUNTS, per_account, seed=7)
+    for label, build in (('list of dicts', list_feed), ('AccountActivity', batch_feed)):
+        size = allocated(build, *sample)
+        print(f'{label + " memory":34} {size / (MEMORY_ACCOUNTS * per_account):12,.0f} bytes/event')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [20_000, 100]))
@@ -0,0 +1,62 @@
+"""
+benchmarks/bench_acct_num.py
+
+Account number allocation throughput against a large set of existing accounts:
+
+- legacy: 12 randint calls plus a generator scan over every record (1 call only)
+- allocate: single draw checked against the acct_num index
+- allocate_many: bulk allocation of a block of numbers
+
+Run from the project root (10M existing accounts needs ~1.5 GB of RAM):
+
+    python benchmarks/bench_acct_num.py
+    python benchmarks/bench_acct_num.py 100000 1000000
+"""
+
+import random
+import sys
+import time
+
+from banking_system.db.account_numbers import AccountNumberAllocator
+
+DEFAULT_SIZES = [100_000, 1_000_000, 10_000_000]
+BULK = 100_000
+
+
+def legacy_create_account(store):
+    """The pre-index create_account path."""
+    acct_num = ''.join(str(random.randint(0, 9)) for _ in range(12))
+    if acct_num in (data['acct_num'] for data in store.values()):
+        return legacy_create_account(store)
+    return acct_num
+
+
+def main(sizes):
+    allocator = AccountNumberAllocator()
+    print(f"{'existing':>10} {'legacy us/acct':>15} {'allocate us/acct':>17} {'allocate_many/s':>16}")
+    for size in sizes:
+        taken = set(allocator.allocate_many(size, ()))
+
+        if size <= 1_000_000:
+            store = {str(i): {'acct_num': acct_num} for i, acct_num in enumerate(taken)}
+            start = time.perf_counter()
+            legacy_create_account(store)
+            legacy = f'{(time.perf_counter() - start) * 1e6:15.1f}'
+            del store
+        else:
+            legacy = f"{'skipped':>15}"
+
+        start = time.perf_counter()
+        for _ in range(BULK):
+            allocator.allocate(taken)
+        single = (time.perf_counter() - start) / BULK * 1e6
+
+        start = time.perf_counter()
+        allocator.allocate_many(BULK, taken)
+        bulk = BULK / (time.perf_counter() - start)
+
+        print(f'{size:>10} {legacy} {single:>17.2f} {bulk:>16,.0f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
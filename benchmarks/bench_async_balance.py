@@ -0,0 +1,65 @@
+"""
+benchmarks/bench_async_balance.py
+
+Concurrent balance checks against a file-backed SQLite store: a synchronous
+balance() loop, then the same number of requests issued at once through
+AsyncAccountTransactions, with and without request coalescing. Requests pick
+from a small set of hot accounts, as a gateway sees during a payday spike. Run
+from the project root:
+
+    python benchmarks/bench_async_balance.py
+    python benchmarks/bench_async_balance.py 50000 100
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from banking_system.db.async_storage import AsyncStore
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.model.async_transactions import AsyncAccountTransactions
+from banking_system.model.transactions import AccountTransactions
+
+
+def run_sync(store, cust_ids):
+    start = time.perf_counter()
+    for cust_id in cust_ids:
+        AccountTransactions(cust_id, store=store).balance()
+    return time.perf_counter() - start
+
+
+def run_async(store, cust_ids, coalesce):
+    async def requests():
+        adapter = AsyncStore(store, coalesce=coalesce)
+        start = time.perf_counter()
+        await asyncio.gather(*(AsyncAccountTransactions(cust_id, store=adapter).balance() for cust_id in cust_ids))
+        return time.perf_counter() - start, adapter.stats()
+
+    return asyncio.run(requests())
+
+
+def main(requests, accounts):
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteStore(os.path.join(directory, 'bank.db'), pool_size=8)
+        for index in range(accounts):
+            store.create_ledger(str(index), index)
+        rng = random.Random(7)
+        cust_ids = [str(rng.randrange(accounts)) for _ in range(requests)]
+
+        print(f'requests: {requests:,}  hot accounts: {accounts:,}')
+        elapsed = run_sync(store, cust_ids)
+        print(f'sync balance() loop      {elapsed:8.2f} s  {requests / elapsed:>10,.0f} req/s')
+        for coalesce in (False, True):
+            elapsed, stats = run_async(store, cust_ids, coalesce)
+            label = 'async, coalesced' if coalesce else 'async, no coalescing'
+            print(f'{label:<24} {elapsed:8.2f} s  {requests / elapsed:>10,.0f} req/s'
+                  f'  backend reads: {stats["reads"] - stats["coalesced"]:,}')
+        store.close()
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [20_000, 100]))
@@ -0,0 +1,58 @@
+"""
+benchmarks/bench_batch_posting.py
+
+Posting a payroll-style file of credits: looping AccountTransactions(cust_id).deposit
+vs. one AccountTransactions.apply_batch call, on the in-memory store.
+
+stdout is redirected to /dev/null during the loop so the print calls cost what they
+would in a service writing to a log pipe. Run from the project root:
+
+    python benchmarks/bench_batch_posting.py
+    python benchmarks/bench_batch_posting.py 500000 50000
+"""
+
+import contextlib
+import os
+import random
+import sys
+import time
+
+from banking_system.db.storage import MemoryStore
+from banking_system.model.transactions import AccountTransactions
+
+
+def build_store(accounts):
+    """Creates a store with `accounts` empty ledgers."""
+    store = MemoryStore({}, {})
+    for cust_id in range(accounts):
+        store.create_ledger(str(cust_id))
+    return store
+
+
+def main(records, accounts):
+    payroll = [(str(random.randrange(accounts)), 'deposit', random.randint(100, 500_000) / 100) for _ in range(records)]
+
+    store = build_store(accounts)
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for cust_id, _, amount in payroll:
+            AccountTransactions(cust_id, store=store).deposit(amount)
+    loop = time.perf_counter() - start
+
+    batch_store = build_store(accounts)
+    start = time.perf_counter()
+    result = AccountTransactions.apply_batch(payroll, store=batch_store)
+    batch = time.perf_counter() - start
+
+    assert result.applied == records
+    assert all(store.get_balance(cust_id) == batch_store.get_balance(cust_id) for cust_id in map(str, range(accounts)))
+
+    print(f'records: {records:,}  accounts: {accounts:,}')
+    print(f'loop of deposit(): {loop:8.2f} s  {records / loop:>12,.0f} records/s')
+    print(f'apply_batch():     {batch:8.2f} s  {records / batch:>12,.0f} records/s')
+    print(f'speedup:           {loop / batch:8.1f}x')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [500_000, 50_000]))
@@ -0,0 +1,100 @@
+"""
+benchmarks/bench_concurrent_posting.py
+
+Stress test for concurrent postings: a thread pool of posting workers runs random
+deposits and withdrawals against the same store, for 1, 2, 4, and 8 workers.
+After each run the final balance of every account is checked against the sum of
+what the workers posted, so any lost update fails the run.
+
+With the in-memory store the work is CPU-bound Python, so the GIL caps scaling;
+the run also compares striped locks with a single lock (one stripe) to show the
+lock itself is not the bottleneck. With --sqlite the workers spend most of their
+time inside SQLite, where the GIL is released. Run from the project root:
+
+    python benchmarks/bench_concurrent_posting.py
+    python benchmarks/bench_concurrent_posting.py 4000 64 --sqlite
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from banking_system.db import storage
+from banking_system.db.locks import StripedLock
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+WORKER_COUNTS = (1, 2, 4, 8)
+
+
+def run(store, workers, operations, accounts):
+    """Runs `operations` postings split across `workers` threads; returns (seconds, lost updates)."""
+    cust_ids = [str(index) for index in range(accounts)]
+    for cust_id in cust_ids:
+        store.create_ledger(cust_id, 1_000)
+    posted = [dict.fromkeys(cust_ids, 0) for _ in range(workers)]
+
+    def worker(tally):
+        rng = random.Random()
+        for _ in range(operations // workers):
+            cust_id = rng.choice(cust_ids)
+            account = AccountTransactions(cust_id, store=store)
+            if rng.random() < 0.5:
+                account.deposit(1.00)
+                tally[cust_id] += 100
+            else:
+                account.withdraw(1.00)
+                tally[cust_id] -= 100
+
+    threads = [threading.Thread(target=worker, args=(tally,)) for tally in posted]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    lost = sum(
+        store.get_balance(cust_id) != Money(100_000 + sum(tally[cust_id] for tally in posted))
+        for cust_id in cust_ids
+    )
+    return elapsed, lost
+
+
+def report(label, make_store, operations, accounts):
+    print(label)
+    for workers in WORKER_COUNTS:
+        store = make_store()
+        elapsed, lost = run(store, workers, operations, accounts)
+        print(f'  {workers} workers: {operations / elapsed:>10,.0f} ops/s   lost updates: {lost}')
+        if hasattr(store, 'close'):
+            store.close()
+
+
+def main(operations, accounts, sqlite=False):
+    print(f'operations: {operations:,}  accounts: {accounts:,}')
+    if sqlite:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = iter(range(len(WORKER_COUNTS)))
+            report(
+                'SQLite store (WAL, pool of 8)',
+                lambda: SQLiteStore(os.path.join(directory, f'bank{next(paths)}.db'), pool_size=8),
+                operations, accounts,
+            )
+        return
+
+    report('memory store, striped locks', lambda: MemoryStore({}, {}), operations, accounts)
+    with mock.patch.object(storage, '_account_locks', StripedLock(stripes=1)):
+        report('memory store, single lock', lambda: MemoryStore({}, {}), operations, accounts)
+
+
+if __name__ == '__main__':
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [int(arg) for arg in sys.argv[1:] if not arg.startswith('--')]
+    main(*(args or [200_000, 64]), sqlite='--sqlite' in flags)
@@ -0,0 +1,66 @@
+"""
+benchmarks/bench_cust_id.py
+
+Compares customer ID allocation cost as the customer book grows:
+
+- legacy: scan every key of accounts_db for the max ID (the old create_cust_id path)
+- sequence: IdSequence built once per store, then O(1) per signup
+
+Run from the project root:
+
+    python benchmarks/bench_cust_id.py
+    python benchmarks/bench_cust_id.py 1000 10000 100000 1000000
+"""
+
+import sys
+import time
+
+from banking_system.db.sequence import IdSequence
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def build_store(size):
+    """Builds an accounts_db-shaped dict with size customers."""
+    return {str(1001 + i): {'first_name': f'first{i}', 'last_name': f'last{i}'} for i in range(size)}
+
+
+def legacy_next_id(store):
+    """The pre-sequence allocation: a full scan of the store per call."""
+    max_id = 1000
+    for cust_id in store.keys():
+        try:
+            cust_id_int = int(cust_id)
+            if cust_id_int > max_id:
+                max_id = cust_id_int
+        except (ValueError, TypeError):
+            continue
+    return max_id + 1
+
+
+def time_per_call(func, calls):
+    """Returns the mean wall time per call in microseconds."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(sizes):
+    print(f"{'customers':>10} {'legacy us/signup':>18} {'sequence us/signup':>20} {'startup build ms':>18}")
+    for size in sizes:
+        store = build_store(size)
+
+        legacy_calls = max(3, 200_000 // size)
+        legacy = time_per_call(lambda: legacy_next_id(store), legacy_calls)
+
+        start = time.perf_counter()
+        sequence = IdSequence.from_store(store)
+        build_ms = (time.perf_counter() - start) * 1e3
+        seq = time_per_call(sequence.next_id, 100_000)
+
+        print(f'{size:>10} {legacy:>18.2f} {seq:>20.3f} {build_ms:>18.1f}')
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
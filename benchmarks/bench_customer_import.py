@@ -0,0 +1,99 @@
+"""
+benchmarks/bench_customer_import.py
+
+Onboarding throughput: BankAccount.create_cust_id per row vs. the streaming
+bulk import (model/customer_import.py), both into a SQLiteStore.
+
+A CSV book of N customers (with about 1% duplicate names) is generated first.
+The per-row path is timed on a sample of it; the import runs over the whole
+file, reporting rows per second and the process's peak RSS after each tenth
+of the file, which stays flat because only one chunk is held at a time. Run
+from the project root:
+
+    python benchmarks/bench_customer_import.py             # 1M customers
+    python benchmarks/bench_customer_import.py 5000000     # the 5M target
+"""
+
+import csv
+import itertools
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.model.account import BankAccount
+from banking_system.model.customer_import import import_customers, read_rows
+
+SAMPLE = 5_000
+CITIES = ('miami', 'tampa', 'orlando', 'austin', 'boston', 'denver', 'seattle', 'chicago')
+
+
+def write_book(path, customers):
+    with open(path, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['first_name', 'last_name', 'address', 'city', 'state', 'zip', 'balance'])
+        for index in range(customers):
+            person = index - 1 if index % 100 == 99 else index  # every 100th row repeats a name
+            writer.writerow([
+                f'first{person % 10_000}', f'last{person // 10_000}', f'{index % 9999} Main St',
+                CITIES[index % len(CITIES)], 'FL', f'{10000 + index % 90000:05d}', f'{index % 5000}.{index % 100:02d}',
+            ])
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def per_row(directory, path):
+    """Times create_cust_id + create_ledger for the first SAMPLE rows."""
+    store = SQLiteStore(os.path.join(directory, 'per_row.db'))
+    start = time.perf_counter()
+    for _, row in itertools.islice(read_rows(path), SAMPLE):
+        cust_id = BankAccount(row['first_name'], row['last_name'], store=store).create_cust_id(
+            row['first_name'], row['last_name'], row['address'], row['city'], row['state'], row['zip'],
+        )
+        if cust_id is not None:
+            store.create_ledger(str(cust_id), row['balance'])
+    elapsed = time.perf_counter() - start
+    store.close()
+    return SAMPLE / elapsed
+
+
+def bulk(directory, path, customers):
+    store = SQLiteStore(os.path.join(directory, 'bulk.db'))
+    checkpoints = []
+    step = max(customers // 10, 1)
+    start = time.perf_counter()
+
+    def rows():
+        for count, item in enumerate(read_rows(path), 1):
+            yield item
+            if count % step == 0:
+                checkpoints.append((count, time.perf_counter() - start, peak_rss_mb()))
+
+    report = import_customers(rows(), store=store)
+    store.close()
+    return report, checkpoints
+
+
+def main(customers):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'book.csv')
+        write_book(path, customers)
+        print(f'book: {customers:,} rows, {os.path.getsize(path) / 2**20:.0f} MB')
+
+        rate = per_row(directory, path)
+        print(f'create_cust_id per row: {rate:10,.0f} rows/s -> {customers / rate / 60:6.1f} min for the book')
+
+        report, checkpoints = bulk(directory, path, customers)
+        print(f'bulk import:            {report.read / report.seconds:10,.0f} rows/s -> {report.seconds / 60:6.1f} min '
+              f'({report.imported:,} imported, {report.rejected:,} rejected: {report.reasons})')
+        for count, elapsed, rss in checkpoints:
+            print(f'  {count:>10,} rows  {elapsed:7.1f} s  peak RSS {rss:6.0f} MB')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [1_000_000]))
@@ -0,0 +1,78 @@
+"""
+benchmarks/bench_customer_memory.py
+
+Memory per customer: the original 7-key dict records vs. model.customer.Customer.
+
+Fields are built as fresh string objects, as they would be when parsed from a
+request or a file, so repeated cities and states are only shared when the
+record interns them. Memory is measured with tracemalloc and includes the
+accounts dict holding the records. Run from the project root:
+
+    python benchmarks/bench_customer_memory.py            # 1M customers
+    python benchmarks/bench_customer_memory.py 100000
+"""
+
+import sys
+import tracemalloc
+
+from banking_system.model.customer import Customer
+
+CITIES = 2_000
+STATES = ('FL', 'GA', 'TX', 'CA', 'NY', 'IL', 'WA', 'CO', 'MA', 'OH')
+
+
+def fields(index):
+    """Returns freshly built field values for customer index."""
+    return (
+        f'first{index % 5000}',
+        f'last{index // 5000}',
+        f'{index:012d}',
+        f'{index % 9999} Main St',
+        f'city{index % CITIES}',
+        ''.join(STATES[index % len(STATES)]),
+        f'{10000 + index % 90000:05d}',
+    )
+
+
+def build_dicts(customers):
+    """accounts_db as it was: cust_id -> dict record."""
+    accounts = {}
+    for index in range(customers):
+        first, last, acct_num, address, city, state, zip_code = fields(index)
+        accounts[str(1001 + index)] = {
+            'first_name': first, 'last_name': last, 'acct_num': acct_num,
+            'address': address, 'city': city, 'state': state, 'zip': zip_code,
+        }
+    return accounts
+
+
+def build_customers(customers):
+    """accounts_db now: cust_id -> Customer."""
+    accounts = {}
+    for index in range(customers):
+        accounts[str(1001 + index)] = Customer(*fields(index))
+    return accounts
+
+
+def measure(build, customers):
+    """Returns bytes allocated (and retained) by build(customers)."""
+    tracemalloc.start()
+    data = build(customers)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main(customers):
+    before = measure(build_dicts, customers)
+    after = measure(build_customers, customers)
+    print(f'{customers:,} customers')
+    print(f'dict records:     {before / 2**20:8.1f} MB  {before / customers:6.0f} B/customer')
+    print(f'Customer records: {after / 2**20:8.1f} MB  {after / customers:6.0f} B/customer')
+    print(f'saved:            {(before - after) / 2**20:8.1f} MB  ({1 - after / before:.0%})')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [1_000_000]))
@@ -0,0 +1,54 @@
+"""
+benchmarks/bench_dedup_cache.py
+
+Cost of idempotency keys on deposits: unkeyed deposit() against keyed deposits,
+first posts and retries, then the memory held by a full DedupCache. Run from
+the project root:
+
+    python benchmarks/bench_dedup_cache.py
+    python benchmarks/bench_dedup_cache.py 100000 1000000
+"""
+
+import sys
+import time
+import tracemalloc
+
+from banking_system.db.dedup import DedupCache, PostingRecord
+from banking_system.db.storage import MemoryStore
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+
+def time_deposits(account, count, keyed):
+    start = time.perf_counter()
+    for index in range(count):
+        account.deposit(1.00, key=f'req-{index}' if keyed else None)
+    return time.perf_counter() - start
+
+
+def main(count, keys):
+    store = MemoryStore({}, {})
+    store.create_ledger('1001', 0)
+    account = AccountTransactions('1001', store=store)
+    print(f'deposits: {count:,}')
+    for label, keyed in [('unkeyed', False), ('keyed, first post', True), ('keyed, retry', True)]:
+        elapsed = time_deposits(account, count, keyed)
+        print(f'{label:<20} {elapsed:8.2f} s  {elapsed / count * 1e6:8.2f} us/deposit')
+    print(f'balance after retries: {store.get_balance("1001")}')
+
+    amount = Money.of(1)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    cache = DedupCache(capacity=keys)
+    now = time.time()
+    for index in range(keys):
+        key = f'req-{index:012d}'
+        cache.put(key, PostingRecord(key, '1001', 'deposit', amount, amount, now), now=now)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f'cache of {keys:,} keys: {used / 2**20:,.1f} MiB  {used / keys:,.0f} bytes/key')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [100_000, 1_000_000]))
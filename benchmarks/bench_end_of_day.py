@@ -0,0 +1,89 @@
+"""
+benchmarks/bench_end_of_day.py
+
+End-of-day run over the whole book: looping AccountTransactions(cust_id).balance()
+(closing balances only), a per-account Python loop computing the same figures
+as the engine, and run_end_of_day (closing balances, day totals, intraday
+low/high, and overdraft flags for every account).
+
+stdout is redirected to /dev/null during the loop so the print calls cost what they
+would in a service writing to a log pipe. Run from the project root:
+
+    python benchmarks/bench_end_of_day.py
+    python benchmarks/bench_end_of_day.py 1000000 8
+"""
+
+import contextlib
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from banking_system.db.ledger import DEPOSIT, WITHDRAW
+from banking_system.db.storage import MemoryStore
+from banking_system.model.end_of_day import run_end_of_day
+from banking_system.model.transactions import AccountTransactions
+
+
+def build_store(accounts, entries):
+    """Creates a store with `accounts` ledgers of `entries` random postings each."""
+    store = MemoryStore({}, {})
+    now = time.time()
+    for cust_id in range(accounts):
+        store.create_ledger(str(cust_id), random.randint(0, 100_000) / 100)
+        codes = np.random.choice([DEPOSIT, WITHDRAW], entries).astype(np.int8)
+        deltas = np.random.randint(100, 50_000, entries) * np.where(codes == DEPOSIT, 1, -1)
+        store.transactions[str(cust_id)].extend_minor(codes, deltas, now)
+    return store
+
+
+def python_figures(store):
+    """Computes closing, totals, low/high, and overdraft flags one account at a time."""
+    figures = {}
+    for cust_id, ledger in store.transactions.items():
+        balance = low = high = ledger.opening_cents
+        deposits = withdrawals = 0
+        for amount in ledger.amounts:
+            balance += amount
+            if amount > 0:
+                deposits += amount
+            else:
+                withdrawals -= amount
+            low = min(low, balance)
+            high = max(high, balance)
+        figures[cust_id] = (balance, deposits, withdrawals, low, high, balance < 0)
+    return figures
+
+
+def main(accounts, entries):
+    store = build_store(accounts, entries)
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        closing = [AccountTransactions(str(cust_id), store=store).balance() for cust_id in range(accounts)]
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    python_figures(store)
+    per_account = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report = run_end_of_day(store=store)
+    engine = time.perf_counter() - start
+
+    positions = {cust_id: index for index, cust_id in enumerate(report.cust_ids)}
+    assert all(report.closing[positions[str(cust_id)]] == balance.minor for cust_id, balance in enumerate(closing))
+
+    print(f'accounts: {accounts:,}  entries/account: {entries}')
+    print(f'loop of balance():  {loop:8.2f} s  {accounts / loop:>12,.0f} accounts/s')
+    print(f'python loop (all):  {per_account:8.2f} s  {accounts / per_account:>12,.0f} accounts/s')
+    print(f'run_end_of_day():   {engine:8.2f} s  {accounts / engine:>12,.0f} accounts/s')
+    print(f'speedup vs balance(): {loop / engine:6.1f}x   vs python loop: {per_account / engine:6.1f}x')
+    print(f'overdrawn at close: {int(report.overdrawn.sum()):,}')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [200_000, 5]))
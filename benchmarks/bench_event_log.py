@@ -0,0 +1,58 @@
+"""
+benchmarks/bench_event_log.py
+
+Cost of the event log on the deposit hot path, per sink: null (the default),
+an in-memory ring buffer, a background JSON-lines file, and the console sink
+writing to /dev/null (what the old print() calls amounted to). Run from the
+project root:
+
+    python benchmarks/bench_event_log.py
+    python benchmarks/bench_event_log.py 500000
+"""
+
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+from banking_system.db.storage import MemoryStore
+from banking_system.events.event_log import DEBUG, EventLog, set_event_log
+from banking_system.events.sinks import FileSink, NullSink, RingBufferSink, StreamSink
+from banking_system.model.transactions import AccountTransactions
+
+
+def run(deposits, event_log):
+    """Times `deposits` deposit() calls with event_log installed, including the final flush."""
+    store = MemoryStore({}, {})
+    store.create_ledger('1001')
+    account = AccountTransactions('1001', store=store)
+    previous = set_event_log(event_log)
+    try:
+        start = time.perf_counter()
+        for _ in range(deposits):
+            account.deposit(1.00)
+        event_log.close()
+        return time.perf_counter() - start
+    finally:
+        set_event_log(previous)
+
+
+def main(deposits):
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, 'w') as devnull:
+        sinks = [
+            ('null', lambda: EventLog(NullSink())),
+            ('ring', lambda: EventLog(RingBufferSink(), level=DEBUG)),
+            ('file (background)', lambda: EventLog(FileSink(os.path.join(directory, 'events.jsonl')), level=DEBUG)),
+            ('console (sync)', lambda: EventLog(StreamSink(devnull), level=DEBUG, background=False)),
+        ]
+        print(f'deposits: {deposits:,}')
+        for name, make_log in sinks:
+            with contextlib.redirect_stdout(devnull):
+                elapsed = run(deposits, make_log())
+            print(f'{name:<18} {elapsed:8.2f} s  {elapsed / deposits * 1e6:8.2f} us/deposit')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [200_000]))
@@ -0,0 +1,96 @@
+"""
+benchmarks/bench_interest_accrual.py
+
+Nightly interest accrual over an in-memory book: a per-account Python loop
+(one balance_as_of() and one tiered-rate calculation per account) vs. the
+AccrualEngine (model/interest.py) reading every ledger vs. reading only the
+ledgers posted to since the previous night. Posting a month's interest and
+fees is timed too. Run from the project root:
+
+    python benchmarks/bench_interest_accrual.py                 # 200k accounts, 1% posted to each day
+    python benchmarks/bench_interest_accrual.py 1000000 0.05
+"""
+
+import sys
+import time
+from datetime import date, datetime, time as day_time, timedelta
+
+import numpy as np
+
+from banking_system.db.ledger import Ledger
+from banking_system.db.storage import MemoryStore
+from banking_system.model.interest import AccrualEngine, FeeSchedule, InterestSchedule
+
+TIERS = ((0, 0.005), (10_000, 0.02), (100_000, 0.035))
+FIRST = date(2026, 3, 1)
+
+
+def build(accounts):
+    rng = np.random.default_rng(3)
+    openings = rng.integers(0, 50_000, accounts).tolist()
+    return {str(1001 + index): Ledger(opening) for index, opening in enumerate(openings)}
+
+
+def post_day(book, day, share, rng):
+    """Posts one deposit at noon of `day` to a random `share` of the accounts."""
+    cust_ids = list(book)
+    noon = datetime.combine(day, day_time(12)).timestamp()
+    for index in rng.choice(len(cust_ids), int(len(cust_ids) * share), replace=False).tolist():
+        book[cust_ids[index]].append('deposit', 25, timestamp=noon)
+
+
+def python_loop(store, schedule, day):
+    """The per-account baseline: one day's interest, figured one account at a time."""
+    end = datetime.combine(day + timedelta(days=1), day_time.min)
+    fraction = schedule.year_fraction(day)
+    ceilings = [floor for floor, _ in schedule.tiers[1:]] + [float('inf')]
+    accrued = {}
+    for cust_id in store.transactions:
+        balance = store.balance_as_of(cust_id, end).minor
+        interest = 0.0
+        for (floor, rate), ceiling in zip(schedule.tiers, ceilings):
+            interest += rate * min(max(balance - floor * 100, 0), (ceiling - floor) * 100)
+        accrued[cust_id] = interest * fraction
+    return accrued
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(accounts, share=0.01):
+    book = build(accounts)
+    store = MemoryStore({}, book)
+    schedule = InterestSchedule(TIERS, 'actual/365')
+    rng = np.random.default_rng(5)
+    print(f'{accounts:,} accounts, {share:.0%} posted to each day')
+
+    seconds, _ = timed(python_loop, store, schedule, FIRST)
+    print(f'{"python loop, one day":34} {seconds:8.2f} s  {accounts / seconds:12,.0f} accounts/s')
+
+    engine = AccrualEngine(schedule, FeeSchedule(5, waive_minimum=100), store=store)
+    seconds, read = timed(engine.accrue, FIRST)
+    print(f'{"engine, first run (all ledgers)":34} {seconds:8.2f} s  {accounts / seconds:12,.0f} accounts/s  read {read:,}')
+    full = incremental = 0.0
+    for offset in range(1, 31):
+        day = FIRST + timedelta(days=offset)
+        post_day(book, day, share, rng)
+        if offset % 2:
+            seconds, read = timed(engine.accrue, day, incremental=False)
+            full += seconds
+        else:
+            seconds, read = timed(engine.accrue, day)
+            incremental += seconds
+    print(f'{"engine, nightly full re-read":34} {full / 15:8.2f} s  {accounts * 15 / full:12,.0f} accounts/s')
+    print(f'{"engine, nightly incremental":34} {incremental / 15:8.2f} s  {accounts * 15 / incremental:12,.0f} accounts/s')
+
+    seconds, report = timed(engine.post)
+    print(f'{"post month (interest + fees)":34} {seconds:8.2f} s  {accounts / seconds:12,.0f} accounts/s  '
+          f'credited {int(np.count_nonzero(report.interest)):,}, charged {int(np.count_nonzero(report.fees)):,}')
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[0]) if args else 200_000, float(args[1]) if len(args) > 1 else 0.01)
@@ -0,0 +1,107 @@
+"""
+benchmarks/bench_ledger_export.py
+
+Full-ledger CSV dump from a SQLiteStore: materializing the whole book with
+ledger_columns() and writing it vs. the streaming export_ledger
+(model/ledger_export.py), which reads EXPORT_CHUNK_ACCOUNTS accounts at a time.
+
+A SQLite book of N accounts with E entries each is generated first. Each
+variant runs in its own process so its peak RSS is measured on its own; the
+streaming export also runs sharded over several processes. Run from the
+project root:
+
+    python benchmarks/bench_ledger_export.py                 # 200k accounts x 50 entries
+    python benchmarks/bench_ledger_export.py 1000000 20 4    # accounts, entries, shards
+"""
+
+import csv
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.model.ledger_export import _entry_rows, export_ledger, export_sharded, window_chunk
+
+START = 1_767_225_600  # 2026-01-01 UTC
+
+
+def build(path, accounts, entries):
+    SQLiteStore(path).close()
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            'INSERT INTO balances VALUES (?, ?, ?)',
+            ((str(1001 + index), 10_000 + entries // 2 * 150, 'USD') for index in range(accounts)),
+        )
+        conn.executemany(
+            'INSERT INTO ledger (cust_id, kind, amount_minor, created_at) VALUES (?, ?, ?, ?)',
+            (
+                (str(1001 + index), 'deposit' if entry % 2 else 'withdraw', 200 if entry % 2 else 50,
+                 START + entry * 3600 + index % 3600)
+                for index in range(accounts) for entry in range(entries)
+            ),
+        )
+    conn.close()
+
+
+def whole(path, output):
+    """Loads every ledger with ledger_columns(), then writes the CSV."""
+    store = SQLiteStore(path)
+    chunk = window_chunk(store.ledger_columns())
+    with open(output, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(('cust_id', 'txn_id', 'timestamp', 'kind', 'amount', 'currency', 'balance'))
+        writer.writerows(_entry_rows(chunk))
+    store.close()
+
+
+def stream(path, output):
+    store = SQLiteStore(path)
+    export_ledger(output, store=store)
+    store.close()
+
+
+def sharded(path, output, shards):
+    export_sharded(output, int(shards), url=f'sqlite:///{path}')
+
+
+def child(variant, *args):
+    """Runs one variant; prints seconds and the peak RSS of this process and its children."""
+    start = time.perf_counter()
+    {'whole': whole, 'stream': stream, 'sharded': sharded}[variant](*args)
+    elapsed = time.perf_counter() - start
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(elapsed, rss / 1024)
+
+
+def run(*args):
+    out = subprocess.run([sys.executable, __file__, '--child', *map(str, args)], capture_output=True, text=True, check=True)
+    elapsed, rss = map(float, out.stdout.split())
+    return elapsed, rss
+
+
+def main(accounts, entries, shards=4):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bank.db')
+        build(path, accounts, entries)
+        rows = accounts * entries
+        print(f'book: {accounts:,} accounts x {entries} entries = {rows:,} rows, {os.path.getsize(path) / 2**20:.0f} MB')
+        for label, args in (
+            ('ledger_columns + write', ('whole', path, os.path.join(directory, 'whole.csv'))),
+            ('export_ledger (streaming)', ('stream', path, os.path.join(directory, 'stream.csv'))),
+            (f'export_sharded x{shards} processes', ('sharded', path, os.path.join(directory, 'shards'), shards)),
+        ):
+            elapsed, rss = run(*args)
+            print(f'{label:34} {rows / elapsed:10,.0f} rows/s  {elapsed:7.1f} s  peak RSS {rss:7.0f} MB')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(*sys.argv[2:])
+    else:
+        args = [int(arg) for arg in sys.argv[1:]]
+        main(*(args or [200_000, 50]))
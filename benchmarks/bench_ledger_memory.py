@@ -0,0 +1,75 @@
+"""
+benchmarks/bench_ledger_memory.py
+
+Memory per ledger entry: the original per-customer float lists vs. db.ledger.Ledger.
+
+Entries are spread over accounts of ENTRIES_PER_ACCOUNT entries each; memory is
+measured with tracemalloc. Run from the project root:
+
+    python benchmarks/bench_ledger_memory.py             # 1M entries, extrapolated to 100M
+    python benchmarks/bench_ledger_memory.py 100000000   # full 100M run (~3 GB for Ledger)
+"""
+
+import random
+import sys
+import tracemalloc
+
+from banking_system.db.ledger import Ledger
+
+ENTRIES_PER_ACCOUNT = 1_000
+TARGET = 100_000_000
+
+
+def measure(build, entries):
+    """Returns bytes allocated (and retained) by build(entries)."""
+    tracemalloc.start()
+    data = build(entries)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def build_legacy(entries):
+    """Per-customer dicts of deposit/withdraw float lists, as in transactions_db."""
+    store = {}
+    for start in range(0, entries, ENTRIES_PER_ACCOUNT):
+        record = {'deposit': [], 'withdraw': [], 'balance': 0.0}
+        for _ in range(min(ENTRIES_PER_ACCOUNT, entries - start)):
+            amount = random.randint(1, 100_000) / 100
+            if random.random() < 0.5:
+                record['deposit'].append(amount)
+                record['balance'] += amount
+            else:
+                record['withdraw'].append(amount)
+                record['balance'] -= amount
+        store[str(start)] = record
+    return store
+
+
+def build_ledger(entries):
+    """Per-customer Ledger objects."""
+    store = {}
+    timestamp = 1_700_000_000.0
+    for start in range(0, entries, ENTRIES_PER_ACCOUNT):
+        ledger = Ledger()
+        for _ in range(min(ENTRIES_PER_ACCOUNT, entries - start)):
+            timestamp += 0.001
+            ledger.append('deposit' if random.random() < 0.5 else 'withdraw', random.randint(1, 100_000) / 100, timestamp)
+        store[str(start)] = ledger
+    return store
+
+
+def main(entries):
+    legacy = measure(build_legacy, entries)
+    ledger = measure(build_ledger, entries)
+    scale = TARGET / entries
+    print(f'entries measured: {entries:,}')
+    print(f"{'':>8} {'bytes/entry':>12} {'at 100M entries':>16}")
+    print(f"{'legacy':>8} {legacy / entries:>12.1f} {legacy * scale / 2**30:>13.2f} GB")
+    print(f"{'ledger':>8} {ledger / entries:>12.1f} {ledger * scale / 2**30:>13.2f} GB")
+    print('(legacy lists hold no timestamps or transaction IDs; the ledger does)')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
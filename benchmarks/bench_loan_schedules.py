@@ -0,0 +1,95 @@
+"""
+benchmarks/bench_loan_schedules.py
+
+Loan book jobs over a book of a million loans (model/loans.py): repricing
+every loan after a rate change, point-in-time balances for the whole book,
+building amortization schedules, and collecting a month's installments, vs. a
+per-loan Python loop that builds each schedule one installment at a time.
+Single-loan balance lookups on cached schedules are timed too. Run from the
+project root:
+
+    python benchmarks/bench_loan_schedules.py                   # 1M loans over 100k accounts
+    python benchmarks/bench_loan_schedules.py 200000 20000
+"""
+
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from banking_system.db.ledger import Ledger
+from banking_system.db.storage import MemoryStore
+from banking_system.model.loans import LoanBook
+from banking_system.model.overdraft import OverdraftPolicy
+
+LOOP_LOANS = 10_000
+LOOKUPS = 100_000
+FIRST = date(2026, 1, 1)
+
+
+def python_schedules(loans):
+    """The per-loan baseline: a level payment and an installment-by-installment schedule for each loan."""
+    schedules = []
+    for principal, annual_rate, installments in loans:
+        rate = annual_rate / 12
+        payment = round(principal * rate / (1 - (1 + rate) ** -installments)) if rate else round(principal / installments)
+        balance, rows = principal, []
+        for number in range(1, installments + 1):
+            interest = round(balance * rate)
+            paid = balance + interest if number == installments else payment
+            balance += interest - paid
+            rows.append((paid, interest, paid - interest, balance))
+        schedules.append(rows)
+    return schedules
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def report(label, seconds, count, unit):
+    print(f'{label:36} {seconds:8.2f} s  {count / seconds:14,.0f} {unit}/s')
+
+
+def main(loans, accounts):
+    rng = np.random.default_rng(13)
+    store = MemoryStore({}, {str(1001 + index): Ledger(100_000) for index in range(accounts)})
+    owners = (1001 + rng.integers(0, accounts, loans)).astype(str).tolist()
+    principal = np.round(rng.uniform(1_000, 400_000, loans), 2).tolist()
+    rates = np.round(rng.uniform(0.02, 0.09, loans), 4).tolist()
+    terms = rng.choice([12, 36, 60, 180, 360], loans).tolist()
+    starts = [FIRST + timedelta(days=offset) for offset in rng.integers(0, 28, loans).tolist()]
+    print(f'{loans:,} loans over {accounts:,} accounts, {int(sum(terms)):,} installments')
+
+    book = LoanBook(store=store)
+    seconds, _ = timed(book.add_many, zip(owners, principal, rates, terms, starts))
+    report('add_many', seconds, loans, 'loans')
+
+    sample = list(zip((np.array(principal[:LOOP_LOANS]) * 100).round().astype(int).tolist(), rates, terms[:LOOP_LOANS]))
+    seconds, _ = timed(python_schedules, sample)
+    report(f'python loop, {LOOP_LOANS:,} schedules', seconds, LOOP_LOANS, 'loans')
+    seconds, _ = timed(book.schedules, range(LOOP_LOANS))
+    report(f'LoanBook.schedules, {LOOP_LOANS:,} loans', seconds, LOOP_LOANS, 'loans')
+
+    seconds, _ = timed(book.reprice, np.asarray(rates) + 0.0025, date(2026, 6, 1))
+    report('reprice every loan', seconds, loans, 'loans')
+    seconds, _ = timed(book.balances_at, date(2027, 1, 1))
+    report('balances_at, every loan', seconds, loans, 'loans')
+
+    queries = rng.integers(0, LOOP_LOANS, LOOKUPS).tolist()
+    days = [FIRST + timedelta(days=offset) for offset in rng.integers(0, 3_650, LOOKUPS).tolist()]
+    book.schedules(range(LOOP_LOANS))
+    seconds, _ = timed(lambda: [book.balance_at(loan_id, day) for loan_id, day in zip(queries, days)])
+    report('balance_at, cached schedules', seconds, LOOKUPS, 'queries')
+
+    seconds, result = timed(book.collect, date(2026, 7, 1), policy=OverdraftPolicy(floor=0))
+    report('collect a month of installments', seconds, len(result), 'loans')
+    print(f'{"":36} collected {result.collected:,}, missed {len(result) - result.collected:,}')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [1_000_000, 100_000]))
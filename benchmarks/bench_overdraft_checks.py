@@ -0,0 +1,78 @@
+"""
+benchmarks/bench_overdraft_checks.py
+
+Cost of the overdraft policy on the withdraw and batch paths. Each withdraw()
+run starts from an account that already has a long withdrawal history, to show
+that the rolling-limit check does not grow with it: the naive alternative, which
+re-sums the account's withdraw list on every call, is timed alongside. Run from
+the project root:
+
+    python benchmarks/bench_overdraft_checks.py
+    python benchmarks/bench_overdraft_checks.py 20000 100000
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from banking_system.db.storage import MemoryStore
+from banking_system.model.overdraft import OverdraftError, OverdraftPolicy
+from banking_system.model.transactions import AccountTransactions
+
+
+def funded_store(history):
+    """Returns a store whose account 1001 has `history` earlier withdrawals."""
+    store = MemoryStore({}, {})
+    store.create_ledger('1001', 10_000_000)
+    store.apply_batch(['1001'], [history], np.full(history, 2, dtype=np.int8), np.full(history, -100, dtype=np.int64))
+    return store
+
+
+def time_withdrawals(store, withdrawals, policy):
+    account = AccountTransactions('1001', store=store, policy=policy)
+    start = time.perf_counter()
+    for _ in range(withdrawals):
+        account.withdraw(1.00)
+    return time.perf_counter() - start
+
+
+def time_naive(store, withdrawals, limit):
+    """Withdrawals guarded by summing the withdraw list on every call."""
+    account = AccountTransactions('1001', store=store, policy=OverdraftPolicy())
+    start = time.perf_counter()
+    for _ in range(withdrawals):
+        if sum(store.get_ledger('1001')['withdraw']) + 1 > limit:
+            raise OverdraftError('Daily withdrawal limit exceeded')
+        account.withdraw(1.00)
+    return time.perf_counter() - start
+
+
+def main(withdrawals, history):
+    print(f'withdrawals: {withdrawals:,}  prior withdrawals on the account: {history:,}')
+    rules = [
+        ('no rules', OverdraftPolicy()),
+        ('floor 0', OverdraftPolicy(floor=0)),
+        ('floor + daily limit', OverdraftPolicy(floor=0, daily_limit=10_000_000)),
+    ]
+    for label, policy in rules:
+        elapsed = time_withdrawals(funded_store(history), withdrawals, policy)
+        print(f'{label:<26} {elapsed:8.2f} s  {elapsed / withdrawals * 1e6:8.2f} us/withdraw')
+    naive = min(withdrawals, 20)
+    elapsed = time_naive(funded_store(history), naive, 10_000_000)
+    print(f'{"naive sum (" + format(naive, ",") + " calls)":<26} {elapsed:8.2f} s  {elapsed / naive * 1e6:8.2f} us/withdraw')
+
+    records = [(str(index % 1_000), 'withdraw' if index % 3 else 'deposit', 1.00) for index in range(200_000)]
+    for label, policy in rules:
+        store = MemoryStore({}, {})
+        for cust_id in range(1_000):
+            store.create_ledger(str(cust_id), 20)
+        start = time.perf_counter()
+        result = AccountTransactions.apply_batch(records, store=store, policy=policy)
+        elapsed = time.perf_counter() - start
+        print(f'batch of 200,000, {label:<19} {elapsed:6.2f} s  rejected {len(result.rejected):,}')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [20_000, 100_000]))
@@ -0,0 +1,96 @@
+"""
+benchmarks/bench_parallel_jobs.py
+
+Whole-book batch jobs in one process vs. on a ParallelRunner
+(model/parallel.py) of 1, 2, and 4 worker processes: the EOD computation and
+reconciliation over an in-memory book, and a bulk posting to a SQLite book.
+
+The workers map the ledger columns from shared memory, so the parallel runs
+pay one copy of the book plus the chunk results, not a pickle of every entry.
+Workers only add throughput when they have cores of their own; the script
+prints how many the machine has. Run from the project root:
+
+    python benchmarks/bench_parallel_jobs.py                    # 200k accounts x 50 entries, 200k postings
+    python benchmarks/bench_parallel_jobs.py 1000000 20 1000000
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from banking_system.db.ledger import DEPOSIT, WITHDRAW, Ledger
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.model.end_of_day import compute_end_of_day
+from banking_system.model.parallel import ParallelRunner, parallel_apply_batch, parallel_end_of_day, reconcile
+from banking_system.model.transactions import AccountTransactions
+
+WORKERS = (1, 2, 4)
+START = 1_767_225_600  # 2026-01-01 UTC, in seconds
+
+
+def build(accounts, entries):
+    """An in-memory book of accounts ledgers with `entries` entries each."""
+    rng = np.random.default_rng(7)
+    book = {}
+    kinds = np.where(np.arange(entries) % 3 == 2, WITHDRAW, DEPOSIT).astype(np.int8)
+    timestamps = (START + np.arange(entries) * 3_600) * 1_000_000
+    for index in range(accounts):
+        amounts = rng.integers(100, 10_000, entries)
+        amounts[kinds == WITHDRAW] *= -1
+        ledger = Ledger(1_000)
+        txn_ids = np.arange(index * entries + 1, (index + 1) * entries + 1, dtype=np.int64)
+        ledger.extend_raw(timestamps.tobytes(), amounts.tobytes(), kinds.tobytes(), txn_ids.tobytes())
+        book[str(1001 + index)] = ledger
+    return MemoryStore({}, book)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main(accounts, entries, postings):
+    print(f'{os.cpu_count()} CPU(s); book of {accounts:,} accounts x {entries} entries, {postings:,} postings')
+    store = build(accounts, entries)
+    rows = accounts * entries
+    serial_eod = timed(lambda: compute_end_of_day(store.ledger_columns()))
+    print(f'{"in-process":18} EOD {rows / serial_eod:12,.0f} entries/s')
+    for workers in WORKERS:
+        with ParallelRunner(workers) as runner:
+            runner.map(abs, range(workers))  # start the workers before timing
+            eod = timed(parallel_end_of_day, store=store, runner=runner)
+            check = timed(reconcile, store, runner=runner)
+        print(f'{f"{workers} worker(s)":18} EOD {rows / eod:12,.0f} entries/s   reconcile {rows / check:12,.0f} entries/s')
+
+    rng = np.random.default_rng(11)
+    records = [(str(1001 + index), 'deposit', 1.25) for index in rng.integers(0, accounts, postings).tolist()]
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in (None,) + WORKERS:
+            path = os.path.join(directory, f'bank-{workers}.db')
+            SQLiteStore(path).close()
+            conn = sqlite3.connect(path)
+            with conn:
+                conn.executemany('INSERT INTO balances VALUES (?, ?, ?)', ((str(1001 + index), 10_000, 'USD') for index in range(accounts)))
+            conn.close()
+            book = SQLiteStore(path)
+            if workers is None:
+                elapsed = timed(AccountTransactions.apply_batch, records, store=book)
+                label = 'in-process'
+            else:
+                book.close()
+                with ParallelRunner(workers) as runner:
+                    runner.map(abs, range(workers))
+                    elapsed = timed(parallel_apply_batch, records, url=f'sqlite:///{path}', runner=runner)
+                label = f'{workers} worker(s)'
+            print(f'{label:18} posting {postings / elapsed:12,.0f} records/s')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [200_000, 50, 200_000]))
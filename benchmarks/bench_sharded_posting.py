@@ -0,0 +1,124 @@
+"""
+benchmarks/bench_sharded_posting.py
+
+Posting throughput against shard count: the in-process MemoryStore vs. a
+ShardedStore (db/sharding.py) of 1, 2, 4, and 8 shard processes.
+
+Two workloads run against each store:
+
+    single  threads posting one deposit or withdrawal at a time through
+            AccountTransactions (one IPC round trip each on a sharded store)
+    batch   AccountTransactions.apply_batch over batches of postings, which a
+            sharded store splits into one sub-batch per shard, applied in
+            parallel by two-phase commit
+
+Shards only add throughput when they have cores of their own; the script
+prints how many the machine has. Final balances are checked against what was
+posted. Run from the project root:
+
+    python benchmarks/bench_sharded_posting.py                # 100k accounts, 20k single, 1M batched
+    python benchmarks/bench_sharded_posting.py 100000 20000 1000000 10000
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+from banking_system.db.sharding import ShardedStore
+from banking_system.db.storage import MemoryStore
+from banking_system.model.customer import Customer
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+SHARD_COUNTS = (1, 2, 4, 8)
+THREADS = 8
+
+
+def open_accounts(store, accounts):
+    cust_ids = [str(1001 + index) for index in range(accounts)]
+    customers = [(cust_id, Customer('first', f'last{cust_id}', acct_num=f'{cust_id:0>12}')) for cust_id in cust_ids]
+    store.insert_customers(customers, [Money(1_000_000)] * accounts)
+    return cust_ids
+
+
+def single(store, cust_ids, operations):
+    """Posts from THREADS threads; returns (postings per second, net posted per account)."""
+    tallies = [dict() for _ in range(THREADS)]
+
+    def worker(seed, tally):
+        rng = random.Random(seed)
+        for _ in range(operations // THREADS):
+            cust_id = rng.choice(cust_ids)
+            account = AccountTransactions(cust_id, store=store)
+            if rng.random() < 0.5:
+                account.deposit(1)
+                tally[cust_id] = tally.get(cust_id, 0) + 100
+            else:
+                account.withdraw(1)
+                tally[cust_id] = tally.get(cust_id, 0) - 100
+
+    threads = [threading.Thread(target=worker, args=(seed, tally)) for seed, tally in enumerate(tallies)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    net = {}
+    for tally in tallies:
+        for cust_id, amount in tally.items():
+            net[cust_id] = net.get(cust_id, 0) + amount
+    return (operations // THREADS * THREADS) / elapsed, net
+
+
+def batched(store, cust_ids, postings, batch_size):
+    """Posts deposits in batches; returns (postings per second, net posted per account)."""
+    rng = np.random.default_rng(7)
+    picks = rng.integers(0, len(cust_ids), postings)
+    net = np.bincount(picks, minlength=len(cust_ids)) * 100
+    start = time.perf_counter()
+    for offset in range(0, postings, batch_size):
+        records = [(cust_ids[index], 'deposit', 1) for index in picks[offset:offset + batch_size].tolist()]
+        AccountTransactions.apply_batch(records, store=store)
+    elapsed = time.perf_counter() - start
+    return postings / elapsed, {cust_ids[index]: int(amount) for index, amount in enumerate(net.tolist()) if amount}
+
+
+def lost_updates(store, expected):
+    return sum(store.get_balance(cust_id) != Money(1_000_000 + amount) for cust_id, amount in expected.items())
+
+
+def measure(label, make_store, accounts, operations, postings, batch_size):
+    store = make_store()
+    try:
+        cust_ids = open_accounts(store, accounts)
+        single_rate, single_net = single(store, cust_ids, operations)
+        lost = lost_updates(store, single_net)
+        store_b = make_store()
+    finally:
+        if hasattr(store, 'close'):
+            store.close()
+    try:
+        cust_ids = open_accounts(store_b, accounts)
+        batch_rate, batch_net = batched(store_b, cust_ids, postings, batch_size)
+        lost += lost_updates(store_b, batch_net)
+    finally:
+        if hasattr(store_b, 'close'):
+            store_b.close()
+    print(f'{label:22} single {single_rate:>10,.0f} ops/s   batch {batch_rate:>10,.0f} postings/s   lost updates: {lost}')
+
+
+def main(accounts, operations, postings, batch_size=10_000):
+    print(f'{os.cpu_count()} CPU(s); {accounts:,} accounts, {THREADS} posting threads, batches of {batch_size:,}')
+    measure('MemoryStore', lambda: MemoryStore({}, {}), accounts, operations, postings, batch_size)
+    for shards in SHARD_COUNTS:
+        measure(f'ShardedStore x{shards}', lambda: ShardedStore(shards), accounts, operations, postings, batch_size)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [100_000, 20_000, 1_000_000]))
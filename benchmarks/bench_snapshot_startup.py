@@ -0,0 +1,102 @@
+"""
+benchmarks/bench_snapshot_startup.py
+
+Startup cost of a large book: loading pickled dicts (what a checkpoint holds)
+vs. mapping a snapshot (db/snapshot.py) and serving the first balance.
+
+The book has N customers, each with a ledger of ENTRIES_PER_ACCOUNT postings.
+Both files are written once; each load is then timed in a fresh interpreter so
+neither benefits from objects already built by the parent. The OS page cache is
+warm in both cases (the files were just written). Run from the project root:
+
+    python benchmarks/bench_snapshot_startup.py            # 1M customers
+    python benchmarks/bench_snapshot_startup.py 200000
+"""
+
+import os
+import pickle
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from banking_system.db.snapshot import write_snapshot
+from banking_system.db.storage import MemoryStore
+
+ENTRIES_PER_ACCOUNT = 4
+CITIES = ('miami', 'tampa', 'orlando', 'austin', 'boston', 'denver', 'seattle', 'chicago')
+
+PICKLE_LOAD = """
+import pickle, sys, time
+start = time.perf_counter()
+with open(sys.argv[1], 'rb') as handle:
+    accounts, transactions = pickle.load(handle)
+balance = transactions[sys.argv[2]].balance
+print((time.perf_counter() - start) * 1000)
+"""
+
+SNAPSHOT_LOAD = """
+import sys, time
+from banking_system.db.snapshot import SnapshotStore
+from banking_system.model.transactions import AccountTransactions
+start = time.perf_counter()
+store = SnapshotStore(sys.argv[1])
+balance = AccountTransactions(sys.argv[2], store=store).balance()
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def build(customers):
+    store = MemoryStore({}, {})
+    timestamp = 1_700_000_000.0
+    for index in range(customers):
+        cust_id = str(1001 + index)
+        store.accounts[cust_id] = {
+            'first_name': f'first{index % 5000}',
+            'last_name': f'last{index // 5000}',
+            'acct_num': f'{index:012d}',
+            'address': f'{index % 9999} Main St',
+            'city': CITIES[index % len(CITIES)],
+            'state': 'FL',
+            'zip': 10000 + index % 90000,
+        }
+        store.create_ledger(cust_id, 100)
+        ledger = store.transactions[cust_id]
+        for _ in range(ENTRIES_PER_ACCOUNT):
+            timestamp += 0.001
+            ledger.append('deposit' if random.random() < 0.5 else 'withdraw', random.randint(1, 10_000) / 100, timestamp)
+    return store
+
+
+def timed_run(script, *args):
+    """Runs script in a fresh interpreter and returns the milliseconds it reports."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.run([sys.executable, '-c', script, *args], check=True, capture_output=True, text=True, env=env)
+    return float(output.stdout)
+
+
+def main(customers):
+    store = build(customers)
+    cust_id = str(1001 + customers // 2)
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, 'book.pkl')
+        snapshot_path = os.path.join(directory, 'book.snap')
+
+        with open(pickle_path, 'wb') as handle:
+            pickle.dump((store.accounts, store.transactions), handle, protocol=pickle.HIGHEST_PROTOCOL)
+        start = time.perf_counter()
+        report = write_snapshot(store, snapshot_path)
+        written = time.perf_counter() - start
+        del store
+
+        print(f'{customers:,} customers, {report["entries"]:,} ledger entries')
+        print(f'pickle:   {os.path.getsize(pickle_path) / 2**20:8.1f} MB')
+        print(f'snapshot: {report["bytes"] / 2**20:8.1f} MB  (written in {written:.1f} s)')
+        print(f'pickle load + balance:    {timed_run(PICKLE_LOAD, pickle_path, cust_id):10.1f} ms')
+        print(f'snapshot open + balance:  {timed_run(SNAPSHOT_LOAD, snapshot_path, cust_id):10.1f} ms')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [1_000_000]))
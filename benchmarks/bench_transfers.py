@@ -0,0 +1,65 @@
+"""
+benchmarks/bench_transfers.py
+
+Settling transfers three ways: chaining withdraw() and deposit() (what clients did
+before), transfer() per request, and transfer_batch() with net-position settlement.
+Transfers pick from a small set of accounts, so the batch touches each account many
+times but writes it once. Run from the project root:
+
+    python benchmarks/bench_transfers.py
+    python benchmarks/bench_transfers.py 200000 1000 --sqlite
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.model.transactions import AccountTransactions
+
+
+def chained(store, transfers):
+    for source, destination, amount in transfers:
+        AccountTransactions(source, store=store).withdraw(amount)
+        AccountTransactions(destination, store=store).deposit(amount)
+
+
+def single(store, transfers):
+    for source, destination, amount in transfers:
+        AccountTransactions(source, store=store).transfer(destination, amount)
+
+
+def batched(store, transfers):
+    AccountTransactions.transfer_batch(transfers, store=store)
+
+
+def main(count, accounts, sqlite=False):
+    rng = random.Random(7)
+    transfers = []
+    while len(transfers) < count:
+        source, destination = rng.randrange(accounts), rng.randrange(accounts)
+        if source != destination:
+            transfers.append((str(source), str(destination), rng.randint(1, 50_000) / 100))
+
+    print(f'transfers: {count:,}  accounts: {accounts:,}  store: {"sqlite" if sqlite else "memory"}')
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (label, settle) in enumerate([('withdraw + deposit', chained), ('transfer()', single), ('transfer_batch()', batched)]):
+            store = SQLiteStore(os.path.join(directory, f'bank{index}.db')) if sqlite else MemoryStore({}, {})
+            for cust_id in range(accounts):
+                store.create_ledger(str(cust_id), 1_000)
+            start = time.perf_counter()
+            settle(store, transfers)
+            elapsed = time.perf_counter() - start
+            total = sum(store.get_balance(str(cust_id)).minor for cust_id in range(accounts))
+            print(f'{label:<20} {elapsed:8.2f} s  {count / elapsed:>12,.0f} transfers/s  book total {total:,}')
+            if sqlite:
+                store.close()
+
+
+if __name__ == '__main__':
+    flags = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    args = [int(arg) for arg in sys.argv[1:] if not arg.startswith('--')]
+    main(*(args or [100_000, 1_000]), sqlite='--sqlite' in flags)
@@ -0,0 +1,114 @@
+"""
+benchmarks/bench_wal_recovery.py
+
+Durability costs of the write-ahead logged store (db/durable_store.py):
+
+1. Group commit: deposits per second with one writer (one fsync per posting)
+   and with many writers sharing fsyncs, and the resulting frames per flush.
+2. Recovery: a log of single-posting frames is written directly, then the
+   store is reopened and replays it. The rate is reported per GB and
+   extrapolated to a 10 GB log; a log that size needs more RAM than the state
+   it describes fits on a small machine, which is why the default run is 1 GB.
+3. Recovery after a checkpoint, which only replays the log written since.
+
+Run from the project root:
+
+    python benchmarks/bench_wal_recovery.py
+    python benchmarks/bench_wal_recovery.py 2048 16
+"""
+
+import sys
+import tempfile
+import threading
+import time
+
+from banking_system.db.durable_store import DurableStore, _encode_entries
+from banking_system.db.ledger import DEPOSIT
+from banking_system.model.transactions import AccountTransactions
+
+ACCOUNTS = 10_000
+
+
+def group_commit(directory, writers, postings):
+    store = DurableStore(directory, {}, {})
+    for cust_id in range(writers):
+        store.create_ledger(str(cust_id), 0)
+    per_writer = postings // writers
+
+    def post(cust_id):
+        account = AccountTransactions(str(cust_id), store=store)
+        for _ in range(per_writer):
+            account.deposit(1)
+
+    threads = [threading.Thread(target=post, args=(cust_id,)) for cust_id in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stats = store.wal.stats()
+    store.close()
+    return per_writer * writers / elapsed, stats['frames'] / max(stats['flushes'], 1)
+
+
+def write_log(store, megabytes):
+    """Appends single-deposit frames round-robin over ACCOUNTS until the log reaches megabytes."""
+    wal = store.wal
+    target = megabytes * 1024 * 1024
+    micros = int(time.time() * 1_000_000)
+    txn_id = 1
+    frames = 0
+    while wal.appended_bytes < target:
+        for cust_id in range(ACCOUNTS):
+            wal.append(_encode_entries([(str(cust_id), 1, (
+                micros.to_bytes(8, 'little'), (100).to_bytes(8, 'little'),
+                DEPOSIT.to_bytes(1, 'little'), txn_id.to_bytes(8, 'little'),
+            ))]))
+            txn_id += 1
+        frames += ACCOUNTS
+        wal.sync()
+    return frames
+
+
+def main(megabytes, writers):
+    with tempfile.TemporaryDirectory() as directory:
+        single, _ = group_commit(f'{directory}/single', 1, 2_000)
+        grouped, per_flush = group_commit(f'{directory}/grouped', writers, 20_000)
+        print(f'1 writer:    {single:>10,.0f} deposits/s (one fsync each)')
+        print(f'{writers} writers: {grouped:>10,.0f} deposits/s ({per_flush:.1f} frames per fsync)')
+
+        path = f'{directory}/recovery'
+        store = DurableStore(path, {}, {}, sync=False, checkpoint_bytes=None)
+        for cust_id in range(ACCOUNTS):
+            store.create_ledger(str(cust_id), 0)
+        store.checkpoint()
+        start = time.perf_counter()
+        frames = write_log(store, megabytes)
+        written = time.perf_counter() - start
+        size = store.wal.appended_bytes
+        store.close()
+        del store
+        print(f'log: {size / 2**30:.2f} GB, {frames:,} frames, written in {written:.1f} s')
+
+        store = DurableStore(path, {}, {}, sync=False, checkpoint_bytes=None)
+        report = store.recovery
+        rate = size / 2**20 / report['seconds']
+        print(f'full replay: {report["seconds"]:.1f} s  {report["frames"] / report["seconds"]:,.0f} frames/s  '
+              f'{rate:.1f} MB/s -> ~{10 * 1024 / rate:.0f} s for a 10 GB log')
+
+        store.checkpoint()
+        account = AccountTransactions('0', store=store)
+        for _ in range(10_000):
+            account.deposit(1)
+        store.close()
+        del store, account
+        store = DurableStore(path, {}, {}, sync=False, checkpoint_bytes=None)
+        report = store.recovery
+        print(f'after a checkpoint: {report["seconds"]:.1f} s to load it and replay {report["frames"]:,} frames')
+        store.close()
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(*(args or [1024, 16]))
@@ -15,12 +15,61 @@ class Config:
     )
     DEBUG = os.getenv('FLASK_DEBUG', '0') == '1'  # 1 = Development, 0 = Production
 
+    # Customer ID sequence high-water mark (see db/sequence.py); unset keeps it in memory only
+    CUST_ID_SEQUENCE_PATH = os.getenv('CUST_ID_SEQUENCE_PATH') or None
+
+    # Connection pool for the SQL-backed store (see db/pool.py)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+
+    # Structured event log (see events/event_log.py)
+    EVENT_LOG_SINK = os.getenv('EVENT_LOG_SINK', 'null')
+    EVENT_LOG_LEVEL = os.getenv('EVENT_LOG_LEVEL', 'INFO')
+
+    # Withdrawal rules (see model/overdraft.py); unset means not enforced
+    OVERDRAFT_FLOOR = os.getenv('OVERDRAFT_FLOOR') or None
+    OVERDRAFT_LIMIT = os.getenv('OVERDRAFT_LIMIT') or None
+    DAILY_WITHDRAWAL_LIMIT = os.getenv('DAILY_WITHDRAWAL_LIMIT') or None
+
+    # Dedup cache for posting idempotency keys (see db/dedup.py)
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '1000000'))
+    IDEMPOTENCY_TTL = float(os.getenv('IDEMPOTENCY_TTL', '86400'))
+
+    # Write-ahead log for DATABASE_URL=wal://... (see db/durable_store.py)
+    WAL_SYNC = os.getenv('WAL_SYNC', '1') == '1'
+    WAL_COMMIT_DELAY = float(os.getenv('WAL_COMMIT_DELAY', '0'))
+    WAL_CHECKPOINT_BYTES = int(os.getenv('WAL_CHECKPOINT_BYTES', str(256 * 1024 * 1024)))
+
+    # Bulk customer import (see model/customer_import.py)
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '10000'))
+
+    # Statement and ledger export (see model/ledger_export.py)
+    EXPORT_CHUNK_ACCOUNTS = int(os.getenv('EXPORT_CHUNK_ACCOUNTS', '1000'))
+
+    # Multi-process batch jobs (see model/parallel.py); 0 workers means one per CPU
+    PARALLEL_WORKERS = int(os.getenv('PARALLEL_WORKERS', '0'))
+    PARALLEL_CHUNK_ACCOUNTS = int(os.getenv('PARALLEL_CHUNK_ACCOUNTS', '20000'))
+
+    # Interest accrual and fees (see model/interest.py)
+    ACCRUAL_CHUNK_ACCOUNTS = int(os.getenv('ACCRUAL_CHUNK_ACCOUNTS', '10000'))
+
+    # Loans (see model/loans.py)
+    LOAN_SCHEDULE_CACHE = int(os.getenv('LOAN_SCHEDULE_CACHE', '10000'))
+
+    # Account activity feed (see model/activity.py); 0 recent events records nothing
+    ACTIVITY_RECENT = int(os.getenv('ACTIVITY_RECENT', '50'))
+    ACTIVITY_COMPACT_EVENTS = int(os.getenv('ACTIVITY_COMPACT_EVENTS', '100000'))
+    ACTIVITY_COLD_EVENTS = int(os.getenv('ACTIVITY_COLD_EVENTS', '5000000'))
+
 class DevelopmentConfig(Config):
     """Development-specific configuration."""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.getenv(
         'DEV_DATABASE_URL',
     )
+    EVENT_LOG_SINK = os.getenv('EVENT_LOG_SINK', 'console')
+    EVENT_LOG_LEVEL = os.getenv('EVENT_LOG_LEVEL', 'DEBUG')
     DEBUG_TB_PANELS = [
         'flask_debugtoolbar.panels.headers.HeaderDebugPanel',
         'flask_debugtoolbar.panels.logger.LoggingPanel',
@@ -36,9 +85,26 @@ class TestingConfig(Config):
         'TEST_DATABASE_URL',
     )
     WTF_CSRF_ENABLED = False  # Disable CSRF for testing
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '2'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
 
 class ProductionConfig(Config):
     """Production-specific configuration."""
     SQLALCHEMY_DATABASE_URI = os.getenv(
         'DATABASE_URL',
     )
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '20'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
+
+config_by_name = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
+}
+
+
+def get_config(name=None):
+    """Returns the Config class selected by name or the FLASK_CONFIG environment variable."""
+    name = name or os.getenv('FLASK_CONFIG', '')
+    return config_by_name.get(name.lower(), Config)
@@ -0,0 +1,125 @@
+"""
+db/account_numbers.py
+
+Account number allocation for BankAccount.create_account.
+
+Numbers are produced with a single random draw per candidate and checked against
+the acct_num -> cust_id index kept in accounts_store, so allocation cost does not
+depend on how many accounts already exist. Collisions are retried in a bounded
+loop instead of by recursion.
+"""
+
+import random
+
+ACCOUNT_NUMBER_LENGTH = 12
+MAX_ATTEMPTS = 1000
+
+
+def luhn_check_digit(body):
+    """Computes the Luhn check digit for a string of digits.
+
+    Args:
+        body (str): The account number without its check digit.
+
+    Returns:
+        str: The single check digit.
+    """
+    total = 0
+    # Double every second digit starting from the rightmost digit of the body.
+    for position, char in enumerate(reversed(body)):
+        digit = int(char)
+        if position % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_luhn(number):
+    """Checks whether a number's last digit is a valid Luhn check digit."""
+    return number.isdigit() and luhn_check_digit(number[:-1]) == number[-1]
+
+
+class AccountNumberAllocator:
+    """
+    Class to allocate unique, fixed-width account numbers.
+    Methods:
+        - generate
+        - allocate
+        - allocate_many
+    """
+
+    def __init__(self, length=ACCOUNT_NUMBER_LENGTH, check_digit=False, max_attempts=MAX_ATTEMPTS):
+        """Initializes the allocator.
+
+        Args:
+            length (int): Total number of digits, including any check digit.
+            check_digit (bool): Whether the last digit is a Luhn check digit.
+            max_attempts (int): Draws to try before giving up on a full number space.
+        """
+        self.length = length
+        self.check_digit = check_digit
+        self.max_attempts = max_attempts
+        self._body_length = length - 1 if check_digit else length
+        self._upper = 10 ** self._body_length - 1
+
+    def generate(self):
+        """Draws one candidate account number with a single random call."""
+        body = f'{random.randint(0, self._upper):0{self._body_length}d}'
+        if self.check_digit:
+            return body + luhn_check_digit(body)
+        return body
+
+    def allocate(self, taken):
+        """Returns an account number that is not in taken.
+
+        Args:
+            taken: Container of account numbers already in use (supports `in`).
+
+        Returns:
+            str: An unused account number.
+
+        Raises:
+            RuntimeError: If no unused number is found within max_attempts draws.
+        """
+        for _ in range(self.max_attempts):
+            acct_num = self.generate()
+            if acct_num not in taken:
+                return acct_num
+        raise RuntimeError(f'Could not allocate a unique account number after {self.max_attempts} attempts')
+
+    def allocate_many(self, count, taken):
+        """Returns count distinct account numbers, none of which are in taken.
+
+        Args:
+            count (int): How many numbers to allocate.
+            taken: Container of account numbers already in use (supports `in`,
+                or existing(numbers) to check a whole round of draws at once).
+
+        Returns:
+            list: The allocated account numbers in draw order.
+
+        Raises:
+            RuntimeError: If the number space is too full to satisfy the request.
+        """
+        allocated = []
+        seen = set()
+        misses = 0
+        while len(allocated) < count:
+            candidates = [self.generate() for _ in range(count - len(allocated))]
+            # A container that can check many numbers in one call (a database
+            # view, see AccountNumberView) is asked once per round of draws.
+            if hasattr(taken, 'existing'):
+                in_use = taken.existing(candidates)
+            else:
+                in_use = {acct_num for acct_num in candidates if acct_num in taken}
+            for acct_num in candidates:
+                if acct_num in seen or acct_num in in_use:
+                    misses += 1
+                    if misses >= self.max_attempts:
+                        raise RuntimeError(f'Could not allocate {count} unique account numbers')
+                    continue
+                seen.add(acct_num)
+                allocated.append(acct_num)
+        return allocated
@@ -2,6 +2,7 @@
 db/accounts_store.py
 
 accounts_db {
+    cust_id: Customer  (model/customer.py; reads like the dict record below)
     cust_id: {
     first_name: fname,
     last_name: lname,
@@ -14,31 +15,309 @@ accounts_db {
 }
 
 transactions_db {
+    cust_id: Ledger  (db/ledger.py; reads like the legacy record below)
     cust_id: {
     deposits: [*args],
     withdrawals: [*args],
     balance: balance
     }
 }
+
+Secondary indexes over accounts_db (normalized name -> cust_ids and
+acct_num -> cust_id) live alongside the stores, one set per dict. Writes that
+go through insert_customer/update_customer/delete_customer keep them
+consistent. Writes made directly are caught before the next lookup: accounts_db
+is a CustomerTable that counts its writes, Customer counts in-place field
+changes, and every index hit is checked against the record it points to, so
+the indexes are rebuilt instead of returning the wrong customer.
 """
 
+import threading
+import unicodedata
 
-accounts_db = {
-    '1001': {
-    'first_name': 'briana',
-    'last_name': 'smith',
-    'acct_num': '854876552154',
-    'address': '2780 briar cliff rd',
-    'city': 'miami',
-    'state': 'FL',
-    'zip': 12345,
-    }
-}
+from banking_system.db.ledger import Ledger
+from banking_system.db.registry import StoreRegistry
+from banking_system.model.customer import Customer, edit_count
+
+
+class CustomerTable(dict):
+    """
+    accounts_db-style dict that counts its writes, so indexes over it can tell
+    when a record was added, replaced, or removed without them.
+    Attributes:
+        - version: number of writes so far
+    """
+
+    version = 0
+
+    def __setitem__(self, cust_id, record):
+        self.version += 1
+        super().__setitem__(cust_id, record)
+
+    def __delitem__(self, cust_id):
+        self.version += 1
+        super().__delitem__(cust_id)
+
+    def __ior__(self, other):
+        self.version += 1
+        return super().__ior__(other)
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, cust_id, record=None):
+        self.version += 1
+        return super().setdefault(cust_id, record)
+
+    def update(self, *args, **kwargs):
+        self.version += 1
+        super().update(*args, **kwargs)
+
+    def clear(self):
+        self.version += 1
+        super().clear()
+
+
+accounts_db = CustomerTable({
+    '1001': Customer(
+    first_name='briana',
+    last_name='smith',
+    acct_num='854876552154',
+    address='2780 briar cliff rd',
+    city='miami',
+    state='FL',
+    zip=12345,
+    )
+})
 
 transactions_db = {
-    '1001': {
+    '1001': Ledger.from_legacy({
         'deposit':[50.00,80.24],
         'withdraw': [37.00, 21.52],
         'balance': 71.72
-    }
+    })
 }
+
+
+def normalize_name(first_name, last_name):
+    """Normalizes a customer name into the key used by the name index.
+
+    Names are Unicode-normalized, case-folded, and have runs of whitespace
+    collapsed, so ' Briana ' / 'SMITH' and 'briana' / 'smith' match.
+
+    Args:
+        first_name (str): Customer first name.
+        last_name (str): Customer last name.
+
+    Returns:
+        tuple: The normalized (first_name, last_name) key.
+    """
+    return (_normalize_part(first_name), _normalize_part(last_name))
+
+
+def _normalize_part(value):
+    """Normalizes a single name part."""
+    value = unicodedata.normalize('NFKC', str(value))
+    return ' '.join(value.split()).casefold()
+
+
+class NameIndex:
+    """
+    Hash index of normalized (first_name, last_name) -> set of cust_ids.
+    Methods:
+        - add
+        - remove
+        - find / existing
+    """
+
+    def __init__(self):
+        """Initializes an empty name index."""
+        self._index = {}
+
+    def add(self, cust_id, record):
+        """Indexes a customer record under its normalized name."""
+        key = normalize_name(record['first_name'], record['last_name'])
+        self._index.setdefault(key, set()).add(cust_id)
+
+    def remove(self, cust_id, record):
+        """Removes a customer record from the index."""
+        key = normalize_name(record['first_name'], record['last_name'])
+        cust_ids = self._index.get(key)
+        if cust_ids is None:
+            return
+        cust_ids.discard(cust_id)
+        if not cust_ids:
+            del self._index[key]
+
+    def find(self, first_name, last_name):
+        """Returns the cust_ids whose normalized name matches, or an empty set."""
+        return self.find_key(normalize_name(first_name, last_name))
+
+    def find_key(self, key):
+        """Returns the cust_ids indexed under an already-normalized name key."""
+        return frozenset(self._index.get(key, ()))
+
+    def existing(self, keys):
+        """Returns the already-normalized name keys that are in the index."""
+        return {key for key in keys if key in self._index}
+
+
+class AccountIndexes:
+    """
+    Secondary indexes kept alongside a customer store.
+
+    - names: NameIndex of normalized (first_name, last_name) -> cust_ids
+    - acct_nums: dict of acct_num -> cust_id
+    Methods:
+        - rebuild / is_current
+        - find_by_name / find_by_acct_num
+        - insert
+        - update
+        - delete
+    """
+
+    def __init__(self, store):
+        """Builds the indexes for store with a single pass over its records."""
+        self.store = store
+        self._lock = threading.RLock()
+        self.rebuild()
+
+    def rebuild(self):
+        """Discards and rebuilds every index from the store."""
+        with self._lock:
+            self.names = NameIndex()
+            self.acct_nums = {}
+            for cust_id, record in list(self.store.items()):
+                self._add(cust_id, record)
+            self._stamp()
+
+    def _stamp(self):
+        """Records the store's size and write counters as the ones the indexes describe."""
+        self._size = len(self.store)
+        self._version = getattr(self.store, 'version', None)
+        self._edits = edit_count()
+
+    def is_current(self):
+        """Checks whether the indexes still describe the store.
+
+        A changed size, CustomerTable version, or Customer edit count means
+        records were written directly rather than through insert_customer /
+        update_customer / delete_customer. A plain dict has no version, so a
+        same-size overwrite of one is caught by the checked lookups instead.
+        """
+        return (
+            self._size == len(self.store)
+            and self._version == getattr(self.store, 'version', None)
+            and self._edits == edit_count()
+        )
+
+    def find_by_name(self, first_name, last_name):
+        """Returns the cust_ids whose normalized name matches, rebuilding if a hit is stale."""
+        key = normalize_name(first_name, last_name)
+        cust_ids = self.names.find_key(key)
+        if all(self._names_match(cust_id, key) for cust_id in cust_ids):
+            return cust_ids
+        self.rebuild()
+        return self.names.find_key(key)
+
+    def find_by_acct_num(self, acct_num):
+        """Returns the cust_id that owns acct_num or None, rebuilding if the hit is stale."""
+        cust_id = self.acct_nums.get(acct_num)
+        if cust_id is None:
+            return None
+        record = self.store.get(cust_id)
+        if record is not None and record.get('acct_num') == acct_num:
+            return cust_id
+        self.rebuild()
+        return self.acct_nums.get(acct_num)
+
+    def _names_match(self, cust_id, key):
+        """Checks whether cust_id's record still has the normalized name key."""
+        record = self.store.get(cust_id)
+        return record is not None and normalize_name(record['first_name'], record['last_name']) == key
+
+    def insert(self, cust_id, record):
+        """Stores a new record and indexes it."""
+        with self._lock:
+            if cust_id in self.store:
+                self._remove(cust_id, self.store[cust_id])
+            self.store[cust_id] = record
+            self._add(cust_id, record)
+            self._stamp()
+
+    def update(self, cust_id, **changes):
+        """Applies field changes to an existing record and reindexes it."""
+        with self._lock:
+            record = self.store[cust_id]
+            self._remove(cust_id, record)
+            record.update(changes)
+            self._add(cust_id, record)
+            self._stamp()
+            return record
+
+    def delete(self, cust_id):
+        """Removes a record and its index entries."""
+        with self._lock:
+            record = self.store.pop(cust_id)
+            self._remove(cust_id, record)
+            self._stamp()
+            return record
+
+    def _add(self, cust_id, record):
+        """Adds a record to every index."""
+        self.names.add(cust_id, record)
+        acct_num = record.get('acct_num')
+        if acct_num is not None:
+            self.acct_nums[acct_num] = cust_id
+
+    def _remove(self, cust_id, record):
+        """Removes a record from every index."""
+        self.names.remove(cust_id, record)
+        acct_num = record.get('acct_num')
+        if self.acct_nums.get(acct_num) == cust_id:
+            del self.acct_nums[acct_num]
+
+
+_indexes = StoreRegistry(AccountIndexes)
+
+
+def account_indexes(store):
+    """Returns the indexes for a customer store, rebuilding them only when stale.
+
+    Every dict has its own indexes, so using one store never discards another's.
+
+    Args:
+        store (dict): Mapping of customer IDs to customer records.
+
+    Returns:
+        AccountIndexes: Indexes describing store.
+    """
+    indexes = _indexes.get(store)
+    if not indexes.is_current():
+        indexes.rebuild()
+    return indexes
+
+
+def insert_customer(store, cust_id, record):
+    """Inserts a customer record and keeps the secondary indexes consistent."""
+    account_indexes(store).insert(cust_id, record)
+
+
+def update_customer(store, cust_id, **changes):
+    """Updates fields of a customer record and keeps the secondary indexes consistent."""
+    return account_indexes(store).update(cust_id, **changes)
+
+
+def delete_customer(store, cust_id):
+    """Deletes a customer record and keeps the secondary indexes consistent."""
+    return account_indexes(store).delete(cust_id)
+
+
+def find_by_acct_num(store, acct_num):
+    """Returns the cust_id that owns acct_num, or None if it is not in use."""
+    return account_indexes(store).find_by_acct_num(acct_num)
@@ -0,0 +1,218 @@
+"""
+db/async_storage.py
+
+Asyncio interface to the storage backends.
+
+AsyncAccountStore mirrors the account operations of AccountStore as coroutines.
+AsyncStore adapts any synchronous AccountStore to it: backends that can block on
+I/O (SQLite) run in worker threads, at most `max_concurrency` at a time, so a
+burst of requests waits on the event loop instead of piling up on the connection
+pool; the in-memory backend is called inline because its operations never block.
+
+Concurrent balance reads of the same account share one backend read (request
+coalescing). A write through the adapter detaches the in-flight read of its
+account, so a read issued after a write has completed always sees it.
+
+Keyed postings use the backend's dedup cache and persisted keys, as the
+synchronous API does; key_lock() serializes postings under one key.
+"""
+
+import asyncio
+import contextlib
+import weakref
+
+from banking_system.db.storage import get_store
+from banking_system.model.money import DEFAULT_CURRENCY
+
+# Thread limit for blocking backends without a connection pool.
+DEFAULT_MAX_CONCURRENCY = 32
+# asyncio locks that keyed postings on a blocking backend are striped over.
+KEY_LOCK_STRIPES = 64
+
+
+class AsyncAccountStore:
+    """
+    Interface of the asyncio storage backends.
+    Methods:
+        - get_balance / get_currency / balance_as_of / withdrawals_since
+        - create_ledger / apply_transaction
+        - dedup_cache / key_lock / get_posting
+    """
+
+    async def get_balance(self, cust_id):
+        """Returns the balance of cust_id, or None if it has no ledger."""
+        raise NotImplementedError
+
+    async def get_currency(self, cust_id):
+        """Returns the currency of cust_id's ledger, or None if it has none."""
+        raise NotImplementedError
+
+    async def balance_as_of(self, cust_id, when):
+        """Returns the balance of cust_id at timestamp when."""
+        raise NotImplementedError
+
+    async def withdrawals_since(self, cust_id, when):
+        """Returns (timestamp_seconds, amount_minor) for cust_id's withdrawals after `when`."""
+        raise NotImplementedError
+
+    async def create_ledger(self, cust_id, balance=0, currency=DEFAULT_CURRENCY):
+        """Creates an empty ledger with an opening balance."""
+        raise NotImplementedError
+
+    async def apply_transaction(self, cust_id, kind, amount, expected=None, key=None):
+        """Appends a transaction and returns the new balance (see AccountStore)."""
+        raise NotImplementedError
+
+    def dedup_cache(self):
+        """Returns the db.dedup.DedupCache of recent posting idempotency keys."""
+        raise NotImplementedError
+
+    def key_lock(self, key):
+        """Returns an async context manager that serializes postings under one idempotency key."""
+        raise NotImplementedError
+
+    async def get_posting(self, key):
+        """Returns the persisted PostingRecord for an idempotency key, or None."""
+        raise NotImplementedError
+
+
+class AsyncStore(AsyncAccountStore):
+    """
+    AsyncAccountStore over a synchronous AccountStore.
+
+    An instance belongs to one event loop (its semaphore and in-flight reads do);
+    get_async_store() keeps one per loop and backend.
+    Methods:
+        - stats
+    """
+
+    @property
+    def registry_key(self):
+        return self.store.registry_key
+
+    def __init__(self, store, max_concurrency=None, coalesce=True):
+        """Initializes the adapter.
+
+        Args:
+            store (AccountStore): The synchronous backend.
+            max_concurrency (int): Backend calls allowed in flight at once; defaults
+                to the backend's connection pool size.
+            coalesce (bool): Whether concurrent balance reads of one account share
+                a single backend read.
+        """
+        if max_concurrency is None:
+            pool = getattr(store, 'pool', None)
+            max_concurrency = getattr(pool, 'size', DEFAULT_MAX_CONCURRENCY)
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        self.store = store
+        self.blocking = store.blocking
+        self.max_concurrency = max_concurrency
+        self.coalesce = coalesce
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._reads = {}
+        self._key_locks = [asyncio.Lock() for _ in range(KEY_LOCK_STRIPES)]
+        self._stats = {'reads': 0, 'coalesced': 0}
+
+    async def _call(self, method, *args, **kwargs):
+        """Runs a backend call, in a worker thread if the backend can block."""
+        if not self.blocking:
+            return method(*args, **kwargs)
+        async with self._slots:
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+    async def get_balance(self, cust_id):
+        self._stats['reads'] += 1
+        if not (self.blocking and self.coalesce):
+            return await self._call(self.store.get_balance, cust_id)
+
+        read = self._reads.get(cust_id)
+        if read is None:
+            read = self._reads[cust_id] = asyncio.ensure_future(self._call(self.store.get_balance, cust_id))
+            read.add_done_callback(lambda done: self._read_done(cust_id, done))
+        else:
+            self._stats['coalesced'] += 1
+        # Shielded so one cancelled caller does not cancel the read for the others.
+        return await asyncio.shield(read)
+
+    def _read_done(self, cust_id, read):
+        """Forgets a finished read (unless a write already detached it)."""
+        if self._reads.get(cust_id) is read:
+            del self._reads[cust_id]
+        if not read.cancelled():
+            read.exception()  # retrieved here in case every waiter was cancelled
+
+    async def get_currency(self, cust_id):
+        return await self._call(self.store.get_currency, cust_id)
+
+    async def balance_as_of(self, cust_id, when):
+        return await self._call(self.store.balance_as_of, cust_id, when)
+
+    async def withdrawals_since(self, cust_id, when):
+        return await self._call(self.store.withdrawals_since, cust_id, when)
+
+    async def create_ledger(self, cust_id, balance=0, currency=DEFAULT_CURRENCY):
+        self._reads.pop(cust_id, None)
+        try:
+            return await self._call(self.store.create_ledger, cust_id, balance, currency)
+        finally:
+            self._reads.pop(cust_id, None)
+
+    async def apply_transaction(self, cust_id, kind, amount, expected=None, key=None):
+        # Detached before and after: reads already in flight may finish before
+        # the write commits, so nobody joins them once the write has completed.
+        self._reads.pop(cust_id, None)
+        try:
+            return await self._call(self.store.apply_transaction, cust_id, kind, amount, expected=expected, key=key)
+        finally:
+            self._reads.pop(cust_id, None)
+
+    def dedup_cache(self):
+        return self.store.dedup_cache()
+
+    @contextlib.asynccontextmanager
+    async def key_lock(self, key):
+        if not self.blocking:
+            # Inline backend calls never suspend, so the synchronous API's
+            # per-key lock can be held here without stalling the loop.
+            with self.store.dedup_cache().lock_for(key):
+                yield
+            return
+        # Writers in other threads or processes are caught by the backend's
+        # persisted keys (DuplicatePostingError).
+        async with self._key_locks[hash(key) % len(self._key_locks)]:
+            yield
+
+    async def get_posting(self, key):
+        return await self._call(self.store.get_posting, key)
+
+    def stats(self):
+        """Returns read counters and the number of reads in flight."""
+        return dict(self._stats, in_flight=len(self._reads))
+
+
+_loop_stores = weakref.WeakKeyDictionary()
+
+
+def get_async_store(store=None, transactions=None):
+    """Returns the asyncio backend for the running event loop.
+
+    Blocking backends get one shared adapter per event loop, so every request on
+    the loop shares its coalesced reads and its concurrency limit.
+
+    Args:
+        store (AccountStore): The synchronous backend; defaults to get_store().
+        transactions (dict): transactions_db-style dict for the in-memory backend.
+
+    Returns:
+        AsyncStore: The adapter.
+    """
+    if store is None:
+        store = get_store(transactions=transactions)
+    if not store.blocking:
+        return AsyncStore(store)
+    adapters = _loop_stores.setdefault(asyncio.get_running_loop(), {})
+    adapter = adapters.get(store)
+    if adapter is None:
+        adapter = adapters[store] = AsyncStore(store)
+    return adapter
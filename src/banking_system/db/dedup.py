@@ -0,0 +1,159 @@
+"""
+db/dedup.py
+
+Idempotency keys for single postings (deposit / withdraw).
+
+A client may send a key with each posting; a retry with the same key gets the
+original result back instead of being applied again. Recent keys live in a
+DedupCache: an LRU of at most `capacity` entries, each valid for `ttl` seconds,
+with O(1) lookups and inserts, so memory stays bounded however many keys arrive
+per day. SQLiteStore also writes every key to a posting_keys table in the same
+transaction as the posting, so a key evicted from the cache (or a retry after a
+restart, or one handled by another process) is still found there. The in-memory
+store has no such table: for it the cache is the dedup window.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from banking_system.db.locks import StripedLock
+from banking_system.db.registry import StoreRegistry
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_TTL = 86_400
+
+
+class DuplicatePostingError(Exception):
+    """Raised by a store when a posting's idempotency key was already recorded."""
+    pass
+
+
+class PostingRecord:
+    """
+    The result of a posting made under an idempotency key.
+    Methods:
+        - matches
+    """
+
+    __slots__ = ('key', 'cust_id', 'kind', 'amount', 'balance', 'created_at')
+
+    def __init__(self, key, cust_id, kind, amount, balance, created_at):
+        """Initializes a record; amount and balance are Money."""
+        self.key = key
+        self.cust_id = cust_id
+        self.kind = kind
+        self.amount = amount
+        self.balance = balance
+        self.created_at = created_at
+
+    def matches(self, cust_id, kind, amount_minor):
+        """Checks whether a retried request describes this same posting."""
+        return (self.cust_id, self.kind, self.amount.minor) == (cust_id, kind, amount_minor)
+
+    def __repr__(self):
+        return f'PostingRecord({self.key!r}, {self.cust_id!r}, {self.kind!r}, {self.amount!r})'
+
+
+class DedupCache:
+    """
+    Bounded LRU + TTL cache of idempotency key -> PostingRecord.
+    Methods:
+        - get / put
+        - records
+        - lock_for
+        - stats
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, ttl=DEFAULT_TTL):
+        """Initializes an empty cache.
+
+        Args:
+            capacity (int): Most keys kept; the least recently used go first.
+            ttl (float): Seconds a key stays valid after it was recorded.
+        """
+        if capacity < 1:
+            raise ValueError('DedupCache capacity must be at least 1')
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = StripedLock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lock_for(self, key):
+        """Returns the lock that serializes postings under one key within this process."""
+        return self._key_locks.lock_for(key)
+
+    def get(self, key, now=None):
+        """Returns the record for key, or None if it is unknown or expired."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            record, expires = entry
+            if expires <= now:
+                del self._entries[key]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return record
+
+    def put(self, key, record, now=None):
+        """Records key, evicting expired entries at the cold end and then the least recently used."""
+        now = time.time() if now is None else now
+        entries = self._entries
+        with self._lock:
+            entries[key] = (record, record.created_at + self.ttl)
+            entries.move_to_end(key)
+            while entries:
+                oldest = next(iter(entries.values()))
+                if oldest[1] > now:
+                    break
+                entries.popitem(last=False)
+                self._stats['expired'] += 1
+            while len(entries) > self.capacity:
+                entries.popitem(last=False)
+                self._stats['evicted'] += 1
+
+    def records(self, now=None):
+        """Returns the records of every unexpired key, least recently used first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [record for record, expires in self._entries.values() if expires > now]
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
+
+
+def create_dedup_cache():
+    """Builds a DedupCache sized by IDEMPOTENCY_CACHE_SIZE / IDEMPOTENCY_TTL in config/settings.py."""
+    config = _config()
+    return DedupCache(config.IDEMPOTENCY_CACHE_SIZE, config.IDEMPOTENCY_TTL)
+
+
+_caches = StoreRegistry(lambda store: create_dedup_cache())
+
+
+def posting_cache(store):
+    """Returns the dedup cache for a transactions_db-style dict.
+
+    As with the transfer journal, each dict keeps its own cache for as long as
+    the process runs, so using one store never drops another store's keys.
+    """
+    return _caches.get(store)
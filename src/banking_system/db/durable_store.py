@@ -0,0 +1,519 @@
+"""
+db/durable_store.py
+
+MemoryStore made durable with a write-ahead log (db/wal.py) and checkpoints.
+
+Every mutation (put_customer, delete_customer, create_ledger, and the posting
+methods) is applied to the dicts and encoded as one log frame while its account
+locks are held, then returns only once that frame is on disk; concurrent writers
+share fsyncs through the log's group commit. A mutation that touches several
+accounts (a batch, a transfer) is a single frame, so it is recovered whole or
+not at all. Idempotency keys (of keyed postings and the transfer journal) are
+written in the frame of the entries they produced, so a retry after a restart
+is still answered from them instead of being applied again. Posting keys are
+kept in the store's bounded dedup cache (db/dedup.py), as for MemoryStore, so
+they are answered for IDEMPOTENCY_TTL seconds and at most IDEMPOTENCY_CACHE_SIZE
+of them are held; a checkpoint writes only the keys still live there.
+
+A checkpoint writes the full state (customer records, ledgers, idempotency
+keys, and the highest customer ID issued) to checkpoint.pkl with the LSN it covers and deletes the log segments before it.
+Checkpoints run when WAL_CHECKPOINT_BYTES of log have been written since the last
+one; the state is copied under the locks and serialized outside them. Recovery
+loads the checkpoint and replays only the frames after its LSN.
+
+Selected with DATABASE_URL=wal:///path/to/directory.
+"""
+
+import json
+import os
+import pickle
+import struct
+import threading
+import time
+
+import numpy as np
+
+from banking_system.db.accounts_store import account_indexes
+from banking_system.db.dedup import DuplicatePostingError, PostingRecord
+from banking_system.db.ledger import Ledger, advance_txn_ids, last_txn_id
+from banking_system.db.sequence import BASE_CUST_ID
+from banking_system.db.storage import MemoryStore, _account_locks
+from banking_system.db.transfers import TransferRecord, transfer_journal
+from banking_system.db.wal import WALError, WriteAheadLog, fsync_directory, iter_frames, list_segments
+from banking_system.model.customer import Customer
+from banking_system.model.money import DEFAULT_CURRENCY, Money
+
+CHECKPOINT_FILE = 'checkpoint.pkl'
+CHECKPOINT_HEADER = struct.Struct('<4sHQQ')
+CHECKPOINT_MAGIC = b'BKCP'
+CHECKPOINT_VERSION = 3
+DEFAULT_CHECKPOINT_BYTES = 256 * 1024 * 1024
+# Single-posting rows recovery holds back before appending them to their ledgers.
+REPLAY_BATCH_ROWS = 1_000_000
+
+# Frame payloads: an op code, then op-specific fields.
+OP_CUSTOMER = 1
+OP_DELETE_CUSTOMER = 2
+OP_LEDGER = 3
+OP_ENTRIES = 4
+OP_KEYED_ENTRIES = 5
+
+_OP = struct.Struct('<BH')         # op, cust_id length (or account count for OP_ENTRIES)
+_OPENING = struct.Struct('<q3s')   # opening balance in minor units, currency
+_ACCOUNT = struct.Struct('<HI')    # cust_id length, entry count
+_KEYED = struct.Struct('<BI')      # OP_KEYED_ENTRIES, length of the OP_ENTRIES payload it wraps
+
+
+def _encode(op, cust_id, body=b''):
+    """Encodes a single-account frame payload."""
+    key = cust_id.encode()
+    return _OP.pack(op, len(key)) + key + body
+
+
+def _encode_entries(groups):
+    """Encodes new ledger entries of one or more accounts as one payload.
+
+    Args:
+        groups (list): (cust_id, count, (timestamps, amounts, kinds, txn_ids)) with column bytes.
+    """
+    parts = [_OP.pack(OP_ENTRIES, len(groups))]
+    for cust_id, count, columns in groups:
+        key = cust_id.encode()
+        parts.append(_ACCOUNT.pack(len(key), count))
+        parts.append(key)
+        parts.extend(columns)
+    return b''.join(parts)
+
+
+def _key_rows(records):
+    """Flattens PostingRecords and TransferRecords into JSON- and pickle-friendly rows."""
+    rows = []
+    for record in records:
+        if isinstance(record, TransferRecord):
+            rows.append(['t', record.key, record.source, record.destination, record.amount.minor,
+                         record.source_balance.minor, record.destination_balance.minor,
+                         record.amount.currency, record.created_at])
+        else:
+            rows.append(['p', record.key, record.cust_id, record.kind, record.amount.minor,
+                         record.balance.minor, record.amount.currency, record.created_at])
+    return rows
+
+
+def _key_records(rows):
+    """Rebuilds the records flattened by _key_rows."""
+    records = []
+    for row in rows:
+        if row[0] == 't':
+            _, key, source, destination, amount, source_balance, destination_balance, currency, created_at = row
+            records.append(TransferRecord(
+                key, source, destination, Money(amount, currency),
+                Money(source_balance, currency), Money(destination_balance, currency), created_at,
+            ))
+        else:
+            _, key, cust_id, kind, amount, balance, currency, created_at = row
+            records.append(PostingRecord(key, cust_id, kind, Money(amount, currency), Money(balance, currency), created_at))
+    return records
+
+
+def _encode_keyed(entries, records):
+    """Wraps an OP_ENTRIES payload with the idempotency keys it settled, as one payload."""
+    return _KEYED.pack(OP_KEYED_ENTRIES, len(entries)) + entries + json.dumps(
+        _key_rows(records), separators=(',', ':')
+    ).encode()
+
+
+# One single-entry OP_ENTRIES body: the four columns of one row, back to back.
+_ROW = np.dtype([('timestamp', '<i8'), ('amount', '<i8'), ('kind', 'i1'), ('txn_id', '<i8')])
+
+
+class _Replayer:
+    """Applies frame payloads to the dicts during recovery.
+
+    Most frames are single postings. Their 25-byte rows are collected per
+    account and appended with one extend_raw per account, instead of four
+    small array appends per frame; anything else that touches the account
+    first flushes what is pending for it, so entries keep their log order.
+    """
+
+    def __init__(self, accounts, transactions, keys):
+        self.accounts = accounts
+        self.transactions = transactions
+        self.keys = keys
+        self.pending = {}
+        self.pending_rows = 0
+        self.highest_txn = 0
+        self.last_cust_id = BASE_CUST_ID
+
+    def apply(self, payload):
+        op, size = _OP.unpack_from(payload)
+        if op == OP_ENTRIES:
+            if size == 1:
+                key_length, count = _ACCOUNT.unpack_from(payload, _OP.size)
+                if count == 1:
+                    start = _OP.size + _ACCOUNT.size
+                    key = payload[start:start + key_length]
+                    rows = self.pending.get(key)
+                    if rows is None:
+                        rows = self.pending[key] = []
+                    rows.append(payload[start + key_length:])
+                    self.pending_rows += 1
+                    if self.pending_rows >= REPLAY_BATCH_ROWS:
+                        self.flush()
+                    return
+            self._apply_entries(payload, size)
+            return
+        if op == OP_KEYED_ENTRIES:
+            _, length = _KEYED.unpack_from(payload)
+            start = _KEYED.size + length
+            if length:
+                self.apply(payload[_KEYED.size:start])
+            self.keys.extend(_key_records(json.loads(payload[start:])))
+            return
+
+        start = _OP.size + size
+        key = payload[_OP.size:start]
+        cust_id = key.decode()
+        if op in (OP_CUSTOMER, OP_DELETE_CUSTOMER) and cust_id.isdigit():
+            self.last_cust_id = max(self.last_cust_id, int(cust_id))
+        if op == OP_CUSTOMER:
+            self.accounts[cust_id] = Customer.from_record(json.loads(payload[start:]))
+        elif op == OP_DELETE_CUSTOMER:
+            self.accounts.pop(cust_id, None)
+        elif op == OP_LEDGER:
+            self.flush(key)  # entries of the ledger being replaced
+            opening, currency = _OPENING.unpack_from(payload, start)
+            currency = currency.decode()
+            self.transactions[cust_id] = Ledger(Money(opening, currency), currency)
+        else:
+            raise WALError(f'Unknown write-ahead log op {op}')
+
+    def _apply_entries(self, payload, groups):
+        """Applies a multi-entry or multi-account frame, column by column."""
+        position = _OP.size
+        for _ in range(groups):
+            key_length, count = _ACCOUNT.unpack_from(payload, position)
+            position += _ACCOUNT.size
+            key = payload[position:position + key_length]
+            position += key_length
+            self.flush(key)
+            columns = []
+            for width in (8, 8, 1, 8):
+                columns.append(payload[position:position + width * count])
+                position += width * count
+            self.transactions[key.decode()].extend_raw(*columns)
+            self.highest_txn = max(self.highest_txn, int(np.frombuffer(columns[3], dtype=np.int64).max()))
+
+    def flush(self, key=None):
+        """Appends the pending rows of one account (key) or of every account."""
+        keys = list(self.pending) if key is None else [key] if key in self.pending else []
+        for key in keys:
+            chunks = self.pending.pop(key)
+            self.pending_rows -= len(chunks)
+            rows = np.frombuffer(b''.join(chunks), dtype=_ROW)
+            self.transactions[key.decode()].extend_raw(
+                rows['timestamp'].tobytes(), rows['amount'].tobytes(), rows['kind'].tobytes(), rows['txn_id'].tobytes()
+            )
+            self.highest_txn = max(self.highest_txn, int(rows['txn_id'].max()))
+
+
+def write_checkpoint(directory, lsn, txn_id, accounts, ledgers, keys=(), last_cust_id=BASE_CUST_ID):
+    """Atomically replaces the checkpoint in directory (write, fsync, rename).
+
+    keys holds the PostingRecords and TransferRecords of the idempotency keys;
+    last_cust_id is the highest customer ID issued, closed accounts included.
+    """
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as handle:
+        handle.write(CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, lsn, txn_id))
+        pickle.dump((accounts, ledgers, _key_rows(keys), last_cust_id), handle, protocol=pickle.HIGHEST_PROTOCOL)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(directory)
+
+
+def read_checkpoint(directory):
+    """Returns (lsn, txn_id, accounts, ledgers, keys, last_cust_id) from the checkpoint in directory, or None.
+
+    A version 1 checkpoint predates persisted idempotency keys and has none;
+    before version 3 last_cust_id is not recorded and is BASE_CUST_ID.
+    """
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as handle:
+        magic, version, lsn, txn_id = CHECKPOINT_HEADER.unpack(handle.read(CHECKPOINT_HEADER.size))
+        if magic != CHECKPOINT_MAGIC or not 1 <= version <= CHECKPOINT_VERSION:
+            raise WALError(f'{path} is not a version {CHECKPOINT_VERSION} checkpoint')
+        state = pickle.load(handle)
+    accounts, ledgers = state[:2]
+    keys = _key_records(state[2]) if version > 1 else []
+    last_cust_id = state[3] if version > 2 else BASE_CUST_ID
+    return lsn, txn_id, accounts, ledgers, keys, last_cust_id
+
+
+def recover(directory, accounts, transactions, keys=None):
+    """Rebuilds the dicts from the checkpoint and the log frames after it.
+
+    Without a checkpoint the frames are replayed on top of the dicts' current
+    contents. Segments that end at or before the checkpoint LSN are not read.
+
+    Args:
+        directory (str): Log and checkpoint directory.
+        accounts (dict): accounts_db-style dict to fill.
+        transactions (dict): transactions_db-style dict to fill.
+        keys (list): Optional list to extend with the recovered PostingRecords
+            and TransferRecords of idempotency keys, oldest first.
+
+    Returns:
+        dict: checkpoint_lsn (None without a checkpoint), last_lsn, frames
+            replayed, seconds taken, tail: (last_lsn, valid_bytes) of the
+            newest segment, or None if there are no segments, and last_cust_id:
+            the highest customer ID ever written, closed accounts included.
+
+    Raises:
+        WALError: If frames are missing between the checkpoint and the end of the log.
+    """
+    started = time.perf_counter()
+    tail = None
+    checkpoint = read_checkpoint(directory)
+    checkpoint_lsn = None
+    highest_txn = 0
+    last_cust_id = BASE_CUST_ID
+    keys = [] if keys is None else keys
+    if checkpoint is not None:
+        checkpoint_lsn, highest_txn, saved_accounts, saved_ledgers, saved_keys, last_cust_id = checkpoint
+        accounts.clear()
+        accounts.update(saved_accounts)
+        transactions.clear()
+        transactions.update(saved_ledgers)
+        keys.extend(saved_keys)
+
+    replayer = _Replayer(accounts, transactions, keys)
+    apply = replayer.apply
+    expected = (checkpoint_lsn or 0) + 1
+    first_replayed = expected
+    segments = list_segments(directory)
+    for index, (first_lsn, path) in enumerate(segments):
+        if index + 1 < len(segments) and segments[index + 1][0] <= expected:
+            continue  # every frame in this segment is covered by the checkpoint
+        tail = (0, 0)
+        for lsn, payload, end in iter_frames(path):
+            tail = (lsn, end)
+            if lsn < expected:
+                continue
+            if lsn != expected:
+                raise WALError(f'Write-ahead log is missing frames {expected}..{lsn - 1}')
+            apply(payload)
+            expected += 1
+    replayer.flush()
+
+    account_indexes(accounts).rebuild()
+    advance_txn_ids(max(highest_txn, replayer.highest_txn))
+    return {
+        'checkpoint_lsn': checkpoint_lsn,
+        'last_lsn': expected - 1,
+        'frames': expected - first_replayed,
+        'seconds': time.perf_counter() - started,
+        'tail': tail,
+        'last_cust_id': max(last_cust_id, replayer.last_cust_id),
+    }
+
+
+class DurableStore(MemoryStore):
+    """
+    MemoryStore whose mutations are write-ahead logged and checkpointed.
+    Methods:
+        - checkpoint
+        - close
+    Attributes:
+        - wal: the db.wal.WriteAheadLog
+        - recovery: what recover() found when the store was opened
+    """
+
+    def __init__(self, directory, accounts=None, transactions=None, sync=True, commit_delay=0.0,
+                 checkpoint_bytes=DEFAULT_CHECKPOINT_BYTES):
+        """Opens (or creates) the store in directory and recovers its state into the dicts.
+
+        Args:
+            directory (str): Directory for log segments and the checkpoint.
+            accounts (dict): accounts_db-style dict; defaults to accounts_store.accounts_db.
+            transactions (dict): transactions_db-style dict; defaults to accounts_store.transactions_db.
+            sync (bool): fsync each group commit (see WriteAheadLog).
+            commit_delay (float): Seconds a group commit waits for more writers.
+            checkpoint_bytes (int): Log volume after which a checkpoint is taken;
+                None disables automatic checkpoints.
+        """
+        super().__init__(accounts, transactions)
+        self.directory = directory
+        self.checkpoint_bytes = checkpoint_bytes
+        os.makedirs(directory, exist_ok=True)
+        keys = []
+        self.recovery = recover(directory, self.accounts, self.transactions, keys)
+        self._last_cust_id = self.recovery['last_cust_id']
+        postings = self.dedup_cache()
+        for record in keys:
+            if isinstance(record, PostingRecord):
+                # Keys past their TTL are dropped as they are put back.
+                postings.put(record.key, record)
+        transfer_journal(self.transactions).add(record for record in keys if isinstance(record, TransferRecord))
+        self.wal = WriteAheadLog(directory, sync=sync, commit_delay=commit_delay, tail=self.recovery['tail'])
+        self._checkpoint_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._checkpoint_pending = False
+        self._checkpointed_at = 0
+        if self.recovery['checkpoint_lsn'] is None:
+            # Capture the starting contents of the dicts, which the log does not hold.
+            self.checkpoint()
+
+    def _commit(self, lsn):
+        """Waits for lsn to be durable, then starts a checkpoint if enough log has built up."""
+        if lsn is None:
+            return
+        self.wal.wait(lsn)
+        if self.checkpoint_bytes is None or self.wal.appended_bytes - self._checkpointed_at < self.checkpoint_bytes:
+            return
+        with self._pending_lock:
+            if self._checkpoint_pending:
+                return
+            self._checkpoint_pending = True
+        threading.Thread(target=self._background_checkpoint, name='wal-checkpoint', daemon=True).start()
+
+    def _background_checkpoint(self):
+        try:
+            self.checkpoint()
+        finally:
+            with self._pending_lock:
+                self._checkpoint_pending = False
+
+    def _lengths(self, cust_ids):
+        """Returns the entry count of each existing ledger, before a posting."""
+        return {cust_id: len(self._ledger(cust_id)) for cust_id in cust_ids if cust_id in self.transactions}
+
+    def _log_entries(self, lengths, keys=()):
+        """Logs the entries added since _lengths as one frame; returns its LSN (None if nothing changed).
+
+        keys holds the records of the idempotency keys the entries were made
+        under; they are written in the same frame.
+        """
+        groups = []
+        for cust_id, start in lengths.items():
+            ledger = self.transactions[cust_id]
+            if len(ledger) > start:
+                groups.append((cust_id, len(ledger) - start, ledger.raw_entries(start)))
+        if keys:
+            return self.wal.append(_encode_keyed(_encode_entries(groups) if groups else b'', keys))
+        return self.wal.append(_encode_entries(groups)) if groups else None
+
+    def _track_cust_id(self, cust_id):
+        """Raises the highest customer ID written, which checkpoints carry across restarts."""
+        if str(cust_id).isdigit():
+            self._last_cust_id = max(self._last_cust_id, int(cust_id))
+
+    def _put_customer(self, cust_id, record):
+        """Stores and logs a customer record; returns the frame's LSN."""
+        with _account_locks.lock_for(cust_id):
+            super().put_customer(cust_id, record)
+            self._track_cust_id(cust_id)
+            return self.wal.append(_encode(OP_CUSTOMER, cust_id, json.dumps(dict(record), separators=(',', ':')).encode()))
+
+    def _create_ledger(self, cust_id, balance, currency):
+        """Creates and logs an empty ledger; returns the frame's LSN."""
+        with _account_locks.lock_for(cust_id):
+            super().create_ledger(cust_id, balance, currency)
+            ledger = self.transactions[cust_id]
+            return self.wal.append(_encode(OP_LEDGER, cust_id, _OPENING.pack(ledger.opening_cents, ledger.currency.encode())))
+
+    def put_customer(self, cust_id, record):
+        self._commit(self._put_customer(cust_id, record))
+
+    def id_sequence(self):
+        sequence = super().id_sequence()
+        # Closed customers are gone from the dicts, but their IDs stay retired.
+        sequence.advance_to(self._last_cust_id)
+        return sequence
+
+    def delete_customer(self, cust_id):
+        with _account_locks.lock_for(cust_id):
+            record = super().delete_customer(cust_id)
+            lsn = self.wal.append(_encode(OP_DELETE_CUSTOMER, cust_id))
+        self._commit(lsn)
+        return record
+
+    def create_ledger(self, cust_id, balance=0, currency=DEFAULT_CURRENCY):
+        self._commit(self._create_ledger(cust_id, balance, currency))
+
+    def insert_customers(self, customers, openings):
+        # Two frames per customer, but a single wait: the chunk shares one group commit.
+        lsn = None
+        for (cust_id, record), opening in zip(customers, openings):
+            self._put_customer(cust_id, record)
+            lsn = self._create_ledger(cust_id, opening, opening.currency)
+        self._commit(lsn)
+
+    def apply_transaction(self, cust_id, kind, amount, expected=None, key=None):
+        with _account_locks.lock_for(cust_id):
+            if key is not None and self.get_posting(key) is not None:
+                raise DuplicatePostingError(key)
+            lengths = self._lengths([cust_id])
+            balance = super().apply_transaction(cust_id, kind, amount, expected=expected, key=key)
+            records = ()
+            if key is not None:
+                record = PostingRecord(key, cust_id, kind, Money.of(amount, balance.currency), balance, time.time())
+                self.dedup_cache().put(key, record)
+                records = (record,)
+            lsn = self._log_entries(lengths, records)
+        self._commit(lsn)
+        return balance
+
+    def get_posting(self, key):
+        return self.dedup_cache().get(key)
+
+    def apply_batch(self, cust_ids, counts, codes, deltas, expected=None):
+        with _account_locks.hold(*cust_ids):
+            lengths = self._lengths(cust_ids)
+            balances = super().apply_batch(cust_ids, counts, codes, deltas, expected=expected)
+            lsn = self._log_entries(lengths)
+        self._commit(lsn)
+        return balances
+
+    def apply_transfers(self, transfers, expected=None):
+        accounts = {cust_id for transfer in transfers for cust_id in transfer[1:3]}
+        keys = [transfer[0] for transfer in transfers if transfer[0] is not None]
+        with _account_locks.hold(*accounts, *keys, *(expected or ())):
+            lengths = self._lengths(accounts)
+            records, replayed = super().apply_transfers(transfers, expected=expected)
+            settled = [
+                record for record, was_replayed in zip(records, replayed) if record.key is not None and not was_replayed
+            ]
+            lsn = self._log_entries(lengths, settled)
+        self._commit(lsn)
+        return records, replayed
+
+    def checkpoint(self):
+        """Writes the full state to the checkpoint and drops the log segments it covers.
+
+        Writers are paused only while the state is copied; it is serialized
+        and synced to disk after they resume.
+
+        Returns:
+            int: The LSN the checkpoint covers.
+        """
+        with self._checkpoint_lock:
+            with _account_locks.hold_all():
+                lsn = self.wal.rotate()
+                accounts = {cust_id: Customer.from_record(record) for cust_id, record in self.accounts.items()}
+                ledgers = {cust_id: self._ledger(cust_id).copy() for cust_id in list(self.transactions)}
+                keys = self.dedup_cache().records() + transfer_journal(self.transactions).records()
+                last_cust_id = self._last_cust_id
+                txn_id = last_txn_id()
+                self._checkpointed_at = self.wal.appended_bytes
+            write_checkpoint(self.directory, lsn, txn_id, accounts, ledgers, keys, last_cust_id)
+            self.wal.drop_segments_before(lsn)
+            return lsn
+
+    def close(self):
+        """Flushes the log and closes it; a final checkpoint is not taken."""
+        with self._checkpoint_lock:
+            self.wal.close()
@@ -0,0 +1,85 @@
+"""
+db/locks.py
+
+Striped per-account locks.
+
+A fixed array of locks is shared by all accounts: an account always maps to the
+same stripe (hash of cust_id modulo the stripe count), so postings to different
+accounts usually proceed in parallel while postings to the same account are
+serialized, without keeping a lock object per account. Operations that touch
+several accounts take every stripe they need in ascending stripe order, which
+rules out lock-order deadlocks between them.
+"""
+
+import threading
+
+DEFAULT_STRIPES = 256
+
+
+class StripedLock:
+    """
+    Fixed set of re-entrant locks keyed by hash.
+    Methods:
+        - lock_for
+        - hold / hold_all
+    """
+
+    def __init__(self, stripes=DEFAULT_STRIPES):
+        """Initializes the stripes.
+
+        Args:
+            stripes (int): Number of locks; more stripes mean fewer false conflicts.
+        """
+        if stripes < 1:
+            raise ValueError('StripedLock needs at least one stripe')
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def __len__(self):
+        return len(self._locks)
+
+    def stripe(self, key):
+        """Returns the stripe index for key."""
+        return hash(key) % len(self._locks)
+
+    def lock_for(self, key):
+        """Returns the lock guarding key (usable directly as a context manager)."""
+        return self._locks[hash(key) % len(self._locks)]
+
+    def hold(self, *keys):
+        """Returns a context manager holding the locks of every key.
+
+        Stripes are acquired in ascending order and each at most once, so two
+        callers locking the same accounts in different argument order cannot
+        deadlock. Take every lock an operation needs in one hold() call.
+        """
+        return _Held(self._locks, sorted({self.stripe(key) for key in keys}))
+
+    def hold_all(self):
+        """Returns a context manager holding every stripe (a consistent snapshot)."""
+        return _Held(self._locks, range(len(self._locks)))
+
+
+class _Held:
+    """Acquires a sorted set of stripes on enter and releases them on exit."""
+
+    __slots__ = ('_locks', '_indexes', '_acquired')
+
+    def __init__(self, locks, indexes):
+        self._locks = locks
+        self._indexes = indexes
+        self._acquired = []
+
+    def __enter__(self):
+        try:
+            for index in self._indexes:
+                self._locks[index].acquire()
+                self._acquired.append(index)
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        while self._acquired:
+            self._locks[self._acquired.pop()].release()
+        return False
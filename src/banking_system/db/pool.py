@@ -0,0 +1,212 @@
+"""
+db/pool.py
+
+Bounded connection pool for the SQL-backed store.
+
+Connections are opened lazily up to pool_size and reused afterwards, so request
+handlers pay connection setup once per pooled connection instead of once per
+operation. A checkout waits at most `timeout` seconds, optionally runs a cheap
+health check (pre-ping) and replaces dead connections. Sessions are tracked with
+a context variable, so nested store calls on the same thread or asyncio task
+reuse the connection they already hold.
+"""
+
+import contextlib
+import contextvars
+import queue
+import threading
+import time
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 30.0
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the checkout timeout."""
+    pass
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of DB-API connections.
+    Methods:
+        - checkout / checkin
+        - session
+        - stats
+        - close
+    """
+
+    def __init__(self, connect, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT, pre_ping=True):
+        """Initializes the pool.
+
+        Args:
+            connect (callable): Opens and returns a new connection.
+            size (int): Maximum number of open connections.
+            timeout (float): Seconds a checkout waits before PoolTimeoutError.
+            pre_ping (bool): Whether to run a health check on every checkout.
+        """
+        if size < 1:
+            raise ValueError('Pool size must be at least 1')
+
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._current = contextvars.ContextVar(f'pool_session_{id(self)}', default=None)
+        self._closed = False
+
+        # Metrics
+        self._opened = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._discarded = 0
+        self._timeouts = 0
+
+    def checkout(self):
+        """Takes a connection from the pool, opening one if the pool is not full.
+
+        Returns:
+            A live DB-API connection.
+
+        Raises:
+            PoolTimeoutError: If the pool stays exhausted for `timeout` seconds.
+        """
+        if self._closed:
+            raise RuntimeError('Connection pool is closed')
+
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(f'No connection available within {self.timeout}s (pool size {self.size})')
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._take_live_connection()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def checkin(self, conn, discard=False):
+        """Returns a connection to the pool.
+
+        Args:
+            conn: A connection obtained from checkout.
+            discard (bool): Close the connection instead of reusing it.
+        """
+        with self._lock:
+            self._in_use -= 1
+        if discard or self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    @contextlib.contextmanager
+    def session(self):
+        """Yields the connection held by the current thread/task, checking one out if needed.
+
+        Nested sessions share the outer connection, so a store operation that calls
+        another store operation does not take a second pooled connection.
+        """
+        holder = self._current.get()
+        if holder is not None:
+            holder[1] += 1
+            try:
+                yield holder[0]
+            finally:
+                holder[1] -= 1
+            return
+
+        conn = self.checkout()
+        token = self._current.set([conn, 1])
+        broken = False
+        try:
+            yield conn
+        except BaseException as exc:
+            broken = not isinstance(exc, Exception) or self._is_disconnect(exc)
+            raise
+        finally:
+            self._current.reset(token)
+            self.checkin(conn, discard=broken)
+
+    def stats(self):
+        """Returns a snapshot of pool metrics.
+
+        Returns:
+            dict: size, open, in_use, idle, checkouts, timeouts, discarded,
+                wait_avg_ms, and wait_max_ms.
+        """
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._opened,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'wait_avg_ms': self._wait_total / self._checkouts * 1e3 if self._checkouts else 0.0,
+                'wait_max_ms': self._wait_max * 1e3,
+            }
+
+    def close(self):
+        """Closes idle connections; checked-out ones are closed when returned."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def _take_live_connection(self):
+        """Reuses an idle connection that passes the health check, or opens a new one."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if not self.pre_ping or self._ping(conn):
+                return conn
+            self._discard(conn)
+
+        conn = self._connect()
+        with self._lock:
+            self._opened += 1
+        return conn
+
+    def _ping(self, conn):
+        """Runs a trivial query to check that a connection is still usable."""
+        try:
+            conn.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        """Closes a connection and drops it from the pool."""
+        with self._lock:
+            self._opened -= 1
+            self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_disconnect(exc):
+        """Checks whether an error means the connection itself is unusable."""
+        return 'closed' in str(exc).lower()
@@ -0,0 +1,49 @@
+"""
+db/registry.py
+
+Per-dict state for the in-memory stores.
+
+MemoryStore objects are cheap views built per call over accounts_db /
+transactions_db style dicts, so state that must outlive one call (the account
+indexes, the posting dedup cache, the transfer journal, the customer ID
+sequence) belongs to the dict,
+not the view. A StoreRegistry maps each dict, by identity, to its own state, so
+two stores alive at once never share or reset each other's. Plain dicts cannot
+be weakly referenced, so the registry keeps the dicts it has seen alive; a
+process binds only a handful (the module stores, shard stores, and the dicts
+tests patch in).
+"""
+
+import threading
+
+
+class StoreRegistry:
+    """
+    Identity-keyed map of dict -> state, built by a factory on first use.
+    Methods:
+        - get
+    """
+
+    def __init__(self, factory):
+        """Initializes an empty registry.
+
+        Args:
+            factory (callable): Called with a dict (and get's extra args) to build its state.
+        """
+        self._factory = factory
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, store, *args):
+        """Returns the state for store, building it on first use; args go to the factory then."""
+        entry = self._entries.get(id(store))
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(id(store))
+                if entry is None:
+                    # The entry holds store, so its id cannot be reused by another dict.
+                    entry = self._entries[id(store)] = (store, self._factory(store, *args))
+        return entry[1]
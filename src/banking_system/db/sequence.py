@@ -0,0 +1,169 @@
+"""
+db/sequence.py
+
+Monotonic customer ID sequence used by BankAccount.create_cust_id.
+
+The sequence is seeded once from the highest integer key in accounts_db and then
+hands out IDs from memory, so signup cost no longer grows with the customer book.
+When a state file is configured, the sequence persists a high-water mark ahead of
+the IDs it hands out (the same block-caching scheme database sequences use), so a
+restarted process never reissues an ID even if it crashed mid-block.
+"""
+
+import os
+import threading
+
+from banking_system.db.registry import StoreRegistry
+
+# Customer IDs start at 1001, matching the seeded record in accounts_db.
+BASE_CUST_ID = 1000
+DEFAULT_CACHE_SIZE = 100
+
+
+class IdSequence:
+    """
+    Thread-safe, monotonic integer ID allocator.
+
+    Methods:
+        - next_id
+        - reserve
+        - advance_to
+        - from_store
+    """
+
+    def __init__(self, last_id=BASE_CUST_ID, state_path=None, cache_size=DEFAULT_CACHE_SIZE):
+        """Initializes the sequence so the next ID handed out is last_id + 1.
+
+        Args:
+            last_id (int): The most recently used ID.
+            state_path (str): Optional file the high-water mark is persisted to.
+            cache_size (int): How many IDs are claimed per write of the state file.
+        """
+        if cache_size < 1:
+            raise ValueError('cache_size must be at least 1')
+
+        self._lock = threading.Lock()
+        self._state_path = state_path
+        self._cache_size = cache_size
+        self._last = max(last_id, self._read_high_water())
+        # Everything up to the persisted high-water mark may already have been
+        # handed out by a previous process, so we resume above it.
+        self._high_water = self._last
+
+    @classmethod
+    def from_store(cls, store, state_path=None, cache_size=DEFAULT_CACHE_SIZE):
+        """Builds a sequence from the highest integer key in a customer store.
+
+        This is the only place the store is scanned; it runs once at startup.
+
+        Args:
+            store (dict): Mapping of customer IDs to customer records.
+            state_path (str): Optional file the high-water mark is persisted to.
+            cache_size (int): How many IDs are claimed per write of the state file.
+
+        Returns:
+            IdSequence: A sequence positioned after the highest existing ID.
+        """
+        max_id = BASE_CUST_ID
+        for cust_id in store.keys():
+            try:
+                cust_id_int = int(cust_id)
+            except (ValueError, TypeError):
+                # Skip keys that can't be converted to integers
+                continue
+            if cust_id_int > max_id:
+                max_id = cust_id_int
+        return cls(max_id, state_path=state_path, cache_size=cache_size)
+
+    @property
+    def last_id(self):
+        """Returns the most recently allocated ID."""
+        return self._last
+
+    def next_id(self):
+        """Allocates and returns the next ID in the sequence."""
+        return self.reserve(1)[0]
+
+    def reserve(self, count):
+        """Reserves a contiguous block of IDs for batch onboarding.
+
+        Args:
+            count (int): Number of IDs to reserve. Must be positive.
+
+        Returns:
+            range: The reserved IDs, in ascending order.
+
+        Raises:
+            ValueError: If count is not positive.
+        """
+        if count < 1:
+            raise ValueError('count must be positive')
+
+        with self._lock:
+            first = self._last + 1
+            self._last += count
+            if self._last > self._high_water:
+                self._claim(self._last + self._cache_size)
+            return range(first, self._last + 1)
+
+    def advance_to(self, cust_id):
+        """Moves the sequence forward so that cust_id is never handed out.
+
+        Used when a record is inserted with an explicit ID outside the sequence.
+
+        Args:
+            cust_id (int): An ID that is already in use.
+        """
+        with self._lock:
+            if cust_id > self._last:
+                self._last = cust_id
+                if self._last > self._high_water:
+                    self._claim(self._last + self._cache_size)
+
+    def _claim(self, high_water):
+        """Persists a new high-water mark before any ID below it is handed out."""
+        if self._state_path:
+            tmp_path = f'{self._state_path}.tmp'
+            with open(tmp_path, 'w') as handle:
+                handle.write(str(high_water))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, self._state_path)
+        self._high_water = high_water
+
+    def _read_high_water(self):
+        """Reads the persisted high-water mark, or BASE_CUST_ID if there is none."""
+        if not self._state_path or not os.path.exists(self._state_path):
+            return BASE_CUST_ID
+        with open(self._state_path) as handle:
+            content = handle.read().strip()
+        return int(content) if content else BASE_CUST_ID
+
+
+_sequences = StoreRegistry(
+    lambda store, state_path=None: IdSequence.from_store(store, state_path=state_path or _config().CUST_ID_SEQUENCE_PATH)
+)
+
+
+def customer_id_sequence(store, state_path=None):
+    """Returns the ID sequence for a customer store, building it on first use.
+
+    Each accounts_db-style dict keeps its own sequence for as long as the
+    process runs, so using one store never rescans or rewinds another's: an
+    ID handed out (even one whose customer was since deleted) is not reissued.
+
+    Args:
+        store (dict): Mapping of customer IDs to customer records.
+        state_path (str): Optional override for CUST_ID_SEQUENCE_PATH in
+            config/settings.py; used when the store's sequence is built.
+
+    Returns:
+        IdSequence: The sequence of store.
+    """
+    return _sequences.get(store, state_path)
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
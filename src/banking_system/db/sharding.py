@@ -0,0 +1,717 @@
+"""
+db/sharding.py
+
+Sharded account store: customers partitioned by cust_id across worker processes.
+
+Each shard is a process of its own that owns one ordinary backend (a fresh
+MemoryStore by default, or any DATABASE_URL) and serves requests from a
+multiprocessing pipe. ShardedStore is the AccountStore the model talks to: it
+routes each per-account call made by BankAccount and AccountTransactions to the
+shard that owns the cust_id, fans lookups by name or account number out to every
+shard, and splits batches into one sub-batch per shard. A fan-out sends to every
+shard before it waits for any reply, so the shards work in parallel.
+
+Ownership comes from a consistent-hash ring (HashRing). Each shard has many
+points on a ring of 64-bit hashes, and a cust_id belongs to the first point
+after its own hash. A new shard takes over only the keys just before its own
+points, about 1/(N+1) of the book, and add_shard moves exactly those.
+
+Operations that write to accounts on more than one shard (batches and
+transfers) use two-phase commit:
+
+    1. prepare: every participant checks its accounts (ledger exists, balance
+       as expected) and votes; nothing is written
+    2. commit: if every vote was yes, every participant applies its part with
+       apply_batch; otherwise each participant that voted is told to abort
+
+The coordinator holds the accounts' stripe locks from prepare to commit, so no
+other call through this ShardedStore can change them in between. The decision
+is not logged: if a shard process dies between the commits, PartialCommitError
+reports which shards applied their part.
+
+URLs (DATABASE_URL):
+
+    shards://4                                 -> 4 in-memory shards
+    shards://4/sqlite:///data/bank-{shard}.db  -> 4 SQLite shards, one file each
+"""
+
+import hashlib
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+from banking_system.db.dedup import create_dedup_cache
+from banking_system.db.ledger import DEPOSIT, WITHDRAW, LedgerColumns
+from banking_system.db.locks import StripedLock
+from banking_system.db.sequence import BASE_CUST_ID, IdSequence
+from banking_system.db.storage import (
+    MEMORY_URL,
+    SCAN_CHUNK_ACCOUNTS,
+    AccountNumberView,
+    AccountStore,
+    ConcurrentUpdateError,
+    MemoryStore,
+    backend_options,
+    create_store,
+)
+from banking_system.db.transfers import TransferJournal, TransferRecord, net_positions, resolve_repeats, split_replays
+from banking_system.events.event_log import get_event_log
+from banking_system.model.money import DEFAULT_CURRENCY, Money
+
+DEFAULT_VIRTUAL_NODES = 64
+SHUTDOWN_TIMEOUT = 5.0
+
+
+class PartialCommitError(Exception):
+    """Raised when a two-phase operation was committed by some shards and failed on others."""
+    pass
+
+
+def _ring_hash(key):
+    """Returns the 64-bit ring position of a string key."""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Consistent-hash ring assigning keys to shards.
+
+    Rings are immutable: with_shard returns a new ring, so a reader holding a
+    ring sees one consistent assignment.
+    Methods:
+        - shard_for
+        - with_shard
+    Attributes:
+        - shards: shard numbers on the ring, ascending
+        - virtual_nodes: ring points per shard
+    """
+
+    def __init__(self, shards, virtual_nodes=DEFAULT_VIRTUAL_NODES):
+        """Initializes the ring with virtual_nodes points for each shard number."""
+        self.shards = sorted(shards)
+        self.virtual_nodes = virtual_nodes
+        points = sorted(
+            (_ring_hash(f'shard-{shard}#{node}'), shard) for shard in self.shards for node in range(virtual_nodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def __len__(self):
+        return len(self.shards)
+
+    def shard_for(self, key):
+        """Returns the shard number that owns key."""
+        index = bisect_right(self._points, _ring_hash(key))
+        return self._owners[index % len(self._owners)]
+
+    def with_shard(self, shard):
+        """Returns a new ring with one more shard; this ring is left as it was."""
+        return HashRing(self.shards + [shard], self.virtual_nodes)
+
+
+class _ShardServer:
+    """Runs in a shard process: answers the coordinator's requests against one backend."""
+
+    # Requests served by the methods below rather than by the store.
+    COMMANDS = frozenset({
+        'prepare', 'commit', 'abort', 'open_scan', 'next_scan', 'close_scan',
+        'scan_customers', 'last_cust_id', 'get_transfers', 'take_accounts', 'put_accounts',
+    })
+
+    def __init__(self, url):
+        # A fresh MemoryStore rather than the module-level dicts, so every shard
+        # does not start out with the seeded demo customer.
+        self.store = MemoryStore({}, {}) if url == MEMORY_URL else create_store(url, **backend_options(url))
+        self.prepared = {}
+        self.scans = {}
+        self.scan_ids = itertools.count(1)
+
+    def handle(self, method, args):
+        handler = getattr(self, method) if method in self.COMMANDS else getattr(self.store, method)
+        return handler(*args)
+
+    def prepare(self, gid, cust_ids, expected=None):
+        """Phase one: checks the accounts and returns (currency, balance_minor) of each; writes nothing."""
+        votes = []
+        for cust_id in cust_ids:
+            balance = self.store.get_balance(cust_id)
+            if balance is None:
+                raise KeyError(cust_id)
+            votes.append((balance.currency, balance.minor))
+        if expected is not None and [minor for _, minor in votes] != list(expected):
+            raise ConcurrentUpdateError('Balances changed since the batch was validated')
+        self.prepared[gid] = cust_ids
+        return votes
+
+    def commit(self, gid, cust_ids, counts, codes, deltas):
+        """Phase two: applies a prepared transaction's postings."""
+        if self.prepared.pop(gid, None) is None:
+            raise KeyError(f'Transaction {gid} was not prepared')
+        if not cust_ids:
+            return np.empty(0, dtype=np.int64)
+        return self.store.apply_batch(cust_ids, counts, codes, deltas)
+
+    def abort(self, gid):
+        self.prepared.pop(gid, None)
+
+    def open_scan(self, accounts, select):
+        scan = next(self.scan_ids)
+        self.scans[scan] = self.store.iter_ledger_columns(accounts, select)
+        return scan
+
+    def next_scan(self, scan):
+        """Returns the scan's next LedgerColumns chunk, or None once it is exhausted."""
+        columns = next(self.scans[scan], None)
+        if columns is None:
+            del self.scans[scan]
+        return columns
+
+    def close_scan(self, scan):
+        scan = self.scans.pop(scan, None)
+        if scan is not None:
+            scan.close()
+
+    def scan_customers(self):
+        return list(self.store.scan_customers())
+
+    def last_cust_id(self):
+        return self.store.id_sequence().last_id
+
+    def get_transfers(self, keys):
+        records = {key: self.store.get_transfer(key) for key in keys}
+        return {key: record for key, record in records.items() if record is not None}
+
+    def take_accounts(self, ring, shard):
+        """Removes and returns (cust_id, customer, ledger) of every account ring assigns to shard."""
+        store = self.store
+        moving = [cust_id for cust_id in set(store.accounts) | set(store.transactions) if ring.shard_for(cust_id) == shard]
+        return [
+            (cust_id, store.delete_customer(cust_id) if cust_id in store.accounts else None,
+             store.transactions.pop(cust_id, None))
+            for cust_id in moving
+        ]
+
+    def put_accounts(self, items):
+        for cust_id, customer, ledger in items:
+            if customer is not None:
+                self.store.put_customer(cust_id, customer)
+            if ledger is not None:
+                self.store.transactions[cust_id] = ledger
+
+    def close(self):
+        for scan in self.scans.values():
+            scan.close()
+        close = getattr(self.store, 'close', None)
+        if close is not None:
+            close()
+
+
+def _serve(conn, url):
+    """Shard process main loop: answers (method, args) requests until sent None or the pipe closes."""
+    server = _ShardServer(url)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        try:
+            reply = (True, server.handle(*request))
+        except Exception as error:
+            reply = (False, error)
+        try:
+            conn.send(reply)
+        except Exception as error:
+            # The result or the exception could not be pickled.
+            conn.send((False, RuntimeError(f'{request[0]} failed: {error!r}')))
+    server.close()
+
+
+class _Shard:
+    """Coordinator-side handle on one shard process; one request is in flight at a time."""
+
+    def __init__(self, context, url):
+        self.url = url
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, url), daemon=True)
+        self.process.start()
+        child.close()
+        self.lock = threading.Lock()
+
+    def send(self, method, *args):
+        self.conn.send((method, args))
+
+    def receive(self):
+        ok, result = self.conn.recv()
+        if not ok:
+            raise result
+        return result
+
+    def call(self, method, *args):
+        with self.lock:
+            self.send(method, *args)
+            return self.receive()
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass  # the process already exited
+        self.process.join(SHUTDOWN_TIMEOUT)
+        self.conn.close()
+
+
+class ShardedStore(AccountStore):
+    """
+    AccountStore partitioning customers across shard processes by consistent hashing.
+
+    Customer IDs come from one sequence in the coordinator, and the
+    idempotency journal of cross-shard transfers is kept there too; everything
+    else lives in the shards. Only calls made through this object are
+    coordinated, so a shard's backend must not be written to directly.
+    Methods:
+        - shard_for
+        - add_shard
+        - close
+    """
+
+    def __init__(self, shards=2, url_template=MEMORY_URL, virtual_nodes=DEFAULT_VIRTUAL_NODES):
+        """Starts the shard processes.
+
+        Args:
+            shards (int): Number of shards.
+            url_template (str): Backend URL of each shard, with {shard} replaced
+                by the shard number; memory:// gives every shard its own dicts.
+            virtual_nodes (int): Ring points per shard.
+
+        Raises:
+            ValueError: If there are no shards, or shards of a persistent backend would share a URL.
+        """
+        if shards < 1:
+            raise ValueError('A sharded store needs at least one shard')
+        if url_template != MEMORY_URL and shards > 1 and '{shard}' not in url_template:
+            raise ValueError('The shard URL needs a {shard} placeholder, as in sqlite:///bank-{shard}.db')
+        self._template = url_template
+        self._context = multiprocessing.get_context('spawn')
+        self._shards = [_Shard(self._context, self._url(index)) for index in range(shards)]
+        self._ring = HashRing(range(shards), virtual_nodes)
+        self._locks = StripedLock()
+        self._rebalance_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._gids = itertools.count(1)
+        self._journal = TransferJournal(self)
+        self._sequence = None
+        self._dedup = None
+
+    def _url(self, index):
+        return self._template.replace('{shard}', str(index))
+
+    def shard_for(self, cust_id):
+        """Returns the number of the shard that owns cust_id."""
+        return self._ring.shard_for(cust_id)
+
+    def close(self):
+        """Stops the shard processes."""
+        for shard in self._shards:
+            shard.close()
+
+    def _call(self, cust_id, method, *args):
+        """Sends one request to the shard owning cust_id and returns its reply."""
+        while True:
+            ring = self._ring
+            shard = self._shards[ring.shard_for(cust_id)]
+            with shard.lock:
+                if ring is not self._ring:
+                    continue  # add_shard moved accounts while we waited; route again
+                shard.send(method, *args)
+                return shard.receive()
+
+    def _multicall(self, calls):
+        """Sends {shard number: (method, *args)} to every shard at once, then collects the replies.
+
+        Returns:
+            tuple: (results, errors), dicts by shard number.
+        """
+        order = sorted(calls)
+        shards = [self._shards[index] for index in order]
+        for shard in shards:
+            shard.lock.acquire()
+        results, errors = {}, {}
+        try:
+            sent = []
+            for index, shard in zip(order, shards):
+                try:
+                    shard.send(*calls[index])
+                    sent.append(index)
+                except Exception as error:
+                    errors[index] = error
+            for index in sent:
+                try:
+                    results[index] = self._shards[index].receive()
+                except Exception as error:
+                    errors[index] = error
+        finally:
+            for shard in reversed(shards):
+                shard.lock.release()
+        return results, errors
+
+    def _broadcast(self, method, *args):
+        """Sends one request to every shard; returns the replies in shard order."""
+        results, errors = self._multicall({index: (method, *args) for index in range(len(self._shards))})
+        if errors:
+            raise errors[min(errors)]
+        return [results[index] for index in sorted(results)]
+
+    def _scatter(self, method, cust_ids):
+        """Calls a bulk per-account method on every owning shard at once; returns the replies in cust_ids order."""
+        while True:
+            ring = self._ring
+            positions = {}
+            for position, cust_id in enumerate(cust_ids):
+                positions.setdefault(ring.shard_for(cust_id), []).append(position)
+            results, errors = self._multicall({
+                shard: (method, [cust_ids[position] for position in members]) for shard, members in positions.items()
+            })
+            if ring is not self._ring:
+                continue  # add_shard moved accounts while we waited; route again
+            if errors:
+                raise errors[min(errors)]
+            replies = [None] * len(cust_ids)
+            for shard, members in positions.items():
+                for position, reply in zip(members, results[shard]):
+                    replies[position] = reply
+            return replies
+
+    def _two_phase(self, parts, check=None):
+        """Runs a two-phase commit over the shards in parts.
+
+        Args:
+            parts (dict): shard number -> (prepare_ids, commit_ids, counts, codes, deltas, expected).
+            check (callable): Called with the prepare votes ({shard: [(currency, balance_minor)]});
+                raising from it aborts the transaction.
+
+        Returns:
+            tuple: (votes, results), each a dict by shard number; results hold the
+                commit_ids' balances after each posting.
+
+        Raises:
+            PartialCommitError: If some shards committed and others failed.
+        """
+        gid = next(self._gids)
+        votes, errors = self._multicall({
+            shard: ('prepare', gid, part[0], part[5]) for shard, part in parts.items()
+        })
+        try:
+            if errors:
+                raise errors[min(errors)]
+            if check is not None:
+                check(votes)
+        except BaseException:
+            self._multicall({shard: ('abort', gid) for shard in votes})
+            raise
+        results, errors = self._multicall({
+            shard: ('commit', gid, part[1], part[2], part[3], part[4]) for shard, part in parts.items()
+        })
+        if errors:
+            raise PartialCommitError(
+                f'Transaction {gid} committed on shards {sorted(results)} but failed on {sorted(errors)}: '
+                f'{errors[min(errors)]!r}'
+            )
+        return votes, results
+
+    def get_customer(self, cust_id):
+        return self._call(cust_id, 'get_customer', cust_id)
+
+    def put_customer(self, cust_id, record):
+        with self._locks.lock_for(cust_id):
+            self._call(cust_id, 'put_customer', cust_id, record)
+
+    def delete_customer(self, cust_id):
+        with self._locks.lock_for(cust_id):
+            return self._call(cust_id, 'delete_customer', cust_id)
+
+    def scan_customers(self):
+        return itertools.chain.from_iterable(self._broadcast('scan_customers'))
+
+    def find_by_name(self, first_name, last_name):
+        return set().union(*self._broadcast('find_by_name', first_name, last_name))
+
+    def find_by_acct_num(self, acct_num):
+        return next((cust_id for cust_id in self._broadcast('find_by_acct_num', acct_num) if cust_id is not None), None)
+
+    def acct_num_index(self):
+        return AccountNumberView(self)
+
+    def existing_names(self, names):
+        return set().union(*self._broadcast('existing_names', set(names)))
+
+    def existing_acct_nums(self, acct_nums):
+        return set().union(*self._broadcast('existing_acct_nums', set(acct_nums)))
+
+    def insert_customers(self, customers, openings):
+        # Each shard inserts its part as one unit of work.
+        with self._locks.hold(*(cust_id for cust_id, _ in customers)):
+            ring = self._ring
+            parts = {}
+            for customer, opening in zip(customers, openings):
+                part = parts.setdefault(ring.shard_for(customer[0]), ([], []))
+                part[0].append(customer)
+                part[1].append(opening)
+            _, errors = self._multicall({shard: ('insert_customers', *part) for shard, part in parts.items()})
+        if errors:
+            raise errors[min(errors)]
+
+    def id_sequence(self):
+        with self._state_lock:
+            if self._sequence is None:
+                self._sequence = IdSequence(max(self._broadcast('last_cust_id') + [BASE_CUST_ID]))
+            return self._sequence
+
+    def get_ledger(self, cust_id):
+        return self._call(cust_id, 'get_ledger', cust_id)
+
+    def create_ledger(self, cust_id, balance=0, currency=DEFAULT_CURRENCY):
+        with self._locks.lock_for(cust_id):
+            self._call(cust_id, 'create_ledger', cust_id, balance, currency)
+
+    def get_balance(self, cust_id):
+        return self._call(cust_id, 'get_balance', cust_id)
+
+    def get_currency(self, cust_id):
+        return self._call(cust_id, 'get_currency', cust_id)
+
+    def get_currencies(self, cust_ids):
+        return self._scatter('get_currencies', list(cust_ids))
+
+    def get_balances(self, cust_ids):
+        return self._scatter('get_balances', list(cust_ids))
+
+    def balance_as_of(self, cust_id, when):
+        return self._call(cust_id, 'balance_as_of', cust_id, when)
+
+    def withdrawals_since(self, cust_id, when):
+        return self._call(cust_id, 'withdrawals_since', cust_id, when)
+
+    def apply_transaction(self, cust_id, kind, amount, expected=None, key=None):
+        with self._locks.lock_for(cust_id):
+            return self._call(cust_id, 'apply_transaction', cust_id, kind, amount, expected, key)
+
+    def dedup_cache(self):
+        with self._state_lock:
+            if self._dedup is None:
+                self._dedup = create_dedup_cache()
+            return self._dedup
+
+    def get_posting(self, key):
+        return next((record for record in self._broadcast('get_posting', key) if record is not None), None)
+
+    def apply_batch(self, cust_ids, counts, codes, deltas, expected=None):
+        counts = np.asarray(counts, dtype=np.int64)
+        codes = np.asarray(codes)
+        deltas = np.asarray(deltas, dtype=np.int64)
+        if not len(cust_ids):
+            return np.empty(0, dtype=np.int64)
+        with self._locks.hold(*cust_ids):
+            ring = self._ring
+            owners = np.fromiter((ring.shard_for(cust_id) for cust_id in cust_ids), dtype=np.int64, count=len(cust_ids))
+            shards = np.unique(owners).tolist()
+            if len(shards) == 1:
+                return self._call(cust_ids[0], 'apply_batch', cust_ids, counts, codes, deltas, expected)
+
+            row_owners = np.repeat(owners, counts)
+            parts = {}
+            rows_of = {}
+            for shard in shards:
+                groups = np.flatnonzero(owners == shard)
+                rows = rows_of[shard] = np.flatnonzero(row_owners == shard)
+                members = [cust_ids[group] for group in groups.tolist()]
+                parts[shard] = (
+                    members, members, counts[groups], codes[rows], deltas[rows],
+                    None if expected is None else np.asarray(expected)[groups].tolist(),
+                )
+            _, results = self._two_phase(parts)
+        balances = np.empty(len(deltas), dtype=np.int64)
+        for shard, rows in rows_of.items():
+            balances[rows] = results[shard]
+        return balances
+
+    def apply_transfers(self, transfers, expected=None):
+        if not transfers:
+            return [], []
+        keys = [transfer[0] for transfer in transfers if transfer[0] is not None]
+        accounts = {cust_id for transfer in transfers for cust_id in transfer[1:3]}
+        with self._locks.hold(*accounts, *keys):
+            ring = self._ring
+            owners = {cust_id: ring.shard_for(cust_id) for cust_id in accounts}
+            # A batch within one shard is settled by that shard, under its own
+            # journal, unless one of its keys was already used across shards.
+            if len(set(owners.values())) == 1 and not any(self._journal.get(key) for key in keys):
+                return self._call(transfers[0][1], 'apply_transfers', transfers, expected)
+            return self._settle_across(transfers, keys, owners, expected)
+
+    def _settle_across(self, transfers, keys, owners, expected=None):
+        """Settles a batch of transfers spanning shards by two-phase commit."""
+        known = {key: self._journal.get(key) for key in keys}
+        missing = [key for key, record in known.items() if record is None]
+        if missing:
+            for found in self._broadcast('get_transfers', missing):
+                known.update(found)
+        fresh, records, replayed = split_replays(transfers, known.get)
+        pending = [transfers[index] for index in fresh]
+        if not pending:
+            return resolve_repeats(records), replayed
+
+        cust_ids, deltas = net_positions(pending)
+        members = {}
+        for cust_id, delta in zip(cust_ids, deltas):
+            members.setdefault(owners[cust_id], []).append((cust_id, delta))
+        parts = {}
+        for shard, legs in members.items():
+            # Accounts whose transfers cancel out are checked but not posted to.
+            posted = [(cust_id, delta) for cust_id, delta in legs if delta]
+            parts[shard] = (
+                [cust_id for cust_id, _ in legs],
+                [cust_id for cust_id, _ in posted],
+                np.ones(len(posted), dtype=np.int64),
+                np.array([DEPOSIT if delta > 0 else WITHDRAW for _, delta in posted], dtype=np.int8),
+                np.array([delta for _, delta in posted], dtype=np.int64),
+                None,
+            )
+        currencies = {}
+        balances = {}
+
+        def check(votes):
+            for shard, part in parts.items():
+                for cust_id, (currency, balance) in zip(part[0], votes[shard]):
+                    currencies[cust_id] = currency
+                    balances[cust_id] = balance
+            for _, source, destination, _ in pending:
+                if currencies[source] != currencies[destination]:
+                    raise ValueError(f'Currency mismatch: {source} is {currencies[source]}, '
+                                     f'{destination} is {currencies[destination]}')
+            # The coordinator holds the accounts' locks, so the prepared balances
+            # are the ones the commit posts onto.
+            for cust_id, minor in (expected or {}).items():
+                if cust_id in balances and balances[cust_id] != minor:
+                    raise ConcurrentUpdateError(f'Balance of {cust_id} changed since the transfer was validated')
+
+        _, results = self._two_phase(parts, check)
+        for shard, part in parts.items():
+            balances.update(zip(part[1], results[shard].tolist()))
+
+        now = time.time()
+        for index, (key, source, destination, amount_minor) in zip(fresh, pending):
+            currency = currencies[source]
+            records[index] = TransferRecord(
+                key, source, destination, Money(amount_minor, currency),
+                Money(balances[source], currency), Money(balances[destination], currency), now,
+            )
+        self._journal.add(records[index] for index in fresh)
+        return resolve_repeats(records), replayed
+
+    def get_transfer(self, key):
+        record = self._journal.get(key)
+        if record is not None:
+            return record
+        return next((record for record in self._broadcast('get_transfer', key) if record is not None), None)
+
+    def ledger_columns(self):
+        return LedgerColumns.concat(self._broadcast('ledger_columns'))
+
+    def ledgers_changed_since(self, txn_id, known=()):
+        # Every shard process numbers its own transactions, so one mark cannot
+        # cover them all: report every ledger, and callers read the whole book.
+        return [cust_id for part in self._broadcast('ledgers_changed_since', -1) for cust_id in part]
+
+    def iter_ledger_columns(self, accounts=SCAN_CHUNK_ACCOUNTS, select=None):
+        # Each shard streams its own ledgers in cust_id order; they are merged
+        # here one account at a time, holding at most a chunk per shard. select
+        # runs in the shards, so it must be picklable.
+        shards = list(self._shards)
+        scans = [shard.call('open_scan', accounts, select) for shard in shards]
+        current = [None] * len(shards)
+        heads = []
+
+        def advance(index):
+            while scans[index] is not None:
+                columns = shards[index].call('next_scan', scans[index])
+                if columns is None:
+                    scans[index] = None
+                elif len(columns):
+                    current[index] = columns
+                    heapq.heappush(heads, (columns.cust_ids[0], index, 0))
+                    return
+
+        try:
+            for index in range(len(shards)):
+                advance(index)
+            picked = []
+            while heads:
+                _, index, position = heapq.heappop(heads)
+                columns = current[index]
+                picked.append((columns, position))
+                if position + 1 < len(columns):
+                    heapq.heappush(heads, (columns.cust_ids[position + 1], index, position + 1))
+                else:
+                    advance(index)
+                if len(picked) == accounts:
+                    yield _gather(picked)
+                    picked = []
+            if picked:
+                yield _gather(picked)
+        finally:
+            for shard, scan in zip(shards, scans):
+                if scan is not None:
+                    shard.call('close_scan', scan)
+
+    def add_shard(self):
+        """Starts one more shard and moves to it the accounts the enlarged ring assigns it.
+
+        Every account is held while the accounts move, so the store is briefly
+        unavailable; only about 1/(N+1) of the book is moved.
+
+        Returns:
+            int: The number of accounts moved.
+
+        Raises:
+            ValueError: If the shards are not in-memory; persistent shards are
+                rebalanced offline, by exporting and re-importing the moved accounts.
+        """
+        if self._template != MEMORY_URL:
+            raise ValueError('Only in-memory shards can be rebalanced online')
+        with self._rebalance_lock, self._locks.hold_all():
+            number = len(self._shards)
+            shard = _Shard(self._context, self._url(number))
+            ring = self._ring.with_shard(number)
+            existing = list(self._shards)
+            for old in existing:
+                old.lock.acquire()
+            try:
+                moved = []
+                for old in existing:
+                    old.send('take_accounts', ring, number)
+                for old in existing:
+                    moved.extend(old.receive())
+                shard.call('put_accounts', moved)
+                self._shards.append(shard)
+                self._ring = ring
+            finally:
+                for old in reversed(existing):
+                    old.lock.release()
+        get_event_log().info('shard.added', shard=number, moved=len(moved), shards=number + 1)
+        return len(moved)
+
+
+def _gather(picked):
+    """Builds LedgerColumns from (columns, position) picks, taking runs from one chunk at once."""
+    parts = []
+    for columns, run in itertools.groupby(picked, key=lambda pick: pick[0]):
+        parts.append(columns.take([position for _, position in run]))
+    return LedgerColumns.concat(parts)
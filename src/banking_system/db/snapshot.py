@@ -0,0 +1,541 @@
+"""
+db/snapshot.py
+
+Memory-mapped binary snapshot of the customer and ledger stores.
+
+write_snapshot() serializes any AccountStore into one file; Snapshot maps it
+read-only and answers lookups straight from the mapped pages. Nothing is parsed
+per record when it opens, so a process is ready to serve balances in
+milliseconds whatever the size of the book, and processes mapping the same file
+share its pages through the OS page cache instead of each holding a copy.
+
+Layout (little-endian; every section starts on a 64-byte boundary):
+
+    magic (8) | directory length (u32) | directory (JSON: section -> offset, count, dtype)
+
+    customer_keys    S<w>  cust_ids of customer records, sorted
+    customers        fixed-width records, in key order: one string id per field
+                     plus a bitmask of fields that were ints
+    name_index       (hash of normalized name u64, record u32), sorted by hash
+    acct_keys        S<w>  account numbers, sorted
+    acct_records     u32   customer record owning each account number
+    strings          u8    UTF-8 string table; string i is strings[string_offsets[i]:string_offsets[i + 1]]
+    string_offsets   i8
+    ledger_keys      S<w>  cust_ids of ledgers, sorted
+    ledgers          (balance i8, opening i8, currency S3), in key order
+    entry_offsets    i8    ledger i owns entries entry_offsets[i]:entry_offsets[i + 1]
+    timestamps, amounts, kinds, txn_ids: entry columns, as in db.ledger.LedgerColumns
+
+Lookups are binary searches (numpy.searchsorted) over the mapped sorted keys,
+and strings are decoded only for the records a caller reads. Repeated strings
+(cities, states) are stored once.
+
+SnapshotStore serves the AccountStore interface from a snapshot plus an
+in-memory overlay: an account is copied into the overlay the first time it is
+written, and reads prefer the overlay. Selected with
+DATABASE_URL=snapshot:///path/to/bank.snap.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+from numpy.lib.format import descr_to_dtype, dtype_to_descr
+
+from banking_system.db.accounts_store import normalize_name
+from banking_system.db.ledger import Ledger, LedgerColumns, WITHDRAW, to_micros
+from banking_system.db.sequence import BASE_CUST_ID, IdSequence
+from banking_system.db.storage import AccountNumberView, AccountStore, MemoryStore, _account_locks
+from banking_system.model.customer import CUSTOMER_FIELDS, Customer
+from banking_system.model.money import DEFAULT_CURRENCY, Money
+
+MAGIC = b'BKSNAP01'
+ALIGNMENT = 64
+NO_STRING = 0xFFFFFFFF
+
+CUSTOMER_RECORD = np.dtype([*((field, '<u4') for field in CUSTOMER_FIELDS), ('ints', 'u1')])
+NAME_ENTRY = np.dtype([('hash', '<u8'), ('record', '<u4')])
+LEDGER_RECORD = np.dtype([('balance', '<i8'), ('opening', '<i8'), ('currency', 'S3')])
+
+
+class SnapshotError(Exception):
+    """Raised when a file is not a readable snapshot."""
+    pass
+
+
+def name_hash(first_name, last_name):
+    """Returns the stable 64-bit hash of a normalized name used by the name index."""
+    first, last = normalize_name(first_name, last_name)
+    digest = hashlib.blake2b(f'{first}\x1f{last}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _sorted_keys(keys):
+    """Returns (sorted fixed-width byte keys, the permutation that sorts them)."""
+    encoded = np.array([str(key).encode() for key in keys] or [b''], dtype=np.bytes_)[:len(keys)]
+    order = np.argsort(encoded, kind='stable')
+    return encoded[order], order
+
+
+class _StringTable:
+    """Interns strings while a snapshot is written."""
+
+    def __init__(self):
+        self.ids = {}
+        self.chunks = []
+        self.offsets = [0]
+
+    def add(self, value):
+        string_id = self.ids.get(value)
+        if string_id is None:
+            data = value.encode()
+            string_id = self.ids[value] = len(self.chunks)
+            self.chunks.append(data)
+            self.offsets.append(self.offsets[-1] + len(data))
+        return string_id
+
+
+def write_snapshot(store, path):
+    """Writes every customer record and ledger in store to a snapshot file at path.
+
+    The file is written next to path and renamed into place, so readers see
+    either the old snapshot or the new one.
+
+    Args:
+        store (AccountStore): Backend to snapshot.
+        path (str): Destination file.
+
+    Returns:
+        dict: Number of customers, ledgers, entries, and bytes written.
+    """
+    customers = list(store.scan_customers())
+    customer_keys, order = _sorted_keys([cust_id for cust_id, _ in customers])
+    strings = _StringTable()
+    records = np.zeros(len(customers), dtype=CUSTOMER_RECORD)
+    names = np.zeros(len(customers), dtype=NAME_ENTRY)
+    acct_nums = []
+    for position, index in enumerate(order.tolist()):
+        record = customers[index][1]
+        ints = 0
+        for bit, field in enumerate(CUSTOMER_FIELDS):
+            value = record.get(field)
+            if value is None:
+                records[field][position] = NO_STRING
+                continue
+            if isinstance(value, int):
+                ints |= 1 << bit
+            records[field][position] = strings.add(str(value))
+        records['ints'][position] = ints
+        names[position] = (name_hash(record['first_name'], record['last_name']), position)
+        if record.get('acct_num') is not None:
+            acct_nums.append((str(record['acct_num']), position))
+    names.sort(order=('hash', 'record'))
+    acct_keys, acct_order = _sorted_keys([acct_num for acct_num, _ in acct_nums])
+    acct_records = np.array([acct_nums[index][1] for index in acct_order.tolist()], dtype='<u4')
+
+    columns = store.ledger_columns()
+    ledger_keys, ledger_order = _sorted_keys(columns.cust_ids)
+    counts = columns.counts[ledger_order]
+    starts = columns.offsets[:-1][ledger_order]
+    entry_offsets = np.zeros(len(columns) + 1, dtype=np.int64)
+    entry_offsets[1:] = np.cumsum(counts)
+    # Rows of the sorted ledgers, in their new order.
+    rows = np.repeat(starts - entry_offsets[:-1], counts) + np.arange(entry_offsets[-1])
+    ledgers = np.zeros(len(columns), dtype=LEDGER_RECORD)
+    ledgers['opening'] = columns.opening[ledger_order]
+    ledgers['currency'] = [columns.currencies[index].encode() for index in ledger_order.tolist()]
+    running = np.concatenate(([0], np.cumsum(columns.amounts[rows])))
+    ledgers['balance'] = ledgers['opening'] + running[entry_offsets[1:]] - running[entry_offsets[:-1]]
+
+    sections = {
+        'customer_keys': customer_keys,
+        'customers': records,
+        'name_index': names,
+        'acct_keys': acct_keys,
+        'acct_records': acct_records,
+        'strings': np.frombuffer(b''.join(strings.chunks), dtype=np.uint8),
+        'string_offsets': np.array(strings.offsets, dtype='<i8'),
+        'ledger_keys': ledger_keys,
+        'ledgers': ledgers,
+        'entry_offsets': entry_offsets,
+        'timestamps': columns.timestamps[rows],
+        'amounts': columns.amounts[rows],
+        'kinds': columns.kinds[rows],
+        'txn_ids': np.zeros(len(rows), dtype=np.int64) if columns.txn_ids is None else columns.txn_ids[rows],
+    }
+    numeric_ids = [int(cust_id) for cust_id, _ in customers if str(cust_id).isdigit()]
+    # The source's sequence also covers the IDs of closed customers, which stay retired.
+    last_id = max(numeric_ids + [store.id_sequence().last_id], default=BASE_CUST_ID)
+    directory = {'sections': {}, 'last_id': last_id}
+    offset = 0
+    for name, array in sections.items():
+        directory['sections'][name] = [offset, len(array), dtype_to_descr(array.dtype)]
+        offset = _align(offset + array.nbytes)
+    header = json.dumps(directory).encode()
+    data_start = _align(len(MAGIC) + 4 + len(header))
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as handle:
+        handle.write(MAGIC + struct.pack('<I', len(header)) + header)
+        for name, array in sections.items():
+            handle.seek(data_start + directory['sections'][name][0])
+            handle.write(np.ascontiguousarray(array).tobytes())
+        handle.truncate(data_start + offset)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+    return {
+        'customers': len(customers),
+        'ledgers': len(columns),
+        'entries': int(entry_offsets[-1]),
+        'bytes': data_start + offset,
+    }
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file.
+    Methods:
+        - customer / customers / find_by_name / find_by_acct_num
+        - balance / currency / balance_as_of / withdrawals_since
+        - ledger / ledger_keys / ledger_columns
+    Attributes:
+        - last_id: highest customer ID issued by the snapshotted store
+    """
+
+    def __init__(self, path):
+        """Maps the file at path; only the header is read.
+
+        Raises:
+            SnapshotError: If the file is not a snapshot.
+        """
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise SnapshotError(f'{path} is not a snapshot file')
+        (length,) = struct.unpack_from('<I', self._map, len(MAGIC))
+        start = len(MAGIC) + 4
+        directory = json.loads(self._map[start:start + length])
+        data_start = _align(start + length)
+        self.last_id = directory['last_id']
+        for name, (offset, count, descr) in directory['sections'].items():
+            dtype = descr_to_dtype(descr if isinstance(descr, str) else [tuple(field) for field in descr])
+            setattr(self, f'_{name}', np.frombuffer(self._map, dtype=dtype, count=count, offset=data_start + offset))
+        self._strings_start = data_start + directory['sections']['strings'][0]
+
+    def __len__(self):
+        return len(self._customer_keys)
+
+    @staticmethod
+    def _find(keys, key):
+        """Returns the position of key in sorted fixed-width keys, or None."""
+        encoded = str(key).encode()
+        if not len(keys) or len(encoded) > keys.dtype.itemsize:
+            return None
+        position = int(np.searchsorted(keys, encoded))
+        if position < len(keys) and keys[position] == encoded:
+            return position
+        return None
+
+    def _string(self, string_id):
+        if string_id == NO_STRING:
+            return None
+        start = self._strings_start + int(self._string_offsets[string_id])
+        stop = self._strings_start + int(self._string_offsets[string_id + 1])
+        return self._map[start:stop].decode()
+
+    def _record(self, position):
+        """Decodes the customer record at position into a Customer."""
+        row = self._customers[position]
+        ints = int(row['ints'])
+        record = {}
+        for bit, field in enumerate(CUSTOMER_FIELDS):
+            value = self._string(int(row[field]))
+            record[field] = int(value) if ints & (1 << bit) else value
+        return Customer(**record)
+
+    def customer(self, cust_id):
+        """Returns the customer record for cust_id, or None."""
+        position = self._find(self._customer_keys, cust_id)
+        return None if position is None else self._record(position)
+
+    def customers(self):
+        """Yields (cust_id, record) for every customer, decoding one record at a time."""
+        for position, key in enumerate(self._customer_keys):
+            yield key.decode(), self._record(position)
+
+    def find_by_name(self, first_name, last_name):
+        """Returns the set of cust_ids whose normalized name matches."""
+        target = normalize_name(first_name, last_name)
+        hashes = self._name_index['hash']
+        value = np.uint64(name_hash(first_name, last_name))
+        start, stop = np.searchsorted(hashes, value, 'left'), np.searchsorted(hashes, value, 'right')
+        matches = set()
+        for position in self._name_index['record'][start:stop].tolist():
+            record = self._record(position)
+            if normalize_name(record['first_name'], record['last_name']) == target:
+                matches.add(self._customer_keys[position].decode())
+        return matches
+
+    def find_by_acct_num(self, acct_num):
+        """Returns the cust_id that owns acct_num, or None."""
+        position = self._find(self._acct_keys, acct_num)
+        if position is None:
+            return None
+        return self._customer_keys[self._acct_records[position]].decode()
+
+    def _ledger_position(self, cust_id):
+        return self._find(self._ledger_keys, cust_id)
+
+    def balance(self, cust_id):
+        """Returns cust_id's balance as Money, or None if there is no ledger."""
+        position = self._ledger_position(cust_id)
+        if position is None:
+            return None
+        row = self._ledgers[position]
+        return Money(int(row['balance']), row['currency'].decode())
+
+    def currency(self, cust_id):
+        """Returns the currency of cust_id's ledger, or None."""
+        position = self._ledger_position(cust_id)
+        return None if position is None else self._ledgers['currency'][position].decode()
+
+    def _entries(self, cust_id):
+        """Returns (ledger row, start, stop) of cust_id's entries."""
+        position = self._ledger_position(cust_id)
+        if position is None:
+            raise KeyError(cust_id)
+        return self._ledgers[position], int(self._entry_offsets[position]), int(self._entry_offsets[position + 1])
+
+    def balance_as_of(self, cust_id, when):
+        """Returns the balance after every entry at or before `when`.
+
+        Raises:
+            KeyError: If cust_id has no ledger.
+        """
+        row, start, stop = self._entries(cust_id)
+        count = int(np.searchsorted(self._timestamps[start:stop], to_micros(when), 'right'))
+        return Money(int(row['opening']) + int(self._amounts[start:start + count].sum()), row['currency'].decode())
+
+    def withdrawals_since(self, cust_id, when):
+        """Returns (timestamp_seconds, amount_minor) for cust_id's withdrawals after `when`."""
+        try:
+            _, start, stop = self._entries(cust_id)
+        except KeyError:
+            return []
+        first = start + int(np.searchsorted(self._timestamps[start:stop], to_micros(when), 'right'))
+        withdrawals = self._kinds[first:stop] == WITHDRAW
+        return list(zip(
+            (self._timestamps[first:stop][withdrawals] / 1_000_000).tolist(),
+            (-self._amounts[first:stop][withdrawals]).tolist(),
+        ))
+
+    def ledger(self, cust_id):
+        """Returns an in-memory Ledger copy of cust_id's ledger, or None."""
+        try:
+            row, start, stop = self._entries(cust_id)
+        except KeyError:
+            return None
+        ledger = Ledger(Money(int(row['opening']), row['currency'].decode()), row['currency'].decode())
+        ledger.extend_raw(
+            self._timestamps[start:stop].tobytes(), self._amounts[start:stop].tobytes(),
+            self._kinds[start:stop].tobytes(), self._txn_ids[start:stop].tobytes(),
+        )
+        return ledger
+
+    def ledger_keys(self):
+        """Returns the cust_id of every ledger, in snapshot order."""
+        return [key.decode() for key in self._ledger_keys]
+
+    def ledger_columns(self, exclude=()):
+        """Returns the ledgers as LedgerColumns whose entry columns are views of the map.
+
+        Args:
+            exclude (set): cust_ids to leave out (the columns are then copies).
+        """
+        cust_ids = self.ledger_keys()
+        currencies = [currency.decode() for currency in self._ledgers['currency']]
+        opening, offsets = self._ledgers['opening'], self._entry_offsets
+        timestamps, amounts, kinds, txn_ids = self._timestamps, self._amounts, self._kinds, self._txn_ids
+        if exclude:
+            keep = np.fromiter((cust_id not in exclude for cust_id in cust_ids), dtype=bool, count=len(cust_ids))
+            entries = np.repeat(keep, np.diff(offsets))
+            cust_ids = [cust_id for cust_id, kept in zip(cust_ids, keep.tolist()) if kept]
+            currencies = [currency for currency, kept in zip(currencies, keep.tolist()) if kept]
+            opening = opening[keep]
+            offsets = np.concatenate(([0], np.cumsum(np.diff(offsets)[keep])))
+            timestamps, amounts, kinds, txn_ids = timestamps[entries], amounts[entries], kinds[entries], txn_ids[entries]
+        return LedgerColumns(cust_ids, currencies, np.asarray(opening), offsets, timestamps, amounts, kinds, txn_ids)
+
+
+class SnapshotStore(AccountStore):
+    """
+    AccountStore serving reads from a Snapshot, with writes kept in an in-memory overlay.
+    Methods:
+        - save
+    Attributes:
+        - snapshot: the mapped Snapshot
+        - overlay: MemoryStore of customers and ledgers written since the snapshot
+    """
+
+    blocking = False
+
+    def __init__(self, path):
+        """Maps the snapshot at path."""
+        self.path = path
+        self.snapshot = Snapshot(path)
+        self.overlay = MemoryStore({}, {})
+        self._deleted = set()
+        self._sequence_lock = threading.Lock()
+        self._sequence = None
+
+    def _shadowed(self, cust_id):
+        """Checks whether the snapshot's customer record for cust_id is out of date."""
+        return cust_id in self.overlay.accounts or cust_id in self._deleted
+
+    def get_customer(self, cust_id):
+        if self._shadowed(cust_id):
+            return self.overlay.get_customer(cust_id)
+        return self.snapshot.customer(cust_id)
+
+    def put_customer(self, cust_id, record):
+        self.overlay.put_customer(cust_id, record)
+        self._deleted.discard(cust_id)
+
+    def delete_customer(self, cust_id):
+        record = self.get_customer(cust_id)
+        if record is None:
+            raise KeyError(cust_id)
+        if cust_id in self.overlay.accounts:
+            self.overlay.delete_customer(cust_id)
+        self._deleted.add(cust_id)
+        return record
+
+    def scan_customers(self):
+        overlay = list(self.overlay.accounts.items())
+        for cust_id, record in self.snapshot.customers():
+            if not self._shadowed(cust_id):
+                yield cust_id, record
+        yield from overlay
+
+    def find_by_name(self, first_name, last_name):
+        found = {cust_id for cust_id in self.snapshot.find_by_name(first_name, last_name) if not self._shadowed(cust_id)}
+        return frozenset(found | self.overlay.find_by_name(first_name, last_name))
+
+    def find_by_acct_num(self, acct_num):
+        cust_id = self.overlay.find_by_acct_num(acct_num)
+        if cust_id is not None:
+            return cust_id
+        cust_id = self.snapshot.find_by_acct_num(acct_num)
+        return None if cust_id is None or self._shadowed(cust_id) else cust_id
+
+    def acct_num_index(self):
+        return AccountNumberView(self)
+
+    def id_sequence(self):
+        with self._sequence_lock:
+            if self._sequence is None:
+                last_id = max(self.snapshot.last_id, BASE_CUST_ID)
+                for cust_id in self.overlay.accounts:
+                    if str(cust_id).isdigit():
+                        last_id = max(last_id, int(cust_id))
+                self._sequence = IdSequence(last_id)
+            return self._sequence
+
+    def _materialize(self, cust_ids):
+        """Copies the snapshot ledgers of cust_ids into the overlay before they are written."""
+        for cust_id in cust_ids:
+            if cust_id not in self.overlay.transactions:
+                with _account_locks.lock_for(cust_id):
+                    if cust_id not in self.overlay.transactions:
+                        ledger = self.snapshot.ledger(cust_id)
+                        if ledger is not None:
+                            self.overlay.transactions[cust_id] = ledger
+
+    def get_ledger(self, cust_id):
+        if cust_id in self.overlay.transactions:
+            return self.overlay.get_ledger(cust_id)
+        ledger = self.snapshot.ledger(cust_id)
+        return None if ledger is None else ledger.to_dict()
+
+    def create_ledger(self, cust_id, balance=0, currency=DEFAULT_CURRENCY):
+        self.overlay.create_ledger(cust_id, balance, currency)
+
+    def get_balance(self, cust_id):
+        if cust_id in self.overlay.transactions:
+            return self.overlay.get_balance(cust_id)
+        return self.snapshot.balance(cust_id)
+
+    def get_currency(self, cust_id):
+        if cust_id in self.overlay.transactions:
+            return self.overlay.get_currency(cust_id)
+        return self.snapshot.currency(cust_id)
+
+    def balance_as_of(self, cust_id, when):
+        if cust_id in self.overlay.transactions:
+            return self.overlay.balance_as_of(cust_id, when)
+        return self.snapshot.balance_as_of(cust_id, when)
+
+    def withdrawals_since(self, cust_id, when):
+        if cust_id in self.overlay.transactions:
+            return self.overlay.withdrawals_since(cust_id, when)
+        return self.snapshot.withdrawals_since(cust_id, when)
+
+    def apply_transaction(self, cust_id, kind, amount, expected=None, key=None):
+        self._materialize([cust_id])
+        return self.overlay.apply_transaction(cust_id, kind, amount, expected=expected, key=key)
+
+    def dedup_cache(self):
+        return self.overlay.dedup_cache()
+
+    def get_posting(self, key):
+        return self.overlay.get_posting(key)
+
+    def apply_batch(self, cust_ids, counts, codes, deltas, expected=None):
+        self._materialize(cust_ids)
+        return self.overlay.apply_batch(cust_ids, counts, codes, deltas, expected=expected)
+
+    def apply_transfers(self, transfers, expected=None):
+        self._materialize({cust_id for transfer in transfers for cust_id in transfer[1:3]} | set(expected or ()))
+        return self.overlay.apply_transfers(transfers, expected=expected)
+
+    def get_transfer(self, key):
+        return self.overlay.get_transfer(key)
+
+    def ledger_columns(self):
+        written = set(self.overlay.transactions)
+        base = self.snapshot.ledger_columns(exclude=written)
+        if not written:
+            return base
+        changed = self.overlay.ledger_columns()
+        return LedgerColumns(
+            base.cust_ids + changed.cust_ids,
+            base.currencies + changed.currencies,
+            np.concatenate((base.opening, changed.opening)),
+            np.concatenate((base.offsets, base.offsets[-1] + changed.offsets[1:])),
+            np.concatenate((base.timestamps, changed.timestamps)),
+            np.concatenate((base.amounts, changed.amounts)),
+            np.concatenate((base.kinds, changed.kinds)),
+            np.concatenate((base.txn_ids, changed.txn_ids)),
+        )
+
+    def save(self, path=None):
+        """Writes the current state (snapshot plus overlay) to a new snapshot file.
+
+        Args:
+            path (str): Destination; defaults to the file this store maps. Open
+                maps of the old file stay valid, they just do not see the new one.
+
+        Returns:
+            dict: What write_snapshot wrote.
+        """
+        return write_snapshot(self, path or self.path)
@@ -0,0 +1,581 @@
+"""
+db/sqlite_store.py
+
+SQLite implementation of the AccountStore interface.
+
+Data lives on disk, so the working set is no longer bounded by the process heap
+and a restart does not need to reload anything. The database runs in WAL mode so
+readers do not block the writer, every statement is a parameterized constant
+(sqlite3 keeps the compiled statements in its per-connection cache), and
+cust_id, acct_num, and normalized names are all indexed. Amounts are stored as
+INTEGER minor units and returned as model.money.Money. Connections come from a
+ConnectionPool, one session per thread or asyncio task.
+"""
+
+import contextlib
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from banking_system.db.accounts_store import normalize_name
+from banking_system.db.dedup import DuplicatePostingError, PostingRecord, create_dedup_cache
+from banking_system.db.ledger import DEPOSIT, KIND_CODES, KIND_NAMES, LedgerColumns
+from banking_system.db.pool import DEFAULT_POOL_SIZE, DEFAULT_POOL_TIMEOUT, ConnectionPool
+from banking_system.db.sequence import BASE_CUST_ID, IdSequence
+from banking_system.db.storage import (
+    SCAN_CHUNK_ACCOUNTS,
+    AccountNumberView,
+    AccountStore,
+    ConcurrentUpdateError,
+    DuplicateAccountNumberError,
+)
+from banking_system.db.transfers import TransferRecord, net_positions, resolve_repeats, split_replays
+from banking_system.model.customer import Customer, as_customer
+from banking_system.model.money import DEFAULT_CURRENCY, Money
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    cust_id    TEXT PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name  TEXT NOT NULL,
+    first_key  TEXT NOT NULL,
+    last_key   TEXT NOT NULL,
+    acct_num   TEXT UNIQUE,
+    address    TEXT,
+    city       TEXT,
+    state      TEXT,
+    zip        TEXT
+);
+CREATE INDEX IF NOT EXISTS customers_name_key ON customers (last_key, first_key);
+
+-- Tombstones of closed customers: their IDs (and kept ledgers) are never reissued.
+CREATE TABLE IF NOT EXISTS closed_customers (
+    cust_id   TEXT PRIMARY KEY,
+    closed_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS balances (
+    cust_id       TEXT PRIMARY KEY,
+    balance_minor INTEGER NOT NULL,
+    currency      TEXT NOT NULL DEFAULT 'USD'
+);
+
+CREATE TABLE IF NOT EXISTS ledger (
+    txn_id       INTEGER PRIMARY KEY,
+    cust_id      TEXT NOT NULL,
+    kind         TEXT NOT NULL CHECK (kind IN ('deposit', 'withdraw')),
+    amount_minor INTEGER NOT NULL,
+    created_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ledger_cust_id ON ledger (cust_id, txn_id);
+CREATE INDEX IF NOT EXISTS ledger_cust_time ON ledger (cust_id, created_at);
+
+CREATE TABLE IF NOT EXISTS transfers (
+    idempotency_key           TEXT PRIMARY KEY,
+    source                    TEXT NOT NULL,
+    destination               TEXT NOT NULL,
+    amount_minor              INTEGER NOT NULL,
+    currency                  TEXT NOT NULL,
+    source_balance_minor      INTEGER NOT NULL,
+    destination_balance_minor INTEGER NOT NULL,
+    created_at                REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS posting_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    cust_id         TEXT NOT NULL,
+    kind            TEXT NOT NULL,
+    amount_minor    INTEGER NOT NULL,
+    balance_minor   INTEGER NOT NULL,
+    currency        TEXT NOT NULL,
+    created_at      REAL NOT NULL
+);
+"""
+
+SELECT_CUSTOMER = 'SELECT first_name, last_name, acct_num, address, city, state, zip FROM customers WHERE cust_id = ?'
+# Upserts on cust_id only: INSERT OR REPLACE would also delete whichever other
+# customer holds the acct_num, so an acct_num conflict must raise instead.
+UPSERT_CUSTOMER = (
+    'INSERT INTO customers '
+    '(cust_id, first_name, last_name, first_key, last_key, acct_num, address, city, state, zip) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+    'ON CONFLICT (cust_id) DO UPDATE SET first_name = excluded.first_name, last_name = excluded.last_name, '
+    'first_key = excluded.first_key, last_key = excluded.last_key, acct_num = excluded.acct_num, '
+    'address = excluded.address, city = excluded.city, state = excluded.state, zip = excluded.zip'
+)
+DELETE_CUSTOMER = 'DELETE FROM customers WHERE cust_id = ?'
+INSERT_CLOSED_CUSTOMER = 'INSERT OR REPLACE INTO closed_customers (cust_id, closed_at) VALUES (?, ?)'
+SCAN_CUSTOMERS = 'SELECT cust_id, first_name, last_name, acct_num, address, city, state, zip FROM customers ORDER BY cust_id'
+FIND_BY_NAME = 'SELECT cust_id FROM customers WHERE last_key = ? AND first_key = ?'
+FIND_BY_ACCT_NUM = 'SELECT cust_id FROM customers WHERE acct_num = ?'
+CREATE_NAME_PROBE = 'CREATE TEMP TABLE IF NOT EXISTS name_probe (first_key TEXT, last_key TEXT)'
+INSERT_NAME_PROBE = 'INSERT INTO name_probe (first_key, last_key) VALUES (?, ?)'
+FIND_PROBED_NAMES = (
+    'SELECT p.first_key, p.last_key FROM name_probe p WHERE EXISTS '
+    '(SELECT 1 FROM customers c WHERE c.last_key = p.last_key AND c.first_key = p.first_key)'
+)
+CREATE_ACCT_NUM_PROBE = 'CREATE TEMP TABLE IF NOT EXISTS acct_num_probe (acct_num TEXT)'
+INSERT_ACCT_NUM_PROBE = 'INSERT INTO acct_num_probe (acct_num) VALUES (?)'
+FIND_PROBED_ACCT_NUMS = 'SELECT p.acct_num FROM acct_num_probe p JOIN customers c ON c.acct_num = p.acct_num'
+MAX_CUST_ID = (
+    "SELECT MAX(CAST(cust_id AS INTEGER)) FROM "
+    "(SELECT cust_id FROM customers UNION ALL SELECT cust_id FROM closed_customers) "
+    "WHERE cust_id NOT GLOB '*[^0-9]*'"
+)
+SELECT_BALANCE = 'SELECT balance_minor, currency FROM balances WHERE cust_id = ?'
+UPSERT_BALANCE = 'INSERT OR REPLACE INTO balances (cust_id, balance_minor, currency) VALUES (?, ?, ?)'
+UPDATE_BALANCE = 'UPDATE balances SET balance_minor = balance_minor + ? WHERE cust_id = ?'
+DELETE_LEDGER = 'DELETE FROM ledger WHERE cust_id = ?'
+INSERT_LEDGER = 'INSERT INTO ledger (cust_id, kind, amount_minor, created_at) VALUES (?, ?, ?, ?)'
+SELECT_WITHDRAWALS = "SELECT created_at, amount_minor FROM ledger WHERE cust_id = ? AND kind = 'withdraw' AND created_at > ? ORDER BY txn_id"
+SELECT_LEDGER = 'SELECT kind, amount_minor FROM ledger WHERE cust_id = ? ORDER BY txn_id'
+SCAN_BALANCES = 'SELECT cust_id, balance_minor, currency FROM balances ORDER BY cust_id'
+SCAN_LEDGER_IDS = 'SELECT cust_id FROM balances ORDER BY cust_id'
+SELECT_POSTED_SINCE = 'SELECT DISTINCT cust_id FROM ledger WHERE txn_id > ?'
+SCAN_LEDGER = 'SELECT cust_id, kind, amount_minor, created_at, txn_id FROM ledger ORDER BY cust_id, txn_id'
+SCAN_LEDGER_OF = (
+    'SELECT cust_id, kind, amount_minor, created_at, txn_id FROM ledger '
+    'WHERE cust_id IN ({}) ORDER BY cust_id, txn_id'
+)
+# Older SQLite builds allow at most 999 bound parameters per statement.
+MAX_PARAMS = 900
+SELECT_TRANSFER = (
+    'SELECT idempotency_key, source, destination, amount_minor, currency, '
+    'source_balance_minor, destination_balance_minor, created_at FROM transfers WHERE idempotency_key = ?'
+)
+INSERT_TRANSFER = 'INSERT INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+SELECT_POSTING = (
+    'SELECT idempotency_key, cust_id, kind, amount_minor, balance_minor, currency, created_at '
+    'FROM posting_keys WHERE idempotency_key = ?'
+)
+INSERT_POSTING = 'INSERT INTO posting_keys VALUES (?, ?, ?, ?, ?, ?, ?)'
+# Walks back from the current balance over entries newer than the cutoff.
+SUM_AFTER = (
+    "SELECT COALESCE(SUM(CASE kind WHEN 'deposit' THEN amount_minor ELSE -amount_minor END), 0) "
+    'FROM ledger WHERE cust_id = ? AND created_at > ?'
+)
+
+
+@contextlib.contextmanager
+def _acct_num_conflicts():
+    """Raises DuplicateAccountNumberError for a write that would reuse an account number."""
+    try:
+        yield
+    except sqlite3.IntegrityError as error:
+        if 'customers.acct_num' not in str(error):
+            raise
+        raise DuplicateAccountNumberError(str(error)) from None
+
+
+class SQLiteStore(AccountStore):
+    """
+    AccountStore backed by a SQLite database file.
+    """
+
+    def __init__(self, path, pool_size=DEFAULT_POOL_SIZE, pool_timeout=DEFAULT_POOL_TIMEOUT, pre_ping=True):
+        """Opens (and if needed creates) the database at path.
+
+        Args:
+            path (str): Database file path, or ':memory:' for a private database.
+            pool_size (int): Maximum number of pooled connections.
+            pool_timeout (float): Seconds to wait for a free connection.
+            pre_ping (bool): Health-check connections on checkout.
+        """
+        self.path = path
+        self._sequence_lock = threading.Lock()
+        self._sequence = None
+        self._dedup = None
+        self._keepalive = None
+        if path == ':memory:':
+            # A private in-memory database is only visible to connections that share
+            # its cache, and only lives while one of them is open.
+            self._target = f'file:banking_{id(self)}?mode=memory&cache=shared'
+            self._uri = True
+            pool_size = 1
+        else:
+            self._target = path
+            self._uri = False
+
+        init_conn = self._connect()
+        if self._uri:
+            self._keepalive = init_conn
+        else:
+            init_conn.execute('PRAGMA journal_mode=WAL')
+        init_conn.executescript(SCHEMA)
+        if not self._uri:
+            init_conn.close()
+
+        self.pool = ConnectionPool(self._connect, size=pool_size, timeout=pool_timeout, pre_ping=pre_ping)
+
+    def _connect(self):
+        """Opens a new connection configured for this store."""
+        conn = sqlite3.connect(
+            self._target,
+            uri=self._uri,
+            timeout=DEFAULT_POOL_TIMEOUT,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+        )
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.pool.close()
+        if self._keepalive is not None:
+            self._keepalive.close()
+
+    def pool_stats(self):
+        """Returns connection pool metrics (wait time, in-use count, ...)."""
+        return self.pool.stats()
+
+    def _execute(self, sql, params=()):
+        """Runs a single statement on the session connection and returns all rows."""
+        with self.pool.session() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Yields a session connection inside a write transaction."""
+        with self.pool.session() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def get_customer(self, cust_id):
+        rows = self._execute(SELECT_CUSTOMER, (cust_id,))
+        return Customer(*rows[0]) if rows else None
+
+    @staticmethod
+    def _customer_row(cust_id, record):
+        """Returns the UPSERT_CUSTOMER parameters for a record."""
+        record = as_customer(record)
+        first_key, last_key = normalize_name(record['first_name'], record['last_name'])
+        return (
+            cust_id, record['first_name'], record['last_name'], first_key, last_key,
+            record.acct_num, record.address, record.city, record.state, record.zip_code,
+        )
+
+    def put_customer(self, cust_id, record):
+        with _acct_num_conflicts():
+            self._execute(UPSERT_CUSTOMER, self._customer_row(cust_id, record))
+
+    def delete_customer(self, cust_id):
+        with self._transaction() as conn:
+            record = self.get_customer(cust_id)
+            if record is None:
+                raise KeyError(cust_id)
+            conn.execute(DELETE_CUSTOMER, (cust_id,))
+            conn.execute(INSERT_CLOSED_CUSTOMER, (cust_id, time.time()))
+            return record
+
+    def scan_customers(self):
+        # The cursor streams rows instead of materializing the table. The scan holds
+        # its own connection because a generator may be resumed from anywhere.
+        conn = self.pool.checkout()
+        try:
+            for row in conn.execute(SCAN_CUSTOMERS):
+                yield row[0], Customer(*row[1:])
+        finally:
+            self.pool.checkin(conn)
+
+    def find_by_name(self, first_name, last_name):
+        first_key, last_key = normalize_name(first_name, last_name)
+        return frozenset(row[0] for row in self._execute(FIND_BY_NAME, (last_key, first_key)))
+
+    def find_by_acct_num(self, acct_num):
+        rows = self._execute(FIND_BY_ACCT_NUM, (acct_num,))
+        return rows[0][0] if rows else None
+
+    def acct_num_index(self):
+        return AccountNumberView(self)
+
+    def _probe(self, create, table, insert, query, rows):
+        """Returns the rows of query after loading rows into a per-connection temp table.
+
+        Bulk lookups go through a temp table so that many keys are matched
+        against an index in one statement instead of one query per key.
+        """
+        with self.pool.session() as conn:
+            conn.execute(create)
+            conn.execute('BEGIN')
+            try:
+                conn.executemany(insert, rows)
+                return conn.execute(query).fetchall()
+            finally:
+                conn.execute(f'DELETE FROM {table}')
+                conn.execute('COMMIT')
+
+    def existing_names(self, names):
+        return set(self._probe(CREATE_NAME_PROBE, 'name_probe', INSERT_NAME_PROBE, FIND_PROBED_NAMES, names))
+
+    def existing_acct_nums(self, acct_nums):
+        rows = self._probe(
+            CREATE_ACCT_NUM_PROBE, 'acct_num_probe', INSERT_ACCT_NUM_PROBE, FIND_PROBED_ACCT_NUMS,
+            [(acct_num,) for acct_num in acct_nums],
+        )
+        return {row[0] for row in rows}
+
+    def insert_customers(self, customers, openings):
+        with _acct_num_conflicts(), self._transaction() as conn:
+            conn.executemany(UPSERT_CUSTOMER, [self._customer_row(cust_id, record) for cust_id, record in customers])
+            conn.executemany(UPSERT_BALANCE, [
+                (cust_id, opening.minor, opening.currency) for (cust_id, _), opening in zip(customers, openings)
+            ])
+
+    def id_sequence(self):
+        with self._sequence_lock:
+            if self._sequence is None:
+                max_id = self._execute(MAX_CUST_ID)[0][0]
+                self._sequence = IdSequence(max(max_id or BASE_CUST_ID, BASE_CUST_ID))
+            return self._sequence
+
+    def get_ledger(self, cust_id):
+        with self.pool.session() as conn:
+            balance = self.get_balance(cust_id)
+            if balance is None:
+                return None
+            ledger = {'deposit': [], 'withdraw': [], 'balance': balance}
+            for kind, amount_minor in conn.execute(SELECT_LEDGER, (cust_id,)):
+                ledger[kind].append(Money(amount_minor, balance.currency))
+            return ledger
+
+    def create_ledger(self, cust_id, balance=0, currency=DEFAULT_CURRENCY):
+        balance = Money.of(balance, currency)
+        with self._transaction() as conn:
+            conn.execute(DELETE_LEDGER, (cust_id,))
+            conn.execute(UPSERT_BALANCE, (cust_id, balance.minor, balance.currency))
+
+    def get_balance(self, cust_id):
+        rows = self._execute(SELECT_BALANCE, (cust_id,))
+        return Money(*rows[0]) if rows else None
+
+    def get_currency(self, cust_id):
+        rows = self._execute(SELECT_BALANCE, (cust_id,))
+        return rows[0][1] if rows else None
+
+    def balance_as_of(self, cust_id, when):
+        if isinstance(when, datetime):
+            when = when.timestamp()
+        with self.pool.session() as conn:
+            balance = self.get_balance(cust_id)
+            if balance is None:
+                raise KeyError(cust_id)
+            return Money(balance.minor - conn.execute(SUM_AFTER, (cust_id, when)).fetchone()[0], balance.currency)
+
+    def withdrawals_since(self, cust_id, when):
+        if isinstance(when, datetime):
+            when = when.timestamp()
+        return self._execute(SELECT_WITHDRAWALS, (cust_id, when))
+
+    def apply_transaction(self, cust_id, kind, amount, expected=None, key=None):
+        # Ledger row, balance change, and idempotency key commit together or not at all.
+        with self._transaction() as conn:
+            row = conn.execute(SELECT_BALANCE, (cust_id,)).fetchone()
+            if row is None:
+                raise KeyError(cust_id)
+            balance_minor, currency = row
+            if expected is not None and balance_minor != Money.of(expected, currency).minor:
+                raise ConcurrentUpdateError(f'Balance of {cust_id} changed since it was read')
+            amount = Money.of(amount, currency)
+            if amount.currency != currency:
+                raise ValueError(f'Currency mismatch: account is {currency}, amount is {amount.currency}')
+            delta = amount.minor if kind == 'deposit' else -amount.minor
+            now = time.time()
+            if key is not None:
+                try:
+                    conn.execute(INSERT_POSTING, (key, cust_id, kind, amount.minor, balance_minor + delta, currency, now))
+                except sqlite3.IntegrityError:
+                    raise DuplicatePostingError(key) from None
+            conn.execute(UPDATE_BALANCE, (delta, cust_id))
+            conn.execute(INSERT_LEDGER, (cust_id, kind, amount.minor, now))
+            return Money(balance_minor + delta, currency)
+
+    def dedup_cache(self):
+        with self._sequence_lock:
+            if self._dedup is None:
+                self._dedup = create_dedup_cache()
+            return self._dedup
+
+    def get_posting(self, key):
+        rows = self._execute(SELECT_POSTING, (key,))
+        if not rows:
+            return None
+        key, cust_id, kind, amount_minor, balance_minor, currency, created_at = rows[0]
+        return PostingRecord(key, cust_id, kind, Money(amount_minor, currency), Money(balance_minor, currency), created_at)
+
+    def apply_batch(self, cust_ids, counts, codes, deltas, expected=None):
+        now = time.time()
+        kinds = [KIND_NAMES[code] for code in codes.tolist()]
+        deltas = deltas.tolist()
+        balances = []
+        rows = []
+        position = 0
+        # One transaction for the whole batch: one executemany for the ledger rows
+        # and a single balance update per account.
+        with self._transaction() as conn:
+            for group, (cust_id, count) in enumerate(zip(cust_ids, counts)):
+                row = conn.execute(SELECT_BALANCE, (cust_id,)).fetchone()
+                if row is None:
+                    raise KeyError(cust_id)
+                balance_minor, currency = row
+                if expected is not None and balance_minor != expected[group]:
+                    raise ConcurrentUpdateError(f'Balance of {cust_id} changed since the batch was validated')
+                for index in range(position, position + count):
+                    balance_minor += deltas[index]
+                    balances.append(balance_minor)
+                    rows.append((cust_id, kinds[index], abs(deltas[index]), now))
+                conn.execute(UPSERT_BALANCE, (cust_id, balance_minor, currency))
+                position += count
+            conn.executemany(INSERT_LEDGER, rows)
+        return np.array(balances, dtype=np.int64)
+
+    def apply_transfers(self, transfers, expected=None):
+        # Journal lookups, net postings, and journal inserts share one write
+        # transaction, which also serializes concurrent requests with one key.
+        with self._transaction() as conn:
+            for cust_id, minor in (expected or {}).items():
+                row = conn.execute(SELECT_BALANCE, (cust_id,)).fetchone()
+                if row is None:
+                    raise KeyError(cust_id)
+                if row[0] != minor:
+                    raise ConcurrentUpdateError(f'Balance of {cust_id} changed since the transfer was validated')
+            fresh, records, replayed = split_replays(transfers, lambda key: _transfer_record(conn, key))
+            pending = [transfers[index] for index in fresh]
+            cust_ids, deltas = net_positions(pending)
+            accounts = {}
+            for cust_id in cust_ids:
+                row = conn.execute(SELECT_BALANCE, (cust_id,)).fetchone()
+                if row is None:
+                    raise KeyError(cust_id)
+                accounts[cust_id] = row
+            for _, source, destination, _ in pending:
+                if accounts[source][1] != accounts[destination][1]:
+                    raise ValueError(f'Currency mismatch: {source} is {accounts[source][1]}, '
+                                     f'{destination} is {accounts[destination][1]}')
+
+            now = time.time()
+            balances = {}
+            rows = []
+            for cust_id, delta in zip(cust_ids, deltas):
+                balance_minor, currency = accounts[cust_id]
+                balances[cust_id] = Money(balance_minor + delta, currency)
+                if delta:
+                    conn.execute(UPDATE_BALANCE, (delta, cust_id))
+                    rows.append((cust_id, 'deposit' if delta > 0 else 'withdraw', abs(delta), now))
+            conn.executemany(INSERT_LEDGER, rows)
+
+            journal = []
+            for index, (key, source, destination, amount_minor) in zip(fresh, pending):
+                record = records[index] = TransferRecord(
+                    key, source, destination, Money(amount_minor, accounts[source][1]),
+                    balances[source], balances[destination], now,
+                )
+                if key is not None:
+                    journal.append((key, source, destination, amount_minor, record.amount.currency,
+                                    record.source_balance.minor, record.destination_balance.minor, now))
+            conn.executemany(INSERT_TRANSFER, journal)
+        return resolve_repeats(records), replayed
+
+    def get_transfer(self, key):
+        with self.pool.session() as conn:
+            return _transfer_record(conn, key)
+
+    def ledger_columns(self):
+        # A deferred transaction gives both scans the same snapshot without
+        # taking the write lock.
+        with self.pool.session() as conn:
+            conn.execute('BEGIN')
+            try:
+                balances = conn.execute(SCAN_BALANCES).fetchall()
+                entries = conn.execute(SCAN_LEDGER).fetchall()
+            finally:
+                conn.execute('COMMIT')
+        return _ledger_columns(balances, entries)
+
+    def ledgers_changed_since(self, txn_id, known=()):
+        with self.pool.session() as conn:
+            conn.execute('BEGIN')
+            try:
+                cust_ids = [row[0] for row in conn.execute(SCAN_LEDGER_IDS)]
+                posted = {row[0] for row in conn.execute(SELECT_POSTED_SINCE, (txn_id,))}
+            finally:
+                conn.execute('COMMIT')
+        return [cust_id for cust_id in cust_ids if cust_id in posted or cust_id not in known]
+
+    def iter_ledger_columns(self, accounts=SCAN_CHUNK_ACCOUNTS, select=None):
+        # One read transaction spans the whole scan, so every chunk comes from
+        # the same snapshot; the scan holds its own connection, as scan_customers does.
+        conn = self.pool.checkout()
+        try:
+            conn.execute('BEGIN')
+            try:
+                cursor = conn.execute(SCAN_BALANCES)
+                group = []
+                while True:
+                    rows = cursor.fetchmany(accounts)
+                    group.extend(row for row in rows if select is None or select(row[0]))
+                    while len(group) >= accounts or (group and not rows):
+                        chunk, group = group[:accounts], group[accounts:]
+                        entries = []
+                        for start in range(0, len(chunk), MAX_PARAMS):
+                            cust_ids = [row[0] for row in chunk[start:start + MAX_PARAMS]]
+                            entries += conn.execute(SCAN_LEDGER_OF.format(', '.join('?' * len(cust_ids))), cust_ids)
+                        yield _ledger_columns(chunk, entries)
+                    if not rows:
+                        break
+            finally:
+                conn.execute('COMMIT')
+        finally:
+            self.pool.checkin(conn)
+
+
+def _ledger_columns(balances, entries):
+    """Builds LedgerColumns from balances rows and ledger rows, both in cust_id order."""
+    cust_ids = [row[0] for row in balances]
+    position = {cust_id: index for index, cust_id in enumerate(cust_ids)}
+    entries = [row for row in entries if row[0] in position]
+    account = np.fromiter((position[row[0]] for row in entries), dtype=np.int64, count=len(entries))
+    kinds = np.fromiter((KIND_CODES[row[1]] for row in entries), dtype=np.int8, count=len(entries))
+    amounts = np.fromiter((row[2] for row in entries), dtype=np.int64, count=len(entries))
+    amounts = np.where(kinds == DEPOSIT, amounts, -amounts)
+    created = np.fromiter((row[3] for row in entries), dtype=np.float64, count=len(entries))
+    txn_ids = np.fromiter((row[4] for row in entries), dtype=np.int64, count=len(entries))
+
+    offsets = np.zeros(len(cust_ids) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(account, minlength=len(cust_ids)))
+    closing = np.array([row[1] for row in balances], dtype=np.int64)
+    # The balances table holds the current balance; the opening balance is
+    # whatever is left after taking every ledger entry back out.
+    running = np.concatenate(([0], np.cumsum(amounts)))
+    opening = closing - (running[offsets[1:]] - running[offsets[:-1]])
+    return LedgerColumns(
+        cust_ids,
+        [row[2] for row in balances],
+        opening,
+        offsets,
+        np.rint(created * 1_000_000).astype(np.int64),
+        amounts,
+        kinds,
+        txn_ids,
+    )
+
+
+def _transfer_record(conn, key):
+    """Reads the journaled transfer for key on conn, or None."""
+    row = conn.execute(SELECT_TRANSFER, (key,)).fetchone()
+    if row is None:
+        return None
+    key, source, destination, amount_minor, currency, source_minor, destination_minor, created_at = row
+    return TransferRecord(
+        key, source, destination, Money(amount_minor, currency),
+        Money(source_minor, currency), Money(destination_minor, currency), created_at,
+    )
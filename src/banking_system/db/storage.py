@@ -0,0 +1,667 @@
+"""
+db/storage.py
+
+Storage interface shared by BankAccount and AccountTransactions.
+
+AccountStore describes the operations the model layer needs (get/put/scan of
+customer records, index lookups, and atomic balance updates). MemoryStore keeps
+the original accounts_db / transactions_db dicts as the backing data; the SQLite
+backend lives in db/sqlite_store.py. The backend is selected with DATABASE_URL:
+
+    unset or memory://          -> MemoryStore over the in-process dicts
+    sqlite:///path/to/bank.db   -> SQLiteStore at that path
+    sqlite://                   -> SQLiteStore in a private in-memory database
+    wal:///path/to/directory    -> DurableStore: the in-process dicts, write-ahead
+                                   logged to that directory (db/durable_store.py)
+    snapshot:///path/to/file    -> SnapshotStore: a memory-mapped snapshot with an
+                                   in-memory overlay for writes (db/snapshot.py)
+    shards://4[/url-{shard}]    -> ShardedStore: customers partitioned across 4
+                                   shard processes, each in memory or on the given
+                                   backend URL (db/sharding.py)
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from banking_system.db import accounts_store
+from banking_system.db.accounts_store import account_indexes, delete_customer, insert_customer
+from banking_system.db.dedup import posting_cache
+from banking_system.db.ledger import KIND_NAMES, Ledger, LedgerColumns, next_txn_ids
+from banking_system.db.locks import StripedLock
+from banking_system.db.sequence import customer_id_sequence
+from banking_system.db.transfers import TransferRecord, net_positions, resolve_repeats, split_replays, transfer_journal
+from banking_system.model.customer import as_customer
+from banking_system.model.money import DEFAULT_CURRENCY, Money
+
+MEMORY_URL = 'memory://'
+SCAN_CHUNK_ACCOUNTS = 1_000
+
+# Per-account locks for read-modify-write updates on the in-process dicts. They
+# are module-level because MemoryStore objects are cheap views over shared dicts.
+_account_locks = StripedLock()
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when a compare-and-set update finds the balance changed since it was read."""
+    pass
+
+
+class DuplicateAccountNumberError(Exception):
+    """Raised when a customer write would give an account number already in use to another customer."""
+    pass
+
+
+class AccountNumberView:
+    """Container view of account numbers in use, answering `in` with store.find_by_acct_num."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __contains__(self, acct_num):
+        return self._store.find_by_acct_num(acct_num) is not None
+
+    def existing(self, acct_nums):
+        """Returns the account numbers in acct_nums that are in use, in one store call."""
+        return self._store.existing_acct_nums(acct_nums)
+
+
+class AccountStore:
+    """
+    Interface every storage backend implements.
+    Methods:
+        - get_customer / put_customer / delete_customer / scan_customers
+        - find_by_name / find_by_acct_num / acct_num_index
+        - existing_names / existing_acct_nums / insert_customers
+        - id_sequence
+        - get_ledger / create_ledger / get_balance / balance_as_of / apply_transaction
+        - withdrawals_since
+        - dedup_cache / get_posting
+        - get_currency / get_currencies / get_balances / apply_batch
+        - apply_transfers / get_transfer
+        - ledger_columns / iter_ledger_columns / ledgers_changed_since
+    Attributes:
+        - blocking: True if calls can block on I/O (async callers run them in threads)
+        - registry_key: what state kept per store outside it (db/registry.py) is keyed on
+    """
+
+    blocking = True
+
+    @property
+    def registry_key(self):
+        return self
+
+    def get_customer(self, cust_id):
+        """Returns the customer record for cust_id, or None."""
+        raise NotImplementedError
+
+    def put_customer(self, cust_id, record):
+        """Inserts or replaces a customer record.
+
+        Raises:
+            DuplicateAccountNumberError: If a backend that enforces unique account
+                numbers (SQLite) finds acct_num on another customer; nothing is written.
+        """
+        raise NotImplementedError
+
+    def delete_customer(self, cust_id):
+        """Deletes a customer record and returns it.
+
+        The ID stays retired: id_sequence never issues it again, also after a
+        restart of a persistent backend, since the account's ledger is kept.
+        """
+        raise NotImplementedError
+
+    def scan_customers(self):
+        """Yields (cust_id, record) for every customer."""
+        raise NotImplementedError
+
+    def find_by_name(self, first_name, last_name):
+        """Returns the set of cust_ids matching a normalized name."""
+        raise NotImplementedError
+
+    def find_by_acct_num(self, acct_num):
+        """Returns the cust_id that owns acct_num, or None."""
+        raise NotImplementedError
+
+    def acct_num_index(self):
+        """Returns a container of account numbers in use (supports `in`)."""
+        raise NotImplementedError
+
+    def existing_names(self, names):
+        """Returns the normalized (first_name, last_name) keys in names that already belong to a customer.
+
+        The bulk form of find_by_name, for loaders checking many names at once;
+        the default looks each one up.
+        """
+        return {name for name in names if self.find_by_name(*name)}
+
+    def existing_acct_nums(self, acct_nums):
+        """Returns the account numbers in acct_nums that are already in use (bulk find_by_acct_num)."""
+        return {acct_num for acct_num in acct_nums if self.find_by_acct_num(acct_num) is not None}
+
+    def insert_customers(self, customers, openings):
+        """Inserts new customers with their opening ledgers as one unit of work.
+
+        Backends override this to write the whole group in one transaction (or
+        one log commit); the default inserts one customer at a time.
+
+        Args:
+            customers (list): (cust_id, record) pairs for cust_ids not yet in use.
+            openings (list): Opening balance (Money) of each customer's ledger.
+
+        Raises:
+            DuplicateAccountNumberError: As for put_customer; the group is not written.
+        """
+        for (cust_id, record), opening in zip(customers, openings):
+            self.put_customer(cust_id, record)
+            self.create_ledger(cust_id, opening, opening.currency)
+
+    def id_sequence(self):
+        """Returns the customer ID sequence for this store."""
+        raise NotImplementedError
+
+    def get_ledger(self, cust_id):
+        """Returns {'deposit': [...], 'withdraw': [...], 'balance': balance}, or None."""
+        raise NotImplementedError
+
+    def create_ledger(self, cust_id, balance=0, currency=DEFAULT_CURRENCY):
+        """Creates an empty ledger for cust_id with an opening balance."""
+        raise NotImplementedError
+
+    def get_balance(self, cust_id):
+        """Returns the current balance for cust_id as Money, or None if there is no ledger."""
+        raise NotImplementedError
+
+    def balance_as_of(self, cust_id, when):
+        """Returns the balance after every transaction at or before `when`.
+
+        Raises:
+            KeyError: If cust_id has no ledger.
+        """
+        raise NotImplementedError
+
+    def withdrawals_since(self, cust_id, when):
+        """Returns (timestamp_seconds, amount_minor) for cust_id's withdrawals after `when`.
+
+        Used once per account to seed rolling withdrawal limits (model/overdraft.py).
+        Returns an empty list if cust_id has no ledger.
+        """
+        raise NotImplementedError
+
+    def apply_transaction(self, cust_id, kind, amount, expected=None, key=None):
+        """Atomically records a 'deposit' or 'withdraw' and returns the new balance.
+
+        With `expected`, the update is a compare-and-set: it is applied only if
+        the balance is still the one the caller read and validated.
+
+        Args:
+            cust_id (str): Customer whose ledger is posted to.
+            kind (str): 'deposit' or 'withdraw'.
+            amount (Money | float): Positive amount in the account currency.
+            expected (Money): Balance the caller expects the account to have.
+            key (str): Idempotency key; backends that persist keys (see
+                get_posting) record it together with the posting.
+
+        Returns:
+            Money: The balance after the transaction.
+
+        Raises:
+            KeyError: If cust_id has no ledger.
+            ConcurrentUpdateError: If expected is given and the balance differs.
+            DuplicatePostingError: If key was already recorded; nothing is applied.
+        """
+        raise NotImplementedError
+
+    def dedup_cache(self):
+        """Returns the db.dedup.DedupCache of recent posting idempotency keys."""
+        raise NotImplementedError
+
+    def get_posting(self, key):
+        """Returns the persisted PostingRecord for an idempotency key, or None."""
+        raise NotImplementedError
+
+    def get_currency(self, cust_id):
+        """Returns the currency of cust_id's ledger, or None if there is no ledger."""
+        balance = self.get_balance(cust_id)
+        return None if balance is None else balance.currency
+
+    def get_currencies(self, cust_ids):
+        """Returns the currency of each ledger in cust_ids (None where there is no ledger).
+
+        The bulk form of get_currency, for batch postings; the default looks each
+        one up.
+        """
+        return [self.get_currency(cust_id) for cust_id in cust_ids]
+
+    def get_balances(self, cust_ids):
+        """Returns the balance of each ledger in cust_ids (None where there is no ledger); bulk get_balance."""
+        return [self.get_balance(cust_id) for cust_id in cust_ids]
+
+    def apply_batch(self, cust_ids, counts, codes, deltas, expected=None):
+        """Applies pre-validated postings grouped by account.
+
+        The postings are columns sorted by account: the first counts[0] entries
+        belong to cust_ids[0], the next counts[1] to cust_ids[1], and so on, each
+        group in posting order. Backends override this with a bulk implementation;
+        the default posts one transaction at a time.
+
+        Args:
+            cust_ids (list): Accounts, one per group.
+            counts (list): Number of postings in each group.
+            codes (numpy.ndarray): Entry type codes (db.ledger.DEPOSIT / WITHDRAW).
+            deltas (numpy.ndarray): Signed amounts in minor units.
+            expected (numpy.ndarray): Optional opening balance of each account in
+                minor units, as validated by the caller (compare-and-set).
+
+        Returns:
+            numpy.ndarray: int64 balance in minor units after each posting.
+
+        Raises:
+            KeyError: If a cust_id has no ledger; nothing is applied for that account.
+            ConcurrentUpdateError: If expected is given and an opening balance differs.
+        """
+        balances = np.empty(len(deltas), dtype=np.int64)
+        position = 0
+        for group, (cust_id, count) in enumerate(zip(cust_ids, counts)):
+            currency = self.get_currency(cust_id)
+            if currency is None:
+                raise KeyError(cust_id)
+            opening = None if expected is None else Money(int(expected[group]), currency)
+            for index in range(position, position + count):
+                balance = self.apply_transaction(
+                    cust_id, KIND_NAMES[codes[index]], Money(abs(deltas[index]), currency),
+                    expected=opening if index == position else None,
+                )
+                balances[index] = balance.minor
+            position += count
+        return balances
+
+    def apply_transfers(self, transfers, expected=None):
+        """Atomically settles pre-validated transfers by net position.
+
+        Every account touched by the batch gets one ledger entry for its net
+        change (none if its transfers cancel out) and one balance write. Keyed
+        transfers are journaled; a transfer whose key is already journaled, or
+        repeats a key earlier in the batch, is not applied again.
+
+        Args:
+            transfers (list): (key, source, destination, amount_minor) tuples; key
+                may be None, amounts are positive and in the accounts' currency.
+            expected (dict): Optional cust_id -> balance in minor units, as validated
+                by the caller against the overdraft policy (compare-and-set).
+
+        Returns:
+            tuple: (records, replayed), a TransferRecord per transfer in input order
+                (the journaled one for replays) and a bool per transfer flagging replays.
+
+        Raises:
+            KeyError: If an account has no ledger; nothing is applied.
+            ValueError: If a transfer's accounts hold different currencies; nothing is applied.
+            ConcurrentUpdateError: If expected is given and a balance differs; nothing is applied.
+        """
+        raise NotImplementedError
+
+    def get_transfer(self, key):
+        """Returns the TransferRecord journaled under key, or None."""
+        raise NotImplementedError
+
+    def ledger_columns(self):
+        """Returns every ledger as a db.ledger.LedgerColumns snapshot."""
+        raise NotImplementedError
+
+    def iter_ledger_columns(self, accounts=SCAN_CHUNK_ACCOUNTS, select=None):
+        """Yields the ledgers as LedgerColumns of at most `accounts` accounts each, in cust_id order.
+
+        The streaming form of ledger_columns, for exports that must not hold the
+        whole book at once. Each ledger is read consistently; the in-memory
+        backends read chunk by chunk, so postings made during a scan may land in
+        chunks not yet read. The default slices ledger_columns(), so it is only
+        as bounded as that is.
+
+        Args:
+            accounts (int): Most accounts per chunk.
+            select (callable): Called with each cust_id; only ledgers it accepts are read.
+        """
+        columns = self.ledger_columns()
+        order = sorted(
+            (cust_id, index) for index, cust_id in enumerate(columns.cust_ids) if select is None or select(cust_id)
+        )
+        for start in range(0, len(order), accounts):
+            yield columns.take([index for _, index in order[start:start + accounts]])
+
+    def ledgers_changed_since(self, txn_id, known=()):
+        """Returns the cust_ids of ledgers with entries after txn_id, and of ledgers not in known.
+
+        For incremental whole-book jobs (model/interest.py): txn_id is the
+        highest transaction ID the caller has read, and known the ledgers it has
+        seen. The default reads every ledger.
+        """
+        columns = self.ledger_columns()
+        if columns.txn_ids is None:
+            return list(columns.cust_ids)
+        latest = np.full(len(columns), -1, dtype=np.int64)
+        posted = np.flatnonzero(columns.counts)
+        # Transaction IDs rise within a ledger, so its last entry has the highest.
+        latest[posted] = columns.txn_ids[columns.offsets[posted + 1] - 1]
+        return [
+            cust_id for cust_id, last in zip(columns.cust_ids, latest.tolist()) if last > txn_id or cust_id not in known
+        ]
+
+
+class MemoryStore(AccountStore):
+    """
+    AccountStore backed by accounts_db / transactions_db style dicts.
+
+    The dicts default to the module-level stores in accounts_store; passing
+    other dicts (as the model does with its own module globals) lets callers and
+    tests swap the data without touching this class. Ledgers are kept as
+    db.ledger.Ledger objects; a legacy {'deposit', 'withdraw', 'balance'} dict
+    found in transactions is converted to a Ledger the first time it is written.
+    """
+
+    blocking = False
+
+    def __init__(self, accounts=None, transactions=None):
+        """Initializes the store over existing dicts."""
+        self.accounts = accounts_store.accounts_db if accounts is None else accounts
+        self.transactions = accounts_store.transactions_db if transactions is None else transactions
+
+    @property
+    def registry_key(self):
+        # Views are built per call; the state belongs to the dicts.
+        return self.transactions
+
+    def get_customer(self, cust_id):
+        return self.accounts.get(cust_id)
+
+    def put_customer(self, cust_id, record):
+        insert_customer(self.accounts, cust_id, as_customer(record))
+
+    def delete_customer(self, cust_id):
+        return delete_customer(self.accounts, cust_id)
+
+    def scan_customers(self):
+        return iter(list(self.accounts.items()))
+
+    def find_by_name(self, first_name, last_name):
+        return account_indexes(self.accounts).find_by_name(first_name, last_name)
+
+    def find_by_acct_num(self, acct_num):
+        return account_indexes(self.accounts).find_by_acct_num(acct_num)
+
+    def acct_num_index(self):
+        return account_indexes(self.accounts).acct_nums
+
+    def existing_names(self, names):
+        return account_indexes(self.accounts).names.existing(names)
+
+    def insert_customers(self, customers, openings):
+        indexes = account_indexes(self.accounts)
+        for (cust_id, record), opening in zip(customers, openings):
+            indexes.insert(cust_id, as_customer(record))
+            self.transactions[cust_id] = Ledger(opening, opening.currency)
+
+    def id_sequence(self):
+        return customer_id_sequence(self.accounts)
+
+    def _ledger(self, cust_id):
+        """Returns the Ledger for cust_id, upgrading a legacy dict in place."""
+        ledger = self.transactions[cust_id]
+        if not isinstance(ledger, Ledger):
+            ledger = self.transactions[cust_id] = Ledger.from_legacy(ledger)
+        return ledger
+
+    def get_ledger(self, cust_id):
+        ledger = self.transactions.get(cust_id)
+        if isinstance(ledger, Ledger):
+            return ledger.to_dict()
+        return ledger
+
+    def create_ledger(self, cust_id, balance=0, currency=DEFAULT_CURRENCY):
+        with _account_locks.lock_for(cust_id):
+            self.transactions[cust_id] = Ledger(balance, currency)
+
+    def get_balance(self, cust_id):
+        ledger = self.transactions.get(cust_id)
+        return None if ledger is None else Money.of(ledger['balance'])
+
+    def get_currency(self, cust_id):
+        ledger = self.transactions.get(cust_id)
+        if ledger is None:
+            return None
+        return ledger.currency if isinstance(ledger, Ledger) else Money.of(ledger['balance']).currency
+
+    def balance_as_of(self, cust_id, when):
+        with _account_locks.lock_for(cust_id):
+            return self._ledger(cust_id).balance_as_of(when)
+
+    def withdrawals_since(self, cust_id, when):
+        ledger = self.transactions.get(cust_id)
+        if ledger is None:
+            return []
+        if not isinstance(ledger, Ledger):
+            ledger = Ledger.from_legacy(ledger)
+        return ledger.withdrawals_since(when)
+
+    def apply_transaction(self, cust_id, kind, amount, expected=None, key=None):
+        with _account_locks.lock_for(cust_id):
+            ledger = self._ledger(cust_id)
+            if expected is not None and ledger.balance_cents != ledger._to_minor(expected):
+                raise ConcurrentUpdateError(f'Balance of {cust_id} changed since it was read')
+            return ledger.append(kind, amount)
+
+    def dedup_cache(self):
+        return posting_cache(self.transactions)
+
+    def get_posting(self, key):
+        return None  # keys are not persisted; the dedup cache is the whole window
+
+    def apply_batch(self, cust_ids, counts, codes, deltas, expected=None):
+        deltas = np.asarray(deltas, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        starts = np.cumsum(counts) - counts
+        with _account_locks.hold(*cust_ids):
+            ledgers = [self._ledger(cust_id) for cust_id in cust_ids]
+            now = time.time()
+            # Running balances for every account in one pass: a global cumulative
+            # sum, rebased at the start of each group onto that account's balance.
+            running = np.cumsum(deltas)
+            openings = np.fromiter((ledger.balance_cents for ledger in ledgers), dtype=np.int64, count=len(ledgers))
+            if expected is not None and not np.array_equal(openings, expected):
+                raise ConcurrentUpdateError('Balances changed since the batch was validated')
+            balances = running - np.repeat(running[starts] - deltas[starts] - openings, counts)
+            reserved = next_txn_ids(len(deltas))
+            txn_ids = np.arange(reserved.start, reserved.stop, dtype=np.int64)
+            for ledger, start, stop in zip(ledgers, starts.tolist(), (starts + counts).tolist()):
+                ledger.extend_minor(
+                    codes[start:stop], deltas[start:stop], now, balances=balances[start:stop], txn_ids=txn_ids[start:stop]
+                )
+        return balances
+
+    def apply_transfers(self, transfers, expected=None):
+        journal = transfer_journal(self.transactions)
+        keys = [transfer[0] for transfer in transfers if transfer[0] is not None]
+        accounts = {cust_id for transfer in transfers for cust_id in transfer[1:3]}
+        # Keys share the account lock stripes, so two requests with one key
+        # cannot both miss the journal.
+        with _account_locks.hold(*accounts, *keys, *(expected or ())):
+            for cust_id, minor in (expected or {}).items():
+                if self._ledger(cust_id).balance_cents != minor:
+                    raise ConcurrentUpdateError(f'Balance of {cust_id} changed since the transfer was validated')
+            fresh, records, replayed = split_replays(transfers, journal.get)
+            pending = [transfers[index] for index in fresh]
+            cust_ids, deltas = net_positions(pending)
+            ledgers = {cust_id: self._ledger(cust_id) for cust_id in cust_ids}
+            for _, source, destination, _ in pending:
+                if ledgers[source].currency != ledgers[destination].currency:
+                    raise ValueError(f'Currency mismatch: {source} is {ledgers[source].currency}, '
+                                     f'{destination} is {ledgers[destination].currency}')
+
+            now = time.time()
+            for cust_id, delta in zip(cust_ids, deltas):
+                if delta:
+                    ledger = ledgers[cust_id]
+                    ledger.append('deposit' if delta > 0 else 'withdraw', Money(abs(delta), ledger.currency), now)
+            for index, (key, source, destination, amount_minor) in zip(fresh, pending):
+                currency = ledgers[source].currency
+                records[index] = TransferRecord(
+                    key, source, destination, Money(amount_minor, currency),
+                    ledgers[source].balance, ledgers[destination].balance, now,
+                )
+            journal.add(records[index] for index in fresh)
+        return resolve_repeats(records), replayed
+
+    def get_transfer(self, key):
+        return transfer_journal(self.transactions).get(key)
+
+    def ledger_columns(self):
+        with _account_locks.hold_all():
+            cust_ids = list(self.transactions)
+            books = list(self.transactions.values())
+        # Legacy dict records are read through a temporary Ledger, not upgraded.
+        books = [ledger if isinstance(ledger, Ledger) else Ledger.from_legacy(ledger) for ledger in books]
+        return LedgerColumns.from_ledgers(cust_ids, books)
+
+    def iter_ledger_columns(self, accounts=SCAN_CHUNK_ACCOUNTS, select=None):
+        cust_ids = sorted(cust_id for cust_id in list(self.transactions) if select is None or select(cust_id))
+        for start in range(0, len(cust_ids), accounts):
+            group = cust_ids[start:start + accounts]
+            # from_ledgers copies the entries, so the locks cover the copy only.
+            with _account_locks.hold(*group):
+                present = [cust_id for cust_id in group if cust_id in self.transactions]
+                books = [self.transactions[cust_id] for cust_id in present]
+                books = [ledger if isinstance(ledger, Ledger) else Ledger.from_legacy(ledger) for ledger in books]
+                columns = LedgerColumns.from_ledgers(present, books)
+            yield columns
+
+    def ledgers_changed_since(self, txn_id, known=()):
+        # A legacy dict record has no txn_ids, so it always counts as changed.
+        return [
+            cust_id for cust_id, txn_ids in ((cust_id, getattr(ledger, 'txn_ids', None)) for cust_id, ledger in list(self.transactions.items()))
+            if txn_ids is None or cust_id not in known or (txn_ids and txn_ids[-1] > txn_id)
+        ]
+
+
+def create_store(url, **options):
+    """Creates a storage backend from a database URL.
+
+    Args:
+        url (str): A memory://, sqlite://, wal://, snapshot://, or shards:// URL, or None for the in-memory store.
+        **options: Backend options such as pool_size, pool_timeout, and pre_ping
+            (sqlite), sync, commit_delay, and checkpoint_bytes (wal), or virtual_nodes (shards).
+
+    Returns:
+        AccountStore: The backend for url.
+
+    Raises:
+        ValueError: If the URL scheme is not supported.
+    """
+    if not url or url == MEMORY_URL:
+        return MemoryStore()
+    if url.startswith('sqlite://'):
+        from banking_system.db.sqlite_store import SQLiteStore
+        path = url[len('sqlite://'):]
+        # sqlite:///relative.db and sqlite:////abs/path.db, as in SQLAlchemy URLs
+        return SQLiteStore(path[1:] if path.startswith('/') else ':memory:', **options)
+    if url.startswith('wal://'):
+        from banking_system.db.durable_store import DurableStore
+        path = url[len('wal://'):]
+        if not path.startswith('/'):
+            raise ValueError('wal:// URLs need a directory, as in wal:///path/to/directory')
+        return DurableStore(path[1:], **options)
+    if url.startswith('snapshot://'):
+        from banking_system.db.snapshot import SnapshotStore
+        path = url[len('snapshot://'):]
+        if not path.startswith('/'):
+            raise ValueError('snapshot:// URLs need a file, as in snapshot:///path/to/bank.snap')
+        return SnapshotStore(path[1:])
+    if url.startswith('shards://'):
+        from banking_system.db.sharding import ShardedStore
+        count, _, template = url[len('shards://'):].partition('/')
+        if not count.isdigit():
+            raise ValueError('shards:// URLs need a shard count, as in shards://4 or shards://4/sqlite:///bank-{shard}.db')
+        return ShardedStore(int(count), template or MEMORY_URL, **options)
+    raise ValueError(
+        f'Unsupported DATABASE_URL scheme: {url.split(":", 1)[0]} '
+        '(use memory://, sqlite:///path, wal:///dir, snapshot:///file, or shards://n; see .env.example)'
+    )
+
+
+_database_url = None
+_shared_stores = {}
+_shared_lock = threading.Lock()
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
+
+
+def database_url():
+    """Returns the configured DATABASE_URL, read once from config/settings.py."""
+    global _database_url
+    if _database_url is None:
+        _database_url = _config().SQLALCHEMY_DATABASE_URI or MEMORY_URL
+    return _database_url
+
+
+def pool_options():
+    """Returns connection pool options from the active Config class."""
+    config = _config()
+    return {
+        'pool_size': config.DB_POOL_SIZE,
+        'pool_timeout': config.DB_POOL_TIMEOUT,
+        'pre_ping': config.DB_POOL_PRE_PING,
+    }
+
+
+def wal_options():
+    """Returns write-ahead log options from the active Config class."""
+    config = _config()
+    return {
+        'sync': config.WAL_SYNC,
+        'commit_delay': config.WAL_COMMIT_DELAY,
+        'checkpoint_bytes': config.WAL_CHECKPOINT_BYTES,
+    }
+
+
+def configure(url):
+    """Overrides the configured DATABASE_URL (for example from an app factory)."""
+    global _database_url
+    with _shared_lock:
+        _database_url = url or MEMORY_URL
+
+
+def backend_options(url):
+    """Returns the configured create_store options for a backend URL."""
+    if url.startswith('wal://'):
+        return wal_options()
+    if url.startswith('sqlite://'):
+        return pool_options()
+    return {}
+
+
+def get_store(accounts=None, transactions=None):
+    """Returns the configured storage backend.
+
+    With the default in-memory configuration this is a MemoryStore over the
+    given dicts; otherwise it is a single shared backend per DATABASE_URL.
+
+    Args:
+        accounts (dict): accounts_db-style dict for the in-memory backend.
+        transactions (dict): transactions_db-style dict for the in-memory backend.
+
+    Returns:
+        AccountStore: The backend to use.
+    """
+    url = database_url()
+    if url == MEMORY_URL:
+        return MemoryStore(accounts, transactions)
+    with _shared_lock:
+        store = _shared_stores.get(url)
+        if store is None:
+            store = _shared_stores[url] = create_store(url, **backend_options(url))
+        return store
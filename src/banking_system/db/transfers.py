@@ -0,0 +1,157 @@
+"""
+db/transfers.py
+
+Account-to-account transfers and their idempotency journal.
+
+A transfer moves an amount from a source to a destination account in one store
+operation: both ledgers are written together or not at all. Transfers may carry
+an idempotency key; the store journals keyed transfers, and a transfer whose key
+is already journaled is not applied again. The journaled record is returned in
+its place, so a client retrying after a timeout cannot move the money twice.
+
+Stores settle transfers in batches by net position: every transfer in a batch
+is folded into one signed amount per account (net_positions), and each account
+gets a single ledger entry and balance write however many transfers touch it.
+"""
+
+import threading
+
+from banking_system.db.registry import StoreRegistry
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when an idempotency key is reused for a different transfer."""
+    pass
+
+
+class TransferRecord:
+    """
+    A settled transfer, as journaled under its idempotency key.
+    Attributes:
+        - key, source, destination, amount (Money)
+        - source_balance / destination_balance: balances once the transfer's batch settled
+        - created_at: epoch seconds
+    Methods:
+        - matches
+    """
+
+    __slots__ = ('key', 'source', 'destination', 'amount', 'source_balance', 'destination_balance', 'created_at')
+
+    def __init__(self, key, source, destination, amount, source_balance, destination_balance, created_at):
+        """Initializes a record."""
+        self.key = key
+        self.source = source
+        self.destination = destination
+        self.amount = amount
+        self.source_balance = source_balance
+        self.destination_balance = destination_balance
+        self.created_at = created_at
+
+    def matches(self, source, destination, amount_minor):
+        """Checks whether a retried request describes this same transfer."""
+        return (self.source, self.destination, self.amount.minor) == (source, destination, amount_minor)
+
+    def __repr__(self):
+        return f'TransferRecord({self.key!r}, {self.source!r} -> {self.destination!r}, {self.amount!r})'
+
+
+def net_positions(transfers):
+    """Folds (key, source, destination, amount_minor) transfers into one delta per account.
+
+    Returns:
+        tuple: (cust_ids, deltas), accounts in first-seen order and their net
+            change in minor units (zero when their transfers cancel out).
+    """
+    net = {}
+    for _, source, destination, amount_minor in transfers:
+        net[source] = net.get(source, 0) - amount_minor
+        net[destination] = net.get(destination, 0) + amount_minor
+    return list(net), list(net.values())
+
+
+def split_replays(transfers, lookup):
+    """Separates transfers to apply from retries of journaled ones.
+
+    A key repeated inside the batch is applied once; its later occurrences are
+    replays of the first.
+
+    Args:
+        transfers (list): (key, source, destination, amount_minor) tuples.
+        lookup (callable): Returns the journaled TransferRecord for a key, or None.
+
+    Returns:
+        tuple: (fresh, records, replayed) where fresh lists the indexes to apply,
+            records holds the journaled record (or, for in-batch repeats, the index
+            of the first occurrence) at every replayed index, and replayed flags them.
+    """
+    fresh = []
+    records = [None] * len(transfers)
+    replayed = [False] * len(transfers)
+    first = {}
+    for index, transfer in enumerate(transfers):
+        key = transfer[0]
+        if key is not None:
+            if key in first:
+                records[index] = first[key]
+                replayed[index] = True
+                continue
+            record = lookup(key)
+            if record is not None:
+                records[index] = record
+                replayed[index] = True
+                continue
+            first[key] = index
+        fresh.append(index)
+    return fresh, records, replayed
+
+
+def resolve_repeats(records):
+    """Replaces in-batch repeat markers (indexes) left by split_replays with records."""
+    return [records[record] if isinstance(record, int) else record for record in records]
+
+
+class TransferJournal:
+    """
+    Idempotency journal for the in-memory store: key -> TransferRecord.
+    Methods:
+        - get
+        - add
+        - records
+    """
+
+    def __init__(self, store):
+        """Initializes an empty journal for a transactions_db-style dict."""
+        self.store = store
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, key):
+        """Returns the record journaled under key, or None."""
+        return self._records.get(key)
+
+    def add(self, records):
+        """Journals keyed records."""
+        with self._lock:
+            for record in records:
+                if record.key is not None:
+                    self._records[record.key] = record
+
+    def records(self):
+        """Returns a list of every journaled record."""
+        with self._lock:
+            return list(self._records.values())
+
+
+_journals = StoreRegistry(TransferJournal)
+
+
+def transfer_journal(store):
+    """Returns the transfer journal for a transactions_db-style dict.
+
+    Like the account indexes, each dict (tests patch in their own) keeps its
+    own journal, so two stores alive at once never share or drop keys.
+    """
+    return _journals.get(store)
@@ -0,0 +1,271 @@
+"""
+db/wal.py
+
+Write-ahead log for the in-memory store (see db/durable_store.py).
+
+The log is a directory of segment files, wal-<first lsn>.log, each a sequence
+of frames:
+
+    length (u32) | crc32 (u32) | lsn (u64) | payload (length bytes)
+
+The CRC covers the LSN and the payload, so a frame torn by a crash mid-write is
+detected and the log is cut back to the last whole frame on recovery.
+
+Writers append frames to an in-memory buffer and then wait for their LSN to be
+durable. Waiting writers commit as a group: the first one to find no flush in
+progress becomes the leader and writes and fsyncs everything buffered so far in
+one call, then wakes every writer whose LSN that covered. Under load, one fsync
+serves many postings instead of one each. A checkpoint rotates to a new segment
+so segments wholly before it can be deleted.
+"""
+
+import os
+import re
+import struct
+import threading
+import zlib
+
+FRAME_HEADER = struct.Struct('<IIQ')
+SEGMENT_PATTERN = re.compile(r'wal-(\d{20})\.log$')
+READ_CHUNK = 64 * 1024 * 1024
+
+
+class WALError(Exception):
+    """Raised when the log can no longer be written (a failed write or fsync)."""
+    pass
+
+
+def segment_name(first_lsn):
+    """Returns the file name of the segment whose first frame is first_lsn."""
+    return f'wal-{first_lsn:020d}.log'
+
+
+def list_segments(directory):
+    """Returns (first_lsn, path) for every segment in directory, oldest first."""
+    segments = []
+    for name in os.listdir(directory):
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            segments.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def encode_frame(lsn, payload):
+    """Returns the bytes of one frame."""
+    lsn_bytes = lsn.to_bytes(8, 'little')
+    return FRAME_HEADER.pack(len(payload), zlib.crc32(payload, zlib.crc32(lsn_bytes)), lsn) + payload
+
+
+def scan_segment(path):
+    """Returns (last_lsn, valid_bytes) for a segment: its last whole frame and where it ends."""
+    last_lsn, end = 0, 0
+    for lsn, _, end in iter_frames(path):
+        last_lsn = lsn
+    return last_lsn, end
+
+
+def iter_frames(path, after=0):
+    """Yields (lsn, payload, end_offset) for each whole frame in a segment with lsn > after.
+
+    The file is read in large chunks; iteration stops at the first torn or
+    corrupt frame.
+    """
+    header_size = FRAME_HEADER.size
+    unpack = FRAME_HEADER.unpack_from
+    crc32 = zlib.crc32
+    with open(path, 'rb') as handle:
+        pending = b''
+        offset = 0  # file offset of buffer[0]
+        while True:
+            chunk = handle.read(READ_CHUNK)
+            if not chunk:
+                return
+            buffer = pending + chunk if pending else chunk
+            position = 0
+            end = len(buffer)
+            while position + header_size <= end:
+                length, crc, lsn = unpack(buffer, position)
+                stop = position + header_size + length
+                if stop > end:
+                    break
+                payload = buffer[position + header_size:stop]
+                if crc32(payload, crc32(lsn.to_bytes(8, 'little'))) != crc:
+                    return
+                position = stop
+                if lsn > after:
+                    yield lsn, payload, offset + stop
+            # A frame cut by the chunk boundary is completed by the next read.
+            pending = buffer[position:]
+            offset += position
+
+
+class WriteAheadLog:
+    """
+    Segmented, checksummed log with group commit.
+    Methods:
+        - append / wait / sync
+        - rotate / drop_segments_before
+        - close
+        - stats
+    Attributes:
+        - last_lsn: LSN of the most recently appended frame
+        - durable_lsn: every frame up to this LSN is on disk
+        - appended_bytes: bytes appended since the log was opened
+    """
+
+    def __init__(self, directory, sync=True, commit_delay=0.0, tail=None):
+        """Opens the log in directory, continuing after its last whole frame.
+
+        A torn frame at the end of the newest segment (a crash mid-write) is
+        truncated away before anything new is appended.
+
+        Args:
+            directory (str): Directory holding the segment files; created if missing.
+            sync (bool): fsync on every group commit. Without it a commit only
+                reaches the OS page cache (survives a process crash, not a power loss).
+            commit_delay (float): Seconds a group leader waits for more writers to
+                join before flushing; trades latency for fewer fsyncs.
+            tail (tuple): (last_lsn, valid_bytes) of the newest segment, if the
+                caller has just read it (as recovery does), to skip a second scan.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sync_enabled = sync
+        self.commit_delay = commit_delay
+        self._cond = threading.Condition()
+        self._buffer = []
+        self._flushing = False
+        self._failed = None
+        self.appended_bytes = 0
+        self._stats = {'frames': 0, 'bytes': 0, 'flushes': 0}
+
+        segments = list_segments(directory)
+        if segments:
+            first_lsn, path = segments[-1]
+            last_lsn, valid_bytes = tail or scan_segment(path)
+            if os.path.getsize(path) != valid_bytes:
+                with open(path, 'r+b') as handle:
+                    handle.truncate(valid_bytes)
+            self.last_lsn = last_lsn or first_lsn - 1
+            self._segment_start = first_lsn
+            self._file = open(path, 'ab')
+        else:
+            self.last_lsn = 0
+            self._segment_start = 1
+            self._file = self._create_segment(1)
+        self.durable_lsn = self.last_lsn
+
+    def _create_segment(self, first_lsn):
+        """Creates a segment file and makes its directory entry durable."""
+        handle = open(os.path.join(self.directory, segment_name(first_lsn)), 'ab')
+        if self.sync_enabled:
+            fsync_directory(self.directory)
+        return handle
+
+    def append(self, payload):
+        """Buffers a frame and returns its LSN; it is durable once wait(lsn) returns."""
+        with self._cond:
+            if self._failed is not None:
+                raise WALError('Write-ahead log is unusable after an earlier failure') from self._failed
+            lsn = self.last_lsn = self.last_lsn + 1
+            frame = encode_frame(lsn, payload)
+            self._buffer.append(frame)
+            self.appended_bytes += len(frame)
+            return lsn
+
+    def wait(self, lsn):
+        """Blocks until every frame up to lsn is durable, flushing as group leader if needed.
+
+        Raises:
+            WALError: If the flush covering lsn failed.
+        """
+        with self._cond:
+            while self.durable_lsn < lsn:
+                if self._failed is not None:
+                    raise WALError('Write-ahead log flush failed') from self._failed
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                self._flushing = True
+                if self.commit_delay:
+                    self._cond.wait(self.commit_delay)
+                self._flush_locked()
+
+    def _flush_locked(self):
+        """Writes and syncs the buffer as one group; called with the condition held."""
+        chunks, upto = self._buffer, self.last_lsn
+        self._buffer = []
+        self._cond.release()
+        error = None
+        try:
+            data = b''.join(chunks)
+            self._file.write(data)
+            self._file.flush()
+            if self.sync_enabled:
+                os.fsync(self._file.fileno())
+        except OSError as exc:
+            error = exc
+        finally:
+            self._cond.acquire()
+        if error is not None:
+            self._failed = error
+        else:
+            self.durable_lsn = upto
+            self._stats['frames'] += len(chunks)
+            self._stats['bytes'] += len(data)
+            self._stats['flushes'] += 1
+        self._flushing = False
+        self._cond.notify_all()
+
+    def sync(self):
+        """Makes every frame appended so far durable."""
+        self.wait(self.last_lsn)
+
+    def rotate(self):
+        """Flushes the current segment and starts a new one at the next LSN.
+
+        Returns:
+            int: The LSN of the last frame in the closed segment.
+        """
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            if self._buffer:
+                self._flushing = True
+                self._flush_locked()
+            if self._failed is not None:
+                raise WALError('Write-ahead log flush failed') from self._failed
+            last = self.last_lsn
+            if last >= self._segment_start:
+                self._file.close()
+                self._segment_start = last + 1
+                self._file = self._create_segment(self._segment_start)
+            return last
+
+    def drop_segments_before(self, lsn):
+        """Deletes segments whose frames all have an LSN at or below lsn."""
+        segments = list_segments(self.directory)
+        for (_, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 <= lsn:
+                os.remove(path)
+
+    def stats(self):
+        """Returns frame, byte, and flush counts; frames / flushes is the mean group size."""
+        with self._cond:
+            return dict(self._stats, last_lsn=self.last_lsn, durable_lsn=self.durable_lsn)
+
+    def close(self):
+        """Flushes pending frames and closes the current segment."""
+        self.sync()
+        self._file.close()
+
+
+def fsync_directory(directory):
+    """Syncs a directory so a newly created or renamed file survives a crash."""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1 @@
+"""Events package for the structured, leveled event log."""
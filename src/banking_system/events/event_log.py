@@ -0,0 +1,323 @@
+"""
+events/event_log.py
+
+Structured, leveled event log for the model layer.
+
+Model methods emit named events with keyword fields (cust_id, amount, balance,
+...) instead of printing. Events below the log level, or sent to a NullSink,
+are dropped before an Event object is even built, so production can run with no
+I/O per transaction. Otherwise events are appended to an in-memory buffer and a
+background thread hands them to the sink in batches, so the caller never waits
+on a write. The sink and level come from EVENT_LOG_SINK / EVENT_LOG_LEVEL in
+config/settings.py:
+
+    null                 -> discard everything (default)
+    console              -> messages on stdout, as the old print() calls did
+    ring / ring:<n>      -> keep the last n events in memory
+    file:/path/audit.log -> JSON lines appended in batches
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+
+from banking_system.events.sinks import NullSink, create_sink
+from banking_system.model.money import Money
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR', OFF: 'OFF'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_MAX_PENDING = 100_000
+
+# Human-readable text for each event; fields fill the placeholders, Money
+# fields as Money.display() renders them in their own currency.
+MESSAGES = {
+    'account.created': 'Created customer {cust_id} ({first_name} {last_name})',
+    'account.exists': '{first_name} {last_name} already exists in the database.',
+    'account.missing': '{first_name} {last_name} does not exist in the database, needs a new account setup.\nRun create_cust_id',
+    'account.duplicate': 'Customer {first_name} {last_name} already exists. Skipping account creation.',
+    'account.closed': 'Closed customer {cust_id}',
+    'balance.read': '{balance}',
+    'transaction.deposit': 'Deposited {amount}, balance {balance}',
+    'transaction.withdraw': 'Withdraw {amount}, balance {balance}',
+    'transaction.replayed': 'Replayed {kind} of {amount} for {cust_id} (key {key})',
+    'transaction.declined': 'Declined withdraw of {amount} for {cust_id}: {reason}',
+    'transaction.batch': 'Batch posted {applied} records, rejected {rejected}',
+    'transaction.transfer': 'Transferred {amount} from {source} to {destination}',
+    'transaction.transfer_batch': 'Settled {applied} transfers across {accounts} accounts, replayed {replayed}, rejected {rejected}',
+    'import.chunk': 'Committed import chunk {chunk}: {imported} customers from {first_id}',
+    'import.completed': 'Imported {imported} of {read} customers, rejected {rejected}, in {seconds:.1f}s',
+    'shard.added': 'Added shard {shard} of {shards}: moved {moved} accounts to it',
+    'export.completed': 'Exported {entries} entries of {accounts} accounts to {path} in {seconds:.1f}s',
+    'interest.accrued': 'Accrued interest through {through} on {accounts} accounts ({read} ledgers read)',
+    'interest.posted': 'Posted interest to {credited} accounts and maintenance fees to {charged} accounts',
+    'loan.repriced': 'Repriced {loans} loans effective {effective}',
+    'loan.collected': 'Collected loan installments on {day} from {collected} loans; {missed} missed',
+}
+
+
+def parse_level(level):
+    """Converts a level name ('INFO') or number to its numeric value."""
+    if isinstance(level, int):
+        return level
+    try:
+        return LEVELS[str(level).strip().upper()]
+    except KeyError:
+        raise ValueError(f'Unknown event level: {level}') from None
+
+
+class Event:
+    """
+    One structured event.
+    Methods:
+        - message
+        - to_dict
+    """
+
+    __slots__ = ('timestamp', 'level', 'name', 'fields')
+
+    def __init__(self, timestamp, level, name, fields):
+        """Initializes an event."""
+        self.timestamp = timestamp
+        self.level = level
+        self.name = name
+        self.fields = fields
+
+    def message(self):
+        """Returns the human-readable text for the event."""
+        template = MESSAGES.get(self.name)
+        if template is None:
+            return ' '.join([self.name] + [f'{key}={value}' for key, value in self.fields.items()])
+        fields = {key: value.display() if isinstance(value, Money) else value for key, value in self.fields.items()}
+        return template.format(**fields)
+
+    def to_dict(self):
+        """Returns the event as a flat dict for serialization."""
+        return {
+            'ts': self.timestamp,
+            'level': LEVEL_NAMES.get(self.level, self.level),
+            'event': self.name,
+            **self.fields,
+        }
+
+    def __repr__(self):
+        return f'Event({self.name!r}, {LEVEL_NAMES.get(self.level, self.level)}, {self.fields!r})'
+
+
+class EventLog:
+    """
+    Leveled event log writing to a sink, in the background by default.
+    Methods:
+        - enabled
+        - emit / debug / info / warning / error
+        - flush
+        - close
+        - stats
+    """
+
+    def __init__(self, sink=None, level=INFO, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, max_pending=DEFAULT_MAX_PENDING, background=True):
+        """Initializes the log.
+
+        Args:
+            sink: Where events go; defaults to a NullSink.
+            level (int | str): Minimum level that is recorded.
+            batch_size (int): Pending events that wake the writer early.
+            flush_interval (float): Seconds between background writes.
+            max_pending (int): Pending events kept before the oldest are dropped
+                (in O(1) each), so a slow sink cannot grow memory without bound.
+            background (bool): Write from a background thread; False writes
+                each event synchronously (useful in tests and scripts).
+        """
+        self.sink = sink if sink is not None else NullSink()
+        self.level = parse_level(level) if self.sink.enabled else OFF
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.background = background
+
+        self._pending = deque(maxlen=max_pending)
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._closed = False
+
+        # Metrics
+        self._emitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._restarts = 0
+        self.last_error = None
+
+    def enabled(self, level):
+        """Checks whether events at level are recorded."""
+        return level >= self.level
+
+    def emit(self, level, name, **fields):
+        """Records an event if its level is enabled.
+
+        Args:
+            level (int): DEBUG, INFO, WARNING, or ERROR.
+            name (str): Dotted event name, e.g. 'transaction.deposit'.
+            **fields: Structured data attached to the event.
+        """
+        if level < self.level:
+            return
+        event = Event(time.time(), level, name, fields)
+        if not self.background:
+            with self._write_lock:
+                self._emitted += 1
+                self._write([event])
+            return
+
+        with self._condition:
+            if self._closed:
+                return
+            self._emitted += 1
+            if len(self._pending) == self.max_pending:
+                self._dropped += 1  # the append pushes out the oldest
+            self._pending.append(event)
+            if self._writer is None:
+                self._start_writer()
+            elif not self._writer.is_alive():
+                # Killed by something _run_writer could not catch; start another.
+                self._restarts += 1
+                self._start_writer()
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def debug(self, name, **fields):
+        """Records a DEBUG event."""
+        self.emit(DEBUG, name, **fields)
+
+    def info(self, name, **fields):
+        """Records an INFO event."""
+        self.emit(INFO, name, **fields)
+
+    def warning(self, name, **fields):
+        """Records a WARNING event."""
+        self.emit(WARNING, name, **fields)
+
+    def error(self, name, **fields):
+        """Records an ERROR event."""
+        self.emit(ERROR, name, **fields)
+
+    def flush(self):
+        """Writes every pending event to the sink and flushes it."""
+        with self._condition:
+            batch = self._take_pending()
+        with self._write_lock:
+            self._write(batch)
+            self.sink.flush()
+
+    def close(self):
+        """Stops the background writer, writes pending events, and closes the sink."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._writer is not None:
+            self._writer.join()
+        self.flush()
+        self.sink.close()
+
+    def stats(self):
+        """Returns a snapshot of log metrics.
+
+        Returns:
+            dict: level, emitted, written, dropped, pending, failed (events in
+                batches the sink raised on; the error is kept in last_error), and
+                restarts of the background writer.
+        """
+        with self._condition:
+            return {
+                'level': LEVEL_NAMES.get(self.level, self.level),
+                'emitted': self._emitted,
+                'written': self._written,
+                'dropped': self._dropped,
+                'pending': len(self._pending),
+                'failed': self._failed,
+                'restarts': self._restarts,
+            }
+
+    def _take_pending(self):
+        """Returns the pending events and starts an empty buffer; the caller holds _condition."""
+        batch, self._pending = self._pending, deque(maxlen=self.max_pending)
+        return batch
+
+    def _write(self, batch):
+        """Hands a batch to the sink; the caller holds _write_lock."""
+        if batch:
+            self.sink.write(batch)
+            self._written += len(batch)
+
+    def _start_writer(self):
+        """Starts the background writer thread; the caller holds _condition."""
+        self._writer = threading.Thread(target=self._run_writer, name='event-log-writer', daemon=True)
+        self._writer.start()
+
+    def _run_writer(self):
+        """Writes pending events every flush_interval, or sooner when a batch fills up.
+
+        A sink error loses that batch, not the writer: it is counted in stats()
+        and kept in last_error, and the next batch is tried as usual.
+        """
+        while True:
+            with self._condition:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                batch = self._take_pending()
+                closed = self._closed
+            with self._write_lock:
+                try:
+                    self._write(batch)
+                except Exception as error:
+                    self._failed += len(batch)
+                    self.last_error = error
+            if closed:
+                return
+
+
+_event_log = None
+_event_log_lock = threading.Lock()
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
+
+
+def get_event_log():
+    """Returns the process-wide event log, built from config/settings.py on first use."""
+    global _event_log
+    if _event_log is None:
+        with _event_log_lock:
+            if _event_log is None:
+                config = _config()
+                _event_log = EventLog(create_sink(config.EVENT_LOG_SINK), level=config.EVENT_LOG_LEVEL)
+    return _event_log
+
+
+def set_event_log(event_log):
+    """Replaces the process-wide event log and returns the previous one (not closed)."""
+    global _event_log
+    with _event_log_lock:
+        previous, _event_log = _event_log, event_log
+    return previous
+
+
+@atexit.register
+def _close_event_log():
+    """Writes events still pending when the interpreter exits."""
+    if _event_log is not None:
+        _event_log.close()
@@ -0,0 +1,148 @@
+"""
+events/sinks.py
+
+Destinations for the event log.
+
+A sink receives events in batches from events.event_log.EventLog. NullSink
+discards everything and tells the log it is disabled, so emitting costs one
+comparison; RingBufferSink keeps the most recent events in memory (tests, debug
+endpoints); FileSink appends JSON lines with one write per batch; StreamSink
+writes the human-readable message to a text stream such as stdout.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import deque
+
+DEFAULT_RING_CAPACITY = 10_000
+
+
+class NullSink:
+    """Sink that drops every event; an EventLog using it skips building events at all."""
+
+    enabled = False
+
+    def write(self, events):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class RingBufferSink:
+    """
+    Keeps the last `capacity` events in memory.
+    Methods:
+        - events / messages / find
+        - clear
+    """
+
+    enabled = True
+
+    def __init__(self, capacity=DEFAULT_RING_CAPACITY):
+        """Initializes an empty ring buffer."""
+        self._events = deque(maxlen=capacity)
+
+    def write(self, events):
+        self._events.extend(events)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def events(self):
+        """Returns the buffered events, oldest first."""
+        return list(self._events)
+
+    def messages(self):
+        """Returns the human-readable message of each buffered event, oldest first."""
+        return [event.message() for event in self._events]
+
+    def find(self, name):
+        """Returns the buffered events with a given name, oldest first."""
+        return [event for event in self._events if event.name == name]
+
+    def clear(self):
+        """Drops every buffered event."""
+        self._events.clear()
+
+
+class FileSink:
+    """Appends events to a file as JSON lines, one write per batch."""
+
+    enabled = True
+
+    def __init__(self, path):
+        """Opens (and if needed creates) the file at path for appending."""
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, events):
+        lines = ''.join(json.dumps(event.to_dict(), default=str) + '\n' for event in events)
+        with self._lock:
+            self._file.write(lines)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class StreamSink:
+    """Writes each event's message to a text stream (stdout by default)."""
+
+    enabled = True
+
+    def __init__(self, stream=None):
+        """Initializes the sink; stream defaults to sys.stdout at write time."""
+        self._stream = stream
+
+    def write(self, events):
+        stream = self._stream or sys.stdout
+        stream.write(''.join(event.message() + '\n' for event in events))
+
+    def flush(self):
+        (self._stream or sys.stdout).flush()
+
+    def close(self):
+        pass
+
+
+def create_sink(spec):
+    """Builds a sink from a configuration string.
+
+    Args:
+        spec (str): 'null', 'console', 'ring', 'ring:<capacity>', or 'file:<path>'.
+
+    Returns:
+        The sink.
+
+    Raises:
+        ValueError: If the spec is not recognized.
+    """
+    kind, _, argument = (spec or 'null').partition(':')
+    kind = kind.strip().lower()
+    if kind in ('null', 'none', 'off'):
+        return NullSink()
+    if kind in ('console', 'stdout'):
+        return StreamSink()
+    if kind == 'ring':
+        return RingBufferSink(int(argument) if argument else DEFAULT_RING_CAPACITY)
+    if kind == 'file' and argument:
+        return FileSink(argument)
+    raise ValueError(f'Unsupported EVENT_LOG_SINK: {spec}')
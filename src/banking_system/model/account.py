@@ -1,16 +1,20 @@
 """banking/bank_account.py"""
 
-import random
+from banking_system.db.account_numbers import AccountNumberAllocator
 from banking_system.db.accounts_store import accounts_db
+from banking_system.db.storage import DuplicateAccountNumberError, get_store
+from banking_system.events.event_log import get_event_log
 
-# Import OverdraftError or define it here if needed
-try:
-    from banking_system.model.overdraft import OverdraftError
-except ImportError:
-    # Define OverdraftError if not available for import
-    class OverdraftError(Exception):
-        """Custom error for overdraft attempts."""
-        pass
+from banking_system.model.activity import get_account_activity
+from banking_system.model.customer import Customer
+from banking_system.model.overdraft import OverdraftError
+
+
+# Shared allocator for new account numbers.
+account_number_allocator = AccountNumberAllocator()
+
+# Account numbers drawn for one signup before giving up on a store that keeps refusing them.
+ACCT_NUM_WRITE_ATTEMPTS = 5
 
 
 class BankAccount:
@@ -20,71 +24,117 @@ class BankAccount:
     - A constructor that takes `owner_name` and an optional `starting_balance` (default to 0).
     - A 'create_account' method that adds a new account to the database.
     - A 'close_account' method that closes the account from the database.
+    - Every account opened or closed is recorded in the AccountActivity feed.
     - A `deposit(amount)` method that adds money to the balance.
     - A `withdraw(amount)` method that subtracts money from the balance, unless it would go negative.
     - A `get_balance()` method that returns the current balance.
     - Raise a custom `OverdraftError` if the user tries to withdraw more than the balance.
     """
 
-    def __init__(self, first_name, last_name):
-        """initialize BankAccount class"""
+    def __init__(self, first_name, last_name, store=None):
+        """initialize BankAccount class
+
+        Args:
+            first_name (str): Customer first name.
+            last_name (str): Customer last name.
+            store (AccountStore): Optional storage backend. Defaults to the one
+                selected by DATABASE_URL (the in-memory accounts_db if unset).
+        """
         self.first_name = first_name
         self.last_name = last_name
+        self.store = store
+
+
+    def _get_store(self):
+        """Returns the storage backend this account operates on."""
+        if self.store is not None:
+            return self.store
+        return get_store(accounts=accounts_db)
 
 
     def create_cust_id(self, first_name, last_name, address, city, state, zip):
         """checks for the last customer ID created and creates the next ID in sequential order."""
         # Step 0:  Check datebase for existing account
         if self.check_for_account(first_name, last_name):
-            print(f"Customer {first_name} {last_name} already exists. Skipping account creation.")
+            get_event_log().warning('account.duplicate', first_name=first_name, last_name=last_name)
             return None
 
-        #Step 1.  Check database for the last customer ID
-        max_id = 1000
-        for cust_id in accounts_db.keys():
+        #Step 1.  Allocate the next customer ID from the sequence (built once per store)
+        store = self._get_store()
+        sequence = store.id_sequence()
+
+        # Step 2:  Assign next customer ID to the new customer and store customer info as a Customer record.
+        # The account number is drawn outside the write, so a concurrent signup
+        # can take it first; the store then refuses the write and we draw again.
+        new_cust_id_info = sequence.next_id()
+        for attempt in range(ACCT_NUM_WRITE_ATTEMPTS):
+            acct_num = self.create_account(first_name,last_name)
             try:
-                cust_id_int = int(cust_id)
-                if cust_id_int > max_id:
-                    max_id = cust_id_int
-            except (ValueError, TypeError):
-                # Skip keys that can't be converted to integers
-                continue
-
-        # Step 2:  Assign next customer ID to the new customer and store customer info into a dict.
-        new_cust_id_info = max_id + 1
-        acct_num = self.create_account(first_name,last_name)
-        accounts_db[str(new_cust_id_info)] = {
-            'first_name' : first_name,
-            'last_name' : last_name,
-            'acct_num': acct_num,
-            'address': address,
-            'city': city,
-            'state': state,
-            'zip': zip
-        }
+                store.put_customer(str(new_cust_id_info), Customer(
+                    first_name=first_name,
+                    last_name=last_name,
+                    acct_num=acct_num,
+                    address=address,
+                    city=city,
+                    state=state,
+                    zip=zip,
+                ))
+                break
+            except DuplicateAccountNumberError:
+                if attempt == ACCT_NUM_WRITE_ATTEMPTS - 1:
+                    raise
+        get_event_log().info('account.created', cust_id=new_cust_id_info, first_name=first_name, last_name=last_name)
+        get_account_activity().record(str(new_cust_id_info), 'create')
         return new_cust_id_info
 
 
+    def close_account(self, cust_id):
+        """Closes a customer's account: deletes the customer record and records the closure.
+
+        The ledger is kept, so the account's history stays readable, and the
+        store retires the ID so no later signup is given it (or its ledger).
+
+        Returns:
+            Customer: The deleted customer record.
+
+        Raises:
+            ValueError: If the customer ID is not found in the database.
+        """
+        try:
+            record = self._get_store().delete_customer(cust_id)
+        except KeyError:
+            raise ValueError("Customer ID not found") from None
+        get_event_log().info('account.closed', cust_id=cust_id)
+        get_account_activity().record(cust_id, 'close')
+        return record
+
+
     def check_for_account(self, first_name, last_name):
-        """Checks database for an existing account"""
-        for data in accounts_db.values():
-            if data['first_name'] == first_name and data['last_name'] == last_name:
-                print(f'{first_name} {last_name} already exists in the database.')
-                return True
+        """Checks database for an existing account.
 
-        print(f'{first_name} {last_name} does not exist in the database, needs a new account setup.\nRun create_cust_id')
+        Uses the name index, so the check is a hash lookup rather than a scan, and
+        matching ignores case and extra whitespace.
+        """
+        if self._get_store().find_by_name(first_name, last_name):
+            get_event_log().debug('account.exists', first_name=first_name, last_name=last_name)
+            return True
+
+        get_event_log().debug('account.missing', first_name=first_name, last_name=last_name)
         return False
 
 
     def create_account(self, first_name, last_name):
-        """Creates an account"""
-
-        acct = [random.randint(0,9) for x in range(12)]
-        acct_num = ''.join(str(x) for x in acct)
-        if acct_num in (data['acct_num'] for data in accounts_db.values()):
-            return self.create_account(first_name, last_name)
-        else:
-            return acct_num
+        """Creates an account number that is not already in use.
+
+        Candidates are drawn in a single random call and checked against the
+        acct_num index, retrying on collision without recursion.
+        """
+        return account_number_allocator.allocate(self._get_store().acct_num_index())
+
+
+    def lookup_account(self, acct_num):
+        """Returns the customer ID that owns an account number, or None."""
+        return self._get_store().find_by_acct_num(acct_num)
 
 # Test code moved to a main block to prevent it from running when imported
 if __name__ == "__main__":
@@ -0,0 +1,650 @@
+"""
+model/activity.py
+
+AccountActivity: the per-account feed of what happened to an account (created,
+deposit, withdraw, closed), newest first, for "recent activity" screens.
+
+Each account's events are numbered 0, 1, 2, ... (seq). The newest `capacity`
+events of every account live in a hot tier of ring buffers: one row per
+account in a set of NumPy columns (timestamp, kind, amount, balance), with
+event seq kept at column seq % capacity, so recording an event is a handful of
+array writes and reading the last 50 is two slices of one row, whatever the
+account's history. An event pushed out of its ring spills to a buffer that
+indexes its events by account. Every ACTIVITY_COMPACT_EVENTS events the buffer
+is sealed and a fresh one takes its place; a background compactor, outside the
+feed's lock, sorts each sealed buffer into a run ordered by (account, seq) and
+merges runs tier by tier (MERGE_FANOUT runs of one tier make one run of the
+next), so an event is re-sorted a logarithmic number of times rather than on
+every compaction. The cold tier keeps the newest ACTIVITY_COLD_EVENTS events;
+older ones are dropped, oldest run first, and paging stops where they were.
+
+recent() is served from per-account views of the hot tier, cached until the
+account records another event.
+
+Pages are read newest first. A page's next_cursor is the seq of its oldest
+event; passing it back returns the events before it, so a client paging down
+while new events arrive never sees one twice or skips one.
+
+The model layer records activity as it posts (AccountTransactions,
+AsyncAccountTransactions, BankAccount, the interest engine); the process-wide
+feed comes from get_account_activity(). The feed lives in the process that
+recorded it; save() and load() carry it across restarts.
+"""
+
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+from itertools import repeat
+
+import numpy as np
+
+from banking_system.db.ledger import DEPOSIT, WITHDRAW
+from banking_system.model.money import DEFAULT_CURRENCY, Money
+
+CREATE = 3
+CLOSE = 4
+# Deposits and withdrawals keep their ledger kind codes.
+ACTIVITY_KINDS = {'create': CREATE, 'deposit': DEPOSIT, 'withdraw': WITHDRAW, 'close': CLOSE}
+ACTIVITY_NAMES = {code: name for name, code in ACTIVITY_KINDS.items()}
+
+# Each cold run is one contiguous array per field, sorted by (slot, seq).
+COLD_FIELDS = ('slot', 'seq', 'timestamp', 'amount', 'balance', 'kind')
+_COLUMNS = ('_timestamps', '_amounts', '_balances', '_kinds')
+# Runs of one tier merged into one run of the next.
+MERGE_FANOUT = 4
+# Accounts whose recent() view is kept built.
+RECENT_VIEWS = 1_024
+
+
+def _cold_events(count):
+    """Returns zeroed cold-tier columns for `count` events."""
+    return {field: np.zeros(count, dtype=np.int8 if field == 'kind' else np.int64) for field in COLD_FIELDS}
+
+
+def _merge_runs(runs):
+    """Returns the events of `runs`, oldest run first, as one run sorted by (slot, seq).
+
+    An account's events reach the cold tier in seq order, so within a run and
+    across runs taken oldest first its seqs already ascend: a stable sort on
+    slot alone finishes the order, and over concatenated sorted runs it is a
+    merge of those runs.
+    """
+    if len(runs) == 1 and not isinstance(runs[0], _SpillBuffer):
+        return runs[0]
+    columns = [run.columns if isinstance(run, _SpillBuffer) else run for run in runs]
+    sizes = [run.size if isinstance(run, _SpillBuffer) else len(run['seq']) for run in runs]
+    merged = {field: np.concatenate([run[field][:size] for run, size in zip(columns, sizes)]) for field in COLD_FIELDS}
+    order = np.argsort(merged['slot'], kind='stable')
+    return {field: column[order] for field, column in merged.items()}
+
+
+def _run_rows(run, slot, end, limit):
+    """Returns up to `limit` of the account's events in a sorted run before seq `end`, oldest first."""
+    low = np.searchsorted(run['slot'], slot, side='left')
+    high = np.searchsorted(run['slot'], slot, side='right')
+    stop = low + np.searchsorted(run['seq'][low:high], end, side='left')
+    start = max(low, stop - limit)
+    return {field: run[field][start:stop] for field in COLD_FIELDS}
+
+
+class _SpillBuffer:
+    """Events pushed out of the hot tier, in arrival order, with each account's positions indexed."""
+
+    __slots__ = ('columns', 'size', 'index')
+
+    def __init__(self, capacity):
+        """Initializes an empty buffer of `capacity` events."""
+        self.columns = _cold_events(capacity)
+        self.size = 0
+        self.index = {}
+
+    @property
+    def full(self):
+        return self.size == len(self.columns['seq'])
+
+    def append(self, slot, seq, timestamp, amount, balance, kind):
+        """Appends one event; the buffer must not be full."""
+        size, columns = self.size, self.columns
+        columns['slot'][size] = slot
+        columns['seq'][size] = seq
+        columns['timestamp'][size] = timestamp
+        columns['amount'][size] = amount
+        columns['balance'][size] = balance
+        columns['kind'][size] = kind
+        positions = self.index.get(slot)
+        if positions is None:
+            positions = self.index[slot] = array('q')
+        positions.append(size)
+        self.size = size + 1
+
+    def add(self, rows, offset, count):
+        """Appends rows[offset:offset + count], as many as fit, and returns how many did."""
+        taken = min(count, len(self.columns['seq']) - self.size)
+        size = self.size
+        for field in COLD_FIELDS:
+            self.columns[field][size:size + taken] = rows[field][offset:offset + taken]
+        index = self.index
+        for slot, position in zip(self.columns['slot'][size:size + taken].tolist(), range(size, size + taken)):
+            positions = index.get(slot)
+            if positions is None:
+                positions = index[slot] = array('q')
+            positions.append(position)
+        self.size = size + taken
+        return taken
+
+    def rows(self, slot, end, limit):
+        """Returns up to `limit` of the account's buffered events before seq `end`, oldest first."""
+        positions = self.index.get(slot)
+        if not positions:
+            return None
+        positions = np.frombuffer(positions, dtype=np.int64)
+        stop = np.searchsorted(self.columns['seq'][positions], end, side='left')
+        positions = positions[max(0, stop - limit):stop]
+        return {field: column[positions] for field, column in self.columns.items()}
+
+
+class ActivityEvent(namedtuple('ActivityEvent', 'cust_id seq timestamp kind amount_minor balance_minor currency')):
+    """
+    One event of an account's activity; a tuple, so a page of them is cheap to build.
+    Methods:
+        - to_dict
+    Attributes:
+        - cust_id / seq / kind
+        - timestamp: epoch microseconds
+        - amount / balance: Money, or None for 'create' and 'close'
+    """
+
+    __slots__ = ()
+
+    @property
+    def amount(self):
+        return None if self.kind in ('create', 'close') else Money(self.amount_minor, self.currency)
+
+    @property
+    def balance(self):
+        return None if self.kind in ('create', 'close') else Money(self.balance_minor, self.currency)
+
+    def to_dict(self):
+        """Returns the event as a flat dict for serialization."""
+        amount, balance = self.amount, self.balance
+        return {
+            'seq': self.seq,
+            'ts': self.timestamp / 1_000_000,
+            'kind': self.kind,
+            'amount': None if amount is None else str(amount),
+            'balance': None if balance is None else str(balance),
+            'currency': self.currency,
+        }
+
+    def __repr__(self):
+        return f'ActivityEvent({self.cust_id!r}, {self.seq}, {self.kind!r}, {self.amount!r})'
+
+
+class ActivityPage:
+    """
+    One page of an account's activity, newest first.
+    Attributes:
+        - events: ActivityEvent list
+        - next_cursor: pass to AccountActivity.page for the next page; None on the last one
+    """
+
+    __slots__ = ('events', 'next_cursor')
+
+    def __init__(self, events, next_cursor):
+        """Initializes the page."""
+        self.events = events
+        self.next_cursor = next_cursor
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+
+class AccountActivity:
+    """
+    Per-account activity feed with a ring-buffered hot tier and a bounded cold tier of merged runs.
+    Methods:
+        - record / record_many
+        - recent / page
+        - compact
+        - stats
+        - save / load
+    Attributes:
+        - capacity: events per account kept in the hot tier; 0 records nothing
+        - compact_events: spilled events buffered before the buffer is sealed for compaction
+        - cold_events: most events kept in the cold tier; older ones are dropped
+    """
+
+    def __init__(self, capacity=None, compact_events=None, cold_events=None):
+        """Initializes an empty feed.
+
+        Args:
+            capacity (int): Hot events per account; defaults to ACTIVITY_RECENT.
+            compact_events (int): Spill buffer size; defaults to ACTIVITY_COMPACT_EVENTS.
+            cold_events (int): Cold tier bound; defaults to ACTIVITY_COLD_EVENTS.
+        """
+        self.capacity = _config().ACTIVITY_RECENT if capacity is None else capacity
+        self.compact_events = max(1, _config().ACTIVITY_COMPACT_EVENTS if compact_events is None else compact_events)
+        self.cold_events = max(0, _config().ACTIVITY_COLD_EVENTS if cold_events is None else cold_events)
+        self._lock = threading.Lock()
+        # Held by whichever thread is sorting and merging runs, outside _lock.
+        self._compact_lock = threading.Lock()
+        self._compactor = None
+        self._slots = {}
+        self._cust_ids = []
+        self._currencies = []
+        self._next = np.zeros(0, dtype=np.int64)
+        self._timestamps = np.zeros((0, self.capacity), dtype=np.int64)
+        self._amounts = np.zeros((0, self.capacity), dtype=np.int64)
+        self._balances = np.zeros((0, self.capacity), dtype=np.int64)
+        self._kinds = np.zeros((0, self.capacity), dtype=np.int8)
+        self._spill = _SpillBuffer(self.compact_events)
+        # Full spill buffers waiting for the compactor, oldest first.
+        self._sealed = []
+        # (tier, run) pairs, oldest first; an account's seqs ascend from run to run.
+        self._runs = []
+        self._dropped = 0
+        self._views = OrderedDict()
+
+    @property
+    def enabled(self):
+        """Checks whether events are recorded."""
+        return self.capacity > 0
+
+    def __len__(self):
+        return len(self._cust_ids)
+
+    def _slot(self, cust_id, currency):
+        """Returns cust_id's row, adding one (and growing the columns) for a new account; the caller holds _lock."""
+        slot = self._slots.get(cust_id)
+        if slot is None:
+            slot = self._slots[cust_id] = len(self._cust_ids)
+            self._cust_ids.append(cust_id)
+            self._currencies.append(currency)
+            if slot == len(self._next):
+                rows = max(1_024, 2 * slot)
+                self._next = np.concatenate((self._next, np.zeros(rows - slot, dtype=np.int64)))
+                for name in _COLUMNS:
+                    column = getattr(self, name)
+                    setattr(self, name, np.concatenate((column, np.zeros((rows - slot, self.capacity), dtype=column.dtype))))
+        elif currency is not None and self._currencies[slot] is None:
+            self._currencies[slot] = currency
+        return slot
+
+    def record(self, cust_id, kind, amount=None, balance=None, timestamp=None):
+        """Records one event.
+
+        Args:
+            cust_id (str): The account.
+            kind (str): 'create', 'deposit', 'withdraw', or 'close'.
+            amount (Money): Amount posted, for deposits and withdrawals.
+            balance (Money): Balance after the posting.
+            timestamp (float): Epoch seconds; defaults to now.
+        """
+        if not self.capacity:
+            return
+        code = ACTIVITY_KINDS[kind]
+        money = amount if amount is not None else balance
+        micros = int((time.time() if timestamp is None else timestamp) * 1_000_000)
+        with self._lock:
+            slot = self._slot(cust_id, None if money is None else money.currency)
+            seq = int(self._next[slot])
+            position = seq % self.capacity
+            if seq >= self.capacity:
+                self._spill.append(
+                    slot, seq - self.capacity, self._timestamps[slot, position], self._amounts[slot, position],
+                    self._balances[slot, position], self._kinds[slot, position],
+                )
+                if self._spill.full:
+                    self._seal()
+            self._timestamps[slot, position] = micros
+            self._amounts[slot, position] = 0 if amount is None else amount.minor
+            self._balances[slot, position] = 0 if balance is None else balance.minor
+            self._kinds[slot, position] = code
+            self._next[slot] = seq + 1
+
+    def record_many(self, cust_ids, codes, amounts, balances, currencies=None, timestamp=None):
+        """Records many events at once, in order; the bulk form of record for batch postings.
+
+        Args:
+            cust_ids (list): Account of each event.
+            codes (ndarray): Kind code of each event (ACTIVITY_KINDS values).
+            amounts (ndarray): Amounts posted, in minor units.
+            balances (ndarray): Balances after each posting, in minor units.
+            currencies (list): Currency of each event's account; None where unknown.
+            timestamp (float): Epoch seconds of every event; defaults to now.
+        """
+        count = len(cust_ids)
+        if not self.capacity or not count:
+            return
+        capacity = self.capacity
+        micros = int((time.time() if timestamp is None else timestamp) * 1_000_000)
+        currencies = [None] * count if currencies is None else currencies
+        with self._lock:
+            slots = np.fromiter(map(self._slot, cust_ids, currencies), dtype=np.int64, count=count)
+            order = np.argsort(slots, kind='stable')
+            slots = slots[order]
+            firsts = np.flatnonzero(np.concatenate(([True], slots[1:] != slots[:-1])))
+            counts = np.diff(np.append(firsts, count))
+            accounts = slots[firsts]
+            before = self._next[accounts]
+            seqs = before.repeat(counts) + np.arange(count) - firsts.repeat(counts)
+
+            # Hot events the batch pushes out, then batch events that are
+            # pushed out by later ones in the same batch, go to the cold tier.
+            low = np.maximum(before - capacity, 0)
+            high = np.maximum(np.minimum(before, before + counts - capacity), low)
+            evicted = high - low
+            if evicted.any():
+                starts = np.cumsum(evicted) - evicted
+                evicted_seqs = low.repeat(evicted) + np.arange(evicted.sum()) - starts.repeat(evicted)
+                self._spill_rows(self._hot_rows(accounts.repeat(evicted), evicted_seqs), len(evicted_seqs))
+            kept = seqs >= (before + counts - capacity).repeat(counts)
+            columns = (
+                np.full(count, micros, dtype=np.int64),
+                np.asarray(amounts, dtype=np.int64)[order],
+                np.asarray(balances, dtype=np.int64)[order],
+                np.asarray(codes, dtype=np.int8)[order],
+            )
+            if not kept.all():
+                dropped = ~kept
+                rows = {'slot': slots[dropped], 'seq': seqs[dropped]}
+                rows.update(zip(COLD_FIELDS[2:], (column[dropped] for column in columns)))
+                self._spill_rows(rows, len(rows['seq']))
+            positions = seqs[kept] % capacity
+            for name, column in zip(_COLUMNS, columns):
+                getattr(self, name)[slots[kept], positions] = column[kept]
+            self._next[accounts] = before + counts
+
+    def _hot_rows(self, slots, seqs):
+        """Returns the hot events (slots[i], seqs[i]) as cold-tier columns; the caller holds _lock."""
+        positions = seqs % self.capacity
+        rows = {'slot': slots, 'seq': seqs}
+        for field, name in zip(COLD_FIELDS[2:], _COLUMNS):
+            rows[field] = getattr(self, name)[slots, positions]
+        return rows
+
+    def _spill_rows(self, rows, count):
+        """Adds events pushed out of the hot tier to the spill buffer, sealing it when it fills; the caller holds _lock."""
+        offset = 0
+        while offset < count:
+            offset += self._spill.add(rows, offset, count - offset)
+            if self._spill.full:
+                self._seal()
+
+    def _seal(self):
+        """Hands the spill buffer to the compactor, starting it if idle; the caller holds _lock."""
+        if not self._spill.size:
+            return
+        self._sealed.append(self._spill)
+        self._spill = _SpillBuffer(self.compact_events)
+        if self._compactor is None:
+            self._compactor = threading.Thread(target=self._compact_in_background, name='activity-compactor', daemon=True)
+            self._compactor.start()
+
+    def _compact_in_background(self):
+        """Compacts sealed buffers until none are left, then exits."""
+        try:
+            while True:
+                self._compact_sealed()
+                with self._lock:
+                    # Cleared under _lock, so the next _seal() starts a new compactor.
+                    if not self._sealed:
+                        self._compactor = None
+                        return
+        except BaseException:
+            with self._lock:
+                self._compactor = None
+            raise
+
+    def _compact_sealed(self, merge_all=False):
+        """Sorts the sealed buffers into runs, merges full tiers, and drops cold events over the bound.
+
+        The sorting and merging run outside _lock on buffers and runs that no
+        longer change; _lock is held only to take them and to swap the result in.
+
+        Args:
+            merge_all (bool): Merge every run into one, as save() writes it.
+        """
+        with self._compact_lock:
+            with self._lock:
+                sealed = list(self._sealed)
+                runs = list(self._runs)
+            if not sealed and (not merge_all or len(runs) < 2) and self._cold_size(runs) <= self.cold_events:
+                return
+            for buffer in sealed:
+                runs.append((0, _merge_runs([buffer])))
+                while len(runs) >= MERGE_FANOUT and len({tier for tier, _ in runs[-MERGE_FANOUT:]}) == 1:
+                    tier = runs[-1][0]
+                    runs[-MERGE_FANOUT:] = [(tier + 1, _merge_runs([run for _, run in runs[-MERGE_FANOUT:]]))]
+            if merge_all and len(runs) > 1:
+                runs = [(max(tier for tier, _ in runs), _merge_runs([run for _, run in runs]))]
+            dropped = self._evict(runs)
+            with self._lock:
+                del self._sealed[:len(sealed)]
+                self._runs = runs
+                self._dropped += dropped
+
+    @staticmethod
+    def _cold_size(runs):
+        return sum(len(run['seq']) for _, run in runs)
+
+    def _evict(self, runs):
+        """Drops the oldest cold events while runs hold more than cold_events, in place; returns how many.
+
+        Eviction goes a tenth below the bound so that it is not repeated on every compaction.
+        """
+        excess = self._cold_size(runs) - self.cold_events
+        if excess <= 0:
+            return 0
+        excess += self.cold_events // 10
+        dropped = 0
+        while excess > 0 and runs:
+            tier, run = runs[0]
+            size = len(run['seq'])
+            if size <= excess:
+                del runs[0]
+                excess -= size
+                dropped += size
+                continue
+            # The oldest run holds the oldest spills; drop its `excess` earliest events.
+            cutoff = np.partition(run['timestamp'], excess - 1)[excess - 1]
+            kept = run['timestamp'] > cutoff
+            runs[0] = (tier, {field: column[kept] for field, column in run.items()})
+            dropped += size - int(kept.sum())
+            excess = 0
+        return dropped
+
+    def compact(self):
+        """Seals the spill buffer and compacts every spilled event into one cold run now."""
+        with self._lock:
+            self._seal()
+        self._compact_sealed(merge_all=True)
+
+    def recent(self, cust_id, limit=None):
+        """Returns the account's newest events, newest first (at most `capacity` of them).
+
+        The account's hot events are built into a view once and reused until it records another event.
+
+        Args:
+            cust_id (str): The account.
+            limit (int): Most events returned; defaults to capacity.
+        """
+        limit = self.capacity if limit is None else min(limit, self.capacity)
+        with self._lock:
+            slot = self._slots.get(cust_id)
+            if slot is None or limit <= 0:
+                return []
+            view = self._views.get(slot)
+            if view is not None and view[0] == self._next[slot]:
+                self._views.move_to_end(slot)
+                return view[1][:limit]
+        events = self.page(cust_id, self.capacity).events
+        with self._lock:
+            if events and self._slots.get(cust_id) == slot:
+                self._views[slot] = (events[0].seq + 1, events)
+                self._views.move_to_end(slot)
+                if len(self._views) > RECENT_VIEWS:
+                    self._views.popitem(last=False)
+        return events[:limit]
+
+    def page(self, cust_id, limit=None, cursor=None):
+        """Returns a page of the account's events, newest first.
+
+        Args:
+            cust_id (str): The account.
+            limit (int): Most events on the page; defaults to capacity.
+            cursor (int): next_cursor of the previous page; None starts from the newest event.
+
+        Returns:
+            ActivityPage: The events and the cursor of the next page.
+        """
+        limit = self.capacity if limit is None else limit
+        with self._lock:
+            slot = self._slots.get(cust_id)
+            if slot is None or limit <= 0:
+                return ActivityPage([], None)
+            total = int(self._next[slot])
+            end = total if cursor is None else max(min(int(cursor), total), 0)
+            oldest_hot = max(total - self.capacity, 0)
+
+            # Hot tier: seqs [start, end), at most two slices of the account's row.
+            start = max(end - limit, oldest_hot)
+            seqs, timestamps, amounts, balances, kinds = [], [], [], [], []
+            if start < end:
+                first, last = start % self.capacity, (end - 1) % self.capacity
+                cuts = [(first, last + 1)] if first <= last else [(first, self.capacity), (0, last + 1)]
+                for name, values in zip(_COLUMNS, (timestamps, amounts, balances, kinds)):
+                    row = getattr(self, name)[slot]
+                    for low, high in cuts:
+                        values.extend(row[low:high].tolist())
+                seqs = list(range(start, end))
+            # Cold tier: the spill buffer holds each account's newest cold events.
+            missing = limit - len(seqs)
+            cold_end = min(end, oldest_hot)
+            if missing > 0 and cold_end > 0:
+                rows = self._cold_rows(slot, cold_end, missing)
+                seqs = rows['seq'].tolist() + seqs
+                for field, values in zip(COLD_FIELDS[2:], (timestamps, amounts, balances, kinds)):
+                    values[:0] = rows[field].tolist()
+            currency = self._currencies[slot] or DEFAULT_CURRENCY
+
+        names = map(ACTIVITY_NAMES.__getitem__, kinds)
+        fields = zip(repeat(cust_id), seqs, timestamps, names, amounts, balances, repeat(currency))
+        events = list(map(tuple.__new__, repeat(ActivityEvent), fields))
+        events.reverse()
+        # A short page is the last one: seq 0 was reached, or older events were dropped.
+        return ActivityPage(events, seqs[0] if len(seqs) == limit and seqs[0] > 0 else None)
+
+    def _cold_rows(self, slot, end, limit):
+        """Returns up to `limit` of the account's cold events before seq `end`, oldest first; the caller holds _lock.
+
+        Sources are read newest first (the spill buffer, sealed buffers, then
+        runs), each by the account's index or by binary search.
+        """
+        sources = [self._spill, *reversed(self._sealed)] + [run for _, run in reversed(self._runs)]
+        parts = []
+        for source in sources:
+            if isinstance(source, _SpillBuffer):
+                rows = source.rows(slot, end, limit)
+            else:
+                rows = _run_rows(source, slot, end, limit)
+            if rows is None or not len(rows['seq']):
+                continue
+            parts.append(rows)
+            limit -= len(rows['seq'])
+            end = int(rows['seq'][0])
+            if limit <= 0:
+                break
+        if not parts:
+            return _cold_events(0)
+        return {field: np.concatenate([rows[field] for rows in reversed(parts)]) for field in COLD_FIELDS}
+
+    def stats(self):
+        """Returns a snapshot of feed metrics.
+
+        Returns:
+            dict: accounts, hot (events in the rings), spilled (in the open
+            spill buffer), cold (sealed or compacted), and dropped events.
+        """
+        with self._lock:
+            recorded = self._next[:len(self)]
+            return {
+                'accounts': len(self),
+                'hot': int(np.minimum(recorded, self.capacity).sum()),
+                'spilled': self._spill.size,
+                'cold': sum(buffer.size for buffer in self._sealed) + self._cold_size(self._runs),
+                'dropped': self._dropped,
+            }
+
+    def save(self, path):
+        """Writes the feed to path (an .npz file) for a later process to load."""
+        self.compact()
+        with self._lock:
+            # Events spilled since compact() returned are merged in here.
+            cold = _merge_runs([run for _, run in self._runs] + self._sealed + [self._spill])
+            accounts = len(self)
+            partial = str(path) + '.partial'
+            with open(partial, 'wb') as handle:
+                np.savez(
+                    handle,
+                    cust_ids=np.array(self._cust_ids, dtype=str),
+                    currencies=np.array([currency or '' for currency in self._currencies], dtype=str),
+                    next=self._next[:accounts],
+                    **{'cold_' + field: column for field, column in cold.items()},
+                    **{name.lstrip('_'): getattr(self, name)[:accounts] for name in _COLUMNS},
+                )
+            os.replace(partial, path)
+
+    def load(self, path):
+        """Replaces the feed with the one saved at path; its capacity must match."""
+        with np.load(path) as saved, self._compact_lock, self._lock:
+            if saved['timestamps'].shape[1] != self.capacity:
+                raise ValueError(f"Saved feed keeps {saved['timestamps'].shape[1]} events per account, not {self.capacity}")
+            self._cust_ids = saved['cust_ids'].tolist()
+            self._currencies = [currency or None for currency in saved['currencies'].tolist()]
+            self._slots = {cust_id: slot for slot, cust_id in enumerate(self._cust_ids)}
+            self._next = saved['next'].copy()
+            for name in _COLUMNS:
+                setattr(self, name, saved[name.lstrip('_')].copy())
+            cold = {field: saved['cold_' + field].copy() for field in COLD_FIELDS}
+            # The loaded run starts at the tier its size would have reached.
+            tier, size = 0, len(cold['seq'])
+            while size >= self.compact_events * MERGE_FANOUT:
+                tier, size = tier + 1, size // MERGE_FANOUT
+            self._runs = [(tier, cold)] if len(cold['seq']) else []
+            self._spill = _SpillBuffer(self.compact_events)
+            self._sealed = []
+            self._views.clear()
+
+
+_account_activity = None
+_account_activity_lock = threading.Lock()
+
+
+def get_account_activity():
+    """Returns the process-wide activity feed, built from config/settings.py on first use."""
+    global _account_activity
+    if _account_activity is None:
+        with _account_activity_lock:
+            if _account_activity is None:
+                _account_activity = AccountActivity()
+    return _account_activity
+
+
+def set_account_activity(activity):
+    """Replaces the process-wide activity feed and returns the previous one."""
+    global _account_activity
+    with _account_activity_lock:
+        previous, _account_activity = _account_activity, activity
+    return previous
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
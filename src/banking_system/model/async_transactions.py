@@ -0,0 +1,205 @@
+"""banking/async_transactions.py"""
+
+import time
+
+from banking_system.db.accounts_store import transactions_db
+from banking_system.db.async_storage import AsyncAccountStore, get_async_store
+from banking_system.db.dedup import DuplicatePostingError, PostingRecord
+from banking_system.db.storage import ConcurrentUpdateError
+from banking_system.db.transfers import IdempotencyConflictError
+from banking_system.events.event_log import get_event_log
+from banking_system.model.activity import get_account_activity
+from banking_system.model.money import Money
+from banking_system.model.overdraft import OverdraftError, get_overdraft_policy
+from banking_system.model.transactions import CAS_RETRIES
+
+
+class AsyncAccountTransactions:
+    """
+    Asyncio counterpart of AccountTransactions.
+    Methods:
+        - balance
+        - deposit
+        - withdraw
+    """
+
+    def __init__(self, cust_id, store=None, policy=None):
+        """Initializes the AsyncAccountTransactions class
+
+        Args:
+            cust_id (str): The customer ID whose ledger is used.
+            store (AsyncAccountStore | AccountStore): Optional storage backend; a
+                synchronous one is wrapped with get_async_store(). Defaults to the
+                one selected by DATABASE_URL.
+            policy (OverdraftPolicy): Optional withdrawal rules; defaults to the
+                process-wide policy.
+        """
+        self.cust_id = cust_id
+        self.store = store
+        self.policy = policy
+
+
+    def _get_store(self):
+        """Returns the asyncio storage backend this account operates on."""
+        if isinstance(self.store, AsyncAccountStore):
+            return self.store
+        return get_async_store(self.store, transactions=transactions_db)
+
+
+    async def balance(self):
+        """Retrieves and returns the current account balance.
+
+        Concurrent calls for the same account share one backend read.
+
+        Returns:
+            Money: The current account balance.
+
+        Raises:
+            ValueError: If the customer ID is not found in the database.
+
+        Examples:
+            >>> await AsyncAccountTransactions('1001').balance()
+            Money('71.72', 'USD')
+        """
+        balance = await self._get_store().get_balance(self.cust_id)
+        if balance is None:
+            raise ValueError(f'Customer ID {self.cust_id} not found in the database')
+
+        get_event_log().debug('balance.read', cust_id=self.cust_id, balance=balance)
+        return balance
+
+    async def _post_once(self, store, kind, amount, key, post):
+        """Awaits post(key) at most once per idempotency key; returns (balance, replayed).
+
+        The asyncio form of AccountTransactions._post_once: the same dedup
+        cache and persisted keys answer a retry, whichever API made the posting.
+        """
+        if key is None:
+            return await post(None), False
+        cache = store.dedup_cache()
+        async with store.key_lock(key):
+            record = await self._recorded_posting(store, cache, key, kind, amount)
+            if record is not None:
+                return record.balance, True
+            try:
+                balance = await post(key)
+            except DuplicatePostingError:
+                # Another process posted under the key after our lookup.
+                return (await self._recorded_posting(store, cache, key, kind, amount)).balance, True
+            cache.put(key, PostingRecord(key, self.cust_id, kind, amount, balance, time.time()))
+            return balance, False
+
+    async def _recorded_posting(self, store, cache, key, kind, amount):
+        """Returns the posting recorded under key, or None; raises if it was a different posting."""
+        record = cache.get(key)
+        if record is None:
+            record = await store.get_posting(key)
+            if record is None:
+                return None
+            cache.put(key, record)
+        if not record.matches(self.cust_id, kind, amount.minor):
+            raise IdempotencyConflictError(f'Idempotency key {key!r} was already used for a different posting')
+        return record
+
+    async def deposit(self, deposit, key=None):
+        """
+        Deposits funds into the customer's account.
+
+        A retry carrying the key of a deposit that was already made (through
+        either API) returns that deposit's balance without crediting the account again.
+
+        Args:
+            deposit (Money | float | Decimal | str): The amount to deposit. Must be positive.
+            key (str): Optional idempotency key, unique per logical deposit.
+
+        Returns:
+            Money: The new account balance after the deposit.
+
+        Raises:
+            ValueError: If the customer ID is not found in the database.
+            ValueError: If the deposit amount is not positive.
+            IdempotencyConflictError: If key was already used for a different posting.
+        """
+        deposit = Money.of(deposit)
+        if deposit <= 0:
+            raise ValueError("Deposit amount must be positive")
+
+        store = self._get_store()
+        try:
+            new_balance, replayed = await self._post_once(
+                store, 'deposit', deposit, key,
+                lambda key: store.apply_transaction(self.cust_id, 'deposit', deposit, key=key),
+            )
+        except KeyError:
+            raise ValueError("Customer ID not found") from None
+
+        if replayed:
+            get_event_log().info('transaction.replayed', cust_id=self.cust_id, kind='deposit', amount=deposit, key=key)
+        else:
+            get_event_log().info('transaction.deposit', cust_id=self.cust_id, amount=deposit, balance=new_balance)
+            get_account_activity().record(self.cust_id, 'deposit', deposit, new_balance)
+        return new_balance
+
+    async def withdraw(self, withdraw, key=None):
+        """
+        Withdraw funds from the customer's account.
+
+        Uses the same overdraft policy checks, compare-and-set loop, and
+        idempotency keys as AccountTransactions.withdraw.
+
+        Args:
+            withdraw (Money | float | Decimal | str): The amount to withdraw. Must be positive.
+            key (str): Optional idempotency key, unique per logical withdrawal.
+
+        Returns:
+            Money: The new account balance after the withdraw.
+
+        Raises:
+            ValueError: If the customer ID is not found in the database.
+            ValueError: If the withdraw amount is not positive.
+            OverdraftError: If the withdrawal would breach the account's floor or overdraft limit.
+            DailyLimitError: If the withdrawal would exceed the rolling withdrawal limit.
+            ConcurrentUpdateError: If the balance kept changing for CAS_RETRIES attempts.
+            IdempotencyConflictError: If key was already used for a different posting.
+        """
+        withdraw = Money.of(withdraw)
+        if withdraw <= 0:
+            raise ValueError('Withdraw amount must be positive')
+
+        store = self._get_store()
+        try:
+            new_balance, replayed = await self._post_once(
+                store, 'withdraw', withdraw, key, lambda key: self._withdraw(store, withdraw, key)
+            )
+        except OverdraftError as error:
+            get_event_log().warning('transaction.declined', cust_id=self.cust_id, amount=withdraw, reason=str(error))
+            raise
+
+        if replayed:
+            get_event_log().info('transaction.replayed', cust_id=self.cust_id, kind='withdraw', amount=withdraw, key=key)
+        else:
+            get_event_log().info('transaction.withdraw', cust_id=self.cust_id, amount=withdraw, balance=new_balance)
+            get_account_activity().record(self.cust_id, 'withdraw', withdraw, new_balance)
+        return new_balance
+
+    async def _withdraw(self, store, withdraw, key):
+        """Checks the overdraft policy and posts a withdrawal; returns the new balance."""
+        policy = self.policy if self.policy is not None else get_overdraft_policy()
+        history = None
+        if policy.needs_history(self.cust_id, store):
+            history = await store.withdrawals_since(self.cust_id, policy.window_start())
+
+        with policy.reserve(self.cust_id, withdraw, history, store=store):
+            for _ in range(CAS_RETRIES):
+                balance = await store.get_balance(self.cust_id)
+                if balance is None:
+                    raise ValueError("Customer ID not found")
+                policy.check(self.cust_id, balance, withdraw)
+
+                try:
+                    return await store.apply_transaction(self.cust_id, 'withdraw', withdraw, expected=balance, key=key)
+                except KeyError:
+                    raise ValueError("Customer ID not found") from None
+                except ConcurrentUpdateError:
+                    continue
+            raise ConcurrentUpdateError(f'Withdraw from {self.cust_id} kept conflicting with concurrent postings')
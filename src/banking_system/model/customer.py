@@ -0,0 +1,136 @@
+"""
+model/customer.py
+
+Compact customer record.
+
+A customer used to be a 7-key dict: about 750 bytes per customer once the dict
+and its strings are counted. Customer keeps the same fields in __slots__ (no
+per-instance dict), interns city and state so every customer in a city shares
+one string, and stores US ZIP codes as ints drawn from a shared pool. It is a
+read-only Mapping over its fields, so code written against the dict records
+(record['first_name'], record.get('acct_num'), comparisons with dicts) keeps
+working, and update() changes fields in place as dict.update did.
+"""
+
+import sys
+from collections.abc import Mapping
+
+CUSTOMER_FIELDS = ('first_name', 'last_name', 'acct_num', 'address', 'city', 'state', 'zip')
+
+# One int object per distinct ZIP code, shared by every customer that has it.
+_zip_codes = {}
+
+# In-place field changes made to any customer, so indexes over customers can
+# tell a record was edited behind their back (see db/accounts_store.py).
+_edit_count = 0
+
+
+def edit_count():
+    """Returns the number of in-place field changes made to customers so far."""
+    return _edit_count
+
+
+def _intern(value):
+    """Interns a string field so equal values share one object."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _zip(value):
+    """Returns a 5-digit ZIP code as a shared int; any other value (ZIP+4, foreign) unchanged."""
+    if isinstance(value, str) and len(value) == 5 and value.isdigit():
+        value = int(value)
+    if type(value) is int:
+        return _zip_codes.setdefault(value, value)
+    return value
+
+
+class Customer(Mapping):
+    """
+    Customer record with fixed fields, readable like the dict records it replaces.
+    Methods:
+        - from_record
+        - update
+        - zip_code
+        - to_dict
+    """
+
+    __slots__ = CUSTOMER_FIELDS
+
+    def __init__(self, first_name, last_name, acct_num=None, address=None, city=None, state=None, zip=None):
+        """Initializes a record; city and state are interned and zip stored as an int.
+
+        Args:
+            first_name (str): Customer first name.
+            last_name (str): Customer last name.
+            acct_num (str): Account number.
+            address (str): Street address.
+            city (str): City.
+            state (str): State.
+            zip (int | str): ZIP code; a 5-digit string is stored as an int.
+        """
+        self.first_name = first_name
+        self.last_name = last_name
+        self.acct_num = acct_num
+        self.address = address
+        self.city = _intern(city)
+        self.state = _intern(state)
+        self.zip = _zip(zip)
+
+    @classmethod
+    def from_record(cls, record):
+        """Builds a Customer from a dict record (or copies another Customer).
+
+        Raises:
+            TypeError: If the record has a field a customer does not.
+        """
+        unknown = set(record) - set(CUSTOMER_FIELDS)
+        if unknown:
+            raise TypeError(f'Unknown customer fields: {", ".join(sorted(unknown))}')
+        return cls(**record)
+
+    def __getitem__(self, field):
+        if field not in CUSTOMER_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field, value):
+        global _edit_count
+        if field not in CUSTOMER_FIELDS:
+            raise KeyError(field)
+        _edit_count += 1
+        if field in ('city', 'state'):
+            value = _intern(value)
+        elif field == 'zip':
+            value = _zip(value)
+        setattr(self, field, value)
+
+    def __iter__(self):
+        return iter(CUSTOMER_FIELDS)
+
+    def __len__(self):
+        return len(CUSTOMER_FIELDS)
+
+    def __repr__(self):
+        return f'Customer({self.first_name!r}, {self.last_name!r}, {self.acct_num!r})'
+
+    def __reduce__(self):
+        return (Customer, tuple(getattr(self, field) for field in CUSTOMER_FIELDS))
+
+    def update(self, changes=(), **fields):
+        """Changes fields in place, as dict.update did on the old records."""
+        for field, value in dict(changes, **fields).items():
+            self[field] = value
+
+    @property
+    def zip_code(self):
+        """Returns the ZIP code as printed: 5 digits, leading zeros kept."""
+        return f'{self.zip:05d}' if type(self.zip) is int else self.zip
+
+    def to_dict(self):
+        """Returns the record as a plain dict (for JSON and other dict-only consumers)."""
+        return {field: getattr(self, field) for field in CUSTOMER_FIELDS}
+
+
+def as_customer(record):
+    """Returns record as a Customer, converting a dict record."""
+    return record if isinstance(record, Customer) else Customer.from_record(record)
@@ -0,0 +1,270 @@
+"""
+model/customer_import.py
+
+Streaming bulk import of customers, for onboarding another bank's book.
+
+Rows are read lazily from CSV or JSON Lines and committed in chunks of
+IMPORT_CHUNK_SIZE (config/settings.py), so memory use depends on the chunk
+size, not on the size of the file. For each chunk the import:
+
+    1. validates every row into a Customer and an opening balance
+    2. checks all the chunk's names against existing customers in one
+       existing_names() call, and against each other (later chunks see earlier
+       ones through the store)
+    3. reserves a block of customer IDs and draws the chunk's account numbers
+       at once
+    4. writes the customers and their opening ledgers with one
+       insert_customers() call (one transaction / one log commit)
+
+Invalid and duplicate rows are rejected rather than imported. ImportReport
+counts them by reason and keeps the first few; pass `rejects` to also write
+every one of them to a CSV file.
+
+Input fields: first_name, last_name, address, city, state, zip, and optionally
+balance (the opening balance, default 0) and currency (default USD). Other
+fields are ignored; account numbers are always newly allocated.
+"""
+
+import csv
+import itertools
+import json
+import os
+import re
+import time
+
+from banking_system.db.accounts_store import accounts_db, normalize_name, transactions_db
+from banking_system.db.storage import DuplicateAccountNumberError, get_store
+from banking_system.events.event_log import get_event_log
+from banking_system.model.account import ACCT_NUM_WRITE_ATTEMPTS, account_number_allocator
+from banking_system.model.customer import Customer
+from banking_system.model.money import DEFAULT_CURRENCY, Money
+
+REQUIRED_FIELDS = ('first_name', 'last_name', 'address', 'city', 'state', 'zip')
+MAX_SAMPLES = 100
+
+_ZIP = re.compile(r'\d{5}(-\d{4})?$')
+_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+class ImportReport:
+    """
+    Outcome of one import.
+    Methods:
+        - reject
+    Attributes:
+        - read / imported / rejected: row counts
+        - chunks: number of chunks committed
+        - reasons: rejection reason -> number of rows rejected for it
+        - samples: (line, reason) of the first MAX_SAMPLES rejected rows
+        - seconds: wall time of the import
+    """
+
+    def __init__(self, writer=None):
+        """Initializes an empty report; rejects are also written to writer (a csv.writer) if given."""
+        self.read = 0
+        self.imported = 0
+        self.rejected = 0
+        self.chunks = 0
+        self.reasons = {}
+        self.samples = []
+        self.seconds = 0.0
+        self._writer = writer
+
+    def reject(self, line, reason):
+        """Records a rejected row by its line number in the source."""
+        self.rejected += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append((line, reason))
+        if self._writer is not None:
+            self._writer.writerow((line, reason))
+
+    def __repr__(self):
+        return f'ImportReport(read={self.read}, imported={self.imported}, rejected={self.rejected})'
+
+
+def read_csv(path):
+    """Yields (line, row dict) for each record of a CSV file with a header row."""
+    with open(path, newline='', encoding='utf-8') as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def read_jsonl(path):
+    """Yields (line, row dict) for each line of a JSON Lines file; a line that is not valid JSON yields None."""
+    with open(path, encoding='utf-8') as handle:
+        for line, text in enumerate(handle, 1):
+            if not text.strip():
+                continue
+            try:
+                yield line, json.loads(text)
+            except ValueError:
+                yield line, None
+
+
+def read_rows(path, format=None):
+    """Yields (line, row) from a CSV or JSON Lines file.
+
+    Args:
+        path (str): File to read.
+        format (str): 'csv' or 'jsonl'; by default taken from the file extension.
+
+    Raises:
+        ValueError: If the format is not given and cannot be told from the extension.
+    """
+    format = format or _FORMATS.get(os.path.splitext(str(path))[1].lower())
+    if format == 'csv':
+        return read_csv(path)
+    if format == 'jsonl':
+        return read_jsonl(path)
+    raise ValueError(f"Cannot tell the format of {path}; pass format='csv' or 'jsonl'")
+
+
+def _text(row, field):
+    """Returns a field as stripped text ('' if missing)."""
+    value = row.get(field)
+    if type(value) is str:
+        return value.strip()
+    if value is None:
+        return ''
+    if field == 'zip' and isinstance(value, int):
+        return f'{value:05d}'
+    return str(value).strip()
+
+
+def validate_row(row):
+    """Checks one input row.
+
+    Returns:
+        tuple: (customer, opening, reason); customer and opening (Money) are
+            None and reason says why when the row is rejected.
+    """
+    if not isinstance(row, dict):
+        return None, None, 'malformed row'
+    fields = {field: _text(row, field) for field in REQUIRED_FIELDS}
+    for field in REQUIRED_FIELDS:
+        if not fields[field]:
+            return None, None, f'missing {field}'
+    state = fields['state'].upper()
+    if len(state) != 2 or not state.isalpha():
+        return None, None, 'invalid state'
+    if not _ZIP.match(fields['zip']):
+        return None, None, 'invalid zip'
+    currency = _text(row, 'currency').upper() or DEFAULT_CURRENCY
+    try:
+        opening = Money.of(_text(row, 'balance') or 0, currency)
+    except ValueError:
+        return None, None, 'invalid balance'
+    customer = Customer(
+        first_name=fields['first_name'],
+        last_name=fields['last_name'],
+        address=fields['address'],
+        city=fields['city'],
+        state=state,
+        zip=fields['zip'],
+    )
+    return customer, opening, None
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
+
+
+def import_customers(source, store=None, format=None, chunk_size=None, rejects=None):
+    """Imports customers from a CSV or JSON Lines file, in chunks.
+
+    Each chunk is committed before the next is read; if the import stops part
+    way, the chunks already committed stay imported, and re-running it rejects
+    their rows as duplicates.
+
+    Args:
+        source (str | iterable): Path of a .csv / .jsonl file, or an iterable of
+            (line, row dict) pairs as yielded by read_rows.
+        store (AccountStore): Backend to import into; defaults to the one
+            selected by DATABASE_URL.
+        format (str): 'csv' or 'jsonl' for a path without a telling extension.
+        chunk_size (int): Rows per commit; defaults to IMPORT_CHUNK_SIZE.
+        rejects (str): Path of a CSV file to write every rejected row to (line, reason).
+
+    Returns:
+        ImportReport: Counts of rows read, imported, and rejected.
+    """
+    if store is None:
+        store = get_store(accounts=accounts_db, transactions=transactions_db)
+    chunk_size = chunk_size or _config().IMPORT_CHUNK_SIZE
+    rows = read_rows(source, format) if isinstance(source, (str, os.PathLike)) else source
+    start = time.perf_counter()
+
+    handle = None if rejects is None else open(rejects, 'w', newline='', encoding='utf-8')
+    try:
+        writer = None
+        if handle is not None:
+            writer = csv.writer(handle)
+            writer.writerow(('line', 'reason'))
+        report = ImportReport(writer)
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            _import_chunk(store, chunk, report)
+    finally:
+        if handle is not None:
+            handle.close()
+
+    report.seconds = time.perf_counter() - start
+    get_event_log().info(
+        'import.completed', read=report.read, imported=report.imported, rejected=report.rejected, seconds=report.seconds,
+    )
+    return report
+
+
+def _import_chunk(store, chunk, report):
+    """Validates, dedups, allocates, and commits one chunk of rows."""
+    valid = []
+    rejected = []
+    for line, row in chunk:
+        report.read += 1
+        customer, opening, reason = validate_row(row)
+        if reason is not None:
+            rejected.append((line, reason))
+            continue
+        valid.append((line, customer, opening, normalize_name(customer.first_name, customer.last_name)))
+
+    existing = store.existing_names({name for *_, name in valid})
+    accepted = []
+    seen = set()
+    for line, customer, opening, name in valid:
+        if name in existing or name in seen:
+            rejected.append((line, 'duplicate customer'))
+            continue
+        seen.add(name)
+        accepted.append((customer, opening))
+    # Rejects are reported in source order, whichever check caught them.
+    for line, reason in sorted(rejected):
+        report.reject(line, reason)
+    if not accepted:
+        return
+
+    cust_ids = store.id_sequence().reserve(len(accepted))
+    # Account numbers are drawn outside the chunk's write, so a concurrent writer
+    # can take one first; the store then refuses the chunk and we draw again.
+    for attempt in range(ACCT_NUM_WRITE_ATTEMPTS):
+        acct_nums = account_number_allocator.allocate_many(len(accepted), store.acct_num_index())
+        customers = []
+        for cust_id, acct_num, (customer, _) in zip(cust_ids, acct_nums, accepted):
+            customer.acct_num = acct_num
+            customers.append((str(cust_id), customer))
+        try:
+            store.insert_customers(customers, [opening for _, opening in accepted])
+            break
+        except DuplicateAccountNumberError:
+            if attempt == ACCT_NUM_WRITE_ATTEMPTS - 1:
+                raise
+
+    report.imported += len(customers)
+    report.chunks += 1
+    get_event_log().debug('import.chunk', chunk=report.chunks, imported=len(customers), first_id=customers[0][0])
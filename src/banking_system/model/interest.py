@@ -0,0 +1,417 @@
+"""
+model/interest.py
+
+Interest accrual and monthly maintenance fees for every account, in bulk.
+
+An AccrualEngine keeps a running state per account: the balance it last read,
+the interest accrued but not yet posted (in millionths of a minor unit), and
+the lowest end-of-day balance of the fee period. accrue() advances the state
+one calendar day at a time: the day's ledger entries move the closing
+balances, then every account earns the day's interest at once, with
+whole-array NumPy operations rather than a Python loop over accounts.
+Interest compounds daily, so each day earns interest on the balance plus the
+interest accrued so far. post() credits the whole minor units accrued and
+charges the maintenance fee where the balance dipped below the waiver minimum,
+in one AccountStore.apply_batch call, so the postings land in the ledgers like
+any other deposit or withdrawal.
+
+Runs are incremental: only ledgers posted to since the previous run (by
+transaction ID, see AccountStore.ledgers_changed_since) and ledgers new to the
+engine are read again, since no other balance can have moved. save() and
+load() carry the state between nightly runs. A run assumes nothing is posted
+while it reads, as when it runs after the day has closed; accrue(incremental=False)
+re-reads every ledger.
+"""
+
+import calendar
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+from banking_system.db.accounts_store import transactions_db
+from banking_system.db.ledger import DEPOSIT, WITHDRAW
+from banking_system.db.storage import get_store
+from banking_system.events.event_log import get_event_log
+from banking_system.model.activity import get_account_activity
+from banking_system.model.end_of_day import day_bounds
+from banking_system.model.money import Money, minor_unit_scale
+
+DAY_COUNTS = ('actual/365', 'actual/360', 'actual/actual', '30/360')
+# Accrued interest is kept in millionths of a minor unit.
+ACCRUAL_SCALE = 1_000_000
+_NO_LOW = np.iinfo(np.int64).max
+
+
+class InterestSchedule:
+    """
+    Tiered annual interest rates and a day-count convention.
+
+    Tiers are marginal: each rate applies to the part of the balance inside its
+    band, so with tiers ((0, 0.01), (10_000, 0.02)) the first 10,000 earns 1%
+    and the rest 2%. Band floors are in major units of each account's currency.
+    Negative balances earn nothing.
+    Methods:
+        - year_fraction
+        - annual_interest
+    Attributes:
+        - tiers: (floor, annual rate) pairs, floors ascending from 0
+        - day_count: 'actual/365', 'actual/360', 'actual/actual', or '30/360'
+    """
+
+    def __init__(self, tiers, day_count='actual/365'):
+        """Initializes the schedule.
+
+        Args:
+            tiers (iterable): (floor, annual rate) pairs, e.g. ((0, 0.01), (10_000, 0.02)).
+            day_count (str): How a day converts to a fraction of a year; one of DAY_COUNTS.
+
+        Raises:
+            ValueError: If the tiers do not start at 0, a rate is negative, or the day count is unknown.
+        """
+        tiers = sorted((float(floor), float(rate)) for floor, rate in tiers)
+        if not tiers or tiers[0][0] != 0:
+            raise ValueError('Interest tiers must start at a balance of 0')
+        if any(rate < 0 for _, rate in tiers):
+            raise ValueError('Interest rates must not be negative')
+        if day_count not in DAY_COUNTS:
+            raise ValueError(f"Unknown day count {day_count!r}; use one of {', '.join(DAY_COUNTS)}")
+        self.tiers = tiers
+        self.day_count = day_count
+
+    def year_fraction(self, day):
+        """Returns the fraction of a year one calendar day accrues."""
+        if self.day_count == 'actual/365':
+            return 1 / 365
+        if self.day_count == 'actual/360':
+            return 1 / 360
+        if self.day_count == 'actual/actual':
+            return 1 / (366 if calendar.isleap(day.year) else 365)
+        # 30/360: every month counts 30 days, so the 31st accrues nothing and the
+        # last day of February makes up the rest of its month.
+        if day.day == 31:
+            return 0.0
+        if day.month == 2 and day.day == calendar.monthrange(day.year, 2)[1]:
+            return (31 - day.day) / 360
+        return 1 / 360
+
+    def annual_interest(self, balances, scales):
+        """Returns a year's interest on each balance at the tiered rates.
+
+        Args:
+            balances (ndarray): Balances in minor units.
+            scales (ndarray): Minor units per major unit of each balance's currency.
+
+        Returns:
+            ndarray: float64 interest in minor units.
+        """
+        balances = np.maximum(balances, 0)
+        interest = np.zeros(len(balances))
+        ceilings = [floor for floor, _ in self.tiers[1:]] + [np.inf]
+        for (floor, rate), ceiling in zip(self.tiers, ceilings):
+            if rate:
+                interest += rate * np.clip(balances - floor * scales, 0, (ceiling - floor) * scales)
+        return interest
+
+
+class FeeSchedule:
+    """
+    A monthly maintenance fee, waived if the balance stayed high enough all period.
+    Attributes:
+        - monthly_fee: the fee, in major units of each account's currency
+        - waive_minimum: lowest end-of-day balance (major units) that waives it
+    """
+
+    def __init__(self, monthly_fee, waive_minimum=None):
+        """Initializes the schedule; with no waive_minimum every account pays the fee."""
+        if monthly_fee < 0:
+            raise ValueError('Maintenance fee must not be negative')
+        self.monthly_fee = float(monthly_fee)
+        self.waive_minimum = None if waive_minimum is None else float(waive_minimum)
+
+
+class AccrualReport:
+    """
+    Interest and fees posted by AccrualEngine.post, in engine order.
+    Attributes:
+        - cust_ids / currencies
+        - interest / fees: amounts posted to each account (int64 minor units, positive)
+    Methods:
+        - account
+        - totals
+    """
+
+    def __init__(self, cust_ids, currencies, interest, fees):
+        """Initializes the report from per-account arrays."""
+        self.cust_ids = cust_ids
+        self.currencies = currencies
+        self.interest = interest
+        self.fees = fees
+
+    def __len__(self):
+        return len(self.cust_ids)
+
+    def account(self, cust_id):
+        """Returns {'interest', 'fee'} posted to one account, as Money.
+
+        Raises:
+            ValueError: If cust_id is not in the report.
+        """
+        index = self.cust_ids.index(cust_id)
+        currency = self.currencies[index]
+        return {'interest': Money(self.interest[index], currency), 'fee': Money(self.fees[index], currency)}
+
+    def totals(self):
+        """Returns {currency: {'interest', 'fees'}} summed over accounts."""
+        currencies = np.array(self.currencies, dtype=object)
+        return {
+            currency: {
+                'interest': Money(int(self.interest[currencies == currency].sum()), currency),
+                'fees': Money(int(self.fees[currencies == currency].sum()), currency),
+            }
+            for currency in sorted(set(self.currencies))
+        }
+
+
+class AccrualEngine:
+    """
+    Daily interest accrual and monthly fees for every account in a store.
+    Methods:
+        - accrue
+        - accrued
+        - post
+        - save / load
+    Attributes:
+        - interest: InterestSchedule
+        - fees: FeeSchedule, or None to charge no fees
+        - last_day: last calendar day accrued, or None before the first run
+    """
+
+    def __init__(self, interest, fees=None, store=None):
+        """Initializes the engine with an empty state.
+
+        Args:
+            interest (InterestSchedule): Rates and day count.
+            fees (FeeSchedule): Optional maintenance fee.
+            store (AccountStore): Optional storage backend. Defaults to the one
+                selected by DATABASE_URL (the in-memory transactions_db if unset).
+        """
+        self.interest = interest
+        self.fees = fees
+        self.store = get_store(transactions=transactions_db) if store is None else store
+        self.last_day = None
+        self._cust_ids = []
+        self._positions = {}
+        self._currencies = []
+        self._scales = np.zeros(0)
+        self._balances = np.zeros(0, dtype=np.int64)
+        self._accrued = np.zeros(0, dtype=np.int64)
+        self._low = np.zeros(0, dtype=np.int64)
+        self._mark = None  # highest txn_id read; None reads every ledger
+
+    def __len__(self):
+        return len(self._cust_ids)
+
+    def _place(self, cust_ids, currencies):
+        """Returns the state positions of cust_ids, adding the ones not seen before."""
+        fresh = [index for index, cust_id in enumerate(cust_ids) if cust_id not in self._positions]
+        if fresh:
+            start = len(self._cust_ids)
+            for offset, index in enumerate(fresh):
+                self._positions[cust_ids[index]] = start + offset
+                self._cust_ids.append(cust_ids[index])
+                self._currencies.append(currencies[index])
+            added = len(fresh)
+            self._scales = np.concatenate((self._scales, [minor_unit_scale(currencies[index]) for index in fresh]))
+            self._balances = np.concatenate((self._balances, np.zeros(added, dtype=np.int64)))
+            self._accrued = np.concatenate((self._accrued, np.zeros(added, dtype=np.int64)))
+            self._low = np.concatenate((self._low, np.full(added, _NO_LOW, dtype=np.int64)))
+        return np.fromiter(map(self._positions.__getitem__, cust_ids), dtype=np.int64, count=len(cust_ids))
+
+    def _refresh(self, bounds, changed):
+        """Re-reads ledgers: sets their balances as of bounds[0] and returns the moves of each day.
+
+        Args:
+            bounds (ndarray): Epoch microseconds of the start of each day and the end of the last.
+            changed (set): cust_ids to read, or None for every ledger.
+
+        Returns:
+            tuple: (read, moves), the number of ledgers read and, per day,
+                (positions, amounts) of the entries posted that day.
+        """
+        read = 0
+        mark = self._mark if self._mark is not None else -1
+        first_unread = None
+        days, owners, amounts = [], [], []
+        chunk = _config().ACCRUAL_CHUNK_ACCOUNTS
+        select = None if changed is None else changed.__contains__
+        for columns in self.store.iter_ledger_columns(chunk, select):
+            if not len(columns):
+                continue
+            read += len(columns)
+            positions = self._place(columns.cust_ids, columns.currencies)
+            timestamps = columns.timestamps
+            before = timestamps < bounds[0]
+            within = ~before & (timestamps < bounds[-1])
+            running = np.zeros(len(timestamps) + 1, dtype=np.int64)
+            running[1:] = np.cumsum(np.where(before, columns.amounts, 0))
+            self._balances[positions] = columns.opening + running[columns.offsets[1:]] - running[columns.offsets[:-1]]
+            rows = np.flatnonzero(within)
+            days.append(np.searchsorted(bounds, timestamps[rows], side='right') - 1)
+            owners.append(np.repeat(positions, columns.counts)[rows])
+            amounts.append(columns.amounts[rows])
+            if columns.txn_ids is None:
+                mark = None
+            elif mark is not None and len(columns.txn_ids):
+                # Entries after the last day are not applied yet, so the mark
+                # must stay below them for their ledgers to be read again.
+                later = columns.txn_ids[~(before | within)]
+                mark = max(mark, int(columns.txn_ids[before | within].max(initial=-1)))
+                if len(later):
+                    lowest = int(later.min())
+                    first_unread = lowest if first_unread is None else min(first_unread, lowest)
+        if mark is not None and first_unread is not None:
+            mark = min(mark, first_unread - 1)
+        self._mark = mark
+
+        days = np.concatenate(days) if days else np.zeros(0, dtype=np.int64)
+        owners = np.concatenate(owners) if owners else np.zeros(0, dtype=np.int64)
+        amounts = np.concatenate(amounts) if amounts else np.zeros(0, dtype=np.int64)
+        order = np.argsort(days, kind='stable')
+        cuts = np.searchsorted(days[order], np.arange(len(bounds)))
+        moves = [(owners[order[low:high]], amounts[order[low:high]]) for low, high in zip(cuts[:-1], cuts[1:])]
+        return read, moves
+
+    def accrue(self, through=None, incremental=True):
+        """Accrues interest for every day after the last one accrued, through `through`.
+
+        The first run accrues `through` only. Each day's interest is figured on
+        the day's closing balances.
+
+        Args:
+            through (date): Last day to accrue; defaults to yesterday.
+            incremental (bool): Read only the ledgers that changed since the last
+                run (and new ones); False re-reads every ledger.
+
+        Returns:
+            int: The number of ledgers read.
+
+        Raises:
+            ValueError: If `through` has already been accrued.
+        """
+        through = through or date.today() - timedelta(days=1)
+        first = through if self.last_day is None else self.last_day + timedelta(days=1)
+        if first > through:
+            raise ValueError(f'Interest is already accrued through {self.last_day}')
+        days = [first + timedelta(days=offset) for offset in range((through - first).days + 1)]
+        bounds = np.array([day_bounds(day)[0] for day in days] + [day_bounds(through)[1]], dtype=np.int64)
+
+        changed = None
+        if incremental and self._mark is not None:
+            changed = set(self.store.ledgers_changed_since(self._mark, self._positions))
+        read, moves = self._refresh(bounds, changed)
+
+        for day, (positions, amounts) in zip(days, moves):
+            np.add.at(self._balances, positions, amounts)
+            fraction = self.interest.year_fraction(day)
+            if fraction:
+                # Daily compounding: interest accrued so far earns interest too.
+                base = self._balances + self._accrued / ACCRUAL_SCALE
+                daily = self.interest.annual_interest(base, self._scales) * (fraction * ACCRUAL_SCALE)
+                self._accrued += np.rint(daily).astype(np.int64)
+            np.minimum(self._low, self._balances, out=self._low)
+        self.last_day = through
+        get_event_log().info('interest.accrued', through=through.isoformat(), accounts=len(self), read=read)
+        return read
+
+    def accrued(self, cust_id):
+        """Returns the interest accrued and not yet posted to cust_id, rounded down to a minor unit.
+
+        Raises:
+            KeyError: If the engine has not seen cust_id.
+        """
+        index = self._positions[cust_id]
+        return Money(int(self._accrued[index] // ACCRUAL_SCALE), self._currencies[index])
+
+    def post(self, fees=True):
+        """Posts the accrued interest and the period's maintenance fees, and starts a new fee period.
+
+        Whole minor units of interest are credited as deposits and the fractions
+        carried to the next period; fees are charged as withdrawals. Both are
+        bank postings, so they are not checked against the overdraft policy.
+
+        Args:
+            fees (bool): Charge maintenance fees; False posts interest only and
+                keeps the fee period open.
+
+        Returns:
+            AccrualReport: What was posted to each account.
+        """
+        interest = self._accrued // ACCRUAL_SCALE
+        charges = np.zeros(len(self), dtype=np.int64)
+        if fees and self.fees is not None:
+            seen = self._low != _NO_LOW
+            due = seen if self.fees.waive_minimum is None else seen & (self._low < np.rint(self.fees.waive_minimum * self._scales))
+            charges[due] = np.rint(self.fees.monthly_fee * self._scales[due]).astype(np.int64)
+
+        # One deposit and/or one withdrawal per account, interest first.
+        legs = np.stack((interest > 0, charges > 0), axis=1)
+        counts = legs.sum(axis=1)
+        live = np.flatnonzero(counts)
+        codes = np.broadcast_to(np.array([DEPOSIT, WITHDRAW], dtype=np.int8), legs.shape)[live][legs[live]]
+        deltas = np.stack((interest, -charges), axis=1)[live][legs[live]]
+        if len(live):
+            cust_ids = [self._cust_ids[index] for index in live.tolist()]
+            balances = self.store.apply_batch(cust_ids, counts[live], codes, deltas)
+            legs = np.repeat(np.arange(len(live)), counts[live]).tolist()
+            get_account_activity().record_many(
+                [cust_ids[leg] for leg in legs], codes, np.abs(deltas), balances,
+                [self._currencies[index] for index in live[legs].tolist()],
+            )
+
+        self._accrued -= interest * ACCRUAL_SCALE
+        if fees:
+            self._low[:] = _NO_LOW
+        get_event_log().info(
+            'interest.posted', credited=int(np.count_nonzero(interest)), charged=int(np.count_nonzero(charges)),
+        )
+        return AccrualReport(list(self._cust_ids), list(self._currencies), interest, charges)
+
+    def save(self, path):
+        """Writes the accrual state to path (an .npz file) for a later run to load."""
+        partial = str(path) + '.partial'
+        with open(partial, 'wb') as handle:
+            np.savez(
+                handle,
+                cust_ids=np.array(self._cust_ids, dtype=str),
+                currencies=np.array(self._currencies, dtype=str),
+                balances=self._balances,
+                accrued=self._accrued,
+                low=self._low,
+                mark=np.array(-2 if self._mark is None else self._mark),
+                last_day=np.array(0 if self.last_day is None else self.last_day.toordinal()),
+            )
+        os.replace(partial, path)
+
+    def load(self, path):
+        """Replaces the accrual state with the one saved at path."""
+        with np.load(path) as saved:
+            self._cust_ids = []
+            self._positions = {}
+            self._currencies = []
+            self._scales = np.zeros(0)
+            self._balances = self._accrued = self._low = np.zeros(0, dtype=np.int64)
+            self._place(saved['cust_ids'].tolist(), saved['currencies'].tolist())
+            self._balances = saved['balances'].copy()
+            self._accrued = saved['accrued'].copy()
+            self._low = saved['low'].copy()
+            mark = int(saved['mark'])
+            self._mark = None if mark == -2 else mark
+            last_day = int(saved['last_day'])
+            self.last_day = date.fromordinal(last_day) if last_day else None
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
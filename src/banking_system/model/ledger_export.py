@@ -0,0 +1,574 @@
+"""
+model/ledger_export.py
+
+Streaming statement and ledger export, for customer statements and the monthly
+full-ledger dumps sent to regulators.
+
+Ledgers are read with AccountStore.iter_ledger_columns, a chunk of
+EXPORT_CHUNK_ACCOUNTS accounts (config/settings.py) at a time, and each chunk
+is written out before the next is read, so memory use depends on the chunk
+size, not on the size of the book. Within a chunk every figure (window
+balances, running balances, amount strings) is computed with whole-array
+operations, as in model/end_of_day.py.
+
+Exports can be narrowed to a range of customer IDs, a date window, and one
+shard of the book; export_sharded writes every shard in parallel, one file per
+shard. Output formats:
+
+    csv       one row per ledger entry (or per account, for statements)
+    jsonl     one JSON object per entry (or per account, with its entries)
+    columnar  a directory of raw NumPy column files and a manifest.json, read
+              back without copying by read_columnar
+
+Files are written under a temporary name and renamed into place when complete;
+a columnar directory is complete once its manifest.json exists. An export that
+fails part way removes its temporary output and leaves any previous one in place.
+"""
+
+import csv
+import json
+import os
+import shutil
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from banking_system.db.accounts_store import accounts_db, transactions_db
+from banking_system.db.ledger import DEPOSIT, to_micros
+from banking_system.db.storage import MEMORY_URL, AccountStore, create_store, get_store
+from banking_system.events.event_log import get_event_log
+from banking_system.model.end_of_day import compute_end_of_day
+from banking_system.model.money import MINOR_UNITS, Money
+from banking_system.model.parallel import ParallelRunner
+
+LEDGER_FIELDS = ('cust_id', 'txn_id', 'timestamp', 'kind', 'amount', 'currency', 'balance')
+STATEMENT_FIELDS = ('cust_id', 'currency', 'opening', 'deposits', 'withdrawals', 'closing', 'entries')
+
+ACCOUNT_COLUMNS = ('opening', 'closing', 'deposits', 'withdrawals', 'offsets')
+ENTRY_COLUMNS = ('txn_ids', 'timestamps', 'kinds', 'amounts', 'balances')
+COLUMN_DTYPES = {'kinds': 'int8'}
+MANIFEST = 'manifest.json'
+
+_EXTENSIONS = {'csv': '.csv', 'jsonl': '.jsonl', 'columnar': ''}
+_KIND_NAMES = np.array(['deposit', 'withdraw'], dtype=object)
+
+
+class ExportChunk:
+    """
+    One chunk of exported ledgers, restricted to the export's date window.
+
+    Entries are grouped by account in posting order: the entries of cust_ids[i]
+    are rows offsets[i]:offsets[i + 1] of the entry columns.
+    Methods:
+        - statements
+    Attributes:
+        - cust_ids / currencies: one value per account
+        - opening / closing: balance before and after the window (int64 minor units)
+        - deposits / withdrawals: totals posted in the window (minor units, positive)
+        - offsets: int64, len(cust_ids) + 1 row boundaries
+        - txn_ids / timestamps / kinds: one value per entry in the window
+        - amounts: signed minor units (withdrawals negative)
+        - balances: the account's balance after each entry
+    """
+
+    def __init__(self, cust_ids, currencies, opening, closing, deposits, withdrawals,
+                 offsets, txn_ids, timestamps, kinds, amounts, balances):
+        """Initializes the chunk; see the class docstring for the layout."""
+        self.cust_ids = cust_ids
+        self.currencies = currencies
+        self.opening = opening
+        self.closing = closing
+        self.deposits = deposits
+        self.withdrawals = withdrawals
+        self.offsets = offsets
+        self.txn_ids = txn_ids
+        self.timestamps = timestamps
+        self.kinds = kinds
+        self.amounts = amounts
+        self.balances = balances
+
+    def __len__(self):
+        return len(self.cust_ids)
+
+    @property
+    def entries(self):
+        """Returns the number of entries per account."""
+        return np.diff(self.offsets)
+
+    def statements(self):
+        """Yields one statement dict per account, with amounts as Money."""
+        for index, cust_id in enumerate(self.cust_ids):
+            currency = self.currencies[index]
+            rows = slice(self.offsets[index], self.offsets[index + 1])
+            yield {
+                'cust_id': cust_id,
+                'currency': currency,
+                'opening': Money(self.opening[index], currency),
+                'deposits': Money(self.deposits[index], currency),
+                'withdrawals': Money(self.withdrawals[index], currency),
+                'closing': Money(self.closing[index], currency),
+                'entries': [
+                    (txn_id, timestamp, 'deposit' if kind == DEPOSIT else 'withdraw',
+                     Money(abs(amount), currency), Money(balance, currency))
+                    for txn_id, timestamp, kind, amount, balance in zip(
+                        self.txn_ids[rows].tolist(), self.timestamps[rows].tolist(), self.kinds[rows].tolist(),
+                        self.amounts[rows].tolist(), self.balances[rows].tolist(),
+                    )
+                ],
+            }
+
+
+class ExportReport:
+    """
+    Outcome of one export.
+    Attributes:
+        - path: file or directory written
+        - accounts / entries: numbers exported
+        - seconds: wall time of the export
+    """
+
+    def __init__(self, path, accounts=0, entries=0, seconds=0.0):
+        """Initializes the report."""
+        self.path = path
+        self.accounts = accounts
+        self.entries = entries
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f'ExportReport(path={self.path!r}, accounts={self.accounts}, entries={self.entries})'
+
+
+def month_bounds(year, month):
+    """Returns the (start, end) datetimes of a calendar month in local time, for a monthly dump."""
+    return datetime(year, month, 1), datetime(year + month // 12, month % 12 + 1, 1)
+
+
+def cust_id_key(cust_id):
+    """Orders cust_ids numerically where they are numbers ('999' before '1001')."""
+    return (0, int(cust_id)) if cust_id.isdigit() else (1, cust_id)
+
+
+def shard_of(cust_id, shards):
+    """Returns the shard (0 .. shards - 1) a cust_id's ledger is exported in."""
+    if cust_id.isdigit():
+        return int(cust_id) % shards
+    return zlib.crc32(cust_id.encode('utf-8')) % shards
+
+
+class CustIdFilter:
+    """Picklable select(cust_id) callable for iter_ledger_columns: a cust_id range and/or one shard."""
+
+    def __init__(self, first=None, last=None, shard=None):
+        """Initializes the filter; first and last are inclusive, shard is (index, count)."""
+        self.low = None if first is None else cust_id_key(str(first))
+        self.high = None if last is None else cust_id_key(str(last))
+        self.shard = shard
+
+    def __call__(self, cust_id):
+        if self.low is not None or self.high is not None:
+            key = cust_id_key(cust_id)
+            if (self.low is not None and key < self.low) or (self.high is not None and key > self.high):
+                return False
+        return self.shard is None or shard_of(cust_id, self.shard[1]) == self.shard[0]
+
+
+def _selector(first=None, last=None, shard=None):
+    """Returns a select callable for iter_ledger_columns, or None to read every ledger."""
+    if first is None and last is None and shard is None:
+        return None
+    return CustIdFilter(first, last, shard)
+
+
+def window_chunk(columns, start=None, end=None):
+    """Restricts a LedgerColumns chunk to the entries posted in [start, end).
+
+    Args:
+        columns (LedgerColumns): One chunk of ledgers.
+        start (int): Start of the window in epoch microseconds, inclusive.
+        end (int): End of the window in epoch microseconds, exclusive.
+
+    Returns:
+        ExportChunk: The window's entries with running balances, and per-account figures.
+    """
+    figures = compute_end_of_day(columns, start, end)
+    keep = np.ones(len(columns.amounts), dtype=bool)
+    if start is not None:
+        keep &= columns.timestamps >= start
+    if end is not None:
+        keep &= columns.timestamps < end
+    rows = np.flatnonzero(keep)
+
+    offsets = np.zeros(len(columns) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(figures.entries)
+    amounts = columns.amounts[rows]
+    # Running balance: one cumulative sum over the chunk, rebased at each
+    # account's first row onto that account's opening balance.
+    running = np.cumsum(amounts)
+    counts = np.diff(offsets)
+    before = np.concatenate(([0], running))[offsets[:-1]]
+    balances = running + np.repeat(figures.opening - before, counts)
+    txn_ids = columns.txn_ids[rows] if columns.txn_ids is not None else np.zeros(len(rows), dtype=np.int64)
+    return ExportChunk(
+        columns.cust_ids, columns.currencies, figures.opening, figures.closing, figures.deposits,
+        figures.withdrawals, offsets, txn_ids, columns.timestamps[rows], columns.kinds[rows], amounts, balances,
+    )
+
+
+def iter_chunks(store=None, first=None, last=None, start=None, end=None, shard=None, accounts=None):
+    """Yields the store's ledgers as ExportChunks, a bounded number of accounts at a time.
+
+    Args:
+        store (AccountStore): Backend to read; defaults to the one selected by DATABASE_URL.
+        first / last (str): Lowest and highest cust_id to export, inclusive.
+        start / end (datetime | float): Date window (datetimes or epoch seconds),
+            start inclusive and end exclusive.
+        shard (tuple): (index, count) to export only the ledgers in one shard of count.
+        accounts (int): Accounts per chunk; defaults to EXPORT_CHUNK_ACCOUNTS.
+    """
+    if store is None:
+        store = get_store(accounts=accounts_db, transactions=transactions_db)
+    accounts = accounts or _config().EXPORT_CHUNK_ACCOUNTS
+    start = None if start is None else to_micros(start)
+    end = None if end is None else to_micros(end)
+    for columns in store.iter_ledger_columns(accounts, _selector(first, last, shard)):
+        if len(columns):
+            yield window_chunk(columns, start, end)
+
+
+def statement(cust_id, start=None, end=None, store=None):
+    """Returns one account's statement for a date window.
+
+    Returns:
+        dict: cust_id, currency, opening, deposits, withdrawals, closing (Money),
+            and entries as (txn_id, timestamp, kind, amount, balance) tuples.
+
+    Raises:
+        KeyError: If the account has no ledger.
+    """
+    for chunk in iter_chunks(store, first=cust_id, last=cust_id, start=start, end=end):
+        for row in chunk.statements():
+            if row['cust_id'] == cust_id:
+                return row
+    raise KeyError(cust_id)
+
+
+def _decimals(minor, currencies, counts=None):
+    """Formats minor units as decimal strings, each in its account's currency.
+
+    With counts, `minor` holds entry values and currencies[i] applies to the next
+    counts[i] of them; otherwise there is one currency per value.
+    """
+    minor = np.asarray(minor)
+    codes = np.array(currencies, dtype=object)
+    if counts is not None:
+        codes = np.repeat(codes, counts)
+    text = np.empty(len(minor), dtype=object)
+    for currency in set(currencies):
+        rows = np.flatnonzero(codes == currency)
+        places = MINOR_UNITS[currency]
+        values = minor[rows]
+        sign = np.where(values < 0, '-', '')
+        whole, fraction = np.divmod(np.abs(values), 10 ** places)
+        if places:
+            text[rows] = [f'{s}{w}.{f:0{places}d}' for s, w, f in zip(sign.tolist(), whole.tolist(), fraction.tolist())]
+        else:
+            text[rows] = [f'{s}{w}' for s, w in zip(sign.tolist(), whole.tolist())]
+    return text.tolist()
+
+
+def _iso_timestamps(timestamps):
+    """Formats epoch microseconds as ISO 8601 UTC strings."""
+    return np.datetime_as_string(timestamps.astype('datetime64[us]'), unit='us', timezone='UTC').tolist()
+
+
+def _entry_rows(chunk):
+    """Returns the chunk's entries as tuples of LEDGER_FIELDS strings and numbers."""
+    counts = chunk.entries
+    return zip(
+        np.repeat(np.array(chunk.cust_ids, dtype=object), counts).tolist(),
+        chunk.txn_ids.tolist(),
+        _iso_timestamps(chunk.timestamps),
+        _KIND_NAMES[(chunk.kinds != DEPOSIT).astype(np.int8)].tolist(),
+        _decimals(np.abs(chunk.amounts), chunk.currencies, counts),
+        np.repeat(np.array(chunk.currencies, dtype=object), counts).tolist(),
+        _decimals(chunk.balances, chunk.currencies, counts),
+    )
+
+
+def _statement_rows(chunk):
+    """Returns the chunk's accounts as tuples of STATEMENT_FIELDS."""
+    return zip(
+        chunk.cust_ids, chunk.currencies, _decimals(chunk.opening, chunk.currencies),
+        _decimals(chunk.deposits, chunk.currencies), _decimals(chunk.withdrawals, chunk.currencies),
+        _decimals(chunk.closing, chunk.currencies), chunk.entries.tolist(),
+    )
+
+
+class _CsvWriter:
+    """Writes ledger entries or statements as CSV."""
+
+    def __init__(self, path, statements):
+        self.handle = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.handle)
+        self.statements = statements
+        self.writer.writerow(STATEMENT_FIELDS if statements else LEDGER_FIELDS)
+
+    def write(self, chunk):
+        self.writer.writerows(_statement_rows(chunk) if self.statements else _entry_rows(chunk))
+
+    def close(self):
+        self.handle.close()
+
+    def finish(self):
+        self.close()
+
+
+class _JsonlWriter:
+    """Writes ledger entries, or statements with their entries nested, as JSON Lines."""
+
+    def __init__(self, path, statements):
+        self.handle = open(path, 'w', encoding='utf-8')
+        self.statements = statements
+
+    def write(self, chunk):
+        entries = [dict(zip(LEDGER_FIELDS, row)) for row in _entry_rows(chunk)]
+        if not self.statements:
+            self.handle.writelines(json.dumps(entry) + '\n' for entry in entries)
+            return
+        counts = chunk.entries.tolist()
+        position = 0
+        for row, count in zip(_statement_rows(chunk), counts):
+            record = dict(zip(STATEMENT_FIELDS, row))
+            record['transactions'] = [
+                {field: entry[field] for field in ('txn_id', 'timestamp', 'kind', 'amount', 'balance')}
+                for entry in entries[position:position + count]
+            ]
+            position += count
+            self.handle.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.handle.close()
+
+    def finish(self):
+        self.close()
+
+
+class _ColumnarWriter:
+    """Appends each chunk's columns to raw NumPy column files in a directory."""
+
+    def __init__(self, path, statements):
+        os.makedirs(path)
+        self.path = path
+        self.accounts = 0
+        self.entries = 0
+        self.files = {
+            name: open(os.path.join(path, name + '.bin'), 'wb') for name in ACCOUNT_COLUMNS + ENTRY_COLUMNS
+        }
+        self.text = {name: open(os.path.join(path, name + '.txt'), 'w', encoding='utf-8')
+                     for name in ('cust_ids', 'currencies')}
+        self.files['offsets'].write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def write(self, chunk):
+        for name in ('cust_ids', 'currencies'):
+            self.text[name].writelines(value + '\n' for value in getattr(chunk, name))
+        for name in ACCOUNT_COLUMNS[:-1] + ENTRY_COLUMNS:
+            self.files[name].write(getattr(chunk, name).astype(COLUMN_DTYPES.get(name, 'int64')).tobytes())
+        self.files['offsets'].write((chunk.offsets[1:] + self.entries).astype(np.int64).tobytes())
+        self.accounts += len(chunk)
+        self.entries += int(chunk.offsets[-1])
+
+    def close(self):
+        for handle in list(self.files.values()) + list(self.text.values()):
+            handle.close()
+
+    def finish(self):
+        """Closes the column files and writes the manifest that marks the export complete."""
+        self.close()
+        manifest = {
+            'accounts': self.accounts,
+            'entries': self.entries,
+            'columns': {name: COLUMN_DTYPES.get(name, 'int64') for name in ACCOUNT_COLUMNS + ENTRY_COLUMNS},
+        }
+        with open(os.path.join(self.path, MANIFEST), 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle)
+
+
+_WRITERS = {'csv': _CsvWriter, 'jsonl': _JsonlWriter, 'columnar': _ColumnarWriter}
+
+
+def read_columnar(path):
+    """Opens a columnar export; the numeric columns are memory-mapped, not read.
+
+    Returns:
+        ExportChunk: Every exported account and entry.
+
+    Raises:
+        FileNotFoundError: If the directory has no manifest, i.e. the export did not complete.
+    """
+    with open(os.path.join(path, MANIFEST), encoding='utf-8') as handle:
+        manifest = json.load(handle)
+    columns = {}
+    for name, dtype in manifest['columns'].items():
+        length = manifest['accounts'] + 1 if name == 'offsets' else None
+        if os.path.getsize(os.path.join(path, name + '.bin')) == 0:
+            columns[name] = np.zeros(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(os.path.join(path, name + '.bin'), dtype=dtype, mode='r', shape=length)
+    text = {}
+    for name in ('cust_ids', 'currencies'):
+        with open(os.path.join(path, name + '.txt'), encoding='utf-8') as handle:
+            text[name] = handle.read().splitlines()
+    return ExportChunk(text['cust_ids'], text['currencies'], **columns)
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
+
+
+def _remove(path):
+    """Deletes a file or directory tree, if it exists."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _export(store, path, format, statements, filters):
+    """Writes every chunk matching filters to path through the format's writer."""
+    if format is None:
+        format = 'jsonl' if str(path).endswith(('.jsonl', '.ndjson')) else 'csv'
+    if format not in _WRITERS:
+        raise ValueError(f"Unknown export format {format!r}; use 'csv', 'jsonl', or 'columnar'")
+    begin = time.perf_counter()
+    path = str(path)
+    partial = path + '.partial'
+    _remove(partial)
+    writer = _WRITERS[format](partial, statements)
+    report = ExportReport(path)
+    try:
+        for chunk in iter_chunks(store, **filters):
+            writer.write(chunk)
+            report.accounts += len(chunk)
+            report.entries += int(chunk.offsets[-1])
+    except BaseException:
+        writer.close()
+        _remove(partial)
+        raise
+    writer.finish()
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(partial, path)
+    report.seconds = time.perf_counter() - begin
+    get_event_log().info(
+        'export.completed', path=path, accounts=report.accounts, entries=report.entries, seconds=report.seconds,
+    )
+    return report
+
+
+def export_ledger(path, store=None, format=None, **filters):
+    """Writes every ledger entry matching the filters to path, one chunk of accounts at a time.
+
+    Args:
+        path (str): File to write (a directory for the columnar format).
+        store (AccountStore): Backend to read; defaults to the one selected by DATABASE_URL.
+        format (str): 'csv', 'jsonl', or 'columnar'; by default taken from the extension (csv otherwise).
+        **filters: first, last, start, end, shard, and accounts, as for iter_chunks.
+
+    Returns:
+        ExportReport: Numbers of accounts and entries written.
+
+    Raises:
+        ValueError: If the format is not supported.
+
+    Examples:
+        >>> start, end = month_bounds(2026, 9)
+        >>> export_ledger('/exports/ledger-2026-09.csv', start=start, end=end)
+        ExportReport(path='/exports/ledger-2026-09.csv', accounts=2, entries=17)
+    """
+    return _export(store, path, format, False, filters)
+
+
+def export_statements(path, store=None, format=None, **filters):
+    """Writes one statement per account matching the filters to path.
+
+    A CSV statement is one summary row per account (opening, deposits,
+    withdrawals, closing, entries); a JSON Lines statement also carries the
+    account's transactions with the balance after each.
+
+    Args and Returns are as for export_ledger.
+    """
+    return _export(store, path, format, True, filters)
+
+
+def _export_shard(url, path, format, statements, filters):
+    """Process-pool entry point: exports one shard from a store opened on url."""
+    store = create_store(url)
+    try:
+        return _export(store, path, format, statements, filters)
+    finally:
+        close = getattr(store, 'close', None)
+        if close is not None:
+            close()
+
+
+class _ColumnsView(AccountStore):
+    """Read-only store over one LedgerColumns, so _export can read a shared book like any backend."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def ledger_columns(self):
+        return self.columns
+
+
+def _export_columns(columns, path, format, statements, filters):
+    """ParallelRunner entry point: exports one shard of a book shared by the parent."""
+    return _export(_ColumnsView(columns), path, format, statements, filters)
+
+
+def export_sharded(directory, shards, store=None, url=None, format='csv', statements=False, workers=None, **filters):
+    """Exports the book as `shards` files written in parallel, one per shard of cust_ids.
+
+    Given a database URL (other than memory://) each shard is exported by a
+    separate process with its own connection. Otherwise `store` is read once
+    and shared with worker processes (model/parallel.py), each of which
+    exports one shard of it; this holds the whole book in memory, as an
+    in-memory store does anyway.
+
+    Args:
+        directory (str): Directory for the shard files, named part-00000.csv and so on.
+        shards (int): Number of shards.
+        store (AccountStore): Backend to read when url is not given.
+        url (str): Database URL each worker process opens.
+        format (str): 'csv', 'jsonl', or 'columnar'.
+        statements (bool): Export statements rather than ledger entries.
+        workers (int): Parallel workers; defaults to shards.
+        **filters: first, last, start, end, and accounts, as for iter_chunks.
+
+    Returns:
+        list: One ExportReport per shard, in shard order.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = [os.path.join(directory, f'part-{index:05d}{_EXTENSIONS.get(format, "")}') for index in range(shards)]
+    workers = workers or shards
+    if url and url != MEMORY_URL:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(_export_shard, url, path, format, statements, dict(filters, shard=(index, shards)))
+                for index, path in enumerate(paths)
+            ]
+            return [future.result() for future in futures]
+    if store is None:
+        store = get_store(accounts=accounts_db, transactions=transactions_db)
+    columns = store.ledger_columns()
+    tasks = [
+        (0, len(columns), (path, format, statements, dict(filters, shard=(index, shards))))
+        for index, path in enumerate(paths)
+    ]
+    with ParallelRunner(workers) as runner:
+        return runner.map_columns(_export_columns, columns, tasks)
@@ -0,0 +1,605 @@
+"""
+model/loans.py
+
+Loans, their amortization schedules, and repayment collection, for a whole book
+of loans at a time.
+
+A LoanBook keeps every loan as columns (borrower, principal, monthly rate,
+installments, first due month, level payment, ...), so building schedules or
+repricing a million loans after a rate change takes a few whole-array NumPy
+operations rather than a Python loop per loan. A level-payment loan's balance
+after k installments has a closed form,
+
+    B(k) = P * g**k - payment * (g**k - 1) / r,    g = 1 + r (the monthly rate)
+
+so the balance after every installment of every loan is computed at once and
+rounded to minor units. Each installment's principal is the fall in balance
+and its interest the rest of the payment, within a minor unit of the exact
+interest on the balance before it; the last installment is sized to clear the
+balance exactly. Rounding never accumulates from one installment to the next,
+as it does when each interest charge is rounded in turn.
+
+A loan's full AmortizationSchedule is built on first use and cached (see
+LOAN_SCHEDULE_CACHE); balance and payoff queries for a date find the
+installment with a binary search over its due dates. collect() bills the
+installments that have fallen due and debits them from the borrowers' accounts
+in one AccountTransactions.apply_batch call. A debit the overdraft policy
+refuses stays owed and is tried again at the next collection.
+"""
+
+import os
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+from banking_system.db.accounts_store import transactions_db
+from banking_system.db.storage import get_store
+from banking_system.events.event_log import get_event_log
+from banking_system.model.money import Money, minor_unit_scale, to_minor_units
+from banking_system.model.transactions import AccountTransactions
+
+
+def _due_dates(months, due_day):
+    """Returns the dates (datetime64[D]) in months (datetime64[M]) falling on due_day, or the month end if it is shorter."""
+    starts = months.astype('datetime64[D]')
+    lengths = ((months + 1).astype('datetime64[D]') - starts).astype(np.int64)
+    return starts + (np.minimum(due_day, lengths) - 1)
+
+
+def level_payment(principal, rate, installments):
+    """Returns the level payment that repays each loan, rounded to a minor unit.
+
+    Args:
+        principal (ndarray): Amounts borrowed, in minor units.
+        rate (ndarray): Interest rate per installment period (monthly).
+        installments (ndarray): Number of installments.
+
+    Returns:
+        ndarray: int64 payments in minor units.
+    """
+    principal = np.asarray(principal, dtype=np.float64)
+    rate = np.asarray(rate, dtype=np.float64)
+    installments = np.asarray(installments, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment = np.where(rate > 0, principal * rate / -np.expm1(-installments * np.log1p(rate)), principal / installments)
+    return np.rint(payment).astype(np.int64)
+
+
+def scheduled_balances(principal, rate, payment, installments, paid):
+    """Returns each loan's balance after `paid` installments, in minor units.
+
+    Args:
+        principal (ndarray): Amounts borrowed, in minor units.
+        rate (ndarray): Interest rate per installment period.
+        payment (ndarray): Level payments, in minor units.
+        installments (ndarray): Number of installments; the balance after the last is 0.
+        paid (ndarray): Installments paid.
+
+    Returns:
+        ndarray: int64 balances.
+    """
+    rate = np.asarray(rate, dtype=np.float64)
+    paid = np.asarray(paid, dtype=np.float64)
+    compounding = paid * np.log1p(rate)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(rate > 0, np.expm1(compounding) / rate, paid)
+    balance = np.rint(np.asarray(principal) * np.exp(compounding) - np.asarray(payment) * annuity).astype(np.int64)
+    return np.where(paid >= installments, 0, np.maximum(balance, 0))
+
+
+class AmortizationSchedule:
+    """
+    Every installment of one loan, from its start (or last repricing) to payoff.
+    Methods:
+        - installment
+        - balance_at
+        - payoff
+    Attributes:
+        - opening: balance before the first installment (minor units)
+        - start: date interest starts accruing toward the first installment
+        - rate: interest rate per installment period
+        - currency
+        - due: due date of each installment (datetime64[D])
+        - payment / interest / principal / balance: per installment, in minor
+          units; balance is what is left after the installment
+    """
+
+    def __init__(self, opening, start, rate, currency, due, payment, interest, principal, balance):
+        """Initializes the schedule from per-installment arrays."""
+        self.opening = int(opening)
+        self.start = np.datetime64(start, 'D')
+        self.rate = float(rate)
+        self.currency = currency
+        self.due = due
+        self.payment = payment
+        self.interest = interest
+        self.principal = principal
+        self.balance = balance
+
+    def __len__(self):
+        return len(self.due)
+
+    def installment(self, day):
+        """Returns the number of installments due on or before day (a binary search over the due dates)."""
+        return int(np.searchsorted(self.due, np.datetime64(day, 'D'), side='right'))
+
+    def _balance_after(self, paid):
+        return self.opening if paid == 0 else int(self.balance[paid - 1])
+
+    def balance_at(self, day):
+        """Returns the principal outstanding at the end of day, if every installment due by then was paid."""
+        return Money(self._balance_after(self.installment(day)), self.currency)
+
+    def payoff(self, day):
+        """Returns the amount that repays the loan on day: the balance plus interest accrued since the last installment.
+
+        Interest for a period accrues in proportion to the days elapsed in it.
+        """
+        paid = self.installment(day)
+        balance = self._balance_after(paid)
+        if paid == len(self):
+            return Money(0, self.currency)
+        since = self.start if paid == 0 else self.due[paid - 1]
+        elapsed = (np.datetime64(day, 'D') - since).astype(np.int64)
+        period = (self.due[paid] - since).astype(np.int64)
+        accrued = int(round(balance * self.rate * max(elapsed, 0) / period)) if period > 0 else 0
+        return Money(balance + accrued, self.currency)
+
+
+class Loan:
+    """
+    One loan of a LoanBook, as it stood when it was read.
+    Methods:
+        - schedule
+        - balance_at
+        - payoff
+    Attributes:
+        - loan_id / cust_id / currency
+        - principal: balance the current schedule starts from (Money)
+        - annual_rate
+        - installments: installments left in the current schedule
+        - start / first_due: dates the current schedule runs from
+        - payment: level installment (Money)
+        - owed: installments billed and not yet collected (Money)
+    """
+
+    __slots__ = ('book', 'loan_id', 'cust_id', 'currency', 'principal', 'annual_rate', 'installments', 'start', 'first_due', 'payment', 'owed')
+
+    def __init__(self, book, loan_id):
+        """Initializes the loan from row loan_id of book."""
+        self.book = book
+        self.loan_id = loan_id
+        self.cust_id = book._cust_ids[loan_id]
+        self.currency = book._currencies[loan_id]
+        self.principal = Money(book._principal[loan_id], self.currency)
+        self.annual_rate = float(book._rate[loan_id]) * 12
+        self.installments = int(book._installments[loan_id])
+        self.start = book._start[loan_id].item()
+        self.first_due = _due_dates(book._first_month[loan_id], book._due_day[loan_id]).item()
+        self.payment = Money(book._payment[loan_id], self.currency)
+        self.owed = Money(book._owed[loan_id], self.currency)
+
+    def __repr__(self):
+        return f'Loan({self.loan_id}, {self.cust_id!r}, {self.principal!r}, {self.annual_rate:.4%}, {self.installments} installments)'
+
+    def schedule(self):
+        """Returns the loan's AmortizationSchedule (cached by the book)."""
+        return self.book.schedule(self.loan_id)
+
+    def balance_at(self, day):
+        """Returns the scheduled principal outstanding at the end of day."""
+        return self.book.balance_at(self.loan_id, day)
+
+    def payoff(self, day):
+        """Returns the amount that repays the loan on day, including installments owed."""
+        return self.book.payoff(self.loan_id, day)
+
+
+class CollectionResult:
+    """
+    Outcome of LoanBook.collect.
+    Attributes:
+        - loan_ids: loans that had installments owed (int64 array)
+        - amounts: amount debited or attempted for each, in minor units
+        - batch: the BatchResult of the debits, in loan_ids order
+    Methods:
+        - collected / missed
+    """
+
+    def __init__(self, loan_ids, amounts, batch):
+        """Initializes the result from the loans billed and their debits."""
+        self.loan_ids = loan_ids
+        self.amounts = amounts
+        self.batch = batch
+
+    def __len__(self):
+        return len(self.loan_ids)
+
+    @property
+    def collected(self):
+        """Returns the number of loans whose installments were debited."""
+        return self.batch.applied
+
+    def missed(self):
+        """Returns (loan_id, reason) for every loan whose debit was refused."""
+        return [(int(self.loan_ids[index]), reason) for index, _, reason in self.batch.rejected]
+
+
+class LoanBook:
+    """
+    Every loan, held as columns, with cached amortization schedules.
+    Methods:
+        - add / add_many
+        - loan / loans_for
+        - schedule / schedules
+        - balance_at / balances_at / payoff
+        - reprice
+        - collect
+        - save / load
+    Attributes:
+        - store: AccountStore holding the borrowers' accounts
+    """
+
+    def __init__(self, store=None, cache_size=None):
+        """Initializes an empty book.
+
+        Args:
+            store (AccountStore): Optional storage backend. Defaults to the one
+                selected by DATABASE_URL (the in-memory transactions_db if unset).
+            cache_size (int): Schedules kept built; defaults to LOAN_SCHEDULE_CACHE.
+        """
+        self.store = get_store(transactions=transactions_db) if store is None else store
+        self.cache_size = _config().LOAN_SCHEDULE_CACHE if cache_size is None else cache_size
+        self._schedules = OrderedDict()
+        self._by_customer = {}
+        self._cust_ids = []
+        self._currencies = []
+        self._scales = np.zeros(0, dtype=np.int64)
+        self._principal = np.zeros(0, dtype=np.int64)
+        self._rate = np.zeros(0)
+        self._installments = np.zeros(0, dtype=np.int64)
+        self._start = np.zeros(0, dtype='datetime64[D]')
+        self._first_month = np.zeros(0, dtype='datetime64[M]')
+        self._due_day = np.zeros(0, dtype=np.int64)
+        self._payment = np.zeros(0, dtype=np.int64)
+        self._billed = np.zeros(0, dtype=np.int64)
+        self._owed = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._cust_ids)
+
+    def add(self, cust_id, principal, annual_rate, installments, start, first_due=None):
+        """Adds one loan and returns its loan_id.
+
+        Args:
+            cust_id (str): Borrower; repayments are debited from this account.
+            principal (float | Money): Amount borrowed, in the account currency.
+            annual_rate (float): Nominal annual interest rate, e.g. 0.065;
+                interest compounds monthly at a twelfth of it.
+            installments (int): Number of monthly installments.
+            start (date): Day the loan is drawn and interest starts.
+            first_due (date): First installment date; defaults to a month after
+                start. Later installments fall on the same day of each month.
+
+        Raises:
+            ValueError: If the customer ID is not found, or an amount, rate,
+                term, or date is invalid.
+        """
+        return int(self.add_many([(cust_id, principal, annual_rate, installments, start, first_due)])[0])
+
+    def add_many(self, loans):
+        """Adds many loans at once; the bulk form of add.
+
+        Args:
+            loans (iterable): (cust_id, principal, annual_rate, installments, start)
+                tuples, optionally with first_due as a sixth item.
+
+        Returns:
+            ndarray: The new loan_ids, in input order.
+
+        Raises:
+            ValueError: If any loan is invalid; none are added then.
+        """
+        loans = [tuple(loan) + (None,) * (6 - len(loan)) for loan in loans]
+        if not loans:
+            return np.zeros(0, dtype=np.int64)
+        cust_ids, amounts, rates, installments, starts, first_dues = map(list, zip(*loans))
+        # One store lookup per distinct borrower.
+        borrowers = list(dict.fromkeys(cust_ids))
+        currencies = list(map(dict(zip(borrowers, self.store.get_currencies(borrowers))).__getitem__, cust_ids))
+        for cust_id, currency in zip(cust_ids, currencies):
+            if currency is None:
+                raise ValueError(f'Customer ID {cust_id} not found')
+        principal = _principal_minor_units(amounts, currencies)
+        rates = np.array(rates, dtype=np.float64) / 12
+        installments = np.array(installments, dtype=np.int64)
+        defaults = np.fromiter((first_due is None for first_due in first_dues), dtype=bool, count=len(loans))
+        starts = _days(starts)
+        # Installments fall on the first due date's day of the month, by default
+        # the start's, so a loan drawn on the 31st is due at each month end.
+        anchors = starts if defaults.all() else _days([start if day is None else day for day, start in zip(first_dues, starts.tolist())])
+        due_days = (anchors - anchors.astype('datetime64[M]')).astype(np.int64) + 1
+        first_dues = _due_dates(anchors.astype('datetime64[M]') + defaults, due_days)
+        if (principal <= 0).any():
+            raise ValueError('Loan principal must be positive')
+        if not (rates >= 0).all():
+            raise ValueError('Loan interest rates must not be negative')
+        if (installments < 1).any():
+            raise ValueError('Loans need at least one installment')
+        if (first_dues <= starts).any():
+            raise ValueError('The first installment must fall after the loan starts')
+
+        first = len(self)
+        loan_ids = np.arange(first, first + len(loans))
+        for loan_id, cust_id in zip(loan_ids.tolist(), cust_ids):
+            self._by_customer.setdefault(cust_id, []).append(loan_id)
+        self._cust_ids.extend(cust_ids)
+        self._currencies.extend(currencies)
+        columns = {
+            '_scales': list(map({currency: minor_unit_scale(currency) for currency in set(currencies)}.__getitem__, currencies)),
+            '_principal': principal,
+            '_rate': rates,
+            '_installments': installments,
+            '_start': starts,
+            '_first_month': first_dues.astype('datetime64[M]'),
+            '_due_day': due_days,
+            '_payment': level_payment(principal, rates, installments),
+            '_billed': np.zeros(len(loans), dtype=np.int64),
+            '_owed': np.zeros(len(loans), dtype=np.int64),
+        }
+        for name, values in columns.items():
+            current = getattr(self, name)
+            setattr(self, name, np.concatenate((current, np.asarray(values, dtype=current.dtype))))
+        return loan_ids
+
+    def loan(self, loan_id):
+        """Returns loan_id as a Loan.
+
+        Raises:
+            KeyError: If there is no such loan.
+        """
+        if not 0 <= loan_id < len(self):
+            raise KeyError(loan_id)
+        return Loan(self, loan_id)
+
+    def loans_for(self, cust_id):
+        """Returns every Loan borrowed by cust_id."""
+        return [Loan(self, loan_id) for loan_id in self._by_customer.get(cust_id, ())]
+
+    def schedule(self, loan_id):
+        """Returns the AmortizationSchedule of one loan, building it if it is not cached."""
+        schedule = self._schedules.get(loan_id)
+        if schedule is None:
+            return self.schedules([loan_id])[0]
+        self._schedules.move_to_end(loan_id)
+        return schedule
+
+    def schedules(self, loan_ids):
+        """Returns the AmortizationSchedule of each loan in loan_ids.
+
+        The ones not cached are built together, in one pass over their installments.
+        """
+        loan_ids = [int(loan_id) for loan_id in loan_ids]
+        for loan_id in loan_ids:
+            if not 0 <= loan_id < len(self):
+                raise KeyError(loan_id)
+        cache = self._schedules
+        missing = [loan_id for loan_id in dict.fromkeys(loan_ids) if loan_id not in cache]
+        built = dict(zip(missing, self._build(np.array(missing, dtype=np.int64)))) if missing else {}
+        found = []
+        for loan_id in loan_ids:
+            schedule = built[loan_id] if loan_id in built else cache.get(loan_id)
+            if schedule is None:  # built above but already pushed out of the cache
+                schedule = self._build(np.array([loan_id]))[0]
+            found.append(schedule)
+            cache[loan_id] = schedule
+            cache.move_to_end(loan_id)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return found
+
+    def _build(self, rows):
+        """Builds the schedules of rows, every installment at once."""
+        installments = self._installments[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(installments)
+        owner = np.repeat(np.arange(len(rows)), installments)
+        number = np.arange(offsets[-1]) - offsets[:-1][owner] + 1
+        rate = self._rate[rows][owner]
+        balance = scheduled_balances(
+            self._principal[rows][owner], rate, self._payment[rows][owner], installments[owner], number,
+        )
+        previous = np.empty_like(balance)
+        previous[1:] = balance[:-1]
+        previous[offsets[:-1][installments > 0]] = self._principal[rows][installments > 0]
+        payment = self._payment[rows][owner]
+        last = number == installments[owner]
+        payment[last] = previous[last] + np.rint(previous[last] * rate[last]).astype(np.int64)
+        principal = previous - balance
+        due = _due_dates(self._first_month[rows][owner] + (number - 1), self._due_day[rows][owner])
+        return [
+            AmortizationSchedule(
+                self._principal[row], self._start[row], self._rate[row], self._currencies[row],
+                due[low:high], payment[low:high], payment[low:high] - principal[low:high], principal[low:high], balance[low:high],
+            )
+            for row, low, high in zip(rows.tolist(), offsets[:-1].tolist(), offsets[1:].tolist())
+        ]
+
+    def _installments_due(self, day, rows):
+        """Returns how many installments of each row fall due on or before day."""
+        day = np.datetime64(day, 'D')
+        month = day.astype('datetime64[M]')
+        elapsed = (month - self._first_month[rows]).astype(np.int64)
+        this_month = _due_dates(np.full(len(rows), month), self._due_day[rows]) <= day
+        return np.clip(elapsed + this_month, 0, self._installments[rows])
+
+    def balance_at(self, loan_id, day):
+        """Returns the scheduled principal outstanding on loan_id at the end of day."""
+        return self.schedule(loan_id).balance_at(day)
+
+    def balances_at(self, day):
+        """Returns the scheduled principal outstanding on every loan at the end of day (int64 minor units, by loan_id)."""
+        rows = np.arange(len(self))
+        return scheduled_balances(
+            self._principal, self._rate, self._payment, self._installments, self._installments_due(day, rows),
+        )
+
+    def payoff(self, loan_id, day):
+        """Returns the amount that repays loan_id on day: the scheduled payoff plus installments billed and not collected."""
+        return self.schedule(loan_id).payoff(day) + Money(self._owed[loan_id], self._currencies[loan_id])
+
+    def _bill(self, day, rows):
+        """Adds the installments of rows that fell due by day, and were not billed yet, to what each owes."""
+        due = self._installments_due(day, rows)
+        fresh = due > self._billed[rows]
+        rows, due = rows[fresh], due[fresh]
+        amounts = (due - self._billed[rows]) * self._payment[rows]
+        final = rows[due == self._installments[rows]]
+        if len(final):
+            before = scheduled_balances(
+                self._principal[final], self._rate[final], self._payment[final], self._installments[final], self._installments[final] - 1,
+            )
+            last = before + np.rint(before * self._rate[final]).astype(np.int64)
+            amounts[due == self._installments[rows]] += last - self._payment[final]
+        self._owed[rows] += amounts
+        self._billed[rows] = due
+
+    def reprice(self, annual_rate, effective, loan_ids=None):
+        """Changes the interest rate of loans from a date and re-amortizes what is left.
+
+        Installments due before `effective` are billed at the old rate; the
+        balance after them is spread over the remaining installments at the new
+        rate, and the schedules start again from the last of them.
+
+        Args:
+            annual_rate (float | ndarray): New nominal annual rate, one for all or one per loan.
+            effective (date): First day of the new rate.
+            loan_ids (iterable): Loans to reprice; defaults to every loan.
+
+        Returns:
+            int: The number of loans repriced (loans already repaid are skipped).
+
+        Raises:
+            ValueError: If a rate is negative, `effective` is before a loan's
+                current schedule starts, or installments from `effective` on are
+                already billed.
+        """
+        rows = np.arange(len(self)) if loan_ids is None else np.asarray(list(loan_ids), dtype=np.int64)
+        rates = np.broadcast_to(np.asarray(annual_rate, dtype=np.float64) / 12, rows.shape)
+        if not (rates >= 0).all():
+            raise ValueError('Loan interest rates must not be negative')
+        for loan_id in rows[(rows < 0) | (rows >= len(self))].tolist():
+            raise KeyError(loan_id)
+        if len(np.unique(rows)) != len(rows):
+            raise ValueError('Each loan can be repriced only once per call')
+        before = np.datetime64(effective, 'D') - 1
+        if (self._start[rows] > before + 1).any():
+            raise ValueError(f'Loans cannot be repriced from {effective}, before their current schedule starts')
+        paid = self._installments_due(before, rows)
+        if (self._billed[rows] > paid).any():
+            raise ValueError(f'Installments due from {effective} on are already billed')
+        self._bill(before, rows)
+
+        live = paid < self._installments[rows]
+        rows, paid, rates = rows[live], paid[live], rates[live]
+        moved = paid > 0
+        last_due = _due_dates(self._first_month[rows] + (paid - 1), self._due_day[rows])
+        self._start[rows] = np.where(moved, last_due, self._start[rows])
+        self._principal[rows] = scheduled_balances(
+            self._principal[rows], self._rate[rows], self._payment[rows], self._installments[rows], paid,
+        )
+        self._first_month[rows] += paid
+        self._installments[rows] -= paid
+        self._billed[rows] = 0
+        self._rate[rows] = rates
+        self._payment[rows] = level_payment(self._principal[rows], rates, self._installments[rows])
+        for loan_id in rows.tolist():
+            self._schedules.pop(loan_id, None)
+        get_event_log().info('loan.repriced', loans=len(rows), effective=np.datetime_as_string(before + 1))
+        return len(rows)
+
+    def collect(self, day, policy=None):
+        """Debits every installment due on or before day that has not been collected yet.
+
+        Each loan's owed installments are debited from its borrower's account as
+        one withdrawal, all in one AccountTransactions.apply_batch call, so
+        they are checked against the overdraft policy like any customer debit.
+        Refused debits stay owed and are retried by the next collection.
+
+        Args:
+            day (date): Collection date.
+            policy (OverdraftPolicy): Optional withdrawal rules; defaults to the
+                process-wide policy.
+
+        Returns:
+            CollectionResult: The loans debited and the batch outcome.
+        """
+        self._bill(day, np.arange(len(self)))
+        rows = np.flatnonzero(self._owed > 0)
+        amounts = self._owed[rows].copy()
+        # Money built from the integer minor units, so no float reaches the
+        # batch and each debit is posted in the loan's currency exactly.
+        rows_list = rows.tolist()
+        records = list(zip(
+            [self._cust_ids[row] for row in rows_list],
+            ['withdraw'] * len(rows),
+            map(Money, amounts.tolist(), [self._currencies[row] for row in rows_list]),
+        ))
+        batch = AccountTransactions.apply_batch(records, store=self.store, policy=policy)
+        collected = np.array([error is None for error in batch.errors], dtype=bool)
+        self._owed[rows[collected]] = 0
+        get_event_log().info('loan.collected', day=str(day), collected=int(collected.sum()), missed=int((~collected).sum()))
+        return CollectionResult(rows, amounts, batch)
+
+    def save(self, path):
+        """Writes the book to path (an .npz file) for a later process to load."""
+        partial = str(path) + '.partial'
+        with open(partial, 'wb') as handle:
+            np.savez(
+                handle,
+                cust_ids=np.array(self._cust_ids, dtype=str),
+                currencies=np.array(self._currencies, dtype=str),
+                **{name.lstrip('_'): getattr(self, name) for name in _COLUMNS},
+            )
+        os.replace(partial, path)
+
+    def load(self, path):
+        """Replaces the book with the one saved at path."""
+        with np.load(path) as saved:
+            self._cust_ids = saved['cust_ids'].tolist()
+            self._currencies = saved['currencies'].tolist()
+            for name in _COLUMNS:
+                setattr(self, name, saved[name.lstrip('_')].copy())
+        self._by_customer = {}
+        for loan_id, cust_id in enumerate(self._cust_ids):
+            self._by_customer.setdefault(cust_id, []).append(loan_id)
+        self._schedules.clear()
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_COLUMNS = (
+    '_scales', '_principal', '_rate', '_installments', '_start', '_first_month', '_due_day', '_payment', '_billed', '_owed',
+)
+
+
+def _days(dates):
+    """Converts a list of dates to a datetime64[D] array."""
+    ordinals = np.fromiter(map(date.toordinal, dates), dtype=np.int64, count=len(dates))
+    return (ordinals - _EPOCH_ORDINAL).astype('datetime64[D]')
+
+
+def _principal_minor_units(amounts, currencies):
+    """Converts loan amounts to minor units of each account currency, in one call when they allow it."""
+    if len(set(currencies)) == 1 and set(map(type, amounts)) <= {int, float}:
+        try:
+            return to_minor_units(amounts, currencies[0])
+        except ValueError:
+            pass  # a NaN/inf somewhere; Money.of reports it
+    return np.array([Money.of(amount, currency).minor for amount, currency in zip(amounts, currencies)], dtype=np.int64)
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
@@ -0,0 +1,238 @@
+"""
+model/money.py
+
+Fixed-point money type.
+
+Amounts are held as an integer count of minor units (cents for USD) plus an ISO
+currency code, so balances never drift the way repeated float additions do, and
+summing or storing them is plain int64 arithmetic. Money compares equal to the
+plain numbers callers already pass around (Money.of(75) == 75.00), and batch
+paths can convert whole columns with to_minor_units / sum_minor_units.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from numbers import Integral, Number
+
+import numpy as np
+
+DEFAULT_CURRENCY = 'USD'
+
+# Digits after the decimal point for each supported currency.
+MINOR_UNITS = {
+    'USD': 2,
+    'EUR': 2,
+    'GBP': 2,
+    'CAD': 2,
+    'JPY': 0,
+    'BHD': 3,
+    'KWD': 3,
+}
+
+CURRENCY_SYMBOLS = {'USD': '$', 'EUR': '€', 'GBP': '£', 'CAD': 'CA$', 'JPY': '¥'}
+
+# How close to a half minor unit a scaled float must be for to_minor_units to
+# settle it through Money.of; float error at banking magnitudes is far smaller.
+_TIE_TOLERANCE = 1e-6
+
+
+def minor_unit_scale(currency):
+    """Returns the number of minor units in one major unit (100 for USD)."""
+    try:
+        return 10 ** MINOR_UNITS[currency]
+    except KeyError:
+        raise ValueError(f'Unsupported currency: {currency}') from None
+
+
+class Money:
+    """
+    Immutable amount of money in integer minor units.
+    Methods:
+        - of
+        - to_decimal
+        - arithmetic (+, -, unary -, abs, * int) and comparisons
+    """
+
+    __slots__ = ('minor', 'currency')
+
+    def __init__(self, minor, currency=DEFAULT_CURRENCY):
+        """Initializes a Money value from minor units.
+
+        Args:
+            minor (int): Amount in minor units (e.g. cents).
+            currency (str): ISO 4217 currency code.
+        """
+        minor_unit_scale(currency)
+        object.__setattr__(self, 'minor', int(minor))
+        object.__setattr__(self, 'currency', currency)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Money is immutable')
+
+    def __reduce__(self):
+        # Pickled through __init__, since the default path would go through __setattr__.
+        return Money, (self.minor, self.currency)
+
+    @classmethod
+    def of(cls, amount, currency=DEFAULT_CURRENCY):
+        """Builds Money from a major-unit amount.
+
+        Floats are converted through their shortest decimal representation, so
+        Money.of(0.1) is exactly ten cents. Sub-minor-unit digits are rounded half up.
+
+        Args:
+            amount (Money | int | float | Decimal | str): The amount in major units.
+            currency (str): ISO 4217 currency code, ignored if amount is Money.
+
+        Returns:
+            Money: The converted amount.
+
+        Raises:
+            ValueError: If amount is not a finite number.
+        """
+        if isinstance(amount, Money):
+            return amount
+        scale = minor_unit_scale(currency)
+        if isinstance(amount, Integral) and not isinstance(amount, bool):
+            return cls(int(amount) * scale, currency)
+        try:
+            value = Decimal(str(amount)) if isinstance(amount, float) else Decimal(amount)
+            minor = int((value * scale).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValueError(f'Invalid money amount: {amount!r}') from None
+        return cls(minor, currency)
+
+    def to_decimal(self):
+        """Returns the amount in major units as an exact Decimal."""
+        return Decimal(self.minor).scaleb(-MINOR_UNITS[self.currency])
+
+    def __float__(self):
+        return self.minor / minor_unit_scale(self.currency)
+
+    def __int__(self):
+        return int(self.to_decimal())
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __str__(self):
+        return str(self.to_decimal())
+
+    def __repr__(self):
+        return f"Money('{self}', '{self.currency}')"
+
+    def __format__(self, spec):
+        return format(self.to_decimal(), spec)
+
+    def display(self):
+        """Returns the amount with its currency symbol, e.g. '-$1,234.50'."""
+        symbol = CURRENCY_SYMBOLS.get(self.currency, self.currency + ' ')
+        sign = '-' if self.minor < 0 else ''
+        places = MINOR_UNITS[self.currency]
+        return f'{sign}{symbol}{abs(self.to_decimal()):,.{places}f}'
+
+    def _coerce(self, other):
+        """Converts other to Money in this currency, or returns NotImplemented."""
+        if isinstance(other, Money):
+            if other.currency != self.currency:
+                raise ValueError(f'Currency mismatch: {self.currency} vs {other.currency}')
+            return other
+        if isinstance(other, (Number, Decimal)) and not isinstance(other, bool):
+            return Money.of(other, self.currency)
+        return NotImplemented
+
+    def __add__(self, other):
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        return Money(self.minor + other.minor, self.currency)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        return Money(self.minor - other.minor, self.currency)
+
+    def __rsub__(self, other):
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        return Money(other.minor - self.minor, self.currency)
+
+    def __mul__(self, factor):
+        if isinstance(factor, int) and not isinstance(factor, bool):
+            return Money(self.minor * factor, self.currency)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.minor, self.currency)
+
+    def __abs__(self):
+        return Money(abs(self.minor), self.currency)
+
+    def __eq__(self, other):
+        try:
+            other = self._coerce(other)
+        except ValueError:
+            return False
+        if other is NotImplemented:
+            return other
+        return self.minor == other.minor
+
+    def __hash__(self):
+        return hash((self.minor, self.currency))
+
+    def __lt__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else self.minor < other.minor
+
+    def __le__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else self.minor <= other.minor
+
+    def __gt__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else self.minor > other.minor
+
+    def __ge__(self, other):
+        other = self._coerce(other)
+        return other if other is NotImplemented else self.minor >= other.minor
+
+
+def to_minor_units(amounts, currency=DEFAULT_CURRENCY):
+    """Converts an array-like of major-unit amounts to an int64 array of minor units.
+
+    This is the vectorized counterpart of Money.of for batch paths and rounds
+    the same way: to the nearest minor unit, halves away from zero, judged on
+    each float's shortest decimal representation. A binary float can land just
+    either side of a half (1.005 * 100 is 100.49999...), so the few values that
+    close to a tie are converted with Money.of itself.
+
+    Args:
+        amounts: Sequence or NumPy array of numbers.
+        currency (str): ISO 4217 currency code.
+
+    Returns:
+        numpy.ndarray: int64 minor units.
+    """
+    scale = minor_unit_scale(currency)
+    values = np.asarray(amounts)
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64) * scale
+    values = values.astype(np.float64)
+    if not np.all(np.isfinite(values)):
+        raise ValueError('Amounts must be finite numbers')
+    scaled = np.abs(values * scale)
+    minor = np.copysign(np.floor(scaled + 0.5), values).astype(np.int64)
+    ties = np.flatnonzero(np.abs(scaled % 1 - 0.5) <= _TIE_TOLERANCE + scaled * 1e-12)
+    for index in ties.tolist():
+        minor[index] = Money.of(float(values[index]), currency).minor
+    return minor
+
+
+def sum_minor_units(minor_units, currency=DEFAULT_CURRENCY):
+    """Sums an array of minor units exactly and returns Money."""
+    return Money(int(np.asarray(minor_units, dtype=np.int64).sum()), currency)
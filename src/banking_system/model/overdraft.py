@@ -1,5 +1,368 @@
-"""Contains custom exceptions for banking system."""
+"""
+model/overdraft.py
+
+Overdraft errors and the withdrawal policy engine.
+
+OverdraftPolicy is the single place withdrawal rules live; AccountTransactions
+consults it before every debit. Rules:
+
+    floor            -> hard floor no balance may go below (0 forbids overdrafts)
+    overdraft_limit  -> how far below zero an account may go, with per-account overrides
+    daily_limit      -> most an account may withdraw in a rolling window, with overrides
+
+Checks are O(1) per withdrawal: each account with a daily limit keeps a counter
+of the withdrawals inside its window (expired entries drop off the front) and
+their running total, seeded once from the ledger instead of re-summing the
+withdraw list. Counters are kept per store (db/registry.py), since one cust_id
+names different accounts in different stores, and once per window length the
+counters whose withdrawals have all expired are dropped. evaluate_batch applies the same rules to a whole batch with
+NumPy, falling back to an exact sequential pass only for accounts with a
+violation. The process-wide policy comes from OVERDRAFT_FLOOR, OVERDRAFT_LIMIT,
+and DAILY_WITHDRAWAL_LIMIT in config/settings.py; with none set, every
+withdrawal is allowed, as before.
+"""
+
+import contextlib
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from banking_system.db.registry import StoreRegistry
+from banking_system.model.money import Money
+
+DAY_SECONDS = 86_400
+
+_NO_FLOOR = np.iinfo(np.int64).min
+_NO_LIMIT = np.iinfo(np.int64).max
+
 
 class OverdraftError(Exception):
     """Custom error for overdraft attempts."""
     pass
+
+
+class DailyLimitError(OverdraftError):
+    """Raised when a withdrawal would exceed the account's rolling withdrawal limit."""
+    pass
+
+
+def _insufficient_funds(amount, balance):
+    """Returns the message for a withdrawal that would breach the floor."""
+    return f'Insufficient funds: Cannot withdraw {amount.display()} from balance of {balance.display()}'
+
+
+def _limit_exceeded(limit):
+    """Returns the message for a withdrawal over the rolling limit."""
+    return f'Daily withdrawal limit of {limit.display()} exceeded'
+
+
+def _segment_cumsum(values, starts, counts):
+    """Cumulative sums that restart at each group boundary."""
+    running = np.cumsum(values)
+    return running - np.repeat(running[starts] - values[starts], counts)
+
+
+class _Window:
+    """Withdrawals of one account inside the rolling window, with their total."""
+
+    __slots__ = ('entries', 'total')
+
+    def __init__(self, history=()):
+        self.entries = deque(history)
+        self.total = sum(minor for _, minor in self.entries)
+
+    def expire(self, cutoff):
+        """Drops withdrawals at or before cutoff; amortized O(1)."""
+        entries = self.entries
+        while entries and entries[0][0] <= cutoff:
+            self.total -= entries.popleft()[1]
+
+    def add(self, when, minor):
+        self.entries.append((when, minor))
+        self.total += minor
+
+    def remove(self, when, minor):
+        try:
+            self.entries.remove((when, minor))
+        except ValueError:
+            return  # already expired
+        self.total -= minor
+
+
+class _StoreWindows(dict):
+    """One store's cust_id -> _Window, with the time its expired windows were last dropped."""
+
+    __slots__ = ('swept_at',)
+
+    def __init__(self):
+        super().__init__()
+        self.swept_at = time.time()
+
+    def sweep(self, now, cutoff):
+        """Drops the windows left empty once withdrawals at or before cutoff expire."""
+        for cust_id, window in list(self.items()):
+            window.expire(cutoff)
+            if not window.entries:
+                del self[cust_id]
+        self.swept_at = now
+
+
+def _registry_key(store):
+    """Returns the object a store's windows are kept against (see AccountStore.registry_key)."""
+    return None if store is None else store.registry_key
+
+
+class OverdraftPolicy:
+    """
+    Withdrawal rules checked before every debit.
+    Methods:
+        - set_overdraft_limit / set_daily_limit
+        - floor_minor / daily_limit_minor
+        - check
+        - needs_history / window_start / reserve
+        - evaluate_batch / release
+    """
+
+    def __init__(self, floor=None, overdraft_limit=None, daily_limit=None, window=DAY_SECONDS):
+        """Initializes the policy; a rule left as None is not enforced.
+
+        Args:
+            floor (Money | float): Lowest balance any account may reach.
+            overdraft_limit (Money | float): Default overdraft allowance per account.
+            daily_limit (Money | float): Default withdrawal limit per rolling window.
+            window (float): Length of the rolling window in seconds.
+        """
+        self.floor = floor
+        self.overdraft_limit = overdraft_limit
+        self.daily_limit = daily_limit
+        self.window = window
+        self._overdraft_limits = {}
+        self._daily_limits = {}
+        self._windows = StoreRegistry(lambda store: _StoreWindows())
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """Checks whether any rule is in force."""
+        return any(rule is not None for rule in (self.floor, self.overdraft_limit, self.daily_limit)) or any(
+            limit is not None for limit in (*self._overdraft_limits.values(), *self._daily_limits.values())
+        )
+
+    def set_overdraft_limit(self, cust_id, limit):
+        """Overrides the overdraft allowance of one account (None restores the default)."""
+        if limit is None:
+            self._overdraft_limits.pop(cust_id, None)
+        else:
+            self._overdraft_limits[cust_id] = limit
+
+    def set_daily_limit(self, cust_id, limit):
+        """Overrides the rolling withdrawal limit of one account (None restores the default)."""
+        if limit is None:
+            self._daily_limits.pop(cust_id, None)
+        else:
+            self._daily_limits[cust_id] = limit
+
+    def floor_minor(self, cust_id, currency):
+        """Returns the lowest balance cust_id may reach in minor units, or None if unbounded."""
+        floors = []
+        if self.floor is not None:
+            floors.append(Money.of(self.floor, currency).minor)
+        limit = self._overdraft_limits.get(cust_id, self.overdraft_limit)
+        if limit is not None:
+            floors.append(-Money.of(limit, currency).minor)
+        return max(floors) if floors else None
+
+    def daily_limit_minor(self, cust_id, currency):
+        """Returns cust_id's rolling withdrawal limit in minor units, or None."""
+        limit = self._daily_limits.get(cust_id, self.daily_limit)
+        return None if limit is None else Money.of(limit, currency).minor
+
+    def check(self, cust_id, balance, amount):
+        """Checks a withdrawal of amount against cust_id's floor.
+
+        Raises:
+            OverdraftError: If the balance after the withdrawal would be below the floor.
+        """
+        floor = self.floor_minor(cust_id, balance.currency)
+        if floor is not None and balance.minor - amount.minor < floor:
+            raise OverdraftError(_insufficient_funds(amount, balance))
+
+    def needs_history(self, cust_id, store=None):
+        """Checks whether reserve() for cust_id in store needs the account's recent withdrawals."""
+        if self._daily_limits.get(cust_id, self.daily_limit) is None:
+            return False
+        return cust_id not in self._windows.get(_registry_key(store))
+
+    def window_start(self, now=None):
+        """Returns the epoch seconds at which the current rolling window starts."""
+        return (time.time() if now is None else now) - self.window
+
+    def _window(self, cust_id, history, now, store):
+        """Returns cust_id's window counter in store, seeded from history on first use, expired to now.
+
+        The caller holds _lock.
+        """
+        windows = self._windows.get(_registry_key(store))
+        cutoff = now - self.window
+        if now - windows.swept_at >= self.window:
+            windows.sweep(now, cutoff)
+        window = windows.get(cust_id)
+        if window is None:
+            window = windows[cust_id] = _Window(history or ())
+        window.expire(cutoff)
+        return window
+
+    @contextlib.contextmanager
+    def reserve(self, cust_id, amount, history=None, now=None, store=None):
+        """Counts a withdrawal against cust_id's rolling limit around the block that posts it.
+
+        The reservation is taken before the block runs, so concurrent withdrawals
+        cannot overrun the limit together, and released if the block raises.
+
+        Args:
+            cust_id (str): Account being debited.
+            amount (Money): Amount of the withdrawal.
+            history (list): (timestamp, amount_minor) withdrawals since window_start(),
+                required the first time an account is seen (see needs_history).
+            now (float): Epoch seconds; defaults to now.
+            store (AccountStore): Store holding the account; each keeps its own windows.
+
+        Raises:
+            DailyLimitError: If the withdrawal would exceed the limit.
+        """
+        limit = self.daily_limit_minor(cust_id, amount.currency)
+        if limit is None:
+            yield
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            window = self._window(cust_id, history, now, store)
+            if window.total + amount.minor > limit:
+                raise DailyLimitError(_limit_exceeded(Money(limit, amount.currency)))
+            window.add(now, amount.minor)
+        try:
+            yield
+        except BaseException:
+            with self._lock:
+                window.remove(now, amount.minor)
+            raise
+
+    def evaluate_batch(self, cust_ids, currencies, openings, counts, deltas, histories=None, now=None, store=None):
+        """Evaluates grouped postings in bulk, in the layout of AccountStore.apply_batch.
+
+        Withdrawals are checked in posting order against each account's floor
+        and rolling limit; a rejected withdrawal does not count towards the
+        balance or the limit for the postings after it. Accepted withdrawals are
+        reserved against the limits as with reserve(); pass the returned
+        reservation to release() if the postings are not applied.
+
+        Args:
+            cust_ids (list): Accounts, one per group.
+            currencies (list): Currency of each account.
+            openings (numpy.ndarray): Balance of each account before the batch, in minor units.
+            counts (numpy.ndarray): Number of postings in each group (all positive).
+            deltas (numpy.ndarray): Signed amounts in minor units.
+            histories (dict): cust_id -> recent withdrawals, for accounts needing history.
+            now (float): Epoch seconds; defaults to now.
+            store (AccountStore): Store holding the accounts; each keeps its own windows.
+
+        Returns:
+            tuple: (ok, reasons, reservation) where ok flags the postings that may
+                be applied and reasons holds the message for each rejected one.
+        """
+        now = time.time() if now is None else now
+        histories = histories or {}
+        groups = len(cust_ids)
+        floors = np.full(groups, _NO_FLOOR, dtype=np.int64)
+        limits = np.full(groups, _NO_LIMIT, dtype=np.int64)
+        used = np.zeros(groups, dtype=np.int64)
+        for group, (cust_id, currency) in enumerate(zip(cust_ids, currencies)):
+            floor = self.floor_minor(cust_id, currency)
+            if floor is not None:
+                floors[group] = floor
+            limit = self.daily_limit_minor(cust_id, currency)
+            if limit is not None:
+                limits[group] = limit
+
+        ok = np.ones(len(deltas), dtype=bool)
+        reasons = [None] * len(deltas)
+        starts = np.cumsum(counts) - counts
+        group_of = np.repeat(np.arange(groups), counts)
+        debits = np.maximum(-deltas, 0)
+        reservation = []
+        with self._lock:
+            windows = [None] * groups
+            for group in np.flatnonzero(limits != _NO_LIMIT).tolist():
+                cust_id = cust_ids[group]
+                windows[group] = self._window(cust_id, histories.get(cust_id), now, store)
+                used[group] = windows[group].total
+
+            # Optimistic pass: if nothing is rejected, running balances and
+            # running withdrawal totals are plain segmented cumulative sums.
+            balances = openings[group_of] + _segment_cumsum(deltas, starts, counts)
+            withdrawn = used[group_of] + _segment_cumsum(debits, starts, counts)
+            violations = (deltas < 0) & ((balances < floors[group_of]) | (withdrawn > limits[group_of]))
+            for group in np.unique(group_of[violations]).tolist():
+                balance, total = int(openings[group]), int(used[group])
+                floor, limit, currency = int(floors[group]), int(limits[group]), currencies[group]
+                start = int(starts[group])
+                for index, delta in enumerate(deltas[start:start + counts[group]].tolist(), start):
+                    if delta < 0 and balance + delta < floor:
+                        reasons[index] = _insufficient_funds(Money(-delta, currency), Money(balance, currency))
+                    elif delta < 0 and total - delta > limit:
+                        reasons[index] = _limit_exceeded(Money(limit, currency))
+                    else:
+                        balance += delta
+                        total += max(-delta, 0)
+                        continue
+                    ok[index] = False
+
+            for group, window in enumerate(windows):
+                if window is not None:
+                    start = int(starts[group])
+                    accepted = int(debits[start:start + counts[group]][ok[start:start + counts[group]]].sum())
+                    if accepted:
+                        window.add(now, accepted)
+                        reservation.append((window, now, accepted))
+        return ok, reasons, reservation
+
+    def release(self, reservation):
+        """Returns withdrawals reserved by evaluate_batch to the rolling limits."""
+        with self._lock:
+            for window, when, minor in reservation:
+                window.remove(when, minor)
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
+
+
+def get_overdraft_policy():
+    """Returns the process-wide policy, built from config/settings.py on first use."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                config = _config()
+                _policy = OverdraftPolicy(
+                    floor=config.OVERDRAFT_FLOOR,
+                    overdraft_limit=config.OVERDRAFT_LIMIT,
+                    daily_limit=config.DAILY_WITHDRAWAL_LIMIT,
+                )
+    return _policy
+
+
+def set_overdraft_policy(policy):
+    """Replaces the process-wide policy and returns the previous one."""
+    global _policy
+    with _policy_lock:
+        previous, _policy = _policy, policy
+    return previous
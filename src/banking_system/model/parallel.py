@@ -0,0 +1,415 @@
+"""
+model/parallel.py
+
+Multi-process batch jobs over the whole book: end-of-day figures,
+reconciliation, and bulk posting. Statement and ledger files are written in
+parallel by ledger_export.export_sharded, on the same runner.
+
+The NumPy and Money work in these jobs holds the GIL, so threads do not make
+them faster. A ParallelRunner runs them in a pool of worker processes
+instead. The book's ledger columns are copied once into a shared-memory block
+(SharedColumns) that every worker maps, so handing a chunk of accounts to a
+worker pickles its account range and cust_ids, not its entries. Results are
+collected in chunk order, whatever order the workers finish in, so a parallel
+run returns exactly what a serial one does.
+
+Bulk posting partitions the records by account, so no account is posted to by
+two workers, and each worker posts its partition through its own connection.
+Only books several processes can open at once (sqlite:///path URLs) can be
+posted to that way; any other store is posted to in-process.
+"""
+
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from banking_system.db.accounts_store import transactions_db
+from banking_system.db.ledger import DEPOSIT, WITHDRAW, LedgerColumns
+from banking_system.db.storage import backend_options, create_store, database_url, get_store
+from banking_system.model.end_of_day import EndOfDayReport, compute_end_of_day, day_bounds
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions, BatchResult
+
+# Numeric LedgerColumns fields copied into shared memory, with their dtypes.
+SHARED_FIELDS = (
+    ('opening', np.int64),
+    ('offsets', np.int64),
+    ('timestamps', np.int64),
+    ('amounts', np.int64),
+    ('kinds', np.int8),
+    ('txn_ids', np.int64),
+)
+
+
+class SharedColumns:
+    """
+    The numeric columns of a LedgerColumns, copied into one shared-memory block.
+
+    Worker processes map the block by name through `handle`; cust_ids and
+    currencies stay in this process and travel with each chunk. The block is
+    freed by close(), or on leaving a `with` block.
+    Methods:
+        - close
+    Attributes:
+        - handle: picklable (name, layout) a worker attaches with
+    """
+
+    def __init__(self, columns):
+        """Copies columns into a new shared-memory block."""
+        arrays = [
+            (name, np.ascontiguousarray(getattr(columns, name), dtype=dtype))
+            for name, dtype in SHARED_FIELDS if getattr(columns, name) is not None
+        ]
+        layout = []
+        size = 0
+        for name, array in arrays:
+            layout.append((name, array.dtype.str, size, len(array)))
+            size += -(-array.nbytes // 8) * 8  # keep every column 8-byte aligned
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for (_, array), (_, dtype, offset, length) in zip(arrays, layout):
+            np.ndarray(length, dtype=dtype, buffer=self.memory.buf, offset=offset)[:] = array
+        self.handle = (self.memory.name, tuple(layout))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmaps and frees the block; workers still attached keep their mapping until they let go."""
+        self.memory.close()
+        self.memory.unlink()
+
+
+# Blocks this worker has mapped: name -> (SharedMemory, {field: array}).
+_attached = {}
+# Stores this worker has opened for bulk posting: url -> AccountStore.
+_stores = {}
+
+
+def _attach(handle):
+    """Maps a SharedColumns block in a worker process, once per block."""
+    name, layout = handle
+    if name not in _attached:
+        # A new block means the job that shared the old ones is over.
+        for stale in list(_attached):
+            memory, arrays = _attached.pop(stale)
+            arrays.clear()
+            try:
+                memory.close()
+            except BufferError:
+                pass  # still referenced; the mapping goes when the worker exits
+        memory = shared_memory.SharedMemory(name=name)
+        arrays = {
+            field: np.ndarray(length, dtype=dtype, buffer=memory.buf, offset=offset)
+            for field, dtype, offset, length in layout
+        }
+        _attached[name] = (memory, arrays)
+    return _attached[name][1]
+
+
+def _run_chunk(function, handle, first, stop, cust_ids, currencies, args):
+    """Worker entry point: calls function(columns, *args) on accounts [first, stop) of a shared block."""
+    arrays = _attach(handle)
+    offsets = arrays['offsets']
+    low, high = int(offsets[first]), int(offsets[stop])
+    columns = LedgerColumns(
+        cust_ids,
+        currencies,
+        arrays['opening'][first:stop],
+        offsets[first:stop + 1] - low,
+        arrays['timestamps'][low:high],
+        arrays['amounts'][low:high],
+        arrays['kinds'][low:high],
+        arrays['txn_ids'][low:high] if 'txn_ids' in arrays else None,
+    )
+    return function(columns, *args)
+
+
+class ParallelRunner:
+    """
+    A pool of worker processes for jobs over ledger columns.
+
+    Workers are started once and reused by every job run through the runner;
+    use it as a context manager, or call close() when done.
+    Methods:
+        - chunks
+        - map_columns / map_chunks
+        - map
+        - close
+    Attributes:
+        - workers: number of worker processes
+        - chunk_accounts: most accounts map_chunks puts in one chunk, unless workers need larger ones
+    """
+
+    def __init__(self, workers=None, chunk_accounts=None):
+        """Starts the pool.
+
+        Args:
+            workers (int): Worker processes; defaults to PARALLEL_WORKERS, or one per CPU.
+            chunk_accounts (int): Accounts per chunk; defaults to PARALLEL_CHUNK_ACCOUNTS.
+        """
+        config = _config()
+        self.workers = workers or config.PARALLEL_WORKERS or os.cpu_count() or 1
+        self.chunk_accounts = chunk_accounts or config.PARALLEL_CHUNK_ACCOUNTS
+        # Spawned rather than forked: a fork copies the parent's locks in
+        # whatever state its other threads left them.
+        self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stops the worker processes."""
+        self._pool.shutdown()
+
+    def _collect(self, futures):
+        """Returns the futures' results in order; on the first failure cancels the rest and raises."""
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def map(self, function, *iterables):
+        """Calls function on each set of items in the workers; returns the results in input order."""
+        return self._collect([self._pool.submit(function, *items) for items in zip(*iterables)])
+
+    def chunks(self, columns):
+        """Splits columns into contiguous account ranges with about equal work.
+
+        Work is counted as entries plus one per account, so a few busy accounts
+        do not leave one worker with most of the book.
+
+        Returns:
+            list: (first, stop) account positions, in order.
+        """
+        count = len(columns)
+        if not count:
+            return []
+        pieces = max(self.workers, -(-count // self.chunk_accounts))
+        work = columns.offsets + np.arange(count + 1)
+        cuts = np.searchsorted(work, np.linspace(0, work[-1], pieces + 1))
+        cuts[0], cuts[-1] = 0, count
+        bounds = np.unique(cuts).tolist()
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def map_columns(self, function, columns, tasks):
+        """Calls function(chunk, *args) in the workers for each (first, stop, args) task.
+
+        Each chunk is a LedgerColumns of accounts [first, stop) of columns, a
+        view of the shared block rather than a copy; function must not modify
+        it. columns is shared for the length of the call.
+
+        Returns:
+            list: The results, in task order.
+        """
+        cust_ids = columns.cust_ids
+        currencies = columns.currencies
+        with SharedColumns(columns) as shared:
+            return self._collect([
+                self._pool.submit(
+                    _run_chunk, function, shared.handle, first, stop, cust_ids[first:stop], currencies[first:stop], args,
+                )
+                for first, stop, args in tasks
+            ])
+
+    def map_chunks(self, function, columns, *args):
+        """Calls function(chunk, *args) on every chunk of columns (see chunks); returns the results in order."""
+        return self.map_columns(function, columns, [(first, stop, args) for first, stop in self.chunks(columns)])
+
+
+def _runner(runner, job):
+    """Runs job(runner) on the given runner, or on a temporary one."""
+    if runner is not None:
+        return job(runner)
+    with ParallelRunner() as temporary:
+        return job(temporary)
+
+
+def parallel_end_of_day(day=None, store=None, runner=None):
+    """Runs the EOD computation over every ledger in the store, in worker processes.
+
+    Gives the same report as model.end_of_day.run_end_of_day.
+
+    Args:
+        day (date): Calendar day to report on (local time); defaults to the whole ledger.
+        store (AccountStore): Optional storage backend.
+        runner (ParallelRunner): Pool to run on; defaults to a temporary one.
+
+    Returns:
+        EndOfDayReport: The per-account figures, in the store's ledger order.
+    """
+    if store is None:
+        store = get_store(transactions=transactions_db)
+    start, end = day_bounds(day) if day is not None else (None, None)
+    columns = store.ledger_columns()
+    parts = _runner(runner, lambda pool: pool.map_chunks(compute_end_of_day, columns, start, end))
+    return EndOfDayReport.concat(parts)
+
+
+class ReconciliationReport:
+    """
+    Outcome of reconcile.
+    Attributes:
+        - accounts / entries: how many were checked
+        - breaks: (cust_id, reason) for each discrepancy found, in ledger order
+    Methods:
+        - ok
+    """
+
+    def __init__(self, accounts, entries, breaks):
+        """Initializes the report."""
+        self.accounts = accounts
+        self.entries = entries
+        self.breaks = breaks
+
+    @property
+    def ok(self):
+        """Returns True if nothing failed to reconcile."""
+        return not self.breaks
+
+
+def _check_chunk(columns):
+    """Worker half of reconcile: sums each ledger and checks its entries.
+
+    Returns:
+        tuple: (closing, problems), the ledger-derived balance of each account
+            (int64 minor units) and (position, reason) for accounts whose entries
+            are inconsistent.
+    """
+    offsets = columns.offsets
+    amounts = columns.amounts
+    kinds = columns.kinds
+    running = np.zeros(len(amounts) + 1, dtype=np.int64)
+    running[1:] = np.cumsum(amounts)
+    closing = columns.opening + running[offsets[1:]] - running[offsets[:-1]]
+
+    problems = []
+    owner = np.repeat(np.arange(len(columns), dtype=np.int64), np.diff(offsets))
+    mismatched = ~(((kinds == DEPOSIT) & (amounts > 0)) | ((kinds == WITHDRAW) & (amounts < 0)))
+    for position in np.unique(owner[mismatched]).tolist():
+        problems.append((position, 'Entry kind does not match the sign of its amount'))
+    backwards = np.flatnonzero((np.diff(columns.timestamps) < 0) & (owner[1:] == owner[:-1])) + 1
+    for position in np.unique(owner[backwards]).tolist():
+        problems.append((position, 'Entries are out of timestamp order'))
+    return closing, problems
+
+
+def reconcile(store=None, expected=None, runner=None):
+    """Reconciles every ledger in the store against its balance, in worker processes.
+
+    Each account's entries are summed from its opening balance and compared
+    with the balance the store reports; entries are checked for a kind that
+    disagrees with the amount's sign and for timestamps out of order. Given
+    expected balances (from a general ledger or a counterparty file, say), the
+    balances are also compared with those. Postings made while the check runs
+    can show up as breaks, so run it on a quiet book, as at end of day.
+
+    Args:
+        store (AccountStore): Optional storage backend.
+        expected (dict): Optional cust_id -> balance (Money or major units) to reconcile against.
+        runner (ParallelRunner): Pool to run on; defaults to a temporary one.
+
+    Returns:
+        ReconciliationReport: The discrepancies found.
+    """
+    if store is None:
+        store = get_store(transactions=transactions_db)
+    columns = store.ledger_columns()
+    results = _runner(runner, lambda pool: pool.map_chunks(_check_chunk, columns))
+    recorded = store.get_balances(columns.cust_ids)
+
+    breaks = []
+    position = 0
+    for closing, problems in results:
+        found = dict(problems)
+        for offset, minor in enumerate(closing.tolist()):
+            index = position + offset
+            cust_id = columns.cust_ids[index]
+            currency = columns.currencies[index]
+            balance = recorded[index]
+            if balance is None:
+                breaks.append((cust_id, 'Ledger has no balance in the store'))
+            elif minor != balance.minor:
+                breaks.append((cust_id, f'Entries sum to {Money(minor, currency)}, balance is {balance}'))
+            if offset in found:
+                breaks.append((cust_id, found[offset]))
+            if expected is not None and cust_id in expected and balance is not None:
+                target = Money.of(expected[cust_id], currency)
+                if target != balance:
+                    breaks.append((cust_id, f'Expected {target}, balance is {balance}'))
+        position += len(closing)
+    if expected is not None:
+        held = set(columns.cust_ids)
+        breaks.extend((cust_id, 'Expected balance for an account with no ledger') for cust_id in expected if cust_id not in held)
+    return ReconciliationReport(len(columns), int(columns.offsets[-1]), breaks)
+
+
+def _shareable(url):
+    """Returns True if several processes can open the book at url at once."""
+    return bool(url) and url.startswith('sqlite:///') and len(url) > len('sqlite:///')
+
+
+def _post_partition(url, records):
+    """Worker half of parallel_apply_batch: posts one partition of records through this worker's store."""
+    if url not in _stores:
+        _stores[url] = create_store(url, **backend_options(url))
+    result = AccountTransactions.apply_batch(records, store=_stores[url])
+    result.records = None  # the parent has them
+    return result
+
+
+def parallel_apply_batch(records, url=None, store=None, runner=None):
+    """Posts many deposits and withdrawals from worker processes, one partition of accounts each.
+
+    Records are partitioned by cust_id, so every record for an account goes to
+    the same worker and keeps its input order; each worker posts its partition
+    with AccountTransactions.apply_batch through its own connection, under the
+    process-wide overdraft policy. Unless url names a book several processes
+    can open (sqlite:///path), the batch is posted in-process to store instead.
+
+    Args:
+        records (iterable): (cust_id, type, amount) tuples, as for AccountTransactions.apply_batch.
+        url (str): Database URL the workers open; defaults to DATABASE_URL when no store is given.
+        store (AccountStore): Backend for an in-process post.
+        runner (ParallelRunner): Pool to run on; defaults to a temporary one.
+
+    Returns:
+        BatchResult: The balance after each applied record and the reason each
+            rejected record was refused, in input order.
+    """
+    records = list(records)
+    if url is None and store is None:
+        url = database_url()
+    if not _shareable(url):
+        return AccountTransactions.apply_batch(records, store=store)
+
+    def post(pool):
+        positions = [[] for _ in range(pool.workers)]
+        for position, record in enumerate(records):
+            try:
+                part = zlib.crc32(str(record[0]).encode('utf-8')) % pool.workers
+            except (TypeError, IndexError):
+                part = 0  # malformed; rejected by the worker like any other
+            positions[part].append(position)
+        parts = [(members, [records[position] for position in members]) for members in positions if members]
+        results = pool.map(_post_partition, [url] * len(parts), [part for _, part in parts])
+        return BatchResult.combine(records, zip((members for members, _ in parts), results))
+
+    return _runner(runner, post)
+
+
+def _config():
+    """Returns the active Config class from config/settings.py."""
+    from banking_system.config.settings import get_config
+    return get_config()
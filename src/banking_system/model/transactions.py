@@ -1,15 +1,296 @@
 """banking/transactions.py"""
 
+import time
+from itertools import repeat
+from operator import itemgetter
+
+import numpy as np
+
 from banking_system.db.accounts_store import transactions_db
+from banking_system.db.dedup import DuplicatePostingError, PostingRecord
+from banking_system.db.ledger import DEPOSIT, KIND_CODES, WITHDRAW
+from banking_system.db.storage import ConcurrentUpdateError, get_store
+from banking_system.db.transfers import IdempotencyConflictError, split_replays
+from banking_system.events.event_log import get_event_log
+from banking_system.model.activity import get_account_activity
+from banking_system.model.money import DEFAULT_CURRENCY, Money, minor_unit_scale, to_minor_units
+from banking_system.model.overdraft import OverdraftError, get_overdraft_policy
+
+
+# Attempts a withdrawal makes before giving up on a contended account.
+CAS_RETRIES = 100
+
+
+class BatchResult:
+    """
+    Outcome of AccountTransactions.apply_batch, in input order.
+    Attributes:
+        - balances: balance after each record (Money), or None if it was rejected
+        - balance_minor: balance after each record in minor units (int64 array)
+        - errors: rejection reason for each record, or None if it was applied
+    """
+
+    def __init__(self, records):
+        """Initializes an empty result for a list of records."""
+        self.records = records
+        self.errors = [None] * len(records)
+        self.balance_minor = np.zeros(len(records), dtype=np.int64)
+        self._applied = np.zeros(len(records), dtype=bool)
+        self._currencies = [None] * len(records)
+        self._balances = None
+
+    @property
+    def balances(self):
+        """Returns the balance after each record as Money, or None if it was rejected.
+
+        The list is built on first access, so callers that only need totals or
+        minor units do not pay for one Money object per record.
+        """
+        if self._balances is None:
+            self._balances = [
+                Money(minor, currency) if applied else None
+                for minor, currency, applied in zip(self.balance_minor.tolist(), self._currencies, self._applied.tolist())
+            ]
+        return self._balances
+
+    @property
+    def applied(self):
+        """Returns the number of records that were posted."""
+        return int(self._applied.sum())
+
+    @property
+    def rejected(self):
+        """Returns (index, record, reason) for every rejected record."""
+        return [(index, self.records[index], reason) for index, reason in enumerate(self.errors) if reason is not None]
+
+    @classmethod
+    def combine(cls, records, parts):
+        """Assembles the result of a batch that was posted in parts.
+
+        Args:
+            records (list): The whole batch, in input order.
+            parts (iterable): (positions, result) pairs: the positions in records
+                each part covered, and the BatchResult it was posted with.
+        """
+        result = cls(records)
+        for positions, part in parts:
+            indices = np.asarray(positions, dtype=np.int64)
+            result.balance_minor[indices] = part.balance_minor
+            result._applied[indices] = part._applied
+            for position, error, currency in zip(positions, part.errors, part._currencies):
+                result.errors[position] = error
+                result._currencies[position] = currency
+        return result
+
+
+class TransferBatchResult:
+    """
+    Outcome of AccountTransactions.transfer_batch, in input order.
+    Attributes:
+        - records: TransferRecord for each settled transfer, or None if it was rejected
+        - replayed: True where the idempotency key had already been settled
+        - errors: rejection reason for each transfer, or None if it was settled
+    """
+
+    def __init__(self, transfers):
+        """Initializes an empty result for a list of transfers."""
+        self.transfers = transfers
+        self.records = [None] * len(transfers)
+        self.replayed = [False] * len(transfers)
+        self.errors = [None] * len(transfers)
+
+    @property
+    def applied(self):
+        """Returns the number of transfers settled by this batch (replays excluded)."""
+        return sum(record is not None and not replayed for record, replayed in zip(self.records, self.replayed))
+
+    @property
+    def rejected(self):
+        """Returns (index, transfer, reason) for every rejected transfer."""
+        return [(index, self.transfers[index], reason) for index, reason in enumerate(self.errors) if reason is not None]
+
+
+def _batch_columns(records, errors):
+    """Splits (cust_id, type, amount) records into three columns.
+
+    Malformed records are rejected in errors and contribute (None, None, 0).
+    """
+    try:
+        if set(map(len, records)) == {3}:
+            return [list(map(itemgetter(column), records)) for column in range(3)]
+    except (KeyError, TypeError):
+        pass  # a record without a length; split them one by one
+
+    cust_ids, kinds, amounts = [], [], []
+    for index, record in enumerate(records):
+        try:
+            cust_id, kind, amount = record
+        except (TypeError, ValueError):
+            errors[index] = 'Malformed record'
+            cust_id, kind, amount = None, None, 0
+        cust_ids.append(cust_id)
+        kinds.append(kind)
+        amounts.append(amount)
+    return cust_ids, kinds, amounts
+
+
+def _batch_minor_units(amounts):
+    """Converts amounts to USD minor units, vectorized when they are all plain numbers.
+
+    Either way amounts round as Money.of rounds them for deposit/withdraw, so a
+    batch posts the same minor units as the equivalent single postings.
+
+    Returns:
+        tuple: (minor, valid, plain) arrays; plain is False for amounts that still
+            need a per-record check against the account currency (Money values).
+    """
+    count = len(amounts)
+    if set(map(type, amounts)) <= {int, float}:
+        try:
+            return to_minor_units(amounts), np.ones(count, dtype=bool), np.ones(count, dtype=bool)
+        except (OverflowError, ValueError):
+            pass  # a NaN/inf somewhere; fall back to per-record validation
+
+    minor = np.zeros(count, dtype=np.int64)
+    valid = np.zeros(count, dtype=bool)
+    plain = np.ones(count, dtype=bool)
+    for index, amount in enumerate(amounts):
+        if isinstance(amount, Money):
+            plain[index] = False
+            continue
+        try:
+            minor[index] = Money.of(amount).minor
+            valid[index] = True
+        except (OverflowError, ValueError):
+            pass
+    return minor, valid, plain
+
+
+def _post_batch(store, policy, cust_ids, currencies, counts, codes, deltas):
+    """Posts grouped postings (the AccountStore.apply_batch layout) through the overdraft policy.
+
+    With rules in force the postings are evaluated in bulk against the current
+    balances and posted with those balances as the expected openings, so a
+    concurrent posting sends the batch round again instead of slipping past the
+    checks.
+
+    Returns:
+        tuple: (balances, ok, reasons), the balance after each accepted posting,
+            which postings were accepted, and the reason for each rejected one.
+    """
+    if not policy.enabled:
+        return store.apply_batch(cust_ids, counts, codes, deltas), np.ones(len(deltas), dtype=bool), [None] * len(deltas)
+
+    group_of = np.repeat(np.arange(len(cust_ids)), counts)
+    for _ in range(CAS_RETRIES):
+        now = time.time()
+        openings = np.fromiter((balance.minor for balance in store.get_balances(cust_ids)), dtype=np.int64, count=len(cust_ids))
+        histories = {
+            cust_id: store.withdrawals_since(cust_id, policy.window_start(now))
+            for cust_id in cust_ids if policy.needs_history(cust_id, store)
+        }
+        ok, reasons, reservation = policy.evaluate_batch(
+            cust_ids, currencies, openings, counts, deltas, histories, now, store=store
+        )
+        kept = np.bincount(group_of[ok], minlength=len(cust_ids))
+        live = np.flatnonzero(kept)
+        try:
+            balances = store.apply_batch(
+                [cust_ids[group] for group in live.tolist()], kept[live], codes[ok], deltas[ok], expected=openings[live]
+            )
+        except ConcurrentUpdateError:
+            policy.release(reservation)
+            continue
+        except BaseException:
+            policy.release(reservation)
+            raise
+        return balances, ok, reasons
+    raise ConcurrentUpdateError('Batch kept conflicting with concurrent postings')
+
+
+def _settle_transfers(store, policy, transfers):
+    """Settles (key, source, destination, amount_minor) transfers through the overdraft policy.
+
+    Each transfer's source leg is a withdrawal and is evaluated in bulk, in
+    input order per account, with the credits of the batch's other transfers
+    counted. A transfer whose debit is refused is dropped and the rest are
+    evaluated again, so no settled transfer relies on money from a refused one.
+    Retries of journaled keys are not evaluated. As in _post_batch, the sources'
+    balances are passed as expected ones, and a concurrent posting sends the
+    batch round again.
+
+    Returns:
+        tuple: (records, replayed, reasons) in input order; a refused transfer
+            has no record and the policy's reason.
+    """
+    count = len(transfers)
+    if not policy.enabled:
+        records, replayed = store.apply_transfers(transfers)
+        return records, replayed, [None] * count
+
+    fresh, firsts, _ = split_replays(transfers, store.get_transfer)
+    accounts = list(dict.fromkeys(cust_id for index in fresh for cust_id in transfers[index][1:3]))
+    for _ in range(CAS_RETRIES):
+        now = time.time()
+        balances = dict(zip(accounts, store.get_balances(accounts)))
+        for cust_id, balance in balances.items():
+            if balance is None:
+                raise KeyError(cust_id)
+        histories = {
+            cust_id: store.withdrawals_since(cust_id, policy.window_start(now))
+            for cust_id in accounts if policy.needs_history(cust_id, store)
+        }
+
+        refused = {}
+        reservation = []
+        while True:
+            legs = [index for index in fresh if index not in refused]
+            if not legs:
+                break
+            touched = list(dict.fromkeys(cust_id for index in legs for cust_id in transfers[index][1:3]))
+            group_of = {cust_id: group for group, cust_id in enumerate(touched)}
+            # (group, order, index, delta): each account's postings in input order.
+            postings = sorted(
+                (group_of[cust_id], order, index, sign * transfers[index][3])
+                for order, index in enumerate(legs)
+                for cust_id, sign in ((transfers[index][1], -1), (transfers[index][2], 1))
+            )
+            ok, reasons, reservation = policy.evaluate_batch(
+                touched, [balances[cust_id].currency for cust_id in touched],
+                np.array([balances[cust_id].minor for cust_id in touched], dtype=np.int64),
+                np.bincount([posting[0] for posting in postings], minlength=len(touched)),
+                np.array([posting[3] for posting in postings], dtype=np.int64), histories, now, store=store,
+            )
+            dropped = {posting[2]: reason for posting, accepted, reason in zip(postings, ok.tolist(), reasons) if not accepted}
+            if not dropped:
+                break
+            policy.release(reservation)
+            reservation = []
+            refused.update(dropped)
+        # A later repeat of a refused key was counted as its replay; it is refused too.
+        for index, first in enumerate(firsts):
+            if isinstance(first, int) and first in refused:
+                refused[index] = refused[first]
+
+        kept = [index for index in range(count) if index not in refused]
+        expected = {
+            transfers[index][1]: balances[transfers[index][1]].minor for index in fresh if index not in refused
+        }
+        try:
+            settled = store.apply_transfers([transfers[index] for index in kept], expected=expected) if kept else ([], [])
+        except ConcurrentUpdateError:
+            policy.release(reservation)
+            continue
+        except BaseException:
+            policy.release(reservation)
+            raise
+        records, replayed = [None] * count, [False] * count
+        for index, record, was_replayed in zip(kept, *settled):
+            records[index] = record
+            replayed[index] = was_replayed
+        return records, replayed, [refused.get(index) for index in range(count)]
+    raise ConcurrentUpdateError('Transfer batch kept conflicting with concurrent postings')
 
-# Import OverdraftError or define it here if needed
-try:
-    from banking_system.model.overdraft import OverdraftError
-except ImportError:
-    # Define OverdraftError if not available for import
-    class OverdraftError(Exception):
-        """Custom error for overdraft attempts."""
-        pass
 
 class AccountTransactions:
     """
@@ -18,22 +299,46 @@ class AccountTransactions:
         - balance
         - deposit
         - withdraw
+        - transfer
+        - apply_batch / transfer_batch
     """
 
-    def __init__(self, cust_id):
-        """Initializes the AccountTransactions class"""
+    def __init__(self, cust_id, store=None, policy=None):
+        """Initializes the AccountTransactions class
+
+        Args:
+            cust_id (str): The customer ID whose ledger is used.
+            store (AccountStore): Optional storage backend. Defaults to the one
+                selected by DATABASE_URL (the in-memory transactions_db if unset).
+            policy (OverdraftPolicy): Optional withdrawal rules. Defaults to the
+                process-wide policy from config/settings.py.
+        """
         self.cust_id = cust_id
+        self.store = store
+        self.policy = policy
+
+
+    def _get_store(self):
+        """Returns the storage backend this account operates on."""
+        if self.store is not None:
+            return self.store
+        return get_store(transactions=transactions_db)
+
+
+    def _get_policy(self):
+        """Returns the overdraft policy this account's withdrawals are checked against."""
+        return self.policy if self.policy is not None else get_overdraft_policy()
 
 
     def balance(self):
         """Retrieves and returns the current account balance from the database.
 
         This method checks if the customer ID exists in the transaction database
-        and returns the current balance if found. The balance is both printed to
-        the console and returned as a value.
+        and returns the current balance if found. The read is recorded as a
+        'balance.read' DEBUG event.
 
         Returns:
-            float: The current account balance.
+            Money: The current account balance (compares equal to plain numbers).
 
         Raises:
             ValueError: If the customer ID is not found in the database.
@@ -41,91 +346,473 @@ class AccountTransactions:
         Examples:
             >>> account = AccountTransactions('1001')
             >>> account.balance()
-            $71.72
-            71.72
+            Money('71.72', 'USD')
         """
-        if self.cust_id in transactions_db:
-            balance = transactions_db[self.cust_id]['balance']
-            print(f'${balance}')
-            return balance
-        else:
+        balance = self._get_store().get_balance(self.cust_id)
+        if balance is None:
             raise ValueError(f'Customer ID {self.cust_id} not found in the database')
 
-    def deposit(self, deposit):
+        get_event_log().debug('balance.read', cust_id=self.cust_id, balance=balance)
+        return balance
+
+    def _post_once(self, store, kind, amount, key, post):
+        """Runs post(key) at most once per idempotency key; returns (balance, replayed).
+
+        Without a key the posting always runs. With one, a posting already made
+        under it (in the store's dedup cache, or persisted by the store) is
+        returned instead, and postings racing under the same key are serialized.
+        """
+        if key is None:
+            return post(None), False
+        cache = store.dedup_cache()
+        with cache.lock_for(key):
+            record = self._recorded_posting(store, cache, key, kind, amount)
+            if record is not None:
+                return record.balance, True
+            try:
+                balance = post(key)
+            except DuplicatePostingError:
+                # Another process posted under the key after our lookup.
+                return self._recorded_posting(store, cache, key, kind, amount).balance, True
+            cache.put(key, PostingRecord(key, self.cust_id, kind, amount, balance, time.time()))
+            return balance, False
+
+    def _recorded_posting(self, store, cache, key, kind, amount):
+        """Returns the posting recorded under key, or None; raises if it was a different posting."""
+        record = cache.get(key)
+        if record is None:
+            record = store.get_posting(key)
+            if record is None:
+                return None
+            cache.put(key, record)
+        if not record.matches(self.cust_id, kind, amount.minor):
+            raise IdempotencyConflictError(f'Idempotency key {key!r} was already used for a different posting')
+        return record
+
+    def deposit(self, deposit, key=None):
         """
         Deposits funds into the customer's account.
 
         This method adds the specified amount to the customer's current balance
         in the transaction database. If the customer ID does not exist in the
-        database, a ValueError is raised.
+        database, a ValueError is raised. A retry carrying the key of a deposit
+        that was already made returns that deposit's balance without crediting
+        the account again.
 
         Args:
-            deposit (float): The amount to deposit into the account. Must be a
-                             positive number.
+            deposit (Money | float | Decimal | str): The amount to deposit into the
+                             account. Must be a positive number.
+            key (str): Optional idempotency key, unique per logical deposit.
 
         Returns:
-            float: The new account balance after the deposit.
+            Money: The new account balance after the deposit.
 
         Raises:
             ValueError: If the customer ID is not found in the database.
             ValueError: If the deposit amount is not positive.
+            IdempotencyConflictError: If key was already used for a different posting.
         """
+        deposit = Money.of(deposit)
         if deposit <= 0:
             raise ValueError("Deposit amount must be positive")
 
-        if self.cust_id not in transactions_db:
+        # Record the deposit and update the balance in one store operation
+        store = self._get_store()
+        try:
+            new_balance, replayed = self._post_once(
+                store, 'deposit', deposit, key,
+                lambda key: store.apply_transaction(self.cust_id, 'deposit', deposit, key=key),
+            )
+        except KeyError:
+            raise ValueError("Customer ID not found") from None
+
+        if replayed:
+            get_event_log().info('transaction.replayed', cust_id=self.cust_id, kind='deposit', amount=deposit, key=key)
+        else:
+            get_event_log().info('transaction.deposit', cust_id=self.cust_id, amount=deposit, balance=new_balance)
+            get_account_activity().record(self.cust_id, 'deposit', deposit, new_balance)
+
+        return new_balance
+
+    def transfer(self, destination, amount, key=None):
+        """
+        Transfers funds from this account to another one.
+
+        Both legs (a withdraw here and a deposit into destination) are written in
+        one store operation, so a failure can never leave only one of them
+        applied. The withdraw leg is checked against the overdraft policy as
+        withdraw() is. With an idempotency key, retrying the same request returns
+        the original TransferRecord instead of moving the money again.
+
+        Args:
+            destination (str): Customer ID receiving the funds.
+            amount (Money | float | Decimal | str): The amount to transfer. Must be positive.
+            key (str): Optional idempotency key, unique per logical transfer.
+
+        Returns:
+            TransferRecord: The settled transfer, with both balances after it.
+
+        Raises:
+            ValueError: If either customer ID is not found in the database.
+            ValueError: If the amount is not positive, or destination is this account.
+            ValueError: If the accounts hold different currencies.
+            OverdraftError: If the transfer would breach the account's floor or overdraft limit.
+            DailyLimitError: If the transfer would exceed the rolling withdrawal limit.
+            ConcurrentUpdateError: If the balance kept changing for CAS_RETRIES attempts.
+            IdempotencyConflictError: If key was already used for a different transfer.
+        """
+        if destination == self.cust_id:
+            raise ValueError('Cannot transfer to the same account')
+        store = self._get_store()
+        currency = store.get_currency(self.cust_id)
+        if currency is None:
             raise ValueError("Customer ID not found")
+        amount = Money.of(amount, currency)
+        if amount.currency != currency:
+            raise ValueError(f'Currency mismatch: account is {currency}')
+        if amount <= 0:
+            raise ValueError('Transfer amount must be positive')
 
-        # Add deposit to the deposit list
-        transactions_db[self.cust_id]['deposit'].append(deposit)
-        transactions_db[self.cust_id]['balance'] += deposit
+        try:
+            records, replayed = self._transfer(store, destination, amount, key)
+        except KeyError:
+            raise ValueError("Customer ID not found") from None
+        except OverdraftError as error:
+            get_event_log().warning(
+                'transaction.declined', cust_id=self.cust_id, amount=amount, destination=destination, reason=str(error)
+            )
+            raise
+        record = records[0]
+        if replayed[0] and not record.matches(self.cust_id, destination, amount.minor):
+            raise IdempotencyConflictError(f'Idempotency key {key!r} was already used for a different transfer')
 
-        new_balance = transactions_db[self.cust_id]['balance']
-        print(f"Deposited ${deposit:.2f}")
-        print(f"${new_balance:.2f}")
+        get_event_log().info(
+            'transaction.transfer', source=self.cust_id, destination=destination, amount=amount, key=key, replayed=replayed[0]
+        )
+        if not replayed[0]:
+            get_account_activity().record_many(
+                [self.cust_id, destination], [WITHDRAW, DEPOSIT], [amount.minor] * 2,
+                [record.source_balance.minor, record.destination_balance.minor], [currency] * 2,
+            )
+        return record
 
-        return new_balance
+    def _transfer(self, store, destination, amount, key):
+        """Checks the overdraft policy on the withdraw leg and settles a transfer; returns (records, replayed)."""
+        transfers = [(key, self.cust_id, destination, amount.minor)]
+        policy = self._get_policy()
+        if not policy.enabled:
+            return store.apply_transfers(transfers)
+        if key is not None:
+            # A retry is answered from the journal, not checked again.
+            record = store.get_transfer(key)
+            if record is not None:
+                return [record], [True]
+        history = None
+        if policy.needs_history(self.cust_id, store):
+            history = store.withdrawals_since(self.cust_id, policy.window_start())
 
-    def withdraw(self, withdraw):
+        # Compare-and-set on the source balance, as in _withdraw.
+        with policy.reserve(self.cust_id, amount, history, store=store):
+            for _ in range(CAS_RETRIES):
+                balance = store.get_balance(self.cust_id)
+                if balance is None:
+                    raise ValueError("Customer ID not found")
+                policy.check(self.cust_id, balance, amount)
+
+                try:
+                    return store.apply_transfers(transfers, expected={self.cust_id: balance.minor})
+                except ConcurrentUpdateError:
+                    continue
+            raise ConcurrentUpdateError(f'Transfer from {self.cust_id} kept conflicting with concurrent postings')
+
+    def withdraw(self, withdraw, key=None):
         """
         Withdraw funds from the customer's account.
 
         This method subtracts the specified amount from the customer's current balance
         in the transaction database. If the customer ID does not exist in the
         database or the withdrawal would cause an overdraft, appropriate errors are raised.
+        A retry carrying the key of a withdrawal that was already made returns
+        that withdrawal's balance without debiting the account again.
 
         Args:
-            withdraw (float): The amount to withdraw from the account. Must be a
-                             positive number.
+            withdraw (Money | float | Decimal | str): The amount to withdraw from the
+                             account. Must be a positive number.
+            key (str): Optional idempotency key, unique per logical withdrawal.
 
         Returns:
-            float: The new account balance after the withdraw.
+            Money: The new account balance after the withdraw.
 
         Raises:
             ValueError: If the customer ID is not found in the database.
             ValueError: If the withdraw amount is not positive.
-            OverdraftError: If the withdrawal would cause an overdraft.
+            OverdraftError: If the withdrawal would breach the account's floor or overdraft limit.
+            DailyLimitError: If the withdrawal would exceed the rolling withdrawal limit.
+            ConcurrentUpdateError: If the balance kept changing for CAS_RETRIES attempts.
+            IdempotencyConflictError: If key was already used for a different posting.
         """
+        withdraw = Money.of(withdraw)
         if withdraw <= 0:
             raise ValueError('Withdraw amount must be positive')
 
-        if self.cust_id not in transactions_db:
-            raise ValueError("Customer ID not found")
+        store = self._get_store()
+        try:
+            new_balance, replayed = self._post_once(
+                store, 'withdraw', withdraw, key, lambda key: self._withdraw(store, withdraw, key)
+            )
+        except OverdraftError as error:
+            get_event_log().warning('transaction.declined', cust_id=self.cust_id, amount=withdraw, reason=str(error))
+            raise
 
-        # The current implementation allows overdrafts, but we should add protection
-        # Uncomment the following lines to enable overdraft protection:
-        # if withdraw > transactions_db[self.cust_id]['balance']:
-        #     raise OverdraftError(f"Insufficient funds: Cannot withdraw ${withdraw:.2f} "
-        #                         f"from balance of ${transactions_db[self.cust_id]['balance']:.2f}")
+        if replayed:
+            get_event_log().info('transaction.replayed', cust_id=self.cust_id, kind='withdraw', amount=withdraw, key=key)
+        else:
+            get_event_log().info('transaction.withdraw', cust_id=self.cust_id, amount=withdraw, balance=new_balance)
+            get_account_activity().record(self.cust_id, 'withdraw', withdraw, new_balance)
+        return new_balance
 
-        # Add withdrawal to the withdraw list
-        transactions_db[self.cust_id]['withdraw'].append(withdraw)
-        transactions_db[self.cust_id]['balance'] -= withdraw
+    def _withdraw(self, store, withdraw, key):
+        """Checks the overdraft policy and posts a withdrawal; returns the new balance."""
+        policy = self._get_policy()
+        history = None
+        if policy.needs_history(self.cust_id, store):
+            history = store.withdrawals_since(self.cust_id, policy.window_start())
 
-        new_balance = transactions_db[self.cust_id]['balance']
-        print(f"Withdraw ${withdraw:.2f}")
-        print(f"${new_balance:.2f}")
-        return new_balance
+        # Read and validate the balance, then post only if it is still the balance
+        # that was validated (compare-and-set); a concurrent posting to the same
+        # account sends us round again instead of being overwritten.
+        with policy.reserve(self.cust_id, withdraw, history, store=store):
+            for _ in range(CAS_RETRIES):
+                balance = store.get_balance(self.cust_id)
+                if balance is None:
+                    raise ValueError("Customer ID not found")
+                policy.check(self.cust_id, balance, withdraw)
+
+                try:
+                    return store.apply_transaction(self.cust_id, 'withdraw', withdraw, expected=balance, key=key)
+                except KeyError:
+                    raise ValueError("Customer ID not found") from None
+                except ConcurrentUpdateError:
+                    continue
+            raise ConcurrentUpdateError(f'Withdraw from {self.cust_id} kept conflicting with concurrent postings')
+
+    @classmethod
+    def apply_batch(cls, records, store=None, policy=None):
+        """
+        Posts many deposits and withdrawals in one pass.
+
+        Records are validated up front (amounts are converted in one vectorized
+        call), grouped per account, and handed to the store in a single bulk
+        operation, so a payroll file does not pay per-call overhead for every line.
+        Invalid records are rejected individually; the rest are still applied.
+        Withdrawals are checked against the overdraft policy in bulk, in input
+        order per account.
+
+        Args:
+            records (iterable): (cust_id, type, amount) tuples, where type is
+                'deposit' or 'withdraw'.
+            store (AccountStore): Optional storage backend.
+            policy (OverdraftPolicy): Optional withdrawal rules; defaults to the
+                process-wide policy.
+
+        Returns:
+            BatchResult: The balance after each applied record and the reason
+                each rejected record was refused, in input order.
+
+        Examples:
+            >>> result = AccountTransactions.apply_batch([('1001', 'deposit', 10.00)])
+            >>> result.balances
+            [Money('81.72', 'USD')]
+        """
+        records = list(records)
+        result = BatchResult(records)
+        if store is None:
+            store = get_store(transactions=transactions_db)
+        if not records:
+            return result
+
+        errors = result.errors
+        cust_ids, kinds, amounts = _batch_columns(records, errors)
+        count = len(records)
+        minor, valid, plain = _batch_minor_units(amounts)
+        codes = np.fromiter(map(KIND_CODES.get, kinds, repeat(0)), dtype=np.int8, count=count)
+
+        # One store lookup per distinct account.
+        slots = dict.fromkeys(cust_ids)
+        accounts = list(slots)
+        slots.update(zip(accounts, range(len(accounts))))
+        slot_of = np.fromiter(map(slots.__getitem__, cust_ids), dtype=np.int64, count=count)
+        known = [cust_id for cust_id in accounts if cust_id is not None]
+        found_in = dict(zip(known, store.get_currencies(known)))
+        currencies = [found_in.get(cust_id) for cust_id in accounts]
+        default_scale = minor_unit_scale(DEFAULT_CURRENCY)
+        found = np.array([currency is not None for currency in currencies])[slot_of]
+        exact = np.array([currency is not None and minor_unit_scale(currency) == default_scale for currency in currencies])[slot_of]
+
+        # Amounts given as Money, or posted to accounts whose minor unit differs
+        # from USD, are converted individually in the account currency.
+        for index in np.flatnonzero(found & (codes > 0) & ~(exact & plain)).tolist():
+            currency = currencies[slot_of[index]]
+            try:
+                money = Money.of(amounts[index], currency)
+            except (OverflowError, ValueError):
+                valid[index] = False
+                continue
+            if money.currency != currency:
+                errors[index] = f'Currency mismatch: account is {currency}'
+                valid[index] = False
+                continue
+            minor[index] = money.minor
+            valid[index] = True
+
+        ok = found & (codes > 0) & valid & (minor > 0)
+        for index in np.flatnonzero(~ok).tolist():
+            if errors[index] is not None:
+                continue
+            kind = kinds[index]
+            if not codes[index]:
+                errors[index] = f'Unknown transaction type: {kind}'
+            elif not found[index]:
+                errors[index] = 'Customer ID not found'
+            else:
+                errors[index] = f'{kind.capitalize()} amount must be positive'
+
+        # Group the accepted records by account (stable, so each account keeps
+        # input order) and post them in one store call.
+        applied = np.flatnonzero(ok)
+        order = applied[np.argsort(slot_of[applied], kind='stable')]
+        counts = np.bincount(slot_of[order], minlength=len(accounts))
+        posted = np.flatnonzero(counts)
+        deltas = np.where(codes[order] == DEPOSIT, minor[order], -minor[order])
+        balances, ok, reasons = _post_batch(
+            store,
+            get_overdraft_policy() if policy is None else policy,
+            [accounts[slot] for slot in posted.tolist()],
+            [currencies[slot] for slot in posted.tolist()],
+            counts[posted],
+            codes[order],
+            deltas,
+        )
+        for position in np.flatnonzero(~ok).tolist():
+            errors[order[position]] = reasons[position]
+        order = order[ok]
+
+        result.balance_minor[order] = balances
+        result._applied[order] = True
+        result._currencies = [currencies[slot] for slot in slot_of.tolist()]
+        get_event_log().info('transaction.batch', applied=len(order), rejected=count - len(order))
+        get_account_activity().record_many(
+            [cust_ids[index] for index in order.tolist()], codes[order], minor[order], balances,
+            [currencies[slot] for slot in slot_of[order].tolist()],
+        )
+        return result
+
+    @classmethod
+    def transfer_batch(cls, transfers, store=None, policy=None):
+        """
+        Settles many transfers at once by net position.
+
+        Transfers are validated individually and the accepted ones are folded
+        into one net change per account, so an account touched by a thousand
+        transfers in the batch gets a single ledger entry and balance write. The
+        whole settlement is atomic. Withdraw legs are checked against the
+        overdraft policy as apply_batch checks withdrawals; a refused transfer is
+        rejected with the policy's reason. Transfers with an idempotency key that
+        was already settled are reported as replays and not applied again.
+
+        Args:
+            transfers (iterable): (source, destination, amount) or
+                (source, destination, amount, key) tuples.
+            store (AccountStore): Optional storage backend.
+            policy (OverdraftPolicy): Optional withdrawal rules; defaults to the
+                process-wide policy.
+
+        Returns:
+            TransferBatchResult: The record, replay flag, and rejection reason of
+                each transfer, in input order.
+        """
+        transfers = list(transfers)
+        result = TransferBatchResult(transfers)
+        if store is None:
+            store = get_store(transactions=transactions_db)
+        errors = result.errors
+
+        columns = []
+        for index, transfer in enumerate(transfers):
+            try:
+                source, destination, amount, *key = transfer
+                if len(key) > 1:
+                    raise ValueError
+            except (TypeError, ValueError):
+                errors[index] = 'Malformed record'
+                source, destination, amount, key = None, None, 0, ()
+            columns.append((source, destination, amount, key[0] if key else None))
+        minor, valid, plain = _batch_minor_units([column[2] for column in columns])
+        currencies = {cust_id: None for column in columns for cust_id in column[:2]}
+        known = [cust_id for cust_id in currencies if cust_id is not None]
+        currencies.update(zip(known, store.get_currencies(known)))
+        default_scale = minor_unit_scale(DEFAULT_CURRENCY)
+
+        accepted = []
+        positions = []
+        for index, (source, destination, amount, key) in enumerate(columns):
+            if errors[index] is not None:
+                continue
+            currency = currencies[source]
+            if currency is None or currencies[destination] is None:
+                errors[index] = 'Customer ID not found'
+                continue
+            if source == destination:
+                errors[index] = 'Cannot transfer to the same account'
+                continue
+            if currency != currencies[destination]:
+                errors[index] = f'Currency mismatch: {source} is {currency}, {destination} is {currencies[destination]}'
+                continue
+            amount_minor = int(minor[index])
+            if not (plain[index] and minor_unit_scale(currency) == default_scale):
+                try:
+                    money = Money.of(amount, currency)
+                except (OverflowError, ValueError):
+                    money = None
+                if money is not None and money.currency != currency:
+                    errors[index] = f'Currency mismatch: account is {currency}'
+                    continue
+                valid[index] = money is not None
+                amount_minor = money.minor if money is not None else 0
+            if not valid[index] or amount_minor <= 0:
+                errors[index] = 'Transfer amount must be positive'
+                continue
+            accepted.append((key, source, destination, amount_minor))
+            positions.append(index)
+
+        policy = policy if policy is not None else get_overdraft_policy()
+        records, replayed, refusals = _settle_transfers(store, policy, accepted) if accepted else ([], [], [])
+        for index, transfer, record, was_replayed, refusal in zip(positions, accepted, records, replayed, refusals):
+            if refusal is not None:
+                errors[index] = refusal
+                continue
+            if was_replayed and not record.matches(*transfer[1:]):
+                errors[index] = f'Idempotency key {transfer[0]!r} was already used for a different transfer'
+                continue
+            result.records[index] = record
+            result.replayed[index] = was_replayed
+
+        settled = [record for record, was_replayed in zip(result.records, result.replayed) if record is not None and not was_replayed]
+        get_account_activity().record_many(
+            [cust_id for record in settled for cust_id in (record.source, record.destination)],
+            [WITHDRAW, DEPOSIT] * len(settled),
+            [record.amount.minor for record in settled for _ in range(2)],
+            [balance.minor for record in settled for balance in (record.source_balance, record.destination_balance)],
+            [record.amount.currency for record in settled for _ in range(2)],
+        )
+        get_event_log().info(
+            'transaction.transfer_batch',
+            applied=result.applied,
+            accounts=len({cust_id for transfer in accepted for cust_id in transfer[1:3]}),
+            replayed=sum(result.replayed),
+            rejected=len(result.rejected),
+        )
+        return result
 
 # Test code moved to a main block to prevent it from running when imported
 if __name__ == "__main__":
@@ -8,17 +8,15 @@ from unittest import mock
 def BankAccount():
     """Import and return the BankAccount class."""
     with mock.patch('banking_system.model.account.accounts_db', {}):
-        with mock.patch('builtins.print'):
-            from banking_system.model.account import BankAccount as BA
-            return BA
+        from banking_system.model.account import BankAccount as BA
+        return BA
 
 @pytest.fixture
 def AccountTransactions():
     """Import and return the AccountTransactions class."""
     with mock.patch('banking_system.model.transactions.transactions_db', {}):
-        with mock.patch('builtins.print'):
-            from banking_system.model.transactions import AccountTransactions as AT
-            return AT
+        from banking_system.model.transactions import AccountTransactions as AT
+        return AT
 
 @pytest.fixture
 def mock_accounts_db():
@@ -53,7 +51,7 @@ def setup_account_with_balance(AccountTransactions):
         }
     }) as mock_db:
         account = AccountTransactions('1001')
-        return account, mock_db
+        yield account, mock_db
 import pytest
 from unittest import mock
 
@@ -83,3 +81,14 @@ def sample_customer_data():
         "state": "TS",
         "zip": "12345"
     }
+
+@pytest.fixture
+def event_sink():
+    """Route the event log to an in-memory ring buffer at DEBUG level."""
+    from banking_system.events.event_log import DEBUG, EventLog, set_event_log
+    from banking_system.events.sinks import RingBufferSink
+
+    sink = RingBufferSink()
+    previous = set_event_log(EventLog(sink, level=DEBUG, background=False))
+    yield sink
+    set_event_log(previous)
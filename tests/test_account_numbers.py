@@ -0,0 +1,50 @@
+"""Tests for account number allocation."""
+
+import pytest
+from unittest import mock
+
+from banking_system.db.account_numbers import AccountNumberAllocator, is_valid_luhn, luhn_check_digit
+
+
+def test_generate_is_fixed_width_single_draw():
+    """Test that small draws are zero-padded to the full width."""
+    allocator = AccountNumberAllocator()
+
+    with mock.patch('random.randint', return_value=42) as mock_randint:
+        assert allocator.generate() == '000000000042'
+        mock_randint.assert_called_once_with(0, 10 ** 12 - 1)
+
+
+def test_luhn_check_digit():
+    """Test the Luhn check digit against a known value."""
+    assert luhn_check_digit('7992739871') == '3'
+    assert is_valid_luhn('79927398713')
+    assert not is_valid_luhn('79927398710')
+
+
+def test_generate_with_check_digit():
+    """Test that check-digit numbers are the right length and validate."""
+    allocator = AccountNumberAllocator(check_digit=True)
+
+    for _ in range(50):
+        acct_num = allocator.generate()
+        assert len(acct_num) == 12
+        assert is_valid_luhn(acct_num)
+
+
+def test_allocate_many_returns_distinct_unused_numbers():
+    """Test bulk allocation skips taken numbers and never repeats itself."""
+    allocator = AccountNumberAllocator()
+    taken = {'000000000001'}
+
+    with mock.patch('random.randint', side_effect=[1, 2, 2, 3]):
+        assert allocator.allocate_many(2, taken) == ['000000000002', '000000000003']
+
+
+def test_allocate_many_raises_when_space_exhausted():
+    """Test bulk allocation fails cleanly on a full number space."""
+    allocator = AccountNumberAllocator(length=1, max_attempts=50)
+    taken = {str(digit) for digit in range(9)}
+
+    with pytest.raises(RuntimeError):
+        allocator.allocate_many(2, taken)
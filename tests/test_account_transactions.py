@@ -7,9 +7,8 @@ from unittest import mock
 def AccountTransactions():
     """Import and return the AccountTransactions class."""
     with mock.patch('banking_system.model.transactions.transactions_db', {}):
-        with mock.patch('builtins.print'):
-            from banking_system.model.transactions import AccountTransactions as AT
-            return AT
+        from banking_system.model.transactions import AccountTransactions as AT
+        return AT
 
 @pytest.fixture
 def mock_transactions_db():
@@ -28,7 +27,7 @@ def setup_account_with_balance(AccountTransactions):
         }
     }) as mock_db:
         account = AccountTransactions('1001')
-        return account, mock_db
+        yield account, mock_db
 
 
 def test_account_transactions_initialization(AccountTransactions):
@@ -37,14 +36,13 @@ def test_account_transactions_initialization(AccountTransactions):
     assert account.cust_id == "1001"
 
 
-def test_balance_existing_account(setup_account_with_balance):
+def test_balance_existing_account(setup_account_with_balance, event_sink):
     """Test balance method with an existing account."""
     account, _ = setup_account_with_balance
 
-    with mock.patch('builtins.print') as mock_print:
-        balance = account.balance()
-        assert balance == 75.00
-        mock_print.assert_called_with('$75.0')
+    balance = account.balance()
+    assert balance == 75.00
+    assert event_sink.messages()[-1] == '$75.00'
 
 
 def test_balance_nonexistent_account(mock_transactions_db, AccountTransactions):
@@ -57,20 +55,20 @@ def test_balance_nonexistent_account(mock_transactions_db, AccountTransactions):
     assert "Customer ID 9999 not found in the database" in str(excinfo.value)
 
 
-def test_deposit_valid_amount(setup_account_with_balance):
+def test_deposit_valid_amount(setup_account_with_balance, event_sink):
     """Test deposit with a valid amount."""
     account, mock_db = setup_account_with_balance
 
-    with mock.patch('builtins.print') as mock_print:
-        new_balance = account.deposit(50.00)
+    new_balance = account.deposit(50.00)
 
-        # Check if the balance was updated correctly
-        assert new_balance == 125.00
-        assert mock_db['1001']['balance'] == 125.00
+    # Check if the balance was updated correctly
+    assert new_balance == 125.00
+    assert mock_db['1001']['balance'] == 125.00
 
-        # Check print statements
-        mock_print.assert_any_call("Deposited $50.00")
-        mock_print.assert_any_call("$125.00")
+    # Check the recorded event
+    event = event_sink.find('transaction.deposit')[-1]
+    assert event.fields == {'cust_id': '1001', 'amount': 50.00, 'balance': 125.00}
+    assert event.message() == 'Deposited $50.00, balance $125.00'
 
 
 def test_deposit_negative_amount(setup_account_with_balance):
@@ -107,20 +105,18 @@ def test_deposit_to_nonexistent_account(mock_transactions_db, AccountTransaction
     assert "Customer ID not found" in str(excinfo.value)
 
 
-def test_withdraw_valid_amount(setup_account_with_balance):
+def test_withdraw_valid_amount(setup_account_with_balance, event_sink):
     """Test withdraw with a valid amount."""
     account, mock_db = setup_account_with_balance
 
-    with mock.patch('builtins.print') as mock_print:
-        new_balance = account.withdraw(25.00)
+    new_balance = account.withdraw(25.00)
 
-        # Check if the balance was updated correctly
-        assert new_balance == 50.00
-        assert mock_db['1001']['balance'] == 50.00
+    # Check if the balance was updated correctly
+    assert new_balance == 50.00
+    assert mock_db['1001']['balance'] == 50.00
 
-        # Check print statements
-        mock_print.assert_any_call("Withdraw $25.00")
-        mock_print.assert_any_call("$50.00")
+    # Check the recorded event
+    assert event_sink.messages()[-1] == 'Withdraw $25.00, balance $50.00'
 
 
 def test_withdraw_negative_amount(setup_account_with_balance):
@@ -162,25 +158,23 @@ def test_withdraw_entire_balance(setup_account_with_balance):
     """Test withdrawing the entire balance."""
     account, mock_db = setup_account_with_balance
 
-    with mock.patch('builtins.print') as mock_print:
-        new_balance = account.withdraw(75.00)
+    new_balance = account.withdraw(75.00)
 
-        # Check if the balance was updated correctly
-        assert new_balance == 0.00
-        assert mock_db['1001']['balance'] == 0.00
+    # Check if the balance was updated correctly
+    assert new_balance == 0.00
+    assert mock_db['1001']['balance'] == 0.00
 
 
 def test_withdraw_more_than_balance(setup_account_with_balance):
     """Test withdrawing more than the balance."""
     account, mock_db = setup_account_with_balance
 
-    with mock.patch('builtins.print') as mock_print:
-        # The current implementation allows overdraft
-        new_balance = account.withdraw(100.00)
+    # The current implementation allows overdraft
+    new_balance = account.withdraw(100.00)
 
-        # Check if the balance was updated correctly (negative balance)
-        assert new_balance == -25.00
-        assert mock_db['1001']['balance'] == -25.00
+    # Check if the balance was updated correctly (negative balance)
+    assert new_balance == -25.00
+    assert mock_db['1001']['balance'] == -25.00
 
 
 def test_deposit_very_large_amount(setup_account_with_balance):
@@ -188,25 +182,114 @@ def test_deposit_very_large_amount(setup_account_with_balance):
     account, mock_db = setup_account_with_balance
     large_amount = 1000000000.00  # 1 billion
 
-    with mock.patch('builtins.print') as mock_print:
-        new_balance = account.deposit(large_amount)
+    new_balance = account.deposit(large_amount)
 
-        # Check if the balance was updated correctly
-        assert new_balance == 75.00 + large_amount
-        assert mock_db['1001']['balance'] == 75.00 + large_amount
+    # Check if the balance was updated correctly
+    assert new_balance == 75.00 + large_amount
+    assert mock_db['1001']['balance'] == 75.00 + large_amount
 
 
 def test_multiple_operations(setup_account_with_balance):
     """Test multiple operations in sequence."""
     account, mock_db = setup_account_with_balance
 
-    with mock.patch('builtins.print'):
-        # Perform multiple operations
-        account.deposit(100.00)    # 75 + 100 = 175
-        account.withdraw(50.00)    # 175 - 50 = 125
-        account.deposit(25.00)     # 125 + 25 = 150
-        final_balance = account.withdraw(30.00)  # 150 - 30 = 120
-
-        # Check final balance
-        assert final_balance == 120.00
-        assert mock_db['1001']['balance'] == 120.00
+    # Perform multiple operations
+    account.deposit(100.00)    # 75 + 100 = 175
+    account.withdraw(50.00)    # 175 - 50 = 125
+    account.deposit(25.00)     # 125 + 25 = 150
+    final_balance = account.withdraw(30.00)  # 150 - 30 = 120
+
+    # Check final balance
+    assert final_balance == 120.00
+    assert mock_db['1001']['balance'] == 120.00
+
+
+# Batch posting
+def test_apply_batch_posts_records_in_order(setup_account_with_balance, AccountTransactions):
+    """Test a batch applies every valid record and reports running balances."""
+    _, mock_db = setup_account_with_balance
+
+    result = AccountTransactions.apply_batch([
+        ('1001', 'deposit', 100.00),
+        ('1001', 'withdraw', 50.00),
+        ('1001', 'deposit', '0.10'),
+    ])
+
+    assert result.balances == [175.00, 125.00, 125.10]
+    assert result.rejected == []
+    assert result.applied == 3
+    assert mock_db['1001']['balance'] == 125.10
+
+
+def test_apply_batch_rejects_invalid_records(setup_account_with_balance, AccountTransactions):
+    """Test invalid records are rejected individually while the rest apply."""
+    _, mock_db = setup_account_with_balance
+
+    result = AccountTransactions.apply_batch([
+        ('1001', 'deposit', 10.00),
+        ('9999', 'deposit', 10.00),
+        ('1001', 'transfer', 10.00),
+        ('1001', 'withdraw', -5.00),
+        ('1001', 'deposit', 'ten'),
+        ('1001',),
+    ])
+
+    assert result.balances[0] == 85.00
+    assert result.balances[1:] == [None] * 5
+    assert [(index, reason) for index, _, reason in result.rejected] == [
+        (1, 'Customer ID not found'),
+        (2, 'Unknown transaction type: transfer'),
+        (3, 'Withdraw amount must be positive'),
+        (4, 'Deposit amount must be positive'),
+        (5, 'Malformed record'),
+    ]
+    assert mock_db['1001']['balance'] == 85.00
+
+
+def test_apply_batch_matches_individual_calls(mock_transactions_db, AccountTransactions):
+    """Test a batch ends at the same balances as looping deposit/withdraw."""
+    for cust_id in ('1001', '1002'):
+        mock_transactions_db[cust_id] = {'deposit': [], 'withdraw': [], 'balance': 0.00}
+    records = [('1001', 'deposit', 0.10)] * 10 + [('1002', 'deposit', 5.00), ('1002', 'withdraw', 7.50)]
+
+    result = AccountTransactions.apply_batch(records)
+
+    assert mock_transactions_db['1001']['balance'] == 1.00
+    assert mock_transactions_db['1002']['balance'] == -2.50
+    assert result.applied == 12
+
+
+def test_apply_batch_converts_in_account_currency(mock_transactions_db, AccountTransactions):
+    """Test records for non-USD accounts and Money amounts are checked per record."""
+    from banking_system.db.ledger import Ledger
+    from banking_system.model.money import Money
+
+    mock_transactions_db['2001'] = Ledger(0, 'JPY')
+    result = AccountTransactions.apply_batch([
+        ('2001', 'deposit', 500),
+        ('2001', 'deposit', Money(100, 'JPY')),
+        ('2001', 'deposit', Money(100, 'USD')),
+    ])
+
+    assert result.balances == [Money(500, 'JPY'), Money(600, 'JPY'), None]
+    assert result.errors[2] == 'Currency mismatch: account is JPY'
+    assert result.balance_minor[:2].tolist() == [500, 600]
+
+
+def test_apply_batch_rounds_sub_cent_amounts_like_single_postings(mock_transactions_db, AccountTransactions):
+    """Test a batch of sub-cent amounts ends at the same balances as looping deposit/withdraw."""
+    amounts = [1.005, 2.675, 0.125, 1.015, 0.285, 3, 10.0049]
+    for cust_id in ('1001', '1002'):
+        mock_transactions_db[cust_id] = {'deposit': [], 'withdraw': [], 'balance': 100.00}
+
+    looped = AccountTransactions('1001')
+    for amount in amounts:
+        looped.deposit(amount)
+        looped.withdraw(amount / 3)
+    result = AccountTransactions.apply_batch(
+        [record for amount in amounts for record in (('1002', 'deposit', amount), ('1002', 'withdraw', amount / 3))]
+    )
+
+    assert result.applied == 2 * len(amounts)
+    assert mock_transactions_db['1002']['balance'] == mock_transactions_db['1001']['balance']
+    assert mock_transactions_db['1002'].to_dict() == mock_transactions_db['1001'].to_dict()
@@ -0,0 +1,101 @@
+"""Tests for the secondary indexes in accounts_store."""
+
+from banking_system.db.accounts_store import (
+    CustomerTable,
+    account_indexes,
+    delete_customer,
+    find_by_acct_num,
+    insert_customer,
+    normalize_name,
+    update_customer,
+)
+from banking_system.model.customer import Customer
+
+
+def make_record(first_name, last_name, acct_num='123456789012'):
+    """Build a minimal customer record."""
+    return {'first_name': first_name, 'last_name': last_name, 'acct_num': acct_num}
+
+
+def test_normalize_name_ignores_case_and_whitespace():
+    """Test that name normalization folds case and collapses whitespace."""
+    assert normalize_name('  Mary   Ann ', 'SMITH') == ('mary ann', 'smith')
+
+
+def test_index_built_from_existing_records():
+    """Test the name index picks up records already in the store."""
+    store = {'1001': make_record('Briana', 'Smith')}
+
+    assert account_indexes(store).names.find('briana', ' smith ') == {'1001'}
+
+
+def test_insert_update_delete_keep_index_consistent():
+    """Test that writes through the helpers keep the name index in sync."""
+    store = {}
+    insert_customer(store, '1001', make_record('Jane', 'Doe'))
+    insert_customer(store, '1002', make_record('jane', 'DOE'))
+    names = account_indexes(store).names
+
+    assert names.find('Jane', 'Doe') == {'1001', '1002'}
+
+    update_customer(store, '1002', last_name='Roe')
+    assert names.find('Jane', 'Doe') == {'1001'}
+    assert names.find('Jane', 'Roe') == {'1002'}
+
+    delete_customer(store, '1001')
+    assert names.find('Jane', 'Doe') == frozenset()
+    assert '1001' not in store
+
+
+def test_direct_dict_writes_trigger_rebuild():
+    """Test the index notices records written straight into the dict."""
+    store = {}
+    account_indexes(store)
+    store['1001'] = make_record('John', 'Doe')
+
+    assert account_indexes(store).names.find('John', 'Doe') == {'1001'}
+
+
+def test_acct_num_index_follows_writes():
+    """Test the acct_num reverse index tracks inserts, updates, and deletes."""
+    store = {}
+    insert_customer(store, '1001', make_record('Jane', 'Doe', '111111111111'))
+
+    assert find_by_acct_num(store, '111111111111') == '1001'
+
+    update_customer(store, '1001', acct_num='222222222222')
+    assert find_by_acct_num(store, '111111111111') is None
+    assert find_by_acct_num(store, '222222222222') == '1001'
+
+    delete_customer(store, '1001')
+    assert find_by_acct_num(store, '222222222222') is None
+
+
+def test_same_size_overwrites_and_renames_are_not_served_stale():
+    """Test direct overwrites and field edits never return the customer that used to match."""
+    table = CustomerTable({'1001': Customer('Jane', 'Doe', '111111111111')})
+    plain = {'1001': make_record('Jane', 'Doe', '111111111111')}
+    for store in (table, plain):
+        assert find_by_acct_num(store, '111111111111') == '1001'
+        store['1001'] = make_record('John', 'Roe', '222222222222')
+
+        assert find_by_acct_num(store, '111111111111') is None
+        assert find_by_acct_num(store, '222222222222') == '1001'
+        assert account_indexes(store).find_by_name('Jane', 'Doe') == frozenset()
+
+    table['1001'] = Customer('Ann', 'Lee', '333333333333')
+    assert account_indexes(table).find_by_name('Ann', 'Lee') == {'1001'}
+    table['1001']['last_name'] = 'Poe'
+    assert account_indexes(table).names.find('Ann', 'Lee') == frozenset()
+    assert account_indexes(table).find_by_name('Ann', 'Poe') == {'1001'}
+
+
+def test_each_store_keeps_its_own_indexes():
+    """Test using one store does not discard or rebuild another's indexes."""
+    first = {'1001': make_record('Jane', 'Doe')}
+    second = {'2001': make_record('John', 'Roe')}
+    indexes = account_indexes(first)
+
+    assert account_indexes(second).find_by_name('John', 'Roe') == {'2001'}
+    assert account_indexes(first) is indexes
+    assert indexes.find_by_name('Jane', 'Doe') == {'1001'}
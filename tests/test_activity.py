@@ -0,0 +1,180 @@
+"""Tests for the per-account activity feed."""
+
+import numpy as np
+import pytest
+
+from banking_system.db.ledger import DEPOSIT, WITHDRAW, Ledger
+from banking_system.db.storage import MemoryStore
+from banking_system.model.account import BankAccount
+from banking_system.model.activity import AccountActivity, set_account_activity
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+NOW = 1_772_000_000.0
+
+
+@pytest.fixture
+def activity():
+    """Install a small process-wide feed for the test and restore the previous one after it."""
+    feed = AccountActivity(capacity=4, compact_events=3)
+    previous = set_account_activity(feed)
+    yield feed
+    set_account_activity(previous)
+
+
+def deposits(feed, cust_id, count, first=1):
+    """Records `count` deposits of 1, 2, 3, ... to cust_id."""
+    for amount in range(first, first + count):
+        feed.record(cust_id, 'deposit', Money.of(amount), Money.of(amount * 10), timestamp=NOW + amount)
+
+
+def walk(feed, cust_id, limit):
+    """Returns the seqs of every page of cust_id's feed, and the number of pages."""
+    seqs, cursor, pages = [], None, 0
+    while True:
+        page = feed.page(cust_id, limit, cursor)
+        seqs += [event.seq for event in page]
+        pages += 1
+        cursor = page.next_cursor
+        if cursor is None:
+            return seqs, pages
+
+
+def test_recent_returns_the_newest_events_newest_first():
+    """Test the hot tier keeps the last `capacity` events of each account."""
+    feed = AccountActivity(capacity=4, compact_events=3)
+    feed.record('2001', 'create', timestamp=NOW)
+    deposits(feed, '2001', 6)
+    deposits(feed, '2002', 2)
+
+    recent = feed.recent('2001')
+    assert [event.seq for event in recent] == [6, 5, 4, 3]
+    assert recent[0].amount == Money.of(6) and recent[0].balance == Money.of(60)
+    assert recent[0].timestamp == (NOW + 6) * 1_000_000
+    assert [event.seq for event in feed.recent('2001', limit=2)] == [6, 5]
+    assert [event.kind for event in feed.recent('2002')] == ['deposit', 'deposit']
+    assert feed.recent('9999') == []
+    assert feed.stats() == {'accounts': 2, 'hot': 6, 'spilled': 0, 'cold': 3, 'dropped': 0}
+
+    created = feed.page('2001', limit=10).events[-1]
+    assert (created.seq, created.kind, created.amount) == (0, 'create', None)
+
+
+def test_pages_walk_hot_spilled_and_cold_events():
+    """Test cursors page through every tier once each, even while new events arrive."""
+    feed = AccountActivity(capacity=4, compact_events=5)
+    deposits(feed, '2001', 20)
+    deposits(feed, '2002', 9)
+    assert feed.stats()['spilled'] and feed.stats()['cold']
+
+    seqs, pages = walk(feed, '2001', 3)
+    assert seqs == list(range(19, -1, -1))
+    assert pages == 7
+
+    page = feed.page('2001', 5)
+    deposits(feed, '2001', 3, first=21)
+    following = feed.page('2001', 5, page.next_cursor)
+    assert [event.seq for event in following] == [14, 13, 12, 11, 10]
+    assert [event.amount for event in following] == [Money.of(amount) for amount in (15, 14, 13, 12, 11)]
+
+
+def test_record_many_matches_recording_one_at_a_time():
+    """Test bulk recording (including batches longer than the ring) stores what single records do."""
+    rng = np.random.default_rng(3)
+    cust_ids = [str(1001 + index) for index in rng.integers(0, 4, 60).tolist()]
+    codes = np.where(rng.random(60) < 0.5, DEPOSIT, WITHDRAW)
+    amounts = rng.integers(1, 1_000, 60)
+    balances = np.cumsum(amounts)
+
+    single = AccountActivity(capacity=4, compact_events=7)
+    bulk = AccountActivity(capacity=4, compact_events=7)
+    for cust_id, code, amount, balance in zip(cust_ids, codes.tolist(), amounts.tolist(), balances.tolist()):
+        kind = 'deposit' if code == DEPOSIT else 'withdraw'
+        single.record(cust_id, kind, Money(amount), Money(balance), timestamp=NOW)
+    bulk.record_many(cust_ids[:5], codes[:5], amounts[:5], balances[:5], timestamp=NOW)
+    bulk.record_many(cust_ids[5:], codes[5:], amounts[5:], balances[5:], timestamp=NOW)
+
+    for cust_id in set(cust_ids):
+        expected = [event.to_dict() for event in single.page(cust_id, 100)]
+        assert [event.to_dict() for event in bulk.page(cust_id, 100)] == expected
+        assert len(expected) == cust_ids.count(cust_id)
+
+
+def test_sealed_buffers_merge_into_runs_off_the_posting_path():
+    """Test recording never waits on compaction, and pages read the same before and after it."""
+    rng = np.random.default_rng(11)
+    cust_ids = [str(3001 + index) for index in rng.integers(0, 9, 400).tolist()]
+    reference = AccountActivity(capacity=3, compact_events=100_000)
+    feed = AccountActivity(capacity=3, compact_events=4)
+
+    # With the compactor shut out, spill buffers are only sealed and queued.
+    with feed._compact_lock:
+        for amount, cust_id in enumerate(cust_ids, 1):
+            for each in (reference, feed):
+                each.record(cust_id, 'deposit', Money.of(amount), Money.of(amount), timestamp=NOW + amount)
+        assert len(feed._sealed) > 1 and not feed._runs
+        expected = {cust_id: walk(reference, cust_id, 7)[0] for cust_id in set(cust_ids)}
+        assert {cust_id: walk(feed, cust_id, 7)[0] for cust_id in expected} == expected
+
+    feed.compact()
+    assert not feed._sealed and len(feed._runs) == 1
+    assert feed.stats()['cold'] == reference.stats()['spilled'] == 400 - 3 * len(expected)
+    assert {cust_id: walk(feed, cust_id, 7)[0] for cust_id in expected} == expected
+
+
+def test_cold_tier_drops_the_oldest_events_past_its_bound():
+    """Test the cold tier stays bounded and paging ends where dropped events were."""
+    feed = AccountActivity(capacity=4, compact_events=5, cold_events=20)
+    deposits(feed, '2001', 60)
+    feed.compact()
+
+    stats = feed.stats()
+    assert stats['cold'] <= 20
+    assert stats['cold'] + stats['dropped'] == 56
+    seqs, _ = walk(feed, '2001', 6)
+    assert seqs == list(range(59, 59 - len(seqs), -1))
+    assert len(seqs) == 4 + stats['cold']
+
+
+def test_recent_reuses_its_view_until_the_account_changes():
+    """Test recent() hands out the cached events until another is recorded."""
+    feed = AccountActivity(capacity=4, compact_events=3)
+    deposits(feed, '2001', 6)
+    first = feed.recent('2001')
+    assert all(cached is event for cached, event in zip(feed.recent('2001', 2), first))
+
+    deposits(feed, '2001', 1, first=7)
+    assert [event.seq for event in feed.recent('2001')] == [6, 5, 4, 3]
+    assert feed.recent('2001')[0].amount == Money.of(7)
+
+
+def test_postings_and_account_changes_are_recorded(activity, tmp_path):
+    """Test deposits, withdrawals, transfers, batches, and closing an account land in the feed."""
+    store = MemoryStore({}, {'2001': Ledger(100), '2002': Ledger(0)})
+    cust_id = str(BankAccount('Ann', 'Lee', store=store).create_cust_id('Ann', 'Lee', '1 Main St', 'miami', 'FL', 12345))
+    store.create_ledger(cust_id, 0)
+    account = AccountTransactions('2001', store=store)
+    account.deposit(25)
+    account.withdraw(5)
+    account.transfer('2002', 20)
+    AccountTransactions.apply_batch([('2002', 'withdraw', 1), ('5555', 'deposit', 1), (cust_id, 'deposit', 7)], store=store)
+    BankAccount('Ann', 'Lee', store=store).close_account(cust_id)
+
+    assert [(event.kind, event.amount, event.balance) for event in activity.recent('2001')] == [
+        ('withdraw', Money.of(20), Money.of(100)),
+        ('withdraw', Money.of(5), Money.of(120)),
+        ('deposit', Money.of(25), Money.of(125)),
+    ]
+    assert [(event.kind, event.balance) for event in activity.recent('2002')] == [
+        ('withdraw', Money.of(19)), ('deposit', Money.of(20)),
+    ]
+    assert [event.kind for event in activity.recent(cust_id)] == ['close', 'deposit', 'create']
+    with pytest.raises(ValueError):
+        BankAccount('Ann', 'Lee', store=store).close_account(cust_id)
+
+    activity.save(tmp_path / 'activity.npz')
+    loaded = AccountActivity(capacity=4)
+    loaded.load(tmp_path / 'activity.npz')
+    assert [event.to_dict() for event in loaded.recent('2001')] == [event.to_dict() for event in activity.recent('2001')]
+    with pytest.raises(ValueError):
+        AccountActivity(capacity=8).load(tmp_path / 'activity.npz')
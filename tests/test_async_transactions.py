@@ -0,0 +1,175 @@
+"""Tests for AsyncAccountTransactions and the asyncio storage adapter."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from banking_system.db.async_storage import AsyncStore, get_async_store
+from banking_system.db.dedup import DedupCache
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.db.transfers import IdempotencyConflictError
+from banking_system.model.async_transactions import AsyncAccountTransactions
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+
+class SlowStore(MemoryStore):
+    """MemoryStore that pretends to block on I/O and records backend calls."""
+
+    blocking = True
+
+    def __init__(self, delay=0.01):
+        super().__init__({}, {})
+        self.delay = delay
+        self.reads = 0
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get_balance(self, cust_id):
+        with self._lock:
+            self.reads += 1
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        balance = super().get_balance(cust_id)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return balance
+
+
+def test_balance_deposit_and_withdraw(event_sink):
+    """Test the async API posts to the same ledger as the sync one."""
+    store = MemoryStore({}, {})
+    store.create_ledger('1001', 75)
+    account = AsyncAccountTransactions('1001', store=store)
+
+    async def scenario():
+        assert await account.deposit(25.00) == 100.00
+        assert await account.withdraw('40.00') == 60.00
+        return await account.balance()
+
+    assert asyncio.run(scenario()) == Money.of('60.00')
+    assert [event.name for event in event_sink.events()] == [
+        'transaction.deposit', 'transaction.withdraw', 'balance.read']
+
+
+def test_unknown_account_and_invalid_amounts():
+    """Test the async API raises the same errors as the sync one."""
+    account = AsyncAccountTransactions('9999', store=MemoryStore({}, {}))
+
+    with pytest.raises(ValueError, match='not found'):
+        asyncio.run(account.balance())
+    with pytest.raises(ValueError, match='not found'):
+        asyncio.run(account.deposit(10))
+    with pytest.raises(ValueError, match='must be positive'):
+        asyncio.run(account.withdraw(0))
+
+
+def test_concurrent_balance_reads_are_coalesced():
+    """Test simultaneous reads of one account share a single backend read."""
+    store = SlowStore()
+    store.create_ledger('1001', 50)
+
+    async def scenario():
+        adapter = get_async_store(store)
+        balances = await asyncio.gather(*(AsyncAccountTransactions('1001', store=store).balance() for _ in range(500)))
+        return balances, adapter.stats()
+
+    balances, stats = asyncio.run(scenario())
+
+    assert set(balances) == {Money.of('50.00')}
+    assert store.reads == 1
+    assert stats == {'reads': 500, 'coalesced': 499, 'in_flight': 0}
+
+
+def test_read_after_write_is_not_coalesced_with_older_read():
+    """Test a balance read issued after a deposit sees the deposit."""
+    store = SlowStore(delay=0.05)
+    store.create_ledger('1001', 50)
+    account = AsyncAccountTransactions('1001', store=AsyncStore(store))
+
+    async def scenario():
+        stale = asyncio.ensure_future(account.balance())
+        await asyncio.sleep(0)
+        await account.deposit(10)
+        return await stale, await account.balance()
+
+    stale, fresh = asyncio.run(scenario())
+
+    assert stale in (50, 60)  # depends on whether its thread ran before the deposit
+    assert fresh == 60
+    assert store.reads == 2
+
+
+def test_backend_calls_are_bounded():
+    """Test no more than max_concurrency blocking calls run at once."""
+    store = SlowStore()
+    for index in range(40):
+        store.create_ledger(str(index), index)
+    adapter = AsyncStore(store, max_concurrency=4)
+
+    async def scenario():
+        return await asyncio.gather(*(adapter.get_balance(str(index)) for index in range(40)))
+
+    assert asyncio.run(scenario()) == [Money(index * 100) for index in range(40)]
+    assert store.peak == 4
+
+
+def test_concurrent_postings_on_sqlite(tmp_path):
+    """Test concurrent async deposits and withdrawals on SQLite all land."""
+    store = SQLiteStore(str(tmp_path / 'bank.db'), pool_size=4)
+    store.create_ledger('1001', 100)
+
+    async def scenario():
+        account = AsyncAccountTransactions('1001', store=store)
+        await asyncio.gather(*(account.deposit(1) for _ in range(50)), *(account.withdraw(2) for _ in range(25)))
+        return await account.balance()
+
+    try:
+        assert asyncio.run(scenario()) == Money.of('100.00')
+    finally:
+        store.close()
+
+
+def test_retried_postings_apply_once(event_sink):
+    """Test keyed async postings share the sync API's dedup path, including racing retries."""
+    store = MemoryStore({}, {})
+    store.create_ledger('1001', 100)
+    account = AsyncAccountTransactions('1001', store=store)
+
+    async def scenario():
+        deposits = await asyncio.gather(*(account.deposit(10, key='d-1') for _ in range(5)))
+        withdrawal = await account.withdraw(30, key='w-1')
+        assert await account.withdraw(30, key='w-1') == withdrawal
+        with pytest.raises(IdempotencyConflictError):
+            await account.deposit(11, key='d-1')
+        return deposits, withdrawal
+
+    deposits, withdrawal = asyncio.run(scenario())
+    assert deposits == [Money.of(110)] * 5 and withdrawal == Money.of(80)
+    assert AccountTransactions('1001', store=store).deposit(10, key='d-1') == Money.of(110)
+    assert store.get_balance('1001') == Money.of(80)
+    assert [event.name for event in event_sink.events()].count('transaction.replayed') == 6
+
+
+def test_retried_postings_apply_once_on_sqlite(tmp_path):
+    """Test racing keyed retries on a blocking backend post once, and a retry after the cache forgot the key too."""
+    store = SQLiteStore(str(tmp_path / 'bank.db'), pool_size=4)
+    store.create_ledger('1001', 100)
+
+    async def scenario():
+        account = AsyncAccountTransactions('1001', store=store)
+        balances = await asyncio.gather(*(account.withdraw(5, key='w-1') for _ in range(8)))
+        store._dedup = DedupCache(capacity=1)
+        return balances, await account.withdraw(5, key='w-1'), await account.balance()
+
+    try:
+        balances, retried, balance = asyncio.run(scenario())
+        assert set(balances) == {retried} == {Money.of(95)}
+        assert balance == Money.of(95)
+    finally:
+        store.close()
@@ -9,9 +9,8 @@ from unittest import mock
 def BankAccount():
     """Import and return the BankAccount class."""
     with mock.patch('banking_system.model.account.accounts_db', {}):
-        with mock.patch('builtins.print'):
-            from banking_system.model.account import BankAccount as BA
-            return BA
+        from banking_system.model.account import BankAccount as BA
+        return BA
 
 @pytest.fixture
 def mock_accounts_db():
@@ -46,22 +45,36 @@ def test_create_account_generates_unique_account_number(bank_account):
     assert account_number != second_account_number
 
 
-def test_create_account_recursion_on_duplicate(bank_account):
-    """Test that create_account recursively generates a new account number if a duplicate is found."""
-    # Mock the random.randint to always return the same sequence
-    with mock.patch('random.randint', side_effect=[1] * 12 + [2] * 12):
-        # Add an account with the expected first account number
-        mock_existing_account = {'acct_num': '111111111111'}
+def test_create_account_redraws_on_duplicate(bank_account, mock_accounts_db):
+    """Test that create_account draws a new account number if a duplicate is found."""
+    # Add an account with the expected first account number
+    mock_accounts_db['1001'] = {'first_name': 'John', 'last_name': 'Doe', 'acct_num': '111111111111'}
 
-        # Use a context manager to simulate the account existing in the database
-        with mock.patch('banking_system.model.account.accounts_db.values', return_value=[mock_existing_account]):
-            account_number = bank_account.create_account("Test", "User")
+    # Each candidate is a single draw; the first one collides
+    with mock.patch('random.randint', side_effect=[111111111111, 222222222222]):
+        account_number = bank_account.create_account("Test", "User")
 
-            # The function should have recursed and generated a different account number
-            assert account_number == '222222222222'
+    assert account_number == '222222222222'
 
 
-def test_check_for_account_existing_customer(bank_account, mock_accounts_db):
+def test_create_account_raises_when_space_exhausted(bank_account, mock_accounts_db):
+    """Test that create_account gives up instead of recursing forever."""
+    mock_accounts_db['1001'] = {'first_name': 'John', 'last_name': 'Doe', 'acct_num': '111111111111'}
+
+    with mock.patch('random.randint', return_value=111111111111):
+        with pytest.raises(RuntimeError):
+            bank_account.create_account("Test", "User")
+
+
+def test_lookup_account_by_number(bank_account, mock_accounts_db):
+    """Test looking up the owner of an account number."""
+    mock_accounts_db['1001'] = {'first_name': 'John', 'last_name': 'Doe', 'acct_num': '123456789012'}
+
+    assert bank_account.lookup_account('123456789012') == '1001'
+    assert bank_account.lookup_account('000000000000') is None
+
+
+def test_check_for_account_existing_customer(bank_account, mock_accounts_db, event_sink):
     """Test check_for_account when the customer exists."""
     # Set up mock data
     mock_accounts_db['1001'] = {
@@ -71,19 +84,17 @@ def test_check_for_account_existing_customer(bank_account, mock_accounts_db):
     }
 
     # Test with existing customer
-    with mock.patch('builtins.print') as mock_print:
-        result = bank_account.check_for_account("John", "Doe")
-        assert result is True
-        mock_print.assert_called_with('John Doe already exists in the database.')
+    result = bank_account.check_for_account("John", "Doe")
+    assert result is True
+    assert event_sink.messages()[-1] == 'John Doe already exists in the database.'
 
 
-def test_check_for_account_new_customer(bank_account, mock_accounts_db):
+def test_check_for_account_new_customer(bank_account, mock_accounts_db, event_sink):
     """Test check_for_account when the customer doesn't exist."""
     # Empty mock database
-    with mock.patch('builtins.print') as mock_print:
-        result = bank_account.check_for_account("Jane", "Smith")
-        assert result is False
-        mock_print.assert_called_with('Jane Smith does not exist in the database, needs a new account setup.\nRun create_cust_id')
+    result = bank_account.check_for_account("Jane", "Smith")
+    assert result is False
+    assert event_sink.messages()[-1] == 'Jane Smith does not exist in the database, needs a new account setup.\nRun create_cust_id'
 
 
 def test_create_cust_id_new_customer(bank_account, mock_accounts_db):
@@ -106,16 +117,15 @@ def test_create_cust_id_new_customer(bank_account, mock_accounts_db):
             assert entry['acct_num'] == "123456789012"
 
 
-def test_create_cust_id_existing_customer(bank_account, mock_accounts_db):
+def test_create_cust_id_existing_customer(bank_account, mock_accounts_db, event_sink):
     """Test create_cust_id for an existing customer."""
     # Mock the check_for_account to return True (existing customer)
     with mock.patch.object(bank_account, 'check_for_account', return_value=True):
-        with mock.patch('builtins.print') as mock_print:
-            result = bank_account.create_cust_id("John", "Doe", "123 Main St", "Anytown", "CA", "12345")
+        result = bank_account.create_cust_id("John", "Doe", "123 Main St", "Anytown", "CA", "12345")
 
-            # Verify the result
-            assert result is None
-            mock_print.assert_called_with("Customer John Doe already exists. Skipping account creation.")
+        # Verify the result
+        assert result is None
+        assert event_sink.messages()[-1] == "Customer John Doe already exists. Skipping account creation."
 
 
 def test_create_cust_id_increments_id(bank_account, mock_accounts_db):
@@ -153,3 +163,21 @@ def test_create_cust_id_with_special_characters(bank_account, mock_accounts_db):
             entry = mock_accounts_db.get('1001', mock_accounts_db.get(1001))
             assert entry['first_name'] == "O'Reilly"
             assert entry['last_name'] == "Smith-Jones"
+
+
+def test_check_for_account_ignores_case_and_whitespace(bank_account, mock_accounts_db):
+    """Test duplicate detection matches names regardless of case and spacing."""
+    mock_accounts_db['1001'] = {
+        'first_name': 'John',
+        'last_name': 'Doe',
+        'acct_num': '123456789012'
+    }
+
+    assert bank_account.check_for_account(" JOHN ", "doe") is True
+
+
+def test_create_cust_id_indexes_new_customer(bank_account, mock_accounts_db):
+    """Test that a created customer is immediately visible to duplicate detection."""
+    with mock.patch.object(bank_account, 'create_account', return_value='123456789012'):
+        assert bank_account.create_cust_id("Jane", "Smith", "123 Main St", "Anytown", "CA", "12345") == 1001
+        assert bank_account.create_cust_id("jane", "SMITH", "123 Main St", "Anytown", "CA", "12345") is None
@@ -0,0 +1,81 @@
+"""Tests for the compact Customer record."""
+
+import pickle
+
+import pytest
+
+from banking_system.db.accounts_store import update_customer
+from banking_system.db.storage import MemoryStore
+from banking_system.model.account import BankAccount
+from banking_system.model.customer import Customer
+
+
+def make_record(city='miami', zip_code='33101'):
+    """Build a dict customer record as callers used to."""
+    return {
+        'first_name': 'Jane',
+        'last_name': 'Doe',
+        'acct_num': '111111111111',
+        'address': '1 Main St',
+        'city': city,
+        'state': 'FL',
+        'zip': zip_code,
+    }
+
+
+def test_customer_reads_like_a_dict_record():
+    """Test item access, get, iteration, and equality with the dict it replaces."""
+    customer = Customer.from_record(make_record())
+
+    assert customer['first_name'] == 'Jane'
+    assert customer.get('acct_num') == '111111111111'
+    assert customer.get('email') is None
+    assert list(customer) == ['first_name', 'last_name', 'acct_num', 'address', 'city', 'state', 'zip']
+    assert customer == dict(make_record(), zip=33101)
+    assert dict(make_record(), zip=33101) == customer
+    assert customer.to_dict() == dict(customer)
+    with pytest.raises(KeyError):
+        customer['email']
+
+
+def test_customer_is_compact():
+    """Test records carry no per-instance dict, share city/state strings, and store ZIPs as ints."""
+    first = Customer.from_record(make_record(city=''.join(['mia', 'mi'])))
+    second = Customer.from_record(make_record(city=''.join(['mi', 'ami'])))
+
+    assert not hasattr(first, '__dict__')
+    assert first.city is second.city
+    assert first.zip == 33101 and first.zip is second.zip
+    assert Customer('Ann', 'Lee', zip='02134').zip_code == '02134'
+    assert Customer('Ann', 'Lee', zip='12345-6789').zip == '12345-6789'
+
+
+def test_unknown_fields_are_rejected():
+    """Test a dict with fields a customer does not have raises TypeError."""
+    with pytest.raises(TypeError):
+        Customer.from_record(dict(make_record(), email='jane@example.com'))
+
+
+def test_update_keeps_the_store_indexes_consistent():
+    """Test update_customer changes a stored Customer in place and reindexes it."""
+    store = MemoryStore({}, {})
+    store.put_customer('1001', make_record())
+
+    update_customer(store.accounts, '1001', last_name='Smith', city='tampa', zip='33601')
+
+    record = store.get_customer('1001')
+    assert isinstance(record, Customer)
+    assert (record['last_name'], record.city, record.zip) == ('Smith', 'tampa', 33601)
+    assert store.find_by_name('jane', 'smith') == {'1001'}
+    assert store.find_by_name('jane', 'doe') == frozenset()
+
+
+def test_customer_pickles_and_is_created_by_the_model():
+    """Test records survive pickling (checkpoints) and BankAccount stores Customers."""
+    customer = Customer.from_record(make_record())
+    assert pickle.loads(pickle.dumps(customer)) == customer
+
+    store = MemoryStore({}, {})
+    cust_id = BankAccount('Ann', 'Lee', store=store).create_cust_id('Ann', 'Lee', '1 Main St', 'miami', 'FL', '33101')
+    assert isinstance(store.get_customer(str(cust_id)), Customer)
+    assert store.get_customer(str(cust_id)).zip == 33101
@@ -0,0 +1,127 @@
+"""Tests for the streaming bulk customer import."""
+
+import csv
+import json
+
+import pytest
+
+from banking_system.db.durable_store import DurableStore
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.model.account import BankAccount
+from banking_system.model.customer_import import import_customers, read_rows
+from banking_system.model.money import Money
+
+HEADER = ['first_name', 'last_name', 'address', 'city', 'state', 'zip', 'balance', 'currency']
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'durable'])
+def store(request, tmp_path):
+    """Yield each storage backend in turn."""
+    if request.param == 'memory':
+        yield MemoryStore({}, {})
+    elif request.param == 'durable':
+        durable_store = DurableStore(str(tmp_path / 'wal'), {}, {})
+        yield durable_store
+        durable_store.close()
+    else:
+        sqlite_store = SQLiteStore(str(tmp_path / 'bank.db'))
+        yield sqlite_store
+        sqlite_store.close()
+
+
+def write_csv(path, rows):
+    """Write rows under the import header."""
+    with open(path, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_import_creates_customers_and_opening_ledgers(store, tmp_path):
+    """Test valid rows become customers with fresh IDs, account numbers, and balances."""
+    path = write_csv(tmp_path / 'book.csv', [
+        ['Ann', 'Lee', '1 Main St', 'miami', 'fl', '33101', '250.75', ''],
+        ['Bob', 'Ray', '2 Oak Ave', 'tampa', 'FL', '02134', '', ''],
+        ['Cy', 'Tan', '3 Elm Rd', 'tokyo', 'JP', '10001', '5000', 'jpy'],
+    ])
+
+    report = import_customers(path, store=store, chunk_size=2)
+
+    assert (report.read, report.imported, report.rejected, report.chunks) == (3, 3, 0, 2)
+    customers = dict(store.scan_customers())
+    assert sorted(customers) == ['1001', '1002', '1003']
+    ann = store.find_by_name('ann', 'lee')
+    (cust_id,) = ann
+    record = store.get_customer(cust_id)
+    assert (record['state'], record.zip_code) == ('FL', '33101')
+    assert store.find_by_acct_num(record['acct_num']) == cust_id
+    assert store.get_balance(cust_id) == Money.of('250.75')
+    (bob,) = store.find_by_name('bob', 'ray')
+    assert store.get_customer(bob).zip_code == '02134'
+    assert store.get_balance(bob) == Money.of(0)
+    (cy,) = store.find_by_name('cy', 'tan')
+    assert store.get_balance(cy) == Money.of(5000, 'JPY')
+    assert len({record['acct_num'] for record in customers.values()}) == 3
+
+
+def test_rejects_are_counted_and_written(tmp_path):
+    """Test invalid and duplicate rows are rejected with a reason and nothing else is lost."""
+    store = MemoryStore({}, {})
+    BankAccount('Ann', 'Lee', store=store).create_cust_id('Ann', 'Lee', '1 Main St', 'miami', 'FL', '33101')
+    path = write_csv(tmp_path / 'book.csv', [
+        ['ANN', 'lee', '9 Bay St', 'miami', 'FL', '33101', '', ''],
+        ['Dee', 'Fox', '4 Pine Ct', 'austin', 'TX', '7870', '', ''],
+        ['Eve', 'Kim', '5 Ash Ln', 'boston', 'Massachusetts', '02108', '', ''],
+        ['Fay', 'Wu', '6 Fir Dr', 'denver', 'CO', '80202', 'lots', ''],
+        ['', 'Orr', '7 Yew Way', 'reno', 'NV', '89501', '', ''],
+        ['Gus', 'Poe', '8 Oak Pl', 'salem', 'OR', '97301-1234', '10', 'USD'],
+        ['gus', 'POE', '8 Oak Pl', 'salem', 'OR', '97301', '10', 'USD'],
+    ])
+
+    report = import_customers(path, store=store, rejects=str(tmp_path / 'rejects.csv'))
+
+    assert (report.read, report.imported, report.rejected) == (7, 1, 6)
+    assert report.reasons == {
+        'duplicate customer': 2, 'invalid zip': 1, 'invalid state': 1, 'invalid balance': 1, 'missing first_name': 1,
+    }
+    assert report.samples[0] == (2, 'duplicate customer')
+    with open(tmp_path / 'rejects.csv', newline='') as handle:
+        rows = list(csv.reader(handle))
+    assert rows[0] == ['line', 'reason']
+    assert [row[0] for row in rows[1:]] == ['2', '3', '4', '5', '6', '8']
+    assert len(store.accounts) == 2
+
+
+def test_jsonl_input_and_reimport_is_idempotent(tmp_path):
+    """Test JSON Lines rows (including malformed lines) and that a re-run imports nothing twice."""
+    path = tmp_path / 'book.jsonl'
+    path.write_text('\n'.join([
+        json.dumps({'first_name': 'Ann', 'last_name': 'Lee', 'address': '1 Main St', 'city': 'miami', 'state': 'FL', 'zip': 33101, 'balance': 12.5}),
+        '{not json',
+        '',
+        json.dumps(['Bob', 'Ray']),
+        json.dumps({'first_name': 'Bob', 'last_name': 'Ray', 'address': '2 Oak Ave', 'city': 'tampa', 'state': 'FL', 'zip': '33602'}),
+    ]))
+    store = MemoryStore({}, {})
+
+    first = import_customers(str(path), store=store)
+    second = import_customers(str(path), store=store)
+
+    assert (first.imported, first.rejected) == (2, 2)
+    assert first.reasons == {'malformed row': 2}
+    assert first.samples == [(2, 'malformed row'), (4, 'malformed row')]
+    assert (second.imported, second.reasons) == (0, {'malformed row': 2, 'duplicate customer': 2})
+    (ann,) = store.find_by_name('ann', 'lee')
+    assert store.get_balance(ann) == Money.of('12.50')
+
+
+def test_read_rows_needs_a_known_format(tmp_path):
+    """Test an unrecognized extension needs an explicit format."""
+    path = tmp_path / 'book.txt'
+    path.write_text('first_name,last_name\nAnn,Lee\n')
+
+    with pytest.raises(ValueError):
+        read_rows(str(path))
+    assert list(read_rows(str(path), format='csv')) == [(2, {'first_name': 'Ann', 'last_name': 'Lee'})]
@@ -0,0 +1,150 @@
+"""Tests for idempotent deposits and withdrawals and the bounded dedup cache."""
+
+import threading
+
+import pytest
+
+from banking_system.db.dedup import DedupCache, PostingRecord
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.db.transfers import IdempotencyConflictError
+from banking_system.model.money import Money
+from banking_system.model.overdraft import OverdraftError, OverdraftPolicy
+from banking_system.model.transactions import AccountTransactions
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    """Yield each storage backend with one funded account."""
+    if request.param == 'memory':
+        backend = MemoryStore({}, {})
+    else:
+        backend = SQLiteStore(str(tmp_path / 'bank.db'))
+    backend.create_ledger('1001', 100)
+    yield backend
+    if request.param == 'sqlite':
+        backend.close()
+
+
+def record(key, created_at=0.0):
+    return PostingRecord(key, '1001', 'deposit', Money.of(1), Money.of(1), created_at)
+
+
+def test_retried_postings_apply_once(store, event_sink):
+    """Test a retry with the same key returns the original balance and posts nothing."""
+    account = AccountTransactions('1001', store=store)
+
+    assert account.deposit(50, key='dep-1') == 150
+    account.deposit(10)
+    assert account.deposit('50.00', key='dep-1') == 150
+    assert account.withdraw(20, key='wd-1') == 140
+    assert account.withdraw(20, key='wd-1') == 140
+
+    assert store.get_ledger('1001') == {'deposit': [50.00, 10.00], 'withdraw': [20.00], 'balance': 140.00}
+    assert event_sink.messages()[-1] == 'Replayed withdraw of $20.00 for 1001 (key wd-1)'
+
+
+def test_key_reused_for_different_posting_conflicts(store):
+    """Test a key cannot be reused for another amount, kind, or account."""
+    store.create_ledger('1002', 0)
+    AccountTransactions('1001', store=store).deposit(5, key='k')
+
+    with pytest.raises(IdempotencyConflictError):
+        AccountTransactions('1001', store=store).deposit(6, key='k')
+    with pytest.raises(IdempotencyConflictError):
+        AccountTransactions('1001', store=store).withdraw(5, key='k')
+    with pytest.raises(IdempotencyConflictError):
+        AccountTransactions('1002', store=store).deposit(5, key='k')
+    assert store.get_balance('1001') == 105
+    assert store.get_balance('1002') == 0
+
+
+def test_failed_posting_does_not_consume_key(store):
+    """Test a declined withdrawal can be retried under the same key."""
+    account = AccountTransactions('1001', store=store, policy=OverdraftPolicy(floor=0))
+
+    with pytest.raises(OverdraftError):
+        account.withdraw(500, key='wd')
+    account.deposit(400)
+    assert account.withdraw(500, key='wd') == 0
+    assert account.withdraw(500, key='wd') == 0
+
+
+def test_concurrent_retries_apply_once(store):
+    """Test the same key posted from many threads at once is applied a single time."""
+    barrier = threading.Barrier(8)
+    balances = []
+
+    def retry():
+        barrier.wait()
+        balances.append(AccountTransactions('1001', store=store).deposit(1, key='burst'))
+
+    threads = [threading.Thread(target=retry) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert balances == [Money.of(101)] * 8
+    assert store.get_ledger('1001')['deposit'] == [1.00]
+
+
+def test_sqlite_finds_keys_evicted_from_cache(tmp_path):
+    """Test SQLiteStore still deduplicates once the cache forgot a key, or after a restart."""
+    path = str(tmp_path / 'bank.db')
+    store = SQLiteStore(path)
+    store.create_ledger('1001', 0)
+    store._dedup = DedupCache(capacity=1)
+    account = AccountTransactions('1001', store=store)
+
+    account.deposit(1, key='a')
+    account.deposit(2, key='b')
+    assert len(store.dedup_cache()) == 1
+    assert account.deposit(1, key='a') == 1
+    store.close()
+
+    reopened = SQLiteStore(path)
+    assert AccountTransactions('1001', store=reopened).deposit(2, key='b') == 3
+    assert reopened.get_ledger('1001')['deposit'] == [1.00, 2.00]
+    reopened.close()
+
+
+def test_memory_stores_keep_their_own_keys():
+    """Test using a second in-memory store does not drop the first store's keys."""
+    first, second = MemoryStore({}, {}), MemoryStore({}, {})
+    for backend in (first, second):
+        backend.create_ledger('1001', 100)
+
+    AccountTransactions('1001', store=first).deposit(10, key='dep-1')
+    AccountTransactions('1001', store=second).deposit(5, key='dep-2')
+
+    assert AccountTransactions('1001', store=first).deposit(10, key='dep-1') == 110
+    assert AccountTransactions('1001', store=second).deposit(5, key='dep-2') == 105
+    assert (first.get_balance('1001'), second.get_balance('1001')) == (110, 105)
+
+
+def test_cache_evicts_least_recently_used():
+    """Test the cache stays within capacity, keeping the keys used most recently."""
+    cache = DedupCache(capacity=2, ttl=60)
+    cache.put('a', record('a'), now=0)
+    cache.put('b', record('b'), now=0)
+    cache.get('a', now=1)
+    cache.put('c', record('c'), now=1)
+
+    assert cache.get('b', now=1) is None
+    assert cache.get('a', now=1).key == 'a'
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'expired': 0, 'evicted': 1, 'size': 2}
+
+
+def test_cache_expires_keys_after_ttl():
+    """Test keys expire ttl seconds after they were recorded, on lookup and on insert."""
+    cache = DedupCache(capacity=10, ttl=60)
+    cache.put('a', record('a', created_at=0), now=0)
+    cache.put('b', record('b', created_at=30), now=30)
+
+    assert cache.get('a', now=60) is None
+    cache.put('c', record('c', created_at=95), now=95)
+    assert len(cache) == 1
+    assert cache.stats()['expired'] == 2
+    with pytest.raises(ValueError):
+        DedupCache(capacity=0)
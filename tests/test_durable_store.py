@@ -0,0 +1,241 @@
+"""Tests for the write-ahead logged in-memory store and its crash recovery."""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from banking_system.config.settings import Config
+from banking_system.db.durable_store import DurableStore, read_checkpoint
+from banking_system.db.ledger import DEPOSIT, WITHDRAW
+from banking_system.db.storage import create_store
+from banking_system.db.transfers import IdempotencyConflictError
+from banking_system.db.wal import WALError, list_segments
+from banking_system.model.account import BankAccount
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+
+@pytest.fixture
+def directory(tmp_path):
+    """Return an empty log directory."""
+    return str(tmp_path / 'wal')
+
+
+def reopen(directory):
+    """Open the log directory as a freshly started process would."""
+    return DurableStore(directory, {}, {})
+
+
+def test_restart_recovers_customers_and_ledgers(directory):
+    """Test every kind of mutation is replayed into fresh dicts after a restart."""
+    store = reopen(directory)
+    cust_id = BankAccount('x', 'y', store=store).create_cust_id('Ann', 'Lee', '1 Main St', 'miami', 'FL', 12345)
+    store.create_ledger(str(cust_id), 100)
+    store.create_ledger('2001', 0)
+    store.create_ledger('3001', Money.of(500, 'JPY'), 'JPY')
+    account = AccountTransactions(str(cust_id), store=store)
+    account.deposit(25)
+    account.withdraw('10.50')
+    account.transfer('2001', 4)
+    store.apply_batch(['2001'], [2], np.array([DEPOSIT, WITHDRAW], dtype=np.int8), np.array([700, -200], dtype=np.int64))
+    store.put_customer('9999', {'first_name': 'Gone', 'last_name': 'Soon', 'acct_num': '1'})
+    store.delete_customer('9999')
+    store.close()
+
+    recovered = reopen(directory)
+
+    assert recovered.get_customer(str(cust_id))['zip'] == 12345
+    assert recovered.find_by_name('ann', 'LEE') == {str(cust_id)}
+    assert recovered.get_customer('9999') is None
+    assert recovered.get_ledger(str(cust_id)) == {'deposit': [25.00], 'withdraw': [10.50, 4.00], 'balance': 110.50}
+    assert recovered.get_balance('2001') == Money.of('9.00')
+    assert recovered.get_balance('3001') == Money.of(500, 'JPY')
+    assert recovered.id_sequence().next_id() == 10000  # the closed customer 9999 stays retired
+    assert list(recovered.transactions['2001'].entries()) == list(store.transactions['2001'].entries())
+    recovered.close()
+
+
+def test_recovery_replays_only_the_tail_after_a_checkpoint(directory):
+    """Test a checkpoint drops the segments it covers and recovery starts after it."""
+    store = reopen(directory)
+    store.create_ledger('1001', 0)
+    account = AccountTransactions('1001', store=store)
+    for _ in range(50):
+        account.deposit(1)
+    lsn = store.checkpoint()
+    for _ in range(5):
+        account.deposit(1)
+    store.close()
+
+    assert [first for first, _ in list_segments(directory)] == [lsn + 1]
+    recovered = reopen(directory)
+    assert recovered.recovery['checkpoint_lsn'] == lsn
+    assert recovered.recovery['frames'] == 5
+    assert recovered.get_balance('1001') == 55
+    recovered.close()
+
+
+@pytest.mark.parametrize('checkpoint', [False, True])
+def test_retries_after_a_restart_apply_once(directory, checkpoint):
+    """Test keyed postings and transfers are recovered, from the log or a checkpoint, and not applied twice."""
+    store = reopen(directory)
+    store.create_ledger('1001', 100)
+    store.create_ledger('1002', 0)
+    AccountTransactions('1001', store=store).transfer('1002', 10, key='t-1')
+    AccountTransactions('1002', store=store).deposit(5, key='d-1')
+    AccountTransactions('1001', store=store).withdraw(5, key='w-1')
+    if checkpoint:
+        store.checkpoint()
+    store.close()
+
+    recovered = reopen(directory)
+    record = AccountTransactions('1001', store=recovered).transfer('1002', 10, key='t-1')
+    assert AccountTransactions('1002', store=recovered).deposit(5, key='d-1') == 15
+    assert AccountTransactions('1001', store=recovered).withdraw(5, key='w-1') == 85
+    with pytest.raises(IdempotencyConflictError):
+        AccountTransactions('1002', store=recovered).deposit(6, key='d-1')
+
+    assert record.source_balance == 90
+    assert (recovered.get_balance('1001'), recovered.get_balance('1002')) == (85, 15)
+    recovered.close()
+
+
+def test_posting_keys_are_bounded_and_checkpoint_only_the_live_window(directory, monkeypatch):
+    """Test keyed postings live in the bounded dedup cache and expired or evicted keys are not checkpointed."""
+    monkeypatch.setattr(Config, 'IDEMPOTENCY_CACHE_SIZE', 2)
+    monkeypatch.setattr(Config, 'IDEMPOTENCY_TTL', 60)
+    store = reopen(directory)
+    store.create_ledger('1001', 0)
+    account = AccountTransactions('1001', store=store)
+    for index in range(4):
+        account.deposit(1, key=f'd-{index}')
+    assert len(store.dedup_cache()) == 2
+    assert store.get_posting('d-0') is None and store.get_posting('d-3') is not None
+
+    expired = store.get_posting('d-3')
+    expired.created_at -= 120
+    store.dedup_cache().put('d-3', expired)
+    store.checkpoint()
+    assert [record.key for record in read_checkpoint(directory)[4]] == ['d-2']
+    store.close()
+
+    recovered = reopen(directory)
+    assert recovered.get_posting('d-2') is not None and recovered.get_posting('d-3') is None
+    recovered.close()
+
+
+@pytest.mark.parametrize('checkpoint', [False, True])
+def test_closed_account_id_is_not_reissued_after_restart(directory, checkpoint):
+    """Test a closed customer's ID stays retired after a restart, from the log or a checkpoint."""
+    store = reopen(directory)
+    bank = BankAccount('Ann', 'Lee', store=store)
+    bank.create_cust_id('Ann', 'Lee', '1 Main St', 'miami', 'FL', 12345)
+    closed = bank.create_cust_id('Bob', 'Lee', '2 Main St', 'miami', 'FL', 12345)
+    store.create_ledger(str(closed), 500)
+    bank.close_account(str(closed))
+    if checkpoint:
+        store.checkpoint()
+    store.close()
+
+    recovered = reopen(directory)
+
+    assert recovered.id_sequence().next_id() == closed + 1
+    recovered.close()
+
+
+def test_torn_frame_is_cut_off(directory):
+    """Test a frame half-written by a crash is discarded and logging resumes after it."""
+    store = reopen(directory)
+    store.create_ledger('1001', 0)
+    AccountTransactions('1001', store=store).deposit(7)
+    store.close()
+    _, path = list_segments(directory)[-1]
+    with open(path, 'ab') as handle:
+        handle.write(b'\x40\x00\x00\x00torn')
+
+    recovered = reopen(directory)
+    assert recovered.get_balance('1001') == 7
+    AccountTransactions('1001', store=recovered).deposit(1)
+    recovered.close()
+    assert reopen(directory).get_balance('1001') == 8
+
+
+def test_multi_account_postings_are_one_frame(directory):
+    """Test a transfer or batch is logged as a single frame, so it recovers whole or not at all."""
+    store = reopen(directory)
+    for cust_id in ('1001', '1002', '1003'):
+        store.create_ledger(cust_id, 100)
+    before = store.wal.last_lsn
+
+    AccountTransactions.transfer_batch([('1001', '1002', 5), ('1002', '1003', 7)], store=store)
+    AccountTransactions.apply_batch([('1001', 'deposit', 1), ('1003', 'withdraw', 2)], store=store)
+
+    assert store.wal.last_lsn == before + 2
+    store.close()
+
+
+def test_concurrent_writers_share_fsyncs(directory):
+    """Test concurrent postings commit in groups and none is lost."""
+    store = DurableStore(directory, {}, {}, commit_delay=0.002)
+    store.create_ledger('1001', 0)
+
+    def post():
+        account = AccountTransactions('1001', store=store)
+        for _ in range(50):
+            account.deposit(1)
+
+    threads = [threading.Thread(target=post) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = store.wal.stats()
+    store.close()
+
+    assert stats['flushes'] < stats['frames']
+    assert reopen(directory).get_balance('1001') == 400
+
+
+def test_checkpoint_runs_once_enough_log_is_written(directory):
+    """Test a checkpoint is taken in the background after checkpoint_bytes of log."""
+    store = DurableStore(directory, {}, {}, checkpoint_bytes=1_000)
+    store.create_ledger('1001', 0)
+    first = read_checkpoint(directory)[0]
+    account = AccountTransactions('1001', store=store)
+    for _ in range(40):
+        account.deposit(1)
+
+    deadline = time.monotonic() + 5
+    while read_checkpoint(directory)[0] == first and time.monotonic() < deadline:
+        time.sleep(0.01)
+    store.close()
+    assert read_checkpoint(directory)[0] > first
+
+
+def test_missing_frames_fail_recovery(directory):
+    """Test recovery refuses a log with a hole after the checkpoint."""
+    store = reopen(directory)
+    store.create_ledger('1001', 0)
+    store.checkpoint()
+    account = AccountTransactions('1001', store=store)
+    account.deposit(1)
+    store.wal.rotate()
+    account.deposit(1)
+    store.close()
+    os.remove(list_segments(directory)[0][1])
+
+    with pytest.raises(WALError, match='missing frames'):
+        reopen(directory)
+
+
+def test_create_store_from_wal_url(tmp_path):
+    """Test wal:// URLs select the durable store."""
+    store = create_store(f'wal:///{tmp_path}/bank', sync=False)
+    assert isinstance(store, DurableStore)
+    assert store.directory == f'{tmp_path}/bank'
+    store.close()
+    with pytest.raises(ValueError):
+        create_store('wal://relative')
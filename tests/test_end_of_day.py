@@ -0,0 +1,98 @@
+"""Tests for the vectorized end-of-day engine."""
+
+from datetime import date, datetime
+
+import pytest
+
+from banking_system.db.ledger import Ledger
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.model.end_of_day import day_bounds, run_end_of_day
+from banking_system.model.money import Money
+
+DAY = date(2026, 3, 2)
+
+
+def at(hour, day=DAY):
+    """Returns epoch seconds for an hour of the given day."""
+    return datetime(day.year, day.month, day.day, hour).timestamp()
+
+
+@pytest.fixture
+def book():
+    """Three ledgers: one active on DAY, one that dips into overdraft, one idle."""
+    active = Ledger(100.00)
+    active.append('deposit', 50.00, timestamp=at(9, date(2026, 3, 1)))
+    active.append('withdraw', 30.00, timestamp=at(10))
+    active.append('deposit', 20.00, timestamp=at(11))
+    active.append('deposit', 1000.00, timestamp=at(9, date(2026, 3, 3)))
+
+    dipper = Ledger(10.00)
+    dipper.append('withdraw', 25.00, timestamp=at(9))
+    dipper.append('deposit', 40.00, timestamp=at(12))
+
+    return {'1001': active, '1002': dipper, '1003': Ledger(-5.00)}
+
+
+def test_day_figures(book):
+    """Test opening/closing, totals, and intraday range for one calendar day."""
+    report = run_end_of_day(DAY, store=MemoryStore({}, book))
+
+    active = report.account('1001')
+    assert active['opening'] == 150.00
+    assert active['closing'] == 140.00
+    assert active['deposits'] == 20.00
+    assert active['withdrawals'] == 30.00
+    assert active['entries'] == 2
+    assert (active['low'], active['high']) == (120.00, 150.00)
+
+    dipper = report.account('1002')
+    assert (dipper['low'], dipper['high'], dipper['closing']) == (-15.00, 25.00, 25.00)
+    assert dipper['overdrawn_intraday'] and not dipper['overdrawn']
+
+    assert report.overdrawn_accounts() == ['1003']
+    assert report.overdrawn_accounts(intraday=True) == ['1002', '1003']
+    assert report.totals()['USD']['closing'] == Money(16000)
+
+
+def test_whole_ledger_matches_current_balances(book):
+    """Test that without a day the closing balance is the ledger balance."""
+    report = run_end_of_day(store=MemoryStore({}, book))
+
+    assert [row['closing'] for row in report.rows()] == [ledger.balance for ledger in book.values()]
+
+
+def test_legacy_records_are_read_without_upgrade():
+    """Test legacy dict ledgers are included but left as they were."""
+    transactions = {'1001': {'deposit': [50.00, 80.24], 'withdraw': [37.00, 21.52], 'balance': 71.72}}
+
+    report = run_end_of_day(store=MemoryStore({}, transactions))
+
+    assert report.account('1001')['closing'] == 71.72
+    assert report.account('1001')['deposits'] == 130.24
+    assert isinstance(transactions['1001'], dict)
+
+
+def test_sqlite_store_matches_memory_store(tmp_path):
+    """Test both backends produce the same EOD figures."""
+    memory = MemoryStore({}, {})
+    sqlite_store = SQLiteStore(str(tmp_path / 'bank.db'))
+    for store in (memory, sqlite_store):
+        store.create_ledger('1001', 10)
+        store.create_ledger('1002')
+        store.apply_transaction('1001', 'withdraw', 15.00)
+        store.apply_transaction('1001', 'deposit', 2.50)
+        store.apply_transaction('1002', 'deposit', 7.00)
+
+    expected = list(run_end_of_day(store=memory).rows())
+    assert list(run_end_of_day(store=sqlite_store).rows()) == expected
+    assert expected[0]['low'] == -5.00
+    sqlite_store.close()
+
+
+def test_day_bounds_cover_one_day():
+    """Test the day window is [midnight, next midnight)."""
+    start, end = day_bounds(DAY)
+
+    assert end - start == 86_400_000_000
+    assert start == datetime(2026, 3, 2).timestamp() * 1_000_000
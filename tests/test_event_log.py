@@ -0,0 +1,144 @@
+"""Tests for the structured event log and its sinks."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from banking_system.events.event_log import DEBUG, INFO, WARNING, EventLog, parse_level
+from banking_system.events.sinks import FileSink, NullSink, RingBufferSink, StreamSink, create_sink
+from banking_system.model.money import Money
+
+
+def test_levels_filter_events():
+    """Test events below the log level are not recorded."""
+    sink = RingBufferSink()
+    log = EventLog(sink, level=INFO, background=False)
+
+    log.debug('balance.read', cust_id='1001', balance=Money(100))
+    log.info('transaction.deposit', cust_id='1001', amount=Money(100), balance=Money(200))
+
+    assert [event.name for event in sink.events()] == ['transaction.deposit']
+    assert sink.messages() == ['Deposited $1.00, balance $2.00']
+
+
+def test_messages_render_amounts_in_their_currency():
+    """Test message amounts carry their currency's symbol and minor digits, not a fixed $ and two places."""
+    sink = RingBufferSink()
+    log = EventLog(sink, level=INFO, background=False)
+
+    log.info('transaction.deposit', cust_id='1001', amount=Money.of(500, 'JPY'), balance=Money.of(1500, 'JPY'))
+    log.info('transaction.withdraw', cust_id='1002', amount=Money.of('1.25', 'KWD'), balance=Money.of('10.005', 'KWD'))
+
+    assert sink.messages() == ['Deposited ¥500, balance ¥1,500', 'Withdraw KWD 1.250, balance KWD 10.005']
+
+
+def test_null_sink_disables_the_log():
+    """Test a NullSink turns every level off, so nothing is built or buffered."""
+    log = EventLog(NullSink(), level=DEBUG)
+
+    log.error('transaction.deposit', cust_id='1001')
+
+    assert not log.enabled(WARNING)
+    assert log.stats()['emitted'] == 0
+
+
+def test_background_writer_batches_events():
+    """Test buffered events reach the sink on flush, in emit order."""
+    sink = RingBufferSink()
+    log = EventLog(sink, level=DEBUG, flush_interval=60)
+
+    for index in range(5):
+        log.info('custom', index=index)
+    log.flush()
+
+    assert [event.fields['index'] for event in sink.events()] == [0, 1, 2, 3, 4]
+    assert log.stats()['written'] == 5
+    log.close()
+
+
+def test_pending_events_are_bounded():
+    """Test the oldest pending events are dropped once max_pending is reached."""
+    sink = RingBufferSink()
+    log = EventLog(sink, level=DEBUG, flush_interval=60, batch_size=1_000, max_pending=3)
+
+    for index in range(5):
+        log.info('custom', index=index)
+    log.close()
+
+    assert [event.fields['index'] for event in sink.events()] == [2, 3, 4]
+    assert log.stats()['dropped'] == 2
+
+
+class FlakySink(RingBufferSink):
+    """Ring buffer that raises on its first write."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def write(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise OSError('disk full')
+        super().write(events)
+
+
+def test_writer_survives_sink_errors_and_is_restarted():
+    """Test a failed write is counted and later batches still land, and a dead writer is replaced."""
+    sink = FlakySink()
+    log = EventLog(sink, level=DEBUG, flush_interval=0.01, batch_size=1)
+    log.info('custom', index=0)
+    deadline = time.monotonic() + 5
+    while log.stats()['failed'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    log.info('custom', index=1)
+
+    dead = threading.Thread(target=lambda: None)
+    dead.start()
+    dead.join()
+    log._writer = dead
+    log.info('custom', index=2)
+    log.close()
+
+    assert [event.fields['index'] for event in sink.events()] == [1, 2]
+    assert isinstance(log.last_error, OSError)
+    assert (log.stats()['failed'], log.stats()['restarts']) == (1, 1)
+
+
+def test_file_sink_writes_json_lines(tmp_path):
+    """Test the file sink appends one JSON object per event."""
+    path = tmp_path / 'audit' / 'events.jsonl'
+    log = EventLog(FileSink(str(path)), level=INFO)
+
+    log.info('transaction.withdraw', cust_id='1001', amount=Money(250), balance=Money(-50))
+    log.close()
+
+    record = json.loads(path.read_text().strip())
+    assert record['event'] == 'transaction.withdraw'
+    assert record['level'] == 'INFO'
+    assert (record['amount'], record['balance']) == ('2.50', '-0.50')
+
+
+def test_unknown_events_get_a_generic_message(capsys):
+    """Test events without a template still render, and StreamSink writes them out."""
+    log = EventLog(StreamSink(), level=INFO, background=False)
+
+    log.info('custom.event', key='value')
+
+    assert capsys.readouterr().out == 'custom.event key=value\n'
+
+
+def test_create_sink_from_config_strings(tmp_path):
+    """Test sink specs map to the right sink types."""
+    assert isinstance(create_sink(None), NullSink)
+    assert isinstance(create_sink('console'), StreamSink)
+    assert isinstance(create_sink('ring:10'), RingBufferSink)
+    file_sink = create_sink(f'file:{tmp_path / "events.jsonl"}')
+    assert isinstance(file_sink, FileSink)
+    file_sink.close()
+
+    with pytest.raises(ValueError):
+        create_sink('syslog')
+    assert parse_level('warning') == WARNING
@@ -7,17 +7,15 @@ from unittest import mock
 def BankAccount():
     """Import and return the BankAccount class."""
     with mock.patch('banking_system.model.account.accounts_db', {}):
-        with mock.patch('builtins.print'):
-            from banking_system.model.account import BankAccount as BA
-            return BA
+        from banking_system.model.account import BankAccount as BA
+        return BA
 
 @pytest.fixture
 def AccountTransactions():
     """Import and return the AccountTransactions class."""
     with mock.patch('banking_system.model.transactions.transactions_db', {}):
-        with mock.patch('builtins.print'):
-            from banking_system.model.transactions import AccountTransactions as AT
-            return AT
+        from banking_system.model.transactions import AccountTransactions as AT
+        return AT
 
 
 @pytest.fixture
@@ -39,10 +37,9 @@ def test_full_customer_workflow(mock_both_dbs, BankAccount, AccountTransactions)
     bank_account = BankAccount("Jane", "Doe")
 
     # Step 2: Create customer ID
-    with mock.patch('builtins.print'):
-        cust_id = bank_account.create_cust_id(
-            "Jane", "Doe", "456 Oak St", "Springfield", "IL", "54321"
-        )
+    cust_id = bank_account.create_cust_id(
+        "Jane", "Doe", "456 Oak St", "Springfield", "IL", "54321"
+    )
 
     # Verify customer was created
     assert cust_id == 1001  # First customer should be 1001
@@ -59,20 +56,19 @@ def test_full_customer_workflow(mock_both_dbs, BankAccount, AccountTransactions)
     account = AccountTransactions(str(cust_id))
 
     # Step 5: Perform transactions
-    with mock.patch('builtins.print'):
-        # Initial deposit
-        account.deposit(500.00)
+    # Initial deposit
+    account.deposit(500.00)
 
-        # Check balance
-        balance = account.balance()
-        assert balance == 500.00
+    # Check balance
+    balance = account.balance()
+    assert balance == 500.00
 
-        # Make a withdrawal
-        account.withdraw(150.00)
+    # Make a withdrawal
+    account.withdraw(150.00)
 
-        # Check final balance
-        final_balance = account.balance()
-        assert final_balance == 350.00
+    # Check final balance
+    final_balance = account.balance()
+    assert final_balance == 350.00
 
 
 def test_edge_case_account_creation_with_existing_number(mock_both_dbs, BankAccount):
@@ -90,11 +86,11 @@ def test_edge_case_account_creation_with_existing_number(mock_both_dbs, BankAcco
     }
 
     # Step 3: Mock random to first return the existing account number, then a new one
-    with mock.patch('random.randint', side_effect=[1,2,3,4,5,6,7,8,9,0,1,2, 9,8,7,6,5,4,3,2,1,0,9,8]):
+    with mock.patch('random.randint', side_effect=[123456789012, 987654321098]):
         # This should create an account with number '987654321098' after detecting '123456789012' exists
         account_num = bank_account.create_account("Test", "User")
 
-        assert account_num != '123456789012'
+        assert account_num == '987654321098'
         assert len(account_num) == 12
         assert account_num.isdigit()
 
@@ -112,13 +108,12 @@ def test_overdraft_scenario(mock_both_dbs, AccountTransactions):
 
     account = AccountTransactions('1001')
 
-    with mock.patch('builtins.print'):
-        # Current implementation allows overdraft
-        new_balance = account.withdraw(150.00)
+    # Current implementation allows overdraft
+    new_balance = account.withdraw(150.00)
 
-        # Check that balance went negative
-        assert new_balance == -50.00
-        assert transactions_db['1001']['balance'] == -50.00
+    # Check that balance went negative
+    assert new_balance == -50.00
+    assert transactions_db['1001']['balance'] == -50.00
 
 
 def test_multiple_customer_accounts(mock_both_dbs, BankAccount, AccountTransactions):
@@ -130,14 +125,13 @@ def test_multiple_customer_accounts(mock_both_dbs, BankAccount, AccountTransacti
     bank_account2 = BankAccount("Bob", "Jones")
 
     # Create customer IDs
-    with mock.patch('builtins.print'):
-        with mock.patch.object(bank_account1, 'create_account', side_effect=['111111111111', '222222222222']):
-            cust_id1 = bank_account1.create_cust_id(
-                "Alice", "Smith", "789 Pine St", "Boston", "MA", "02101"
-            )
-            cust_id2 = bank_account2.create_cust_id(
-                "Bob", "Jones", "321 Maple Ave", "Chicago", "IL", "60601"
-            )
+    with mock.patch.object(bank_account1, 'create_account', side_effect=['111111111111', '222222222222']):
+        cust_id1 = bank_account1.create_cust_id(
+            "Alice", "Smith", "789 Pine St", "Boston", "MA", "02101"
+        )
+        cust_id2 = bank_account2.create_cust_id(
+            "Bob", "Jones", "321 Maple Ave", "Chicago", "IL", "60601"
+        )
 
     # Set up transactions for both customers
     transactions_db[str(cust_id1)] = {
@@ -157,27 +151,26 @@ def test_multiple_customer_accounts(mock_both_dbs, BankAccount, AccountTransacti
     account2 = AccountTransactions(str(cust_id2))
 
     # Perform different transactions for each account
-    with mock.patch('builtins.print'):
-        account1.deposit(1000.00)
-        account2.deposit(500.00)
+    account1.deposit(1000.00)
+    account2.deposit(500.00)
 
-        account1.withdraw(200.00)
-        account2.withdraw(100.00)
+    account1.withdraw(200.00)
+    account2.withdraw(100.00)
 
-        # Check balances are tracked separately
-        balance1 = account1.balance()
-        balance2 = account2.balance()
+    # Check balances are tracked separately
+    balance1 = account1.balance()
+    balance2 = account2.balance()
 
-        assert balance1 == 800.00
-        assert balance2 == 400.00
+    assert balance1 == 800.00
+    assert balance2 == 400.00
 
-        # Additional operations
-        account1.deposit(50.00)
-        account2.withdraw(50.00)
+    # Additional operations
+    account1.deposit(50.00)
+    account2.withdraw(50.00)
 
-        # Final balances
-        final_balance1 = account1.balance()
-        final_balance2 = account2.balance()
+    # Final balances
+    final_balance1 = account1.balance()
+    final_balance2 = account2.balance()
 
-        assert final_balance1 == 850.00
-        assert final_balance2 == 350.00
+    assert final_balance1 == 850.00
+    assert final_balance2 == 350.00
@@ -0,0 +1,112 @@
+"""Tests for the vectorized interest accrual and fee engine."""
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from banking_system.db.ledger import Ledger
+from banking_system.db.storage import MemoryStore
+from banking_system.model.interest import AccrualEngine, FeeSchedule, InterestSchedule
+from banking_system.model.money import Money
+
+MARCH = date(2026, 3, 1)
+
+
+def at(day, hour=12):
+    """Returns epoch seconds for an hour of a day."""
+    return datetime(day.year, day.month, day.day, hour).timestamp()
+
+
+@pytest.fixture
+def book():
+    """A saver, a small account that dips below the fee waiver, and an overdrawn account."""
+    saver = Ledger(100_000)
+    small = Ledger(900)
+    small.append('withdraw', 500, timestamp=at(MARCH + timedelta(days=9)))
+    small.append('deposit', 500, timestamp=at(MARCH + timedelta(days=12)))
+    return {'1001': saver, '1002': small, '1003': Ledger(-50)}
+
+
+def test_day_counts_and_tiers():
+    """Test each day count's year fractions and that tiers apply to their band only."""
+    thirty = InterestSchedule([(0, 0.01)], '30/360')
+    february = [thirty.year_fraction(date(2026, 2, day)) for day in range(1, 29)]
+    assert sum(february) == pytest.approx(30 / 360)
+    assert thirty.year_fraction(date(2026, 3, 31)) == 0
+    assert InterestSchedule([(0, 0.01)], 'actual/actual').year_fraction(date(2028, 1, 1)) == 1 / 366
+
+    tiered = InterestSchedule([(10_000, 0.03), (0, 0.01)])
+    interest = tiered.annual_interest(np.array([-500, 500_000, 2_000_000]), np.full(3, 100.0))
+    assert interest.tolist() == [0, 5_000, 10_000 + 30_000]
+    with pytest.raises(ValueError):
+        InterestSchedule([(100, 0.01)])
+    with pytest.raises(ValueError):
+        InterestSchedule([(0, 0.01)], 'actual/364')
+
+
+def test_accrual_compounds_daily_on_closing_balances(book):
+    """Test a month of accrual matches daily compounding, with balance moves applied on their day."""
+    engine = AccrualEngine(InterestSchedule([(0, 0.0365)], 'actual/365'), store=MemoryStore({}, book))
+    engine.accrue(MARCH)
+    engine.accrue(date(2026, 3, 31))
+
+    def compounded(closing):
+        accrued = 0.0
+        for balance in closing:
+            accrued += (balance + accrued) * 0.0001
+        return accrued
+
+    assert abs(engine.accrued('1001').minor - compounded([10_000_000] * 31)) <= 1
+    dip = [90_000] * 9 + [40_000] * 3 + [90_000] * 19
+    assert abs(engine.accrued('1002').minor - compounded(dip)) <= 1
+    assert engine.accrued('1003') == Money(0)
+    with pytest.raises(ValueError):
+        engine.accrue(date(2026, 3, 31))
+
+
+def test_incremental_runs_read_only_changed_ledgers(book):
+    """Test a rerun reads new and posted-to ledgers only, and matches a full re-read."""
+    store = MemoryStore({}, book)
+    schedule = InterestSchedule([(0, 0.02), (500, 0.04)])
+    engine = AccrualEngine(schedule, store=store)
+    assert engine.accrue(MARCH) == 3
+
+    book['1003'].append('deposit', 5_000, timestamp=at(date(2026, 3, 2), 9))
+    book['1004'] = Ledger(1_000)
+    # 1002 has entries after the 1st, so it is read again along with 1003 and 1004.
+    assert engine.accrue(date(2026, 3, 5)) == 3
+
+    full = AccrualEngine(schedule, store=store)
+    full.accrue(MARCH)
+    full.accrue(date(2026, 3, 5), incremental=False)
+    for cust_id in ('1001', '1002', '1003'):
+        assert engine.accrued(cust_id) == full.accrued(cust_id)
+    assert engine.accrued('1003') > Money(0)
+    # 1004 was opened after the 1st was accrued, so it earned four days, not five.
+    assert Money(0) < engine.accrued('1004') < full.accrued('1004')
+
+
+def test_post_credits_interest_charges_fees_and_carries_state(book, tmp_path):
+    """Test posting deposits interest, charges fees below the waiver, and saved state resumes."""
+    store = MemoryStore({}, book)
+    engine = AccrualEngine(InterestSchedule([(0, 0.05)]), FeeSchedule(5, waive_minimum=500), store=store)
+    engine.accrue(MARCH)
+    engine.accrue(date(2026, 3, 31))
+    accrued = engine.accrued('1001')
+
+    report = engine.post()
+    assert report.account('1001') == {'interest': accrued, 'fee': Money(0)}
+    assert report.account('1002')['fee'] == Money.of(5)
+    assert report.account('1003') == {'interest': Money(0), 'fee': Money.of(5)}
+    assert store.get_balance('1001') == Money.of(100_000) + accrued
+    assert store.get_balance('1003') == Money.of(-55)
+    assert engine.accrued('1001') == Money(0)
+
+    engine.save(tmp_path / 'accrual.npz')
+    resumed = AccrualEngine(engine.interest, engine.fees, store=store)
+    resumed.load(tmp_path / 'accrual.npz')
+    assert resumed.last_day == date(2026, 3, 31)
+    assert resumed.accrue(date(2026, 4, 1)) == 3
+    engine.accrue(date(2026, 4, 1))
+    assert resumed.accrued('1001') == engine.accrued('1001') > Money(0)
@@ -0,0 +1,96 @@
+"""Tests for the append-only account ledger."""
+
+import pytest
+from unittest import mock
+
+from banking_system.db import ledger as ledger_module
+from banking_system.db.ledger import Ledger
+from banking_system.db.storage import MemoryStore
+from banking_system.model.money import Money
+
+
+def test_amounts_are_exact_cents():
+    """Test repeated postings do not drift the way float sums do."""
+    ledger = Ledger()
+    for _ in range(10):
+        ledger.append('deposit', 0.10)
+
+    assert ledger.balance_cents == 100
+    assert ledger.balance == Money(100)
+
+
+def test_ledger_rejects_other_currencies():
+    """Test a USD ledger refuses a EUR amount."""
+    with pytest.raises(ValueError):
+        Ledger().append('deposit', Money(100, 'EUR'))
+
+
+def test_append_tracks_balance_and_order():
+    """Test entries keep posting order across deposits and withdrawals."""
+    ledger = Ledger(10.00)
+    ledger.append('deposit', 5.25, timestamp=100)
+    ledger.append('withdraw', 2.00, timestamp=101)
+    ledger.append('deposit', 1.00, timestamp=102)
+
+    assert ledger.balance == 14.25
+    assert [entry[2:] for entry in ledger.entries()] == [('deposit', 5.25), ('withdraw', 2.00), ('deposit', 1.00)]
+    assert ledger['deposit'] == [5.25, 1.00]
+    assert ledger['withdraw'] == [2.00]
+    assert ledger['balance'] == 14.25
+
+
+def test_timestamps_must_not_go_backwards():
+    """Test the ledger rejects out-of-order entries."""
+    ledger = Ledger()
+    ledger.append('deposit', 1.00, timestamp=100)
+
+    with pytest.raises(ValueError):
+        ledger.append('deposit', 1.00, timestamp=99)
+
+
+def test_balance_as_of_uses_snapshots():
+    """Test balance-as-of queries across several snapshots."""
+    with mock.patch.object(ledger_module, 'SNAPSHOT_INTERVAL', 4):
+        ledger = Ledger(100.00)
+        for second in range(1, 11):
+            ledger.append('deposit', 1.00, timestamp=second)
+
+        assert len(ledger.snapshots) == 2
+        assert ledger.balance_as_of(0) == 100.00
+        assert ledger.balance_as_of(4) == 104.00
+        assert ledger.balance_as_of(6.5) == 106.00
+        assert ledger.balance_as_of(1000) == 110.00
+
+
+def test_from_legacy_preserves_balance():
+    """Test converting a legacy transactions_db record."""
+    ledger = Ledger.from_legacy({'deposit': [50.00, 80.24], 'withdraw': [37.00, 21.52], 'balance': 71.72})
+
+    assert ledger.balance == 71.72
+    assert ledger.to_dict() == {'deposit': [50.00, 80.24], 'withdraw': [37.00, 21.52], 'balance': 71.72}
+
+
+def test_memory_store_upgrades_legacy_records():
+    """Test the memory store converts a legacy dict to a Ledger on first write."""
+    transactions = {'1001': {'deposit': [100.00], 'withdraw': [], 'balance': 100.00}}
+    store = MemoryStore({}, transactions)
+
+    assert store.apply_transaction('1001', 'withdraw', 0.10) == 99.90
+    assert isinstance(transactions['1001'], Ledger)
+    assert transactions['1001']['balance'] == 99.90
+
+
+def test_extend_minor_matches_append():
+    """Test the bulk append produces the same balances and snapshots as appending one by one."""
+    with mock.patch.object(ledger_module, 'SNAPSHOT_INTERVAL', 4):
+        one_by_one = Ledger()
+        for _ in range(9):
+            one_by_one.append('deposit', 1.00, timestamp=1)
+
+        bulk = Ledger()
+        bulk.extend_minor([1] * 3, [100] * 3, timestamp=1)
+        balances = bulk.extend_minor([1] * 6, [100] * 6, timestamp=1)
+
+    assert balances[-1] == 900
+    assert bulk.balance == one_by_one.balance
+    assert list(bulk.snapshots) == list(one_by_one.snapshots) == [400, 800]
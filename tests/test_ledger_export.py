@@ -0,0 +1,161 @@
+"""Tests for the streaming statement and ledger export."""
+
+import csv
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from banking_system.db.ledger import Ledger
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.model.ledger_export import (
+    export_ledger,
+    export_sharded,
+    export_statements,
+    iter_chunks,
+    month_bounds,
+    read_columnar,
+    statement,
+)
+from banking_system.model.money import Money
+
+
+def at(day, hour=12):
+    """Returns epoch seconds for noon (or hour) of a day in March 2026."""
+    return datetime(2026, 3, day, hour).timestamp()
+
+
+@pytest.fixture
+def store():
+    """Five ledgers with entries before, inside, and after 10-20 March 2026."""
+    book = {}
+    for number in range(1001, 1006):
+        ledger = Ledger(100.00)
+        ledger.append('deposit', 10.00, timestamp=at(1))
+        ledger.append('withdraw', 25.50, timestamp=at(12))
+        ledger.append('deposit', number - 1000, timestamp=at(15))
+        ledger.append('withdraw', 1.00, timestamp=at(25))
+        book[str(number)] = ledger
+    book['1006'] = Ledger(5000, 'JPY')
+    return MemoryStore({}, book)
+
+
+def read_csv(path):
+    with open(path, newline='') as handle:
+        return list(csv.DictReader(handle))
+
+
+def test_ledger_csv_has_running_balances(store, tmp_path):
+    """Test every entry is exported with its signed kind, amount, and balance after it."""
+    report = export_ledger(str(tmp_path / 'ledger.csv'), store=store, accounts=2)
+
+    rows = read_csv(tmp_path / 'ledger.csv')
+    assert (report.accounts, report.entries) == (6, 20)
+    assert [row['cust_id'] for row in rows[:4]] == ['1001'] * 4
+    assert [(row['kind'], row['amount'], row['balance']) for row in rows[:4]] == [
+        ('deposit', '10.00', '110.00'), ('withdraw', '25.50', '84.50'),
+        ('deposit', '1.00', '85.50'), ('withdraw', '1.00', '84.50'),
+    ]
+    assert rows[0]['timestamp'].endswith('Z') and rows[0]['currency'] == 'USD'
+    assert not (tmp_path / 'ledger.csv.partial').exists()
+
+
+def test_window_and_range_filters(store, tmp_path):
+    """Test the window rolls earlier entries into the opening balance and the range picks accounts."""
+    start, end = datetime(2026, 3, 10), datetime(2026, 3, 20)
+    export_statements(str(tmp_path / 'statements.csv'), store=store, first='1002', last='1003', start=start, end=end)
+
+    rows = read_csv(tmp_path / 'statements.csv')
+    assert rows == [
+        {'cust_id': '1002', 'currency': 'USD', 'opening': '110.00', 'deposits': '2.00',
+         'withdrawals': '25.50', 'closing': '86.50', 'entries': '2'},
+        {'cust_id': '1003', 'currency': 'USD', 'opening': '110.00', 'deposits': '3.00',
+         'withdrawals': '25.50', 'closing': '87.50', 'entries': '2'},
+    ]
+    one = statement('1002', start=start, end=end, store=store)
+    assert one['closing'] == Money.of('86.50')
+    assert [entry[4] for entry in one['entries']] == [Money.of('84.50'), Money.of('86.50')]
+    assert statement('1006', store=store)['opening'] == Money(5000, 'JPY')
+    with pytest.raises(KeyError):
+        statement('9999', store=store)
+
+
+def test_jsonl_statements_nest_transactions(store, tmp_path):
+    """Test a JSON Lines statement carries the account's windowed transactions."""
+    start, end = month_bounds(2026, 3)
+    export_statements(str(tmp_path / 'statements.jsonl'), store=store, start=start, end=end)
+
+    with open(tmp_path / 'statements.jsonl') as handle:
+        records = [json.loads(line) for line in handle]
+    assert [record['cust_id'] for record in records] == ['1001', '1002', '1003', '1004', '1005', '1006']
+    assert records[4]['closing'] == '88.50'
+    assert [txn['amount'] for txn in records[4]['transactions']] == ['10.00', '25.50', '5.00', '1.00']
+    assert records[5] == {
+        'cust_id': '1006', 'currency': 'JPY', 'opening': '5000', 'deposits': '0', 'withdrawals': '0',
+        'closing': '5000', 'entries': 0, 'transactions': [],
+    }
+
+
+def test_columnar_round_trip(store, tmp_path):
+    """Test a columnar export reads back as memory-mapped columns matching the chunks."""
+    export_ledger(str(tmp_path / 'ledger'), store=store, format='columnar', accounts=4)
+
+    columns = read_columnar(str(tmp_path / 'ledger'))
+    chunks = list(iter_chunks(store, accounts=4))
+    assert columns.cust_ids == [cust_id for chunk in chunks for cust_id in chunk.cust_ids]
+    assert isinstance(columns.amounts, np.memmap)
+    assert columns.offsets.tolist() == [0, 4, 8, 12, 16, 20, 20]
+    assert columns.balances.tolist() == np.concatenate([chunk.balances for chunk in chunks]).tolist()
+    assert columns.kinds.dtype == np.int8
+
+
+@pytest.mark.parametrize('format', ['csv', 'jsonl', 'columnar'])
+def test_failed_export_leaves_no_partial_output(store, tmp_path, monkeypatch, format):
+    """Test an error part way through removes the temporary output and writes no manifest."""
+    read = store.iter_ledger_columns
+
+    def fail_after_one_chunk(*args, **kwargs):
+        chunks = read(*args, **kwargs)
+        yield next(chunks)
+        raise OSError('disk went away')
+
+    monkeypatch.setattr(store, 'iter_ledger_columns', fail_after_one_chunk)
+    path = str(tmp_path / 'ledger')
+    with pytest.raises(OSError, match='disk went away'):
+        export_ledger(path, store=store, format=format, accounts=2)
+
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(FileNotFoundError):
+        read_columnar(path)
+
+
+def test_sharded_export_covers_the_book_once(store, tmp_path):
+    """Test the shard files partition the accounts."""
+    reports = export_sharded(str(tmp_path / 'shards'), 3, store=store, statements=True)
+
+    seen = [row['cust_id'] for report in reports for row in read_csv(report.path)]
+    assert sorted(seen) == ['1001', '1002', '1003', '1004', '1005', '1006']
+    assert [report.path.rsplit('/', 1)[1] for report in reports] == ['part-00000.csv', 'part-00001.csv', 'part-00002.csv']
+
+
+def test_sqlite_store_matches_memory_store(tmp_path):
+    """Test both backends stream the same figures, across chunk and parameter-batch boundaries."""
+    memory = MemoryStore({}, {})
+    sqlite_store = SQLiteStore(str(tmp_path / 'bank.db'))
+    for backend in (memory, sqlite_store):
+        for number in range(1001, 1012):
+            backend.create_ledger(str(number), number - 1000)
+            backend.apply_transaction(str(number), 'withdraw', 2.25)
+            backend.apply_transaction(str(number), 'deposit', 0.75)
+
+    def rows(backend):
+        return [
+            (chunk.cust_ids, chunk.opening.tolist(), chunk.balances.tolist(), chunk.kinds.tolist())
+            for chunk in iter_chunks(backend, accounts=3, shard=(1, 2))
+        ]
+
+    assert rows(sqlite_store) == rows(memory)
+    assert [len(chunk) for chunk in iter_chunks(sqlite_store, accounts=4)] == [4, 4, 3]
+    sqlite_store.close()
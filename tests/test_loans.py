@@ -0,0 +1,150 @@
+"""Tests for loans, amortization schedules, and repayment collection."""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from banking_system.db.ledger import Ledger
+from banking_system.db.storage import MemoryStore
+from banking_system.model.loans import LoanBook
+from banking_system.model.money import Money
+from banking_system.model.overdraft import OverdraftPolicy
+from banking_system.model.transactions import AccountTransactions
+
+START = date(2026, 1, 31)
+
+
+@pytest.fixture
+def store():
+    """Two borrowers, one with enough money for a few installments."""
+    return MemoryStore({}, {'1001': Ledger(5_000), '1002': Ledger(10)})
+
+
+def period_by_period(principal, monthly_rate, payment, installments):
+    """Returns the exact balances of a schedule built one installment at a time."""
+    balances = []
+    balance = principal
+    for _ in range(installments - 1):
+        balance += balance * monthly_rate - payment
+        balances.append(balance)
+    return balances + [0]
+
+
+def test_schedules_match_a_period_by_period_build(store):
+    """Test the vectorized schedules match an installment-by-installment build to the minor unit."""
+    book = LoanBook(store=store)
+    terms = [(250_000, 0.065, 360), (10_000, 0.06, 12), (1_000, 0.0, 7), (3_333.33, 0.199, 5)]
+    loan_ids = book.add_many([('1001', principal, rate, installments, START) for principal, rate, installments in terms])
+    schedules = book.schedules(loan_ids)
+
+    for (principal, rate, installments), schedule in zip(terms, schedules):
+        expected = period_by_period(round(principal * 100), rate / 12, int(schedule.payment[0]), installments)
+        assert len(schedule) == installments
+        assert np.abs(schedule.balance - np.array(expected)).max() <= 0.5
+        before = np.concatenate(([schedule.opening], schedule.balance[:-1]))
+        assert np.abs(schedule.interest - before * rate / 12).max() <= 1
+        assert schedule.balance[-1] == 0
+        assert schedule.principal.sum() == schedule.opening
+        assert (schedule.payment == schedule.interest + schedule.principal).all()
+    # Drawn on the 31st: due on the last day of shorter months.
+    assert schedules[1].due[:3].tolist() == [date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)]
+    assert book.schedule(loan_ids[1]) is schedules[1]
+
+
+def test_balance_and_payoff_queries(store):
+    """Test point-in-time balances and payoffs, one loan at a time and for the whole book."""
+    book = LoanBook(store=store)
+    loan_id = book.add('1001', 10_000, 0.06, 12, START)
+    other = book.add('1002', 600, 0.12, 6, date(2026, 2, 10), first_due=date(2026, 3, 1))
+    schedule = book.schedule(loan_id)
+
+    assert book.balance_at(loan_id, date(2026, 2, 27)) == Money.of(10_000)
+    assert book.balance_at(loan_id, date(2026, 2, 28)) == Money(schedule.balance[0])
+    assert book.payoff(loan_id, START) == Money.of(10_000)
+    # Half of March's 31-day period after the February installment.
+    midway = book.payoff(loan_id, date(2026, 3, 14))
+    assert midway.minor == schedule.balance[0] + round(schedule.balance[0] * 0.005 * 14 / 31)
+    assert book.payoff(loan_id, date(2027, 2, 1)) == Money(0)
+
+    for day in (date(2026, 2, 1), date(2026, 3, 1), date(2026, 6, 30), date(2030, 1, 1)):
+        assert book.balances_at(day).tolist() == [book.balance_at(loan_id, day).minor, book.balance_at(other, day).minor]
+    assert [loan.loan_id for loan in book.loans_for('1002')] == [other]
+    with pytest.raises(KeyError):
+        book.loan(5)
+    with pytest.raises(ValueError):
+        book.add('9999', 100, 0.05, 12, START)
+
+
+def test_collect_debits_installments_and_retries_missed_ones(store):
+    """Test collection debits what fell due once, and keeps refused debits owed for the next run."""
+    book = LoanBook(store=store)
+    funded = book.add('1001', 1_200, 0.0, 12, START)
+    short = book.add('1002', 120, 0.0, 12, START)
+    policy = OverdraftPolicy(floor=0)
+
+    result = book.collect(date(2026, 3, 31), policy=policy)
+    assert result.loan_ids.tolist() == [funded, short]
+    assert result.amounts.tolist() == [20_000, 2_000]
+    assert result.collected == 1
+    assert [loan_id for loan_id, _ in result.missed()] == [short]
+    assert store.get_balance('1001') == Money.of(4_800)
+    assert book.loan(short).owed == Money.of(20)
+    assert book.payoff(short, date(2026, 3, 31)) == Money.of(120)
+
+    assert len(book.collect(date(2026, 4, 1), policy=policy)) == 1  # only the missed debit is retried
+    store.apply_transaction('1002', 'deposit', 100)
+    result = book.collect(date(2026, 4, 30), policy=policy)
+    assert result.amounts.tolist() == [10_000, 3_000]
+    assert result.collected == 2
+    assert store.get_balance('1002') == Money.of(80)
+
+
+def test_collect_posts_installments_in_exact_minor_units(monkeypatch):
+    """Test installments reach the batch as Money in each loan's currency, never as floats."""
+    store = MemoryStore({}, {
+        '3001': Ledger(Money.of(1_000_000, 'JPY'), 'JPY'), '3002': Ledger(Money.of(1_000, 'BHD'), 'BHD'),
+    })
+    book = LoanBook(store=store)
+    book.add_many([('3001', Money.of(120_000, 'JPY'), 0.0, 12, START), ('3002', Money.of('12.345', 'BHD'), 0.0, 5, START)])
+    posted = []
+    apply_batch = AccountTransactions.apply_batch
+    monkeypatch.setattr(
+        AccountTransactions, 'apply_batch', lambda records, **kwargs: posted.extend(records) or apply_batch(records, **kwargs)
+    )
+
+    result = book.collect(date(2026, 2, 28), policy=OverdraftPolicy(floor=0))
+
+    assert result.amounts.tolist() == [10_000, 2_469]
+    assert [amount for _, _, amount in posted] == [Money(10_000, 'JPY'), Money(2_469, 'BHD')]
+    assert all(type(amount) is Money for _, _, amount in posted)
+    assert store.get_balance('3001') == Money.of(990_000, 'JPY')
+    assert store.get_balance('3002') == Money.of('997.531', 'BHD')
+
+
+def test_reprice_reamortizes_the_remaining_balance(store, tmp_path):
+    """Test a rate change bills earlier installments and spreads the balance over what is left."""
+    book = LoanBook(store=store)
+    loan_ids = book.add_many([('1001', 10_000, 0.06, 12, START), ('1002', 300, 0.05, 2, START)])
+    before = book.schedule(loan_ids[0])
+
+    assert book.reprice(0.12, date(2026, 5, 1)) == 1  # the second loan was repaid in March
+    loan = book.loan(loan_ids[0])
+    assert loan.principal == Money(before.balance[2])
+    assert (loan.installments, loan.first_due, loan.annual_rate) == (9, date(2026, 5, 31), 0.12)
+    assert loan.owed == Money(before.payment[:3].sum())
+    after = book.schedule(loan_ids[0])
+    assert after is not before
+    assert after.balance[-1] == 0 and after.payment[0] > before.payment[0]
+    assert book.payoff(loan_ids[0], date(2026, 4, 30)).minor == before.balance[2] + loan.owed.minor
+
+    book.collect(date(2026, 6, 1))
+    with pytest.raises(ValueError):
+        book.reprice(0.05, date(2026, 4, 1))  # before the new schedule starts
+    with pytest.raises(ValueError):
+        book.reprice(0.05, date(2026, 5, 15))  # the May installment is billed
+    book.save(tmp_path / 'loans.npz')
+    loaded = LoanBook(store=store)
+    loaded.load(tmp_path / 'loans.npz')
+    assert np.array_equal(loaded.schedule(loan_ids[0]).balance, after.balance)
+    assert loaded.loans_for('1001')[0].payment == loan.payment
@@ -0,0 +1,93 @@
+"""Tests for striped account locks and concurrent postings."""
+
+import threading
+from unittest import mock
+
+import pytest
+
+from banking_system.db.locks import StripedLock
+from banking_system.db.storage import ConcurrentUpdateError, MemoryStore
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+
+def run_threads(count, target):
+    """Runs target in count threads and fails the test if any is still running after 10s."""
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert not any(thread.is_alive() for thread in threads), 'threads deadlocked'
+
+
+def test_same_key_maps_to_same_stripe():
+    """Test a key always maps to one lock, and stripes are bounded."""
+    locks = StripedLock(stripes=8)
+
+    assert locks.lock_for('1001') is locks.lock_for('1001')
+    assert 0 <= locks.stripe('1002') < len(locks)
+    with pytest.raises(ValueError):
+        StripedLock(stripes=0)
+
+
+def test_opposite_order_holds_do_not_deadlock():
+    """Test two threads locking the same pair in opposite argument order both finish."""
+    locks = StripedLock(stripes=64)
+    pairs = [('1001', '1002'), ('1002', '1001')]
+
+    def worker(index=iter(range(2))):
+        first, second = pairs[next(index)]
+        for _ in range(2_000):
+            with locks.hold(first, second):
+                pass
+
+    run_threads(2, worker)
+
+
+def test_concurrent_withdrawals_lose_no_updates():
+    """Test many threads withdrawing from one account all land exactly once."""
+    store = MemoryStore({}, {})
+    store.create_ledger('1001', 100)
+    account = AccountTransactions('1001', store=store)
+
+    def worker():
+        for _ in range(250):
+            account.withdraw(0.01)
+
+    run_threads(8, worker)
+
+    assert store.get_balance('1001') == Money.of('80.00')
+    assert len(store.get_ledger('1001')['withdraw']) == 2_000
+
+
+def test_withdraw_retries_after_a_concurrent_posting():
+    """Test a withdrawal whose balance read went stale is retried, not lost."""
+    store = MemoryStore({}, {})
+    store.create_ledger('1001', 10)
+    read_balance = store.get_balance
+    reads = []
+
+    def racing_read(cust_id):
+        balance = read_balance(cust_id)
+        if not reads:
+            store.apply_transaction(cust_id, 'deposit', 5)  # lands between read and write
+        reads.append(balance)
+        return balance
+
+    with mock.patch.object(store, 'get_balance', side_effect=racing_read):
+        assert AccountTransactions('1001', store=store).withdraw(3) == 12
+
+    assert reads == [10, 15]
+
+
+def test_withdraw_gives_up_when_balance_keeps_changing():
+    """Test a permanently stale balance raises instead of looping forever."""
+    store = MemoryStore({}, {})
+    store.create_ledger('1001', 10)
+
+    with mock.patch.object(store, 'get_balance', return_value=Money(1)):
+        with pytest.raises(ConcurrentUpdateError):
+            AccountTransactions('1001', store=store).withdraw(3)
+
+    assert store.get_balance('1001') == 10
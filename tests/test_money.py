@@ -0,0 +1,88 @@
+"""Tests for the fixed-point Money type."""
+
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from banking_system.db.storage import MemoryStore
+from banking_system.model.money import Money, sum_minor_units, to_minor_units
+from banking_system.model.transactions import AccountTransactions
+
+
+def test_of_converts_floats_exactly():
+    """Test floats, strings, Decimals, and ints convert to exact minor units."""
+    assert Money.of(0.1).minor == 10
+    assert Money.of('71.72').minor == 7172
+    assert Money.of(Decimal('1.005')).minor == 101
+    assert Money.of(5).minor == 500
+    assert Money.of(5, 'JPY').minor == 5
+
+
+def test_of_rejects_non_numbers():
+    """Test invalid amounts raise ValueError."""
+    with pytest.raises(ValueError):
+        Money.of('ten dollars')
+    with pytest.raises(ValueError):
+        Money.of(float('nan'))
+
+
+def test_arithmetic_does_not_drift():
+    """Test repeated addition stays exact where floats drift."""
+    total = Money(0)
+    for _ in range(10):
+        total += 0.1
+
+    assert total == 1.00
+    assert sum([0.1] * 10) != 1.00
+
+
+def test_comparisons_with_numbers_and_currency_mismatch():
+    """Test Money compares with plain numbers and refuses mixed currencies."""
+    assert Money.of(75) == 75.00
+    assert Money.of(10) > 9.99
+    assert Money(100, 'EUR') != Money(100, 'USD')
+
+    with pytest.raises(ValueError):
+        Money(100, 'EUR') + Money(100, 'USD')
+
+
+def test_formatting():
+    """Test exact string and display formatting."""
+    assert str(Money(7172)) == '71.72'
+    assert f'{Money(-5):.2f}' == '-0.05'
+    assert Money(-123450).display() == '-$1,234.50'
+    assert Money(1500, 'JPY').display() == '¥1,500'
+
+
+def test_vectorized_conversion_and_sum():
+    """Test the batch helpers round to minor units and sum exactly."""
+    minor = to_minor_units([0.1, 0.2, 19.99])
+
+    assert minor.dtype == np.int64
+    assert minor.tolist() == [10, 20, 1999]
+    assert sum_minor_units(minor) == Money.of('20.29')
+
+
+def test_vectorized_conversion_rounds_like_money_of():
+    """Test scalar and batch conversion agree on half-minor-unit amounts, including float ties."""
+    amounts = [1.005, 2.675, 0.125, 1.015, -1.005, 0.285, 2.5, 123456.785, 7]
+    assert to_minor_units(amounts).tolist() == [Money.of(amount).minor for amount in amounts]
+    assert to_minor_units(amounts).tolist()[:2] == [101, 268]
+    assert to_minor_units([1.0005], 'BHD').tolist() == [Money.of(1.0005, 'BHD').minor]
+    assert to_minor_units(np.arange(3)).tolist() == [0, 100, 200]
+
+
+def test_account_transactions_accept_money_inputs():
+    """Test deposits accept strings and Money, and balances never drift."""
+    store = MemoryStore({}, {})
+    store.create_ledger('1001')
+    account = AccountTransactions('1001', store=store)
+
+    for _ in range(10):
+        account.deposit(0.1)
+    account.deposit('0.05')
+    balance = account.withdraw(Money.of('0.02'))
+
+    assert balance == Money.of('1.03')
+    assert balance.minor == 103
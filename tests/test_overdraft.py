@@ -127,3 +127,144 @@ def test_suggested_overdraft_implementation():
         withdraw_with_protection(100.00, -50.00)
 
     assert "must be positive" in str(excinfo.value)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    """Yield each storage backend with one account holding $100."""
+    from banking_system.db.sqlite_store import SQLiteStore
+    from banking_system.db.storage import MemoryStore
+
+    backend = MemoryStore({}, {}) if request.param == 'memory' else SQLiteStore(str(tmp_path / 'bank.db'))
+    backend.create_ledger('1001', 100)
+    yield backend
+    if request.param == 'sqlite':
+        backend.close()
+
+
+def test_policy_floor_blocks_withdraw(store, event_sink):
+    """Test withdraw enforces the floor and per-account overdraft limits."""
+    from banking_system.model.overdraft import OverdraftError, OverdraftPolicy
+    from banking_system.model.transactions import AccountTransactions
+
+    policy = OverdraftPolicy(floor=0)
+    account = AccountTransactions('1001', store=store, policy=policy)
+
+    assert account.withdraw(100.00) == 0
+    with pytest.raises(OverdraftError, match='Insufficient funds'):
+        account.withdraw(0.01)
+    assert store.get_balance('1001') == 0
+    assert event_sink.find('transaction.declined')[0].fields['reason'].startswith('Insufficient funds')
+
+    policy = OverdraftPolicy(overdraft_limit=50)
+    policy.set_overdraft_limit('1001', 20)
+    account = AccountTransactions('1001', store=store, policy=policy)
+    assert account.withdraw(20.00) == -20
+    with pytest.raises(OverdraftError):
+        account.withdraw(0.01)
+
+
+def test_daily_limit_rolls_and_seeds_from_ledger(store):
+    """Test the rolling limit counts earlier withdrawals and frees up as they expire."""
+    from banking_system.model.money import Money
+    from banking_system.model.overdraft import DailyLimitError, OverdraftPolicy
+    from banking_system.model.transactions import AccountTransactions
+
+    store.apply_transaction('1001', 'withdraw', 30)
+    policy = OverdraftPolicy(daily_limit=50)
+    account = AccountTransactions('1001', store=store, policy=policy)
+
+    assert account.withdraw(20.00) == 50
+    with pytest.raises(DailyLimitError, match='limit of \\$50.00'):
+        account.withdraw(0.01)
+
+    later = policy.window_start() + 2 * policy.window
+    with policy.reserve('1001', Money.of(50), now=later):
+        pass
+    with pytest.raises(DailyLimitError):
+        with policy.reserve('1001', Money.of('0.01'), now=later):
+            pass
+
+
+def test_daily_limit_windows_are_per_store_and_dropped_once_expired():
+    """Test one cust_id in two stores has two rolling windows, and expired windows are evicted."""
+    from banking_system.db.ledger import Ledger
+    from banking_system.db.storage import MemoryStore
+    from banking_system.model.money import Money
+    from banking_system.model.overdraft import DailyLimitError, OverdraftPolicy
+    from banking_system.model.transactions import AccountTransactions
+
+    first = MemoryStore({}, {'1001': Ledger(100)})
+    second = MemoryStore({}, {'1001': Ledger(100)})
+    policy = OverdraftPolicy(daily_limit=50)
+    AccountTransactions('1001', store=first, policy=policy).withdraw(40)
+
+    assert AccountTransactions('1001', store=second, policy=policy).withdraw(40) == 60
+    with pytest.raises(DailyLimitError):
+        # A new view over the same dicts is the same store.
+        AccountTransactions('1001', store=MemoryStore({}, first.transactions), policy=policy).withdraw(20)
+
+    later = policy.window_start() + 2 * policy.window
+    with policy.reserve('1002', Money.of(1), history=[], now=later, store=first):
+        pass
+    assert policy.needs_history('1001', first) and not policy.needs_history('1001', second)
+
+
+def test_batch_withdrawals_follow_the_policy(store):
+    """Test the batch path rejects exactly the withdrawals a sequential pass would."""
+    from banking_system.model.overdraft import OverdraftPolicy
+    from banking_system.model.transactions import AccountTransactions
+
+    policy = OverdraftPolicy(floor=0, daily_limit=90)
+    result = AccountTransactions.apply_batch([
+        ('1001', 'withdraw', 60),
+        ('1001', 'withdraw', 50),
+        ('1001', 'withdraw', 30),
+        ('1001', 'deposit', 100),
+        ('1001', 'withdraw', 25),
+    ], store=store, policy=policy)
+
+    assert [reason for _, _, reason in result.rejected] == [
+        'Insufficient funds: Cannot withdraw $50.00 from balance of $40.00',
+        'Daily withdrawal limit of $90.00 exceeded',
+    ]
+    assert result.balances == [40, None, 10, 110, None]
+    assert store.get_balance('1001') == 110
+
+
+def test_bulk_evaluation_matches_sequential_checks():
+    """Test evaluate_batch agrees with checking every posting one at a time."""
+    import random
+
+    import numpy as np
+
+    from banking_system.model.money import Money
+    from banking_system.model.overdraft import OverdraftError, OverdraftPolicy
+
+    rng = random.Random(3)
+    cust_ids = [str(index) for index in range(50)]
+    counts = np.array([rng.randint(1, 30) for _ in cust_ids], dtype=np.int64)
+    deltas = np.array([rng.choice([-1, -1, 1]) * rng.randint(1, 5_000) for _ in range(counts.sum())], dtype=np.int64)
+    openings = np.array([rng.randint(-1_000, 10_000) for _ in cust_ids], dtype=np.int64)
+
+    bulk = OverdraftPolicy(overdraft_limit=10, daily_limit=200)
+    ok, _, _ = bulk.evaluate_batch(cust_ids, ['USD'] * len(cust_ids), openings, counts, deltas)
+
+    single = OverdraftPolicy(overdraft_limit=10, daily_limit=200)
+    expected = []
+    position = 0
+    for cust_id, opening, count in zip(cust_ids, openings.tolist(), counts.tolist()):
+        balance = Money(opening)
+        for delta in deltas[position:position + count].tolist():
+            try:
+                if delta < 0:
+                    single.check(cust_id, balance, Money(-delta))
+                    with single.reserve(cust_id, Money(-delta), history=[]):
+                        pass
+                balance += Money(delta)
+                expected.append(True)
+            except OverdraftError:
+                expected.append(False)
+        position += count
+
+    assert ok.tolist() == expected
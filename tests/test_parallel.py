@@ -0,0 +1,109 @@
+"""Tests for the multi-process batch job runner."""
+
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from banking_system.db.ledger import Ledger
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import MemoryStore
+from banking_system.model.end_of_day import run_end_of_day
+from banking_system.model.money import Money
+from banking_system.model.parallel import ParallelRunner, parallel_apply_batch, parallel_end_of_day, reconcile
+from banking_system.model.transactions import AccountTransactions
+
+DAY = date(2026, 3, 2)
+
+
+def at(hour, day=DAY):
+    """Returns epoch seconds for an hour of the given day."""
+    return datetime(day.year, day.month, day.day, hour).timestamp()
+
+
+@pytest.fixture(scope='module')
+def runner():
+    """Yield a two-worker runner with small chunks, shared by the tests in this module."""
+    with ParallelRunner(workers=2, chunk_accounts=7) as pool:
+        yield pool
+
+
+@pytest.fixture
+def book():
+    """Forty ledgers with a varying number of entries around DAY."""
+    ledgers = {}
+    for index in range(40):
+        ledger = Ledger(index * 10)
+        for entry in range(index % 6):
+            kind = 'withdraw' if entry % 3 == 2 else 'deposit'
+            ledger.append(kind, 5 + entry, timestamp=at(6 + 3 * entry, date(2026, 3, 1 + entry // 2)))
+        ledgers[str(1001 + index)] = ledger
+    return ledgers
+
+
+def test_chunks_cover_the_book_in_order(runner, book):
+    """Test the account ranges are contiguous, balanced by work, and cover every account once."""
+    columns = MemoryStore({}, book).ledger_columns()
+    chunks = runner.chunks(columns)
+
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(columns)
+    assert all(stop == first for (_, stop), (first, _) in zip(chunks, chunks[1:]))
+    assert len(chunks) >= 40 // 7
+    assert runner.chunks(MemoryStore({}, {}).ledger_columns()) == []
+
+
+def test_parallel_end_of_day_matches_serial(runner, book):
+    """Test the merged report equals the single-process one, for a day and for the whole ledger."""
+    store = MemoryStore({}, book)
+    for day in (DAY, None):
+        parallel = parallel_end_of_day(day, store=store, runner=runner)
+        serial = run_end_of_day(day, store=store)
+        assert parallel.cust_ids == serial.cust_ids
+        for name in ('opening', 'closing', 'deposits', 'withdrawals', 'entries', 'low', 'high'):
+            assert np.array_equal(getattr(parallel, name), getattr(serial, name)), name
+
+
+def test_reconcile_reports_breaks(runner, book):
+    """Test a clean book reconciles, and broken balances, entries, and expectations are reported."""
+    store = MemoryStore({}, book)
+    report = reconcile(store, runner=runner)
+    assert report.ok
+    assert (report.accounts, report.entries) == (40, sum(len(ledger) for ledger in book.values()))
+
+    book['1003'].balance_cents += 1
+    book['1010'].timestamps[0], book['1010'].timestamps[1] = book['1010'].timestamps[1] + 1, book['1010'].timestamps[0]
+    expected = {'1001': Money.of(0), '1002': 99, '9999': 1}
+    report = reconcile(store, expected=expected, runner=runner)
+
+    assert [cust_id for cust_id, _ in report.breaks] == ['1002', '1003', '1010', '9999']
+    assert report.breaks[0][1] == 'Expected 99.00, balance is 15.00'
+    assert report.breaks[1][1].startswith('Entries sum to')
+    assert report.breaks[2][1] == 'Entries are out of timestamp order'
+
+
+def test_parallel_apply_batch_matches_a_single_process(runner, tmp_path):
+    """Test posting from workers gives the in-process result, in input order."""
+    urls = []
+    for name in ('parallel', 'serial'):
+        store = SQLiteStore(str(tmp_path / f'{name}.db'))
+        for number in range(1001, 1011):
+            store.create_ledger(str(number), 50)
+        store.close()
+        urls.append(f'sqlite:///{tmp_path / name}.db')
+    records = [(str(1001 + index % 10), 'withdraw' if index % 4 == 3 else 'deposit', 1 + index % 7) for index in range(60)]
+    records += [('5555', 'deposit', 1), ('1001', 'refund', 1), ('1002',)]
+
+    parallel = parallel_apply_batch(records, url=urls[0], runner=runner)
+    store = SQLiteStore(urls[1][len('sqlite:///'):])
+    serial = AccountTransactions.apply_batch(records, store=store)
+
+    assert parallel.balances == serial.balances
+    assert parallel.errors == serial.errors
+    assert parallel.applied == 60
+
+
+def test_parallel_apply_batch_posts_in_process_to_memory_stores():
+    """Test stores other processes cannot open are posted to directly."""
+    store = MemoryStore({}, {'1001': Ledger(10)})
+    result = parallel_apply_batch([('1001', 'deposit', 5)], store=store)
+    assert result.balances == [Money.of(15)]
@@ -0,0 +1,106 @@
+"""Tests for the connection pool used by the SQL-backed store."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from banking_system.db.pool import ConnectionPool, PoolTimeoutError
+from banking_system.db.sqlite_store import SQLiteStore
+
+
+def connect():
+    """Open a throwaway SQLite connection."""
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+def test_connections_are_reused():
+    """Test that a released connection is handed out again instead of reopened."""
+    pool = ConnectionPool(connect, size=2)
+
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        assert second is first
+
+    assert pool.stats()['open'] == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_nested_sessions_share_a_connection():
+    """Test nested sessions on one thread reuse the outer connection."""
+    pool = ConnectionPool(connect, size=1, timeout=0.1)
+
+    with pool.session() as outer:
+        with pool.session() as inner:
+            assert inner is outer
+            assert pool.stats()['in_use'] == 1
+
+    assert pool.stats()['in_use'] == 0
+
+
+def test_checkout_times_out_when_exhausted():
+    """Test a checkout on a full pool waits at most the timeout."""
+    pool = ConnectionPool(connect, size=1, timeout=0.05)
+    held = pool.checkout()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.checkout()
+
+    pool.checkin(held)
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_pre_ping_replaces_dead_connections():
+    """Test a connection that fails its health check is replaced on checkout."""
+    pool = ConnectionPool(connect, size=1)
+    conn = pool.checkout()
+    pool.checkin(conn)
+    conn.close()
+
+    replacement = pool.checkout()
+
+    assert replacement is not conn
+    replacement.execute('SELECT 1')
+    assert pool.stats()['discarded'] == 1
+
+
+def test_threads_get_their_own_sessions():
+    """Test concurrent threads hold distinct connections."""
+    pool = ConnectionPool(connect, size=4)
+    barrier = threading.Barrier(4)
+    seen = []
+
+    def worker():
+        with pool.session() as conn:
+            seen.append(id(conn))
+            barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(seen)) == 4
+    assert pool.stats()['in_use'] == 0
+
+
+def test_sqlite_store_concurrent_deposits_use_pool(tmp_path):
+    """Test pooled SQLite connections serialize writers without losing updates."""
+    store = SQLiteStore(str(tmp_path / 'bank.db'), pool_size=4)
+    store.create_ledger('1001')
+
+    def worker():
+        for _ in range(50):
+            store.apply_transaction('1001', 'deposit', 1.0)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.get_balance('1001') == 200.0
+    assert store.pool_stats()['open'] <= 4
+    store.close()
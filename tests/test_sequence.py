@@ -0,0 +1,109 @@
+"""Tests for the customer ID sequence."""
+
+import threading
+
+import pytest
+
+from banking_system.db.sequence import IdSequence, customer_id_sequence
+
+
+def test_from_store_starts_after_highest_id():
+    """Test the sequence resumes after the highest integer key."""
+    store = {'1001': {}, '1005': {}, 1003: {}, 'legacy-key': {}}
+    sequence = IdSequence.from_store(store)
+
+    assert sequence.next_id() == 1006
+    assert sequence.next_id() == 1007
+
+
+def test_from_empty_store_starts_at_1001():
+    """Test an empty store hands out 1001 first."""
+    assert IdSequence.from_store({}).next_id() == 1001
+
+
+def test_reserve_returns_contiguous_block():
+    """Test reserving a block for batch onboarding."""
+    sequence = IdSequence(1000)
+
+    block = sequence.reserve(5)
+
+    assert list(block) == [1001, 1002, 1003, 1004, 1005]
+    assert sequence.next_id() == 1006
+
+
+def test_reserve_rejects_non_positive_count():
+    """Test reserve with an invalid count."""
+    with pytest.raises(ValueError):
+        IdSequence().reserve(0)
+
+
+def test_advance_to_skips_used_ids():
+    """Test advance_to keeps explicitly inserted IDs from being reissued."""
+    sequence = IdSequence(1000)
+    sequence.advance_to(2000)
+    sequence.advance_to(1500)
+
+    assert sequence.next_id() == 2001
+
+
+def test_sequence_is_thread_safe():
+    """Test concurrent allocation never hands out the same ID twice."""
+    sequence = IdSequence(1000)
+    allocated = []
+    lock = threading.Lock()
+
+    def worker():
+        ids = [sequence.next_id() for _ in range(1000)]
+        with lock:
+            allocated.extend(ids)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(allocated)) == 8000
+    assert sequence.last_id == 9000
+
+
+def test_sequence_survives_restart(tmp_path):
+    """Test a restarted sequence never reissues IDs handed out before the restart."""
+    state_path = str(tmp_path / 'cust_id.seq')
+    first = IdSequence(1000, state_path=state_path, cache_size=10)
+    issued = [first.next_id() for _ in range(3)]
+
+    # Simulate a crash: the store never saw these customers.
+    restarted = IdSequence.from_store({}, state_path=state_path, cache_size=10)
+
+    assert restarted.next_id() > max(issued)
+
+
+def test_customer_id_sequence_is_built_once_per_store():
+    """Test the bound sequence is reused for the same store and rebuilt for a new one."""
+    store = {'1001': {}}
+    sequence = customer_id_sequence(store)
+
+    assert customer_id_sequence(store) is sequence
+    assert customer_id_sequence({}) is not sequence
+
+
+def test_alternating_stores_keep_their_own_sequences():
+    """Test switching stores neither rescans one nor reissues an ID it handed out."""
+    first, second = {'1001': {}}, {'5001': {}}
+    issued = customer_id_sequence(first).next_id()
+
+    assert customer_id_sequence(second).next_id() == 5002
+    assert customer_id_sequence(first).next_id() == issued + 1
+    assert customer_id_sequence(second).next_id() == 5003
+
+
+def test_customer_id_sequence_reads_state_path_from_config(tmp_path, monkeypatch):
+    """Test the bound sequence persists to CUST_ID_SEQUENCE_PATH from config/settings.py."""
+    from banking_system.config.settings import Config
+
+    state_path = tmp_path / 'cust_id.seq'
+    monkeypatch.setattr(Config, 'CUST_ID_SEQUENCE_PATH', str(state_path))
+    customer_id_sequence({'1001': {}}).next_id()
+
+    assert int(state_path.read_text()) > 1002
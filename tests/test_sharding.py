@@ -0,0 +1,153 @@
+"""Tests for the consistent-hash sharded account store."""
+
+import pytest
+
+from banking_system.db.sharding import HashRing, ShardedStore
+from banking_system.db.storage import MemoryStore, create_store
+from banking_system.model.account import BankAccount
+from banking_system.model.ledger_export import iter_chunks
+from banking_system.model.money import Money
+from banking_system.model.overdraft import OverdraftError, OverdraftPolicy
+from banking_system.model.transactions import AccountTransactions
+
+
+@pytest.fixture
+def store():
+    """Yield a two-shard in-memory store."""
+    sharded = ShardedStore(2)
+    yield sharded
+    sharded.close()
+
+
+def open_accounts(store, count, balance=100):
+    """Create count customers with opening balances; return their cust_ids."""
+    cust_ids = []
+    for index in range(count):
+        cust_id = str(BankAccount('Ann', f'Lee{index}', store=store).create_cust_id(
+            'Ann', f'Lee{index}', f'{index} Main St', 'miami', 'FL', '33101',
+        ))
+        store.create_ledger(cust_id, balance)
+        cust_ids.append(cust_id)
+    return cust_ids
+
+
+def test_ring_spreads_keys_and_moves_few_on_growth():
+    """Test keys spread over every shard and a new shard only takes keys from the others."""
+    ring = HashRing(range(4))
+    keys = [str(1001 + index) for index in range(20_000)]
+    before = [ring.shard_for(key) for key in keys]
+    counts = [before.count(shard) for shard in range(4)]
+    assert min(counts) > 3_000
+
+    grown = ring.with_shard(4)
+    after = [grown.shard_for(key) for key in keys]
+    moved = [old != new for old, new in zip(before, after)]
+    assert all(new == 4 for flag, new in zip(moved, after) if flag)
+    assert 0.1 < sum(moved) / len(keys) < 0.3
+    assert ring.shard_for('1001') == before[0]
+
+
+def test_model_operations_route_to_the_owning_shard(store):
+    """Test BankAccount and AccountTransactions work unchanged over shards."""
+    cust_ids = open_accounts(store, 8)
+
+    assert len({store.shard_for(cust_id) for cust_id in cust_ids}) == 2
+    assert cust_ids == [str(1001 + index) for index in range(8)]
+    assert store.find_by_name('ann', 'lee3') == {cust_ids[3]}
+    acct_num = store.get_customer(cust_ids[5])['acct_num']
+    assert BankAccount('Ann', 'Lee5', store=store).lookup_account(acct_num) == cust_ids[5]
+
+    account = AccountTransactions(cust_ids[2], store=store)
+    account.deposit(25, key='dep-1')
+    assert account.deposit(25, key='dep-1') == Money.of(125)
+    account.withdraw(5)
+    assert store.get_balance(cust_ids[2]) == Money.of(120)
+    assert sorted(cust_id for cust_id, _ in store.scan_customers()) == cust_ids
+
+
+def test_cross_shard_transfers_are_all_or_nothing(store):
+    """Test a transfer between shards settles both legs, replays by key, and aborts cleanly."""
+    cust_ids = open_accounts(store, 6)
+    source = cust_ids[0]
+    destination = next(cust_id for cust_id in cust_ids if store.shard_for(cust_id) != store.shard_for(source))
+
+    record = AccountTransactions(source, store=store).transfer(destination, 30, key='t-1')
+    assert (record.source_balance, record.destination_balance) == (Money.of(70), Money.of(130))
+    again = AccountTransactions(source, store=store).transfer(destination, 30, key='t-1')
+    assert again.created_at == record.created_at
+    assert store.get_transfer('t-1') is not None
+
+    store.create_ledger('9999', 0, 'EUR')
+    result = AccountTransactions.transfer_batch([(source, destination, 10), (source, '9999', 5)], store=store)
+    assert result.rejected[0][2].startswith('Currency mismatch')
+    with pytest.raises(ValueError):
+        AccountTransactions(source, store=store).transfer('5555', 10)
+    assert (store.get_balance(source), store.get_balance(destination)) == (Money.of(60), Money.of(140))
+
+
+def test_cross_shard_transfers_are_checked_against_the_policy(store):
+    """Test both transfer paths refuse a cross-shard withdraw leg below the floor."""
+    cust_ids = open_accounts(store, 6)
+    source = cust_ids[0]
+    destination = next(cust_id for cust_id in cust_ids if store.shard_for(cust_id) != store.shard_for(source))
+    policy = OverdraftPolicy(floor=0)
+
+    with pytest.raises(OverdraftError):
+        AccountTransactions(source, store=store, policy=policy).transfer(destination, 150)
+    result = AccountTransactions.transfer_batch(
+        [(source, destination, 60), (source, destination, 60)], store=store, policy=policy
+    )
+
+    assert [index for index, _, _ in result.rejected] == [1]
+    assert (store.get_balance(source), store.get_balance(destination)) == (Money.of(40), Money.of(160))
+
+
+def test_batches_across_shards_match_a_single_store(store):
+    """Test a posting batch split over shards gives the results of one store, overdraft checks included."""
+    single = MemoryStore({}, {})
+    records = []
+    for target in (store, single):
+        cust_ids = open_accounts(target, 6, balance=50)
+        records = [(cust_ids[index % 6], 'withdraw' if index % 3 else 'deposit', 20) for index in range(30)]
+    policy = OverdraftPolicy(floor=0)
+
+    sharded = AccountTransactions.apply_batch(records, store=store, policy=policy)
+    expected = AccountTransactions.apply_batch(records, store=single, policy=policy)
+
+    assert sharded.balances == expected.balances
+    assert sharded.errors == expected.errors
+    assert sharded.applied < len(records)
+
+
+def test_ledger_scans_merge_in_cust_id_order_and_rebalance(store):
+    """Test chunked scans merge the shards in order, and add_shard keeps every account reachable."""
+    cust_ids = open_accounts(store, 12)
+    AccountTransactions(cust_ids[4], store=store).deposit(7)
+
+    chunks = list(store.iter_ledger_columns(5))
+    assert [len(chunk) for chunk in chunks] == [5, 5, 2]
+    assert [cust_id for chunk in chunks for cust_id in chunk.cust_ids] == sorted(cust_ids)
+    (statement,) = [chunk for chunk in iter_chunks(store, first=cust_ids[4], last=cust_ids[4])]
+    assert statement.closing.tolist() == [10_700]
+
+    moved = store.add_shard()
+    assert 0 < moved < len(cust_ids)
+    assert {store.shard_for(cust_id) for cust_id in cust_ids} == {0, 1, 2}
+    assert [store.get_balance(cust_id) for cust_id in cust_ids] == [
+        Money.of(107) if index == 4 else Money.of(100) for index in range(12)
+    ]
+    assert store.find_by_name('ann', 'lee11') == {cust_ids[11]}
+
+
+def test_shards_url():
+    """Test shards:// URLs start in-memory shards and persistent shards need their own files."""
+    sharded = create_store('shards://3')
+    try:
+        assert len(sharded._shards) == 3
+        assert sharded.get_balance('1001') is None
+    finally:
+        sharded.close()
+    with pytest.raises(ValueError):
+        create_store('shards://2/sqlite:///bank.db')
+    with pytest.raises(ValueError):
+        create_store('shards://many')
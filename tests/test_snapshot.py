@@ -0,0 +1,153 @@
+"""Tests for the memory-mapped snapshot format and SnapshotStore."""
+
+import numpy as np
+import pytest
+
+from banking_system.db.ledger import DEPOSIT, WITHDRAW
+from banking_system.db.snapshot import Snapshot, SnapshotError, SnapshotStore, write_snapshot
+from banking_system.db.storage import MemoryStore, create_store
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+
+def make_record(first_name, last_name, acct_num, zip_code=12345):
+    """Build a customer record."""
+    return {
+        'first_name': first_name,
+        'last_name': last_name,
+        'acct_num': acct_num,
+        'address': '1 Main St',
+        'city': 'miami',
+        'state': 'FL',
+        'zip': zip_code,
+    }
+
+
+@pytest.fixture
+def source():
+    """Return an in-memory store with customers, ledgers, and postings."""
+    store = MemoryStore({}, {})
+    store.put_customer('1001', make_record('Jane', 'Doe', '111111111111'))
+    store.put_customer('1002', make_record('John', 'Doe', '222222222222', '02134'))
+    store.put_customer('1007', make_record('Jane', 'Doe', '777777777777'))
+    store.create_ledger('1001', 100)
+    store.create_ledger('1002', 0)
+    store.create_ledger('1007', Money.of(500, 'JPY'), 'JPY')
+    store.apply_transaction('1001', 'deposit', 25)
+    store.apply_transaction('1001', 'withdraw', '10.50')
+    store.apply_transaction('1007', 'withdraw', 200)
+    return store
+
+
+@pytest.fixture
+def path(source, tmp_path):
+    """Write the source store to a snapshot file and return its path."""
+    path = str(tmp_path / 'bank.snap')
+    write_snapshot(source, path)
+    return path
+
+
+def test_snapshot_reads_match_the_source(source, path):
+    """Test records, indexes, balances, and ledgers read back from the mapped file."""
+    snapshot = Snapshot(path)
+
+    assert len(snapshot) == 3
+    assert snapshot.customer('1001') == source.get_customer('1001')
+    assert snapshot.customer('1002').zip_code == '02134'
+    assert snapshot.customer('1001')['zip'] == 12345
+    assert snapshot.customer('9999') is None
+    assert [cust_id for cust_id, _ in snapshot.customers()] == ['1001', '1002', '1007']
+    assert snapshot.find_by_name(' JANE ', 'doe') == {'1001', '1007'}
+    assert snapshot.find_by_acct_num('222222222222') == '1002'
+    assert snapshot.find_by_acct_num('000000000000') is None
+
+    assert snapshot.balance('1001') == Money.of('114.50')
+    assert snapshot.balance('1007') == Money.of(300, 'JPY')
+    assert snapshot.balance('9999') is None
+    assert snapshot.ledger('1001').to_dict() == source.get_ledger('1001')
+    assert list(snapshot.ledger('1001').entries()) == list(source.transactions['1001'].entries())
+
+
+def test_snapshot_history_queries(source, path):
+    """Test point-in-time balances and recent withdrawals come from the entry columns."""
+    snapshot = Snapshot(path)
+    timestamps = [when for _, when, _, _ in source.transactions['1001'].entries()]
+
+    assert snapshot.balance_as_of('1001', timestamps[0] - 1) == Money.of(100)
+    assert snapshot.balance_as_of('1001', timestamps[-1]) == Money.of('114.50')
+    assert snapshot.withdrawals_since('1001', 0) == source.withdrawals_since('1001', 0)
+
+
+def test_ledger_columns_match_the_source(source, path):
+    """Test the columnar view of a snapshot equals the one built from the live ledgers."""
+    expected = source.ledger_columns()
+    columns = Snapshot(path).ledger_columns()
+
+    assert columns.cust_ids == expected.cust_ids
+    for name in ('currencies', 'opening', 'offsets', 'timestamps', 'amounts', 'kinds', 'txn_ids'):
+        np.testing.assert_array_equal(getattr(columns, name), getattr(expected, name))
+
+
+def test_store_serves_reads_and_writes_through_an_overlay(path):
+    """Test postings copy an account into the overlay and leave the file untouched."""
+    store = SnapshotStore(path)
+    account = AccountTransactions('1001', store=store)
+
+    assert account.balance() == 114.50
+    assert account.deposit(10) == 124.50
+    assert store.get_balance('1001') == 124.50
+    assert store.snapshot.balance('1001') == Money.of('114.50')
+    store.apply_batch(['1002'], [2], np.array([DEPOSIT, WITHDRAW], dtype=np.int8), np.array([700, -200], dtype=np.int64))
+    assert store.get_balance('1002') == 5.00
+
+    columns = store.ledger_columns()
+    assert sorted(columns.cust_ids) == ['1001', '1002', '1007']
+    assert Snapshot(path).balance('1001') == Money.of('114.50')
+
+
+def test_store_overlay_shadows_customer_records(path):
+    """Test puts and deletes hide the snapshot's copy of a record from every lookup."""
+    store = SnapshotStore(path)
+    store.put_customer('1002', make_record('Johnny', 'Doe', '222222222222'))
+    store.delete_customer('1007')
+
+    assert store.get_customer('1002')['first_name'] == 'Johnny'
+    assert store.find_by_name('john', 'doe') == frozenset()
+    assert store.find_by_name('jane', 'doe') == {'1001'}
+    assert store.find_by_acct_num('777777777777') is None
+    assert [cust_id for cust_id, _ in store.scan_customers()] == ['1001', '1002']
+    assert store.id_sequence().next_id() == 1008
+    with pytest.raises(KeyError):
+        store.delete_customer('1007')
+
+
+def test_save_writes_the_merged_state(path, tmp_path):
+    """Test save() folds the overlay into a new snapshot."""
+    store = SnapshotStore(path)
+    AccountTransactions('1001', store=store).withdraw(4)
+    store.delete_customer('1002')
+    store.save(str(tmp_path / 'next.snap'))
+
+    reopened = create_store(f"snapshot:///{tmp_path / 'next.snap'}")
+    assert isinstance(reopened, SnapshotStore)
+    assert reopened.get_balance('1001') == 110.50
+    assert reopened.get_customer('1002') is None
+    assert reopened.id_sequence().next_id() == 1008
+
+
+def test_save_keeps_closed_ids_retired(path, tmp_path):
+    """Test a closed customer with the highest ID is not reissued from the saved snapshot."""
+    store = SnapshotStore(path)
+    store.delete_customer('1007')
+    store.save(str(tmp_path / 'next.snap'))
+
+    assert SnapshotStore(str(tmp_path / 'next.snap')).id_sequence().next_id() == 1008
+
+
+def test_rejects_a_file_that_is_not_a_snapshot(tmp_path):
+    """Test opening a foreign file raises SnapshotError."""
+    path = tmp_path / 'bank.db'
+    path.write_bytes(b'SQLite format 3\x00' + bytes(64))
+
+    with pytest.raises(SnapshotError):
+        Snapshot(str(path))
@@ -0,0 +1,223 @@
+"""Tests for the pluggable storage backends."""
+
+import numpy as np
+import pytest
+
+from banking_system.db.durable_store import DurableStore
+from banking_system.db.ledger import DEPOSIT, WITHDRAW
+from banking_system.db.sharding import ShardedStore
+from banking_system.db.snapshot import SnapshotStore, write_snapshot
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import ConcurrentUpdateError, DuplicateAccountNumberError, MemoryStore, create_store
+from banking_system.model import account as account_module
+from banking_system.model.account import BankAccount
+from banking_system.model.money import Money
+from banking_system.model.transactions import AccountTransactions
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'durable', 'snapshot', 'sharded'])
+def store(request, tmp_path):
+    """Yield each storage backend in turn."""
+    if request.param == 'memory':
+        yield MemoryStore({}, {})
+    elif request.param == 'durable':
+        durable_store = DurableStore(str(tmp_path / 'wal'), {}, {})
+        yield durable_store
+        durable_store.close()
+    elif request.param == 'snapshot':
+        path = str(tmp_path / 'bank.snap')
+        write_snapshot(MemoryStore({}, {}), path)
+        yield SnapshotStore(path)
+    elif request.param == 'sharded':
+        sharded_store = ShardedStore(2)
+        yield sharded_store
+        sharded_store.close()
+    else:
+        sqlite_store = SQLiteStore(str(tmp_path / 'bank.db'))
+        yield sqlite_store
+        sqlite_store.close()
+
+
+def make_record(first_name, last_name, acct_num):
+    """Build a customer record."""
+    return {
+        'first_name': first_name,
+        'last_name': last_name,
+        'acct_num': acct_num,
+        'address': '1 Main St',
+        'city': 'miami',
+        'state': 'FL',
+        'zip': '12345',
+    }
+
+
+def test_customer_roundtrip_and_indexes(store):
+    """Test put/get/scan/delete and the name and acct_num lookups."""
+    store.put_customer('1001', make_record('Jane', 'Doe', '111111111111'))
+    store.put_customer('1002', make_record('John', 'Doe', '222222222222'))
+
+    assert store.get_customer('1001')['acct_num'] == '111111111111'
+    assert [cust_id for cust_id, _ in store.scan_customers()] == ['1001', '1002']
+    assert store.find_by_name(' JANE ', 'doe') == {'1001'}
+    assert store.find_by_acct_num('222222222222') == '1002'
+    assert '111111111111' in store.acct_num_index()
+
+    store.delete_customer('1001')
+    assert store.get_customer('1001') is None
+    assert store.find_by_acct_num('111111111111') is None
+
+
+def test_apply_transaction_updates_balance_and_ledger(store):
+    """Test deposits and withdrawals are recorded with the balance."""
+    store.create_ledger('1001', 10.0)
+
+    assert store.apply_transaction('1001', 'deposit', 5.0) == 15.0
+    assert store.apply_transaction('1001', 'withdraw', 2.5) == 12.5
+    assert store.get_ledger('1001') == {'deposit': [5.0], 'withdraw': [2.5], 'balance': 12.5}
+
+
+def test_apply_transaction_unknown_customer(store):
+    """Test posting to a customer without a ledger raises KeyError."""
+    with pytest.raises(KeyError):
+        store.apply_transaction('9999', 'deposit', 5.0)
+
+
+def test_id_sequence_continues_after_existing_customers(store):
+    """Test the store's ID sequence starts above existing customers."""
+    store.put_customer('1005', make_record('Jane', 'Doe', '111111111111'))
+
+    assert store.id_sequence().next_id() == 1006
+
+
+def test_sqlite_acct_num_conflict_raises_and_signup_redraws(tmp_path, monkeypatch):
+    """Test a write reusing another customer's account number fails instead of replacing that customer."""
+    store = SQLiteStore(str(tmp_path / 'bank.db'))
+    store.put_customer('1001', make_record('Jane', 'Doe', '111111111111'))
+    store.put_customer('1001', make_record('Janet', 'Doe', '111111111111'))
+
+    with pytest.raises(DuplicateAccountNumberError):
+        store.put_customer('1002', make_record('John', 'Doe', '111111111111'))
+    assert store.get_customer('1001')['first_name'] == 'Janet'
+    assert store.get_customer('1002') is None
+
+    # A concurrent signup took the number after the allocator checked it.
+    draws = iter(['111111111111', '333333333333'])
+    monkeypatch.setattr(account_module.account_number_allocator, 'generate', lambda: next(draws))
+    monkeypatch.setattr(store, 'acct_num_index', lambda: set())
+    cust_id = BankAccount('Ann', 'Lee', store=store).create_cust_id('Ann', 'Lee', '1 Main St', 'miami', 'FL', 12345)
+    assert store.get_customer(str(cust_id))['acct_num'] == '333333333333'
+    assert store.find_by_acct_num('111111111111') == '1001'
+    store.close()
+
+
+def test_sqlite_store_survives_restart(tmp_path):
+    """Test data written by one SQLiteStore is visible after reopening."""
+    path = str(tmp_path / 'bank.db')
+    first = SQLiteStore(path)
+    first.put_customer('1001', make_record('Jane', 'Doe', '111111111111'))
+    first.create_ledger('1001')
+    first.apply_transaction('1001', 'deposit', 40.0)
+    first.close()
+
+    reopened = SQLiteStore(path)
+    assert reopened.get_customer('1001')['first_name'] == 'Jane'
+    assert reopened.get_balance('1001') == 40.0
+    assert reopened.id_sequence().next_id() == 1002
+    reopened.close()
+
+
+def test_closed_account_id_is_not_reissued_after_restart(tmp_path):
+    """Test a signup after a restart does not take over a closed customer's ID and ledger."""
+    path = str(tmp_path / 'bank.db')
+    store = SQLiteStore(path)
+    bank = BankAccount('Ann', 'Lee', store=store)
+    bank.create_cust_id('Ann', 'Lee', '1 Main St', 'miami', 'FL', 12345)
+    closed = bank.create_cust_id('Bob', 'Lee', '2 Main St', 'miami', 'FL', 12345)
+    store.create_ledger(str(closed), 500)
+    bank.close_account(str(closed))
+    store.close()
+
+    reopened = SQLiteStore(path)
+    newest = BankAccount('Cy', 'Lee', store=reopened).create_cust_id('Cy', 'Lee', '3 Main St', 'miami', 'FL', 12345)
+
+    assert (closed, newest) == (1002, 1003)
+    assert reopened.get_balance(str(newest)) is None
+    assert reopened.get_balance(str(closed)) == 500
+    reopened.close()
+
+
+def test_create_store_from_url(tmp_path):
+    """Test DATABASE_URL-style URLs select the backend."""
+    assert isinstance(create_store(None), MemoryStore)
+    assert isinstance(create_store('memory://'), MemoryStore)
+
+    sqlite_store = create_store(f"sqlite:///{tmp_path / 'bank.db'}")
+    assert isinstance(sqlite_store, SQLiteStore)
+    assert sqlite_store.path == str(tmp_path / 'bank.db')
+    sqlite_store.close()
+
+    with pytest.raises(ValueError):
+        create_store('postgresql://localhost/bank')
+
+
+def test_model_runs_against_sqlite(tmp_path):
+    """Test BankAccount and AccountTransactions work end to end on SQLite."""
+    store = SQLiteStore(str(tmp_path / 'bank.db'))
+    bank_account = BankAccount("Jane", "Doe", store=store)
+
+    cust_id = bank_account.create_cust_id("Jane", "Doe", "456 Oak St", "Springfield", "IL", "54321")
+    assert bank_account.create_cust_id("jane", "doe", "456 Oak St", "Springfield", "IL", "54321") is None
+
+    store.create_ledger(str(cust_id))
+    account = AccountTransactions(str(cust_id), store=store)
+    account.deposit(500.00)
+    assert account.withdraw(150.00) == 350.00
+    assert account.balance() == 350.00
+
+    assert bank_account.lookup_account(store.get_customer(str(cust_id))['acct_num']) == str(cust_id)
+    store.close()
+
+
+def test_apply_batch_runs_in_bulk(store):
+    """Test the bulk posting path returns running balances (minor units) per account."""
+    store.create_ledger('1001', 10)
+    store.create_ledger('1002')
+
+    balances = store.apply_batch(
+        ['1001', '1002'], [2, 1],
+        np.array([DEPOSIT, WITHDRAW, DEPOSIT], dtype=np.int8),
+        np.array([500, -250, 100], dtype=np.int64),
+    )
+
+    assert balances.tolist() == [1500, 1250, 100]
+    assert store.get_ledger('1001')['withdraw'] == [2.50]
+    assert store.get_balance('1002') == 1.00
+    assert store.get_currencies(['1002', '9999', '1001']) == ['USD', None, 'USD']
+    assert store.get_balances(['1001', '9999']) == [Money.of(12.50), None]
+
+
+def test_compare_and_set_rejects_stale_balance(store):
+    """Test a posting with a stale expected balance is refused and changes nothing."""
+    store.create_ledger('1001', 10)
+
+    assert store.apply_transaction('1001', 'withdraw', 1, expected=Money.of(10)) == 9
+    with pytest.raises(ConcurrentUpdateError):
+        store.apply_transaction('1001', 'withdraw', 1, expected=Money.of(10))
+    assert store.get_balance('1001') == 9
+
+
+def test_ledgers_changed_since_reports_new_and_posted_ledgers(store):
+    """Test the incremental scan reports ledgers posted to after a mark and ledgers not yet known."""
+    store.create_ledger('1001', 10)
+    store.create_ledger('1002', 10)
+    AccountTransactions('1001', store=store).deposit(1)
+    assert sorted(store.ledgers_changed_since(-1)) == ['1001', '1002']
+
+    mark = int(store.ledger_columns().txn_ids.max())
+    AccountTransactions('1002', store=store).deposit(1)
+    store.create_ledger('1003')
+    changed = store.ledgers_changed_since(mark, {'1001', '1002'})
+    if isinstance(store, ShardedStore):
+        assert sorted(changed) == ['1001', '1002', '1003']  # shards number their own transactions
+    else:
+        assert sorted(changed) == ['1002', '1003']
@@ -0,0 +1,210 @@
+"""Tests for account-to-account transfers and batched settlement."""
+
+import pytest
+
+from banking_system.db.sqlite_store import SQLiteStore
+from banking_system.db.storage import ConcurrentUpdateError, MemoryStore
+from banking_system.db.transfers import IdempotencyConflictError
+from banking_system.model.money import Money
+from banking_system.model.overdraft import DailyLimitError, OverdraftError, OverdraftPolicy
+from banking_system.model.transactions import AccountTransactions
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    """Yield each storage backend with three funded USD accounts and one JPY account."""
+    if request.param == 'memory':
+        backend = MemoryStore({}, {})
+    else:
+        backend = SQLiteStore(str(tmp_path / 'bank.db'))
+    for cust_id in ('1001', '1002', '1003'):
+        backend.create_ledger(cust_id, 100)
+    backend.create_ledger('2001', Money.of(5000, 'JPY'), 'JPY')
+    yield backend
+    if request.param == 'sqlite':
+        backend.close()
+
+
+def test_transfer_moves_funds_in_one_operation(store, event_sink):
+    """Test both legs are posted and the record carries both balances."""
+    record = AccountTransactions('1001', store=store).transfer('1002', 25.50)
+
+    assert (record.source_balance, record.destination_balance) == (Money.of('74.50'), Money.of('125.50'))
+    assert store.get_ledger('1001')['withdraw'] == [25.50]
+    assert store.get_ledger('1002')['deposit'] == [25.50]
+    assert event_sink.messages() == ['Transferred $25.50 from 1001 to 1002']
+
+
+def test_idempotency_key_settles_once(store):
+    """Test retrying with a key returns the original record and moves nothing."""
+    account = AccountTransactions('1001', store=store)
+
+    first = account.transfer('1002', 10, key='req-1')
+    retry = account.transfer('1002', '10.00', key='req-1')
+
+    assert retry.created_at == first.created_at
+    assert store.get_balance('1001') == 90
+    assert store.get_transfer('req-1').destination_balance == 110
+    with pytest.raises(IdempotencyConflictError):
+        account.transfer('1003', 10, key='req-1')
+    assert store.get_balance('1003') == 100
+
+
+def test_failed_transfer_changes_nothing(store):
+    """Test a missing destination or mismatched currency leaves both accounts untouched."""
+    account = AccountTransactions('1001', store=store)
+
+    with pytest.raises(ValueError, match='not found'):
+        account.transfer('9999', 10)
+    with pytest.raises(ValueError, match='Currency mismatch'):
+        account.transfer('2001', 10)
+    with pytest.raises(ValueError, match='same account'):
+        account.transfer('1001', 10)
+    with pytest.raises(ValueError, match='must be positive'):
+        account.transfer('1002', 0)
+
+    assert store.get_ledger('1001') == {'deposit': [], 'withdraw': [], 'balance': 100}
+    assert store.get_ledger('2001')['balance'] == Money.of(5000, 'JPY')
+
+
+def test_batch_writes_each_account_once(store):
+    """Test a batch of many transfers is settled as one net entry per account."""
+    transfers = [('1001', '1002', 1.00)] * 600 + [('1002', '1003', 0.50)] * 400 + [('1003', '1001', 2.00)] * 10
+
+    result = AccountTransactions.transfer_batch(transfers, store=store)
+
+    assert result.applied == len(transfers) and not result.rejected
+    assert store.get_balance('1001') == Money.of('-480.00')
+    assert store.get_balance('1002') == Money.of('500.00')
+    assert store.get_balance('1003') == Money.of('280.00')
+    assert store.get_ledger('1001') == {'deposit': [], 'withdraw': [580.00], 'balance': -480.00}
+    assert store.get_ledger('1003') == {'deposit': [180.00], 'withdraw': [], 'balance': 280.00}
+    assert result.records[0].source_balance == Money.of('-480.00')
+
+
+def test_batch_rejects_individually_and_replays_keys(store):
+    """Test invalid transfers are rejected, repeated keys replayed, and the rest settled."""
+    AccountTransactions('1001', store=store).transfer('1002', 5, key='k1')
+
+    result = AccountTransactions.transfer_batch([
+        ('1001', '1002', 5, 'k1'),
+        ('1001', '1003', 7, 'k2'),
+        ('1001', '1003', 7, 'k2'),
+        ('1001', '1003', 9, 'k2'),
+        ('1001', '9999', 1),
+        ('1001', '2001', 1),
+        ('1001', '1002', -3),
+        ('1001',),
+        ('2001', '2001', 1),
+    ], store=store)
+
+    assert result.replayed[:3] == [True, False, True]
+    assert result.applied == 1
+    assert [reason for _, _, reason in result.rejected] == [
+        "Idempotency key 'k2' was already used for a different transfer",
+        'Customer ID not found',
+        'Currency mismatch: 1001 is USD, 2001 is JPY',
+        'Transfer amount must be positive',
+        'Malformed record',
+        'Cannot transfer to the same account',
+    ]
+    assert store.get_balance('1001') == Money.of('88.00')
+    assert store.get_balance('1003') == Money.of('107.00')
+
+
+def test_memory_stores_keep_their_own_journals():
+    """Test settling on a second in-memory store does not drop the first store's keys."""
+    first, second = MemoryStore({}, {}), MemoryStore({}, {})
+    for backend in (first, second):
+        backend.create_ledger('1001', 100)
+        backend.create_ledger('1002', 100)
+
+    AccountTransactions('1001', store=first).transfer('1002', 10, key='t-1')
+    AccountTransactions('1001', store=second).transfer('1002', 5, key='t-2')
+    AccountTransactions('1001', store=first).transfer('1002', 10, key='t-1')
+
+    assert (first.get_balance('1001'), second.get_balance('1001')) == (90, 95)
+    assert second.get_transfer('t-1') is None
+
+
+def test_store_rejects_whole_batch_with_unknown_account(store):
+    """Test the store applies nothing when any account in the batch is missing."""
+    with pytest.raises(KeyError):
+        store.apply_transfers([(None, '1001', '1002', 100), (None, '1002', '9999', 100)])
+
+    assert store.get_balance('1001') == store.get_balance('1002') == 100
+
+
+def test_transfer_is_checked_against_the_floor(store):
+    """Test a transfer that would take the source below the floor is refused and moves nothing."""
+    account = AccountTransactions('1001', store=store, policy=OverdraftPolicy(floor=0))
+
+    with pytest.raises(OverdraftError):
+        account.transfer('1002', 150)
+    record = account.transfer('1002', 100, key='all-in')
+
+    assert record.source_balance == 0
+    assert account.transfer('1002', 100, key='all-in').created_at == record.created_at
+    assert (store.get_balance('1001'), store.get_balance('1002')) == (0, 200)
+
+
+def test_transfer_is_checked_against_the_daily_limit(store):
+    """Test transfers count towards the rolling withdrawal limit with withdrawals."""
+    account = AccountTransactions('1001', store=store, policy=OverdraftPolicy(daily_limit=50))
+
+    account.withdraw(30)
+    account.transfer('1002', 20)
+    with pytest.raises(DailyLimitError):
+        account.transfer('1002', 1)
+
+    assert (store.get_balance('1001'), store.get_balance('1002')) == (50, 120)
+
+
+def test_batch_refuses_transfers_below_the_floor(store):
+    """Test refused source legs are rejected and transfers relying on them are refused too."""
+    result = AccountTransactions.transfer_batch([
+        ('1001', '1002', 60),
+        ('1001', '1003', 60),
+        ('1003', '1002', 150),
+    ], store=store, policy=OverdraftPolicy(floor=0))
+
+    assert [index for index, _, _ in result.rejected] == [1, 2]
+    assert [store.get_balance(cust_id) for cust_id in ('1001', '1002', '1003')] == [40, 160, 100]
+
+
+def test_batch_counts_credits_earlier_in_the_batch(store):
+    """Test a transfer funded by an earlier transfer in the same batch is settled."""
+    result = AccountTransactions.transfer_batch([
+        ('1001', '1002', 100),
+        ('1002', '1003', 200),
+    ], store=store, policy=OverdraftPolicy(floor=0))
+
+    assert result.applied == 2
+    assert [store.get_balance(cust_id) for cust_id in ('1001', '1002', '1003')] == [0, 0, 300]
+
+
+def test_batch_refuses_transfers_over_the_daily_limit(store):
+    """Test the rolling limit applies to a batch's withdraw legs in input order; replays are not checked."""
+    policy = OverdraftPolicy(daily_limit=50)
+    AccountTransactions('1001', store=store, policy=policy).transfer('1002', 30, key='k1')
+
+    result = AccountTransactions.transfer_batch([
+        ('1001', '1002', 30, 'k1'),
+        ('1001', '1003', 15),
+        ('1001', '1003', 10),
+        ('1001', '1003', 10, 'k2'),
+        ('1001', '1003', 10, 'k2'),
+    ], store=store, policy=policy)
+
+    assert result.replayed[0]
+    assert [index for index, _, _ in result.rejected] == [2, 3, 4]
+    assert store.get_balance('1001') == 55
+    assert store.get_transfer('k2') is None
+
+
+def test_store_refuses_transfers_on_a_stale_balance(store):
+    """Test apply_transfers applies nothing when an expected balance no longer holds."""
+    with pytest.raises(ConcurrentUpdateError):
+        store.apply_transfers([(None, '1001', '1002', 10)], expected={'1001': 9_000})
+
+    assert store.get_balance('1001') == store.get_balance('1002') == 100